@@ -0,0 +1,100 @@
+/*
+ * Búsqueda global del menú del administrador: sugiere resultados de
+ * /api/admin/buscar mientras se escribe. Enter (sin elegir sugerencia) abre
+ * la página completa /admin/buscar.
+ *
+ * <form id="busquedaGlobal"> con un <input name="q"> y un
+ * <div class="dropdown-menu"> para las sugerencias.
+ */
+(function () {
+    const formulario = document.getElementById('busquedaGlobal');
+    if (!formulario) {
+        return;
+    }
+    const entrada = formulario.querySelector('input[name="q"]');
+    const menu = formulario.querySelector('.dropdown-menu');
+    const iconos = {
+        propietario: 'fa-user',
+        apartamento: 'fa-home',
+        pago: 'fa-receipt',
+        movimiento: 'fa-list'
+    };
+    let espera = null;
+    let pendiente = null;
+
+    function cerrar() {
+        menu.classList.remove('show');
+        menu.replaceChildren();
+    }
+
+    function mostrar(resultados) {
+        menu.replaceChildren();
+        resultados.forEach(function (resultado) {
+            const opcion = document.createElement('a');
+            opcion.className = 'dropdown-item';
+            opcion.href = resultado.url;
+            const icono = document.createElement('i');
+            icono.className = 'fas ' + (iconos[resultado.tipo] || 'fa-search') + ' me-2';
+            const titulo = document.createElement('span');
+            titulo.textContent = resultado.titulo;
+            const detalle = document.createElement('small');
+            detalle.className = 'text-muted ms-2';
+            detalle.textContent = resultado.detalle || '';
+            opcion.append(icono, titulo, detalle);
+            menu.appendChild(opcion);
+        });
+        menu.classList.toggle('show', resultados.length > 0);
+    }
+
+    function sugerir() {
+        const texto = entrada.value.trim();
+        if (pendiente) {
+            pendiente.abort();
+        }
+        if (texto.length < 2) {
+            cerrar();
+            return;
+        }
+        // Solo importa la respuesta de lo último que se escribió
+        pendiente = new AbortController();
+        fetch('/api/admin/buscar?limite=8&q=' + encodeURIComponent(texto), { signal: pendiente.signal })
+            .then(function (respuesta) { return respuesta.ok ? respuesta.json() : []; })
+            .then(mostrar)
+            .catch(function (error) {
+                if (error.name !== 'AbortError') {
+                    cerrar();
+                }
+            });
+    }
+
+    entrada.addEventListener('input', function () {
+        clearTimeout(espera);
+        espera = setTimeout(sugerir, 150);
+    });
+    entrada.addEventListener('keydown', function (evento) {
+        if (evento.key === 'Escape') {
+            cerrar();
+        } else if (evento.key === 'ArrowDown' && menu.firstChild) {
+            evento.preventDefault();
+            menu.firstChild.focus();
+        }
+    });
+    menu.addEventListener('keydown', function (evento) {
+        const actual = document.activeElement;
+        if (evento.key === 'ArrowDown' && actual.nextSibling) {
+            evento.preventDefault();
+            actual.nextSibling.focus();
+        } else if (evento.key === 'ArrowUp') {
+            evento.preventDefault();
+            (actual.previousSibling || entrada).focus();
+        } else if (evento.key === 'Escape') {
+            cerrar();
+            entrada.focus();
+        }
+    });
+    document.addEventListener('click', function (evento) {
+        if (!formulario.contains(evento.target)) {
+            cerrar();
+        }
+    });
+})();
@@ -0,0 +1,92 @@
+/*
+ * Carga diferida de los tableros: pide los datos a /api cuando el elemento
+ * entra en pantalla y descarga Chart.js solo cuando hay un gráfico visible.
+ *
+ * <script src="{{ asset('js/tableros.js') }}"
+ *         data-chartjs="{{ asset('vendor/chartjs/chart.umd.js') }}"></script>
+ */
+(function () {
+    const urlChartjs = document.currentScript.dataset.chartjs;
+    let cargaChartjs = null;
+
+    function cargarChartjs() {
+        if (window.Chart) {
+            return Promise.resolve(window.Chart);
+        }
+        if (!cargaChartjs) {
+            cargaChartjs = new Promise(function (resolver, rechazar) {
+                const script = document.createElement('script');
+                script.src = urlChartjs;
+                script.onload = function () { resolver(window.Chart); };
+                script.onerror = rechazar;
+                document.head.appendChild(script);
+            });
+        }
+        return cargaChartjs;
+    }
+
+    function alEntrarEnPantalla(elemento, accion) {
+        if (!('IntersectionObserver' in window)) {
+            accion();
+            return;
+        }
+        const observador = new IntersectionObserver(function (entradas) {
+            if (entradas.some(function (entrada) { return entrada.isIntersecting; })) {
+                observador.disconnect();
+                accion();
+            }
+        }, { rootMargin: '200px' });
+        observador.observe(elemento);
+    }
+
+    function pedirJSON(url) {
+        return fetch(url, { credentials: 'same-origin', headers: { 'Accept': 'application/json' } })
+            .then(function (respuesta) {
+                if (!respuesta.ok) {
+                    throw new Error('HTTP ' + respuesta.status);
+                }
+                return respuesta.json();
+            });
+    }
+
+    function mostrarError(elemento) {
+        const aviso = document.createElement('p');
+        aviso.className = 'text-muted small mb-0';
+        aviso.textContent = 'No se pudieron cargar los datos.';
+        elemento.replaceWith(aviso);
+    }
+
+    window.Tableros = {
+        // configurar(datos) retorna la configuración de Chart.js
+        grafico: function (idCanvas, url, configurar) {
+            const canvas = document.getElementById(idCanvas);
+            if (!canvas) {
+                return;
+            }
+            alEntrarEnPantalla(canvas, function () {
+                Promise.all([pedirJSON(url), cargarChartjs()])
+                    .then(function (resultado) {
+                        new resultado[1](canvas.getContext('2d'), configurar(resultado[0]));
+                    })
+                    .catch(function () { mostrarError(canvas); });
+            });
+        },
+
+        // pintar(datos, elemento) llena el elemento con los datos recibidos
+        datos: function (idElemento, url, pintar) {
+            const elemento = document.getElementById(idElemento);
+            if (!elemento) {
+                return;
+            }
+            alEntrarEnPantalla(elemento, function () {
+                pedirJSON(url)
+                    .then(function (datos) { pintar(datos, elemento); })
+                    .catch(function () { mostrarError(elemento); });
+            });
+        },
+
+        moneda: function (valor) {
+            return '$' + Number(valor).toLocaleString('es-CO', { minimumFractionDigits: 2, maximumFractionDigits: 2 });
+        }
+    };
+})();
@@ -0,0 +1,24 @@
+"""
+Ayudas para registrar la cantidad de consultas SQL junto al tiempo
+"""
+import re
+
+_PATRON_CONSULTAS = re.compile(r'desc="(\d+) consultas"')
+
+
+def consultas_de_respuesta(respuesta) -> int:
+    """Cantidad de consultas SQL informada en el header Server-Timing"""
+    coincidencia = _PATRON_CONSULTAS.search(respuesta.headers.get("server-timing", ""))
+    return int(coincidencia.group(1)) if coincidencia else -1
+
+
+def contar_consultas(funcion, *args, **kwargs):
+    """Ejecuta la función una vez y retorna (resultado, consultas SQL emitidas)"""
+    from src.utils.instrumentacion_sql import iniciar_medicion, finalizar_medicion
+
+    estadisticas, token = iniciar_medicion()
+    try:
+        resultado = funcion(*args, **kwargs)
+    finally:
+        finalizar_medicion(token)
+    return resultado, estadisticas.consultas
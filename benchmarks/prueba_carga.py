@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Prueba de Carga de Inicio de Mes
+================================
+
+Simula el pico de los primeros días del mes contra un uvicorn local sembrado
+con src/scripts/sembrar_datos.py: muchos propietarios revisando su estado de
+cuenta y reportando pagos, y administradores registrando pagos automáticos.
+
+Reporta el throughput, p50/p95/p99 por ruta y la saturación del pool de
+conexiones (leída de /metrics con METRICAS_TOKEN mientras corre la prueba).
+Cada corrida guarda el resultado como línea base o se compara contra una.
+
+La línea base de referencia es benchmarks/resultados/linea_base_carga.json:
+un worker de uvicorn sobre la base de sembrar_datos.py (escala por defecto),
+20 propietarios, 2 admins, rampa de 5 s y 60 s, tras una corrida de
+calentamiento de 20 s (la primera corrida contra un proceso recién iniciado
+mide el arranque en frío). Con más usuarios la CPU se satura y el p95 varía
+más que la tolerancia entre corridas iguales. Las latencias dependen de la
+máquina: en otra máquina, guarde su propia línea base con los mismos
+parámetros y compare contra ella.
+
+Uso:
+    export METRICAS_TOKEN=local
+    uvicorn main:app &
+    python -m benchmarks.prueba_carga --propietarios 20 --admins 2 --rampa 5 --duracion 20 \
+        --guardar /tmp/calentamiento.json
+    python -m benchmarks.prueba_carga --propietarios 20 --admins 2 --rampa 5 --duracion 60 \
+        --comparar benchmarks/resultados/linea_base_carga.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from datetime import date
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+CLAVE_USUARIOS = "altavista"  # Igual a src/scripts/sembrar_datos.py
+
+# Mezclas de acciones: (nombre de la ruta, peso)
+MEZCLA_PROPIETARIO = [
+    ("GET /propietario/dashboard", 5),
+    ("GET /propietario/estado-cuenta", 4),
+    ("POST /propietario/reportar-pago", 1),
+]
+MEZCLA_ADMIN = [
+    ("GET /admin/pagos", 3),
+    ("POST /admin/pagos/pago-automatico", 1),
+]
+
+_PATRON_METRICA = re.compile(r"^(db_pool_\w+?)(?:\{[^}]*\})? (\S+)$", re.MULTILINE)
+
+
+class Resultados:
+    """Latencias y errores por ruta"""
+
+    def __init__(self):
+        self.latencias: Dict[str, List[float]] = defaultdict(list)
+        self.errores: Dict[str, int] = defaultdict(int)
+
+    def registrar(self, ruta: str, duracion: float, ok: bool):
+        self.latencias[ruta].append(duracion)
+        if not ok:
+            self.errores[ruta] += 1
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+async def _iniciar_sesion(cliente: httpx.AsyncClient, usuario: str):
+    respuesta = await cliente.post("/login", data={"username": usuario, "password": CLAVE_USUARIOS})
+    if respuesta.status_code != 302:
+        raise RuntimeError(f"No se pudo iniciar sesión como {usuario} ({respuesta.status_code})")
+
+
+async def _ejecutar(cliente: httpx.AsyncClient, accion: str, azar: random.Random, apartamentos: int):
+    metodo, ruta = accion.split(" ", 1)
+    if accion == "POST /propietario/reportar-pago":
+        return await cliente.post(ruta, data={
+            "monto_reportado": azar.choice([250000, 300000, 350000]),
+            "fecha_pago_reportado": date.today().isoformat(),
+            "metodo_pago": "TRANSFERENCIA",
+            "referencia_reportada": f"CARGA-{azar.randint(1, 10**9)}",
+        })
+    if accion == "POST /admin/pagos/pago-automatico":
+        return await cliente.post(ruta, data={
+            "apartamento_id": azar.randint(1, apartamentos),
+            "monto_pago": azar.choice([200000, 300000, 500000]),
+            "referencia_pago": f"CARGA-{azar.randint(1, 10**9)}",
+        })
+    return await cliente.get(ruta)
+
+
+async def _usuario_virtual(url: str, usuario: str, mezcla, fin: float, pausa: float,
+                           resultados: Resultados, azar: random.Random, apartamentos: int):
+    acciones = [accion for accion, _ in mezcla]
+    pesos = [peso for _, peso in mezcla]
+    async with httpx.AsyncClient(base_url=url, follow_redirects=False, timeout=60) as cliente:
+        await _iniciar_sesion(cliente, usuario)
+        while time.monotonic() < fin:
+            accion = azar.choices(acciones, weights=pesos)[0]
+            inicio = time.perf_counter()
+            try:
+                respuesta = await _ejecutar(cliente, accion, azar, apartamentos)
+                ok = respuesta.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            resultados.registrar(accion, time.perf_counter() - inicio, ok)
+            # Tiempo de lectura entre páginas (exponencial)
+            await asyncio.sleep(azar.expovariate(1 / pausa) if pausa > 0 else 0)
+
+
+async def _muestrear_pool(url: str, token: str, fin: float, muestras: List[Dict]):
+    """Lee los medidores del pool de /metrics una vez por segundo"""
+    encabezados = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=url, headers=encabezados, timeout=10) as cliente:
+        while time.monotonic() < fin:
+            try:
+                texto = (await cliente.get("/metrics")).raise_for_status().text
+                muestras.append({nombre: float(valor) for nombre, valor in _PATRON_METRICA.findall(texto)})
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(1)
+
+
+async def correr(args) -> Dict:
+    azar = random.Random(args.semilla)
+    resultados = Resultados()
+    muestras: List[Dict] = []
+
+    usuarios = [(f"propietario{azar.randint(1, args.propietarios_sembrados)}", MEZCLA_PROPIETARIO)
+                for _ in range(args.propietarios)]
+    usuarios += [("admin", MEZCLA_ADMIN) for _ in range(args.admins)]
+
+    inicio = time.monotonic()
+    fin = inicio + args.rampa + args.duracion
+    tareas = []
+    if args.token_metricas:
+        tareas.append(asyncio.create_task(_muestrear_pool(args.url, args.token_metricas, fin, muestras)))
+    for i, (usuario, mezcla) in enumerate(usuarios):
+        # Rampa: los usuarios entran repartidos en los primeros segundos
+        await asyncio.sleep(args.rampa / len(usuarios))
+        tareas.append(asyncio.create_task(_usuario_virtual(
+            args.url, usuario, mezcla, fin, args.pausa, resultados,
+            random.Random(args.semilla * 100_003 + i), args.apartamentos,
+        )))
+    await asyncio.gather(*tareas)
+    duracion = time.monotonic() - inicio
+
+    rutas = {}
+    for ruta, latencias in sorted(resultados.latencias.items()):
+        rutas[ruta] = {
+            "peticiones": len(latencias),
+            "errores": resultados.errores[ruta],
+            "rps": round(len(latencias) / duracion, 2),
+            "p50_ms": round(_percentil(latencias, 50) * 1000, 1),
+            "p95_ms": round(_percentil(latencias, 95) * 1000, 1),
+            "p99_ms": round(_percentil(latencias, 99) * 1000, 1),
+        }
+
+    pool = {}
+    if muestras:
+        pool["conexiones_en_uso_max"] = max(m.get("db_pool_conexiones_en_uso", 0) for m in muestras)
+        pool["desborde_max"] = max(m.get("db_pool_desborde", 0) for m in muestras)
+        pool["tamano"] = muestras[-1].get("db_pool_tamano", 0)
+        esperas = muestras[-1].get("db_pool_espera_segundos_count", 0) - muestras[0].get("db_pool_espera_segundos_count", 0)
+        suma = muestras[-1].get("db_pool_espera_segundos_sum", 0) - muestras[0].get("db_pool_espera_segundos_sum", 0)
+        pool["espera_media_ms"] = round(suma / esperas * 1000, 2) if esperas else 0.0
+
+    total = sum(r["peticiones"] for r in rutas.values())
+    return {
+        "fecha": date.today().isoformat(),
+        "parametros": {
+            "propietarios": args.propietarios, "admins": args.admins, "duracion": args.duracion,
+            "pausa": args.pausa, "semilla": args.semilla,
+        },
+        "throughput_rps": round(total / duracion, 2),
+        "rutas": rutas,
+        "pool": pool,
+    }
+
+
+def imprimir(resultado: Dict):
+    print(f"\n📊 Throughput: {resultado['throughput_rps']} peticiones/s")
+    print(f"{'Ruta':<40} {'n':>7} {'err':>5} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for ruta, r in resultado["rutas"].items():
+        print(f"{ruta:<40} {r['peticiones']:>7} {r['errores']:>5} "
+              f"{r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms")
+    if resultado["pool"]:
+        pool = resultado["pool"]
+        print(f"\n🔌 Pool (proceso que respondió /metrics): en uso máx {pool['conexiones_en_uso_max']:.0f}"
+              f"/{pool['tamano']:.0f}, desborde máx {pool['desborde_max']:.0f}, "
+              f"espera media {pool['espera_media_ms']} ms")
+
+
+def comparar(resultado: Dict, linea_base: Dict, tolerancia: float) -> bool:
+    """Compara el p95 por ruta; retorna False si alguna empeora más que la tolerancia"""
+    print(f"\n📐 Comparación con la línea base del {linea_base['fecha']} (p95)")
+    todo_ok = True
+    for ruta, r in resultado["rutas"].items():
+        base = linea_base["rutas"].get(ruta)
+        if not base:
+            continue
+        cambio = (r["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100 if base["p95_ms"] else 0.0
+        icono = "❌" if cambio > tolerancia else "✅"
+        todo_ok &= cambio <= tolerancia
+        print(f"{icono} {ruta:<40} {base['p95_ms']:>7.1f}ms → {r['p95_ms']:>7.1f}ms ({cambio:+.1f}%)")
+    return todo_ok
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Prueba de carga de inicio de mes")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--propietarios", type=int, default=100, help="Propietarios concurrentes")
+    parser.add_argument("--admins", type=int, default=3, help="Administradores concurrentes")
+    parser.add_argument("--propietarios-sembrados", type=int, default=190, help="Usuarios propietario<N> existentes")
+    parser.add_argument("--apartamentos", type=int, default=200, help="Apartamentos sembrados")
+    parser.add_argument("--duracion", type=float, default=60, help="Segundos a plena carga")
+    parser.add_argument("--rampa", type=float, default=10, help="Segundos para incorporar a todos los usuarios")
+    parser.add_argument("--pausa", type=float, default=1.0, help="Pausa media entre acciones (s)")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--token-metricas", default=os.environ.get("METRICAS_TOKEN"),
+                        help="Token de /metrics para muestrear el pool (por defecto METRICAS_TOKEN)")
+    parser.add_argument("--guardar", type=Path, help="Guardar el resultado como línea base")
+    parser.add_argument("--comparar", type=Path, help="Línea base contra la cual comparar")
+    parser.add_argument("--tolerancia", type=float, default=15.0, help="Empeoramiento de p95 permitido (%%)")
+    args = parser.parse_args()
+    if not (args.guardar or args.comparar):
+        parser.error("indique --guardar ARCHIVO para crear la línea base o --comparar ARCHIVO para medir contra ella")
+    if args.comparar and not args.comparar.exists():
+        parser.error(f"no existe la línea base {args.comparar}; créela primero con --guardar {args.comparar}")
+
+    print(f"🚀 {args.propietarios} propietarios y {args.admins} admins contra {args.url} durante {args.duracion}s")
+    resultado = asyncio.run(correr(args))
+    imprimir(resultado)
+
+    if args.guardar:
+        args.guardar.parent.mkdir(parents=True, exist_ok=True)
+        args.guardar.write_text(json.dumps(resultado, indent=2, ensure_ascii=False))
+        print(f"\n💾 Línea base guardada en {args.guardar}")
+    if args.comparar and not comparar(resultado, json.loads(args.comparar.read_text()), args.tolerancia):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
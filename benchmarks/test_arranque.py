@@ -0,0 +1,43 @@
+"""
+Presupuesto de importación del arranque en frío (no necesita base de datos)
+
+`import main` no debe cargar el ORM, el driver ni los routers diferidos:
+se importan en la primera petición que los usa o en el calentamiento.
+Ver src/scripts/medir_arranque.py para medir a mano.
+"""
+import os
+
+from src.scripts.medir_arranque import medir_importtime
+
+# import main midió ~330 ms en desarrollo (antes ~1000 ms); margen para CI
+PRESUPUESTO_IMPORTACION_MS = float(os.environ.get("PRESUPUESTO_IMPORTACION_MS", "800"))
+
+NO_CARGAR_AL_IMPORTAR = (
+    "sqlalchemy",
+    "sqlmodel",
+    "pg8000",
+    "src.models",
+    "src.routes.admin",
+    "src.routes.admin_pagos",
+    "src.routes.propietario",
+    "src.routes.api",
+    "src.routes.documentos",
+    "src.scripts.generador_v3_funcional",
+    "src.services.pago_automatico",
+    "reportlab",
+)
+
+
+def test_importacion_de_main():
+    modulos = medir_importtime()
+    cargados = {modulo for _, _, modulo in modulos}
+
+    prohibidos = sorted(
+        m for m in cargados if any(m == p or m.startswith(p + ".") for p in NO_CARGAR_AL_IMPORTAR)
+    )
+    assert not prohibidos, f"import main cargó módulos diferidos: {prohibidos}"
+
+    acumulado_main = next(acumulado for acumulado, _, modulo in modulos if modulo == "main") / 1000
+    assert acumulado_main <= PRESUPUESTO_IMPORTACION_MS, (
+        f"import main tardó {acumulado_main:.0f} ms (presupuesto {PRESUPUESTO_IMPORTACION_MS:.0f} ms)"
+    )
@@ -0,0 +1,53 @@
+"""
+Benchmarks de la búsqueda global del administrador
+
+Mide /api/admin/buscar con los términos típicos del typeahead: una
+referencia de pago del libro, parte del nombre de un propietario (con un
+error de digitación) y un identificador de apartamento incompleto.
+"""
+import pytest
+
+from benchmarks.medicion import contar_consultas
+
+
+@pytest.fixture(scope="module")
+def terminos(base_sembrada):
+    from sqlalchemy import text
+    from src.models import db_manager
+
+    with db_manager.get_session() as session:
+        referencia = session.exec(text(
+            "SELECT referencia_pago FROM registro_financiero_apartamento "
+            "WHERE referencia_pago IS NOT NULL ORDER BY id DESC LIMIT 1"
+        )).scalar_one()
+        nombre = session.exec(text("SELECT nombre_completo FROM propietario ORDER BY id LIMIT 1")).scalar_one()
+    apellido = nombre.split()[-1]
+    return {
+        "referencia": referencia,
+        # Una letra cambiada: solo la encuentra el parecido de trigramas
+        "nombre_con_error": apellido[:-1] + ("a" if apellido[-1] != "a" else "e"),
+        "apartamento": "Torre 1 - 1",
+    }
+
+
+@pytest.mark.parametrize("caso", ["referencia", "nombre_con_error", "apartamento"])
+def test_buscar(benchmark, terminos, caso):
+    from src.models import db_manager
+    from src.services.busqueda import buscar
+
+    def ejecutar():
+        with db_manager.get_session() as session:
+            return buscar(session, terminos[caso], limite=8)
+
+    resultados, consultas = contar_consultas(ejecutar)
+    assert resultados, f"Sin resultados para {terminos[caso]!r}"
+    benchmark.extra_info["termino"] = terminos[caso]
+    benchmark.extra_info["consultas"] = consultas
+    benchmark.extra_info["primer_resultado"] = resultados[0]["tipo"]
+    benchmark(ejecutar)
+
+
+def test_api_buscar(benchmark, cliente_admin, terminos):
+    respuesta = benchmark(cliente_admin.get, "/api/admin/buscar", params={"q": terminos["referencia"]})
+    assert respuesta.status_code == 200
+    assert respuesta.json()[0]["tipo"] == "pago"
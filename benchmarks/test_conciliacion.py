@@ -0,0 +1,81 @@
+"""
+Benchmarks de la conciliación de extractos bancarios
+
+test_conciliar_en_memoria lee y asigna BENCH_LINEAS_EXTRACTO líneas con
+índices armados a mano (no necesita base). test_conciliar_extracto recorre
+el camino completo sobre la base sembrada: consultas de índices, asignación
+y el lote de pagos en una transacción.
+"""
+import io
+import itertools
+import os
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from src.services.conciliacion import IndicesConciliacion, leer_extracto, normalizar_identificador
+
+LINEAS = int(os.environ.get("BENCH_LINEAS_EXTRACTO", "10000"))
+
+
+def _extracto(identificadores, desde: date, semilla: int) -> bytes:
+    """CSV con 80% de líneas que nombran el apartamento y 20% irreconocibles"""
+    azar = random.Random(semilla)
+    salida = io.StringIO()
+    salida.write("Fecha;Descripcion;Referencia;Debito;Credito\n")
+    for numero in range(LINEAS):
+        fecha = desde + timedelta(days=azar.randrange(28))
+        monto = azar.choice((250000, 310000, 345500, 420000))
+        if azar.random() < 0.8:
+            torre, unidad = azar.choice(identificadores)
+            descripcion = azar.choice((f"PAGO TORRE {torre} APTO {unidad}", f"CONSIG T{torre}-{unidad}"))
+        else:
+            descripcion = "TRANSFERENCIA RECIBIDA"
+        salida.write(f"{fecha:%d/%m/%Y};{descripcion};{semilla}-{numero};;{monto:,}\n".replace(",", "."))
+    return salida.getvalue().encode("utf-8")
+
+
+def test_conciliar_en_memoria(benchmark, ritmo):
+    identificadores = [(torre, f"{piso}{unidad:02d}") for torre in (1, 2, 3) for piso in range(1, 21)
+                       for unidad in range(1, 9)]
+    ids = {normalizar_identificador(f"Torre {t} - {u}"): i for i, (t, u) in enumerate(identificadores, start=1)}
+    contenido = _extracto(identificadores, date(2025, 1, 1), 1)
+
+    def conciliar():
+        indices = IndicesConciliacion(ids, {}, [], set())
+        return [indices.conciliar(linea) for linea in leer_extracto(io.BytesIO(contenido), "extracto.csv")]
+
+    conciliadas = benchmark(conciliar)
+    asignadas = sum(1 for c in conciliadas if c.estado == "asignada")
+    assert len(conciliadas) == LINEAS and asignadas > LINEAS * 0.7
+    benchmark.extra_info["lineas"] = LINEAS
+    benchmark.extra_info["asignadas"] = asignadas
+    ritmo("lineas_por_segundo", LINEAS)
+
+
+def test_conciliar_extracto(benchmark, base_sembrada):
+    from sqlalchemy import text
+    from src.models import db_manager
+    from src.services.conciliacion import conciliar_extracto
+
+    with db_manager.get_session() as session:
+        filas = session.exec(text("SELECT identificador FROM apartamento")).scalars().all()
+    identificadores = [
+        (identificador.split()[1], identificador.split()[-1]) for identificador in filas
+    ]
+    semillas = itertools.count(1)
+    desde = date(base_sembrada["año_final"], 12, 1)
+
+    def preparar():
+        # Cada ronda es un extracto nuevo: con el mismo todo quedaría "ya_aplicada"
+        return (io.BytesIO(_extracto(identificadores, desde, next(semillas))),), {}
+
+    def conciliar(archivo):
+        with db_manager.get_session() as session:
+            return conciliar_extracto(session, archivo, "extracto.csv")
+
+    resultado = benchmark.pedantic(conciliar, setup=preparar, rounds=3)
+    benchmark.extra_info["lineas"] = LINEAS
+    benchmark.extra_info["estados"] = resultado["estados"]
+    benchmark.extra_info["movimientos"] = resultado["lote"]["movimientos"]
+    benchmark.extra_info["total"] = float(resultado["lote"]["total"] or Decimal("0"))
@@ -0,0 +1,45 @@
+"""
+Benchmark de la subida de documentos de soporte (no necesita base de datos)
+
+Guarda BENCH_SUBIDAS documentos concurrentes de BENCH_SUBIDA_KB cada uno, la
+mitad con contenido repetido, y registra el caudal en MB/s y cuántos
+archivos quedaron en disco.
+"""
+import asyncio
+import io
+import os
+
+from starlette.datastructures import Headers, UploadFile
+
+from src.config import settings
+from src.utils.file_handler import guardar_documento
+
+SUBIDAS = int(os.environ.get("BENCH_SUBIDAS", "32"))
+TAMAÑO = int(os.environ.get("BENCH_SUBIDA_KB", "2048")) * 1024
+
+
+def _subida(contenido: bytes, nombre: str) -> UploadFile:
+    return UploadFile(
+        io.BytesIO(contenido), size=len(contenido), filename=nombre,
+        headers=Headers({"content-type": "application/pdf"}),
+    )
+
+
+def test_subidas_concurrentes(benchmark, ritmo, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOADS_DIR", tmp_path)
+    # La mitad de las subidas repite el contenido de otra (el mismo recibo dos veces)
+    contenidos = [os.urandom(TAMAÑO) for _ in range(SUBIDAS // 2)]
+
+    async def rafaga():
+        subidas = [_subida(contenidos[i % len(contenidos)], f"recibo_{i}.pdf") for i in range(SUBIDAS)]
+        return await asyncio.gather(*(guardar_documento(subida) for subida in subidas))
+
+    guardados = benchmark.pedantic(lambda: asyncio.run(rafaga()), rounds=5, warmup_rounds=1)
+
+    assert len({g.sha256 for g in guardados}) == len(contenidos)
+    archivos = [ruta for ruta in tmp_path.rglob("*") if ruta.is_file() and ".tmp" not in ruta.parts]
+    assert len(archivos) == len(contenidos)
+
+    benchmark.extra_info["subidas"] = SUBIDAS
+    ritmo("mb_por_segundo", SUBIDAS * TAMAÑO / 2 ** 20, decimales=1)
+    benchmark.extra_info["archivos_en_disco"] = len(archivos)
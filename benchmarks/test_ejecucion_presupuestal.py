@@ -0,0 +1,69 @@
+"""
+Benchmarks del informe de ejecución presupuestal
+
+"frio" descarta los meses guardados antes de cada ronda (una consulta
+agrupada para los 12 meses y el guardado de los cerrados); "caliente" lee
+los meses cerrados de ejecucion_presupuestal_mes. Se mide el último año
+sembrado completo con un "hoy" posterior, así todos sus meses están cerrados.
+"""
+from datetime import date
+
+import pytest
+
+from benchmarks.medicion import contar_consultas
+
+
+@pytest.mark.parametrize("cache", ["frio", "caliente"])
+def test_ejecucion_anual(benchmark, base_sembrada, cache):
+    from src.models import db_manager
+    from src.services.ejecucion_presupuestal import ejecucion_anual, invalidar
+
+    año = base_sembrada["año_final"]
+    hoy = date(año + 1, 3, 1)
+
+    def preparar():
+        with db_manager.get_session() as session:
+            if cache == "frio":
+                invalidar(session, año)
+            else:
+                ejecucion_anual(session, año, hoy)
+        return (), {}
+
+    def ejecutar():
+        with db_manager.get_session() as session:
+            return ejecucion_anual(session, año, hoy)
+
+    reporte = benchmark.pedantic(ejecutar, setup=preparar, rounds=5)
+    assert reporte["conceptos"]
+    assert reporte["meses_guardados"] == (0 if cache == "frio" else 12)
+
+    preparar()
+    _, consultas = contar_consultas(ejecutar)
+    benchmark.extra_info["consultas"] = consultas
+    benchmark.extra_info["conceptos"] = len(reporte["conceptos"])
+
+
+def test_movimiento_atrasado_descarta_mes(base_sembrada):
+    """Un débito con fecha atrasada descarta el mes cerrado que toca (0014) y solo ese"""
+    from sqlalchemy import text
+    from src.models import db_manager
+    from src.services.ejecucion_presupuestal import ejecucion_anual
+
+    año = base_sembrada["año_final"]
+    hoy = date(año + 1, 3, 1)
+    with db_manager.get_session() as session:
+        antes = ejecucion_anual(session, año, hoy)["totales"]["INGRESO"]["meses"][2]["ejecutado"]
+        registro_id = session.exec(text("""
+            INSERT INTO registro_financiero_apartamento
+                (apartamento_id, concepto_id, tipo_movimiento, monto, fecha_efectiva, año_aplicable, mes_aplicable)
+            SELECT MIN(id), 1, 'DEBITO', 1000, make_date(:año, 3, 15), :año, 3 FROM apartamento
+            RETURNING id
+        """).bindparams(año=año)).scalar_one()
+        session.commit()
+        try:
+            reporte = ejecucion_anual(session, año, hoy)
+            assert reporte["meses_guardados"] == 11
+            assert reporte["totales"]["INGRESO"]["meses"][2]["ejecutado"] == antes + 1000
+        finally:
+            session.exec(text("DELETE FROM registro_financiero_apartamento WHERE id = :id").bindparams(id=registro_id))
+            session.commit()
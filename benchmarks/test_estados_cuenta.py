@@ -0,0 +1,66 @@
+"""
+Benchmark del render de estados de cuenta en PDF (no necesita base de datos)
+
+Dibuja BENCH_ESTADOS estados sintéticos de un mes con 1 proceso y con todos
+los núcleos, y registra estados por segundo y la aceleración. La lectura de
+los libros se mide aparte con la base sembrada.
+"""
+import os
+import random
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from src.services.estados_cuenta import renderizar_estados
+
+ESTADOS = int(os.environ.get("BENCH_ESTADOS", "1000"))
+NUCLEOS = os.cpu_count() or 1
+
+
+def _estados(cantidad: int):
+    azar = random.Random(7)
+    estados = []
+    for apartamento_id in range(1, cantidad + 1):
+        saldo = Decimal(azar.randrange(0, 2_000_000)) / 100
+        movimientos = []
+        for dia in sorted(azar.sample(range(1, 29), azar.randrange(2, 12))):
+            tipo = azar.choice(("DEBITO", "CREDITO"))
+            monto = Decimal(azar.randrange(50_000, 500_000))
+            saldo += monto if tipo == "DEBITO" else -monto
+            movimientos.append({
+                "fecha": date(2025, 3, dia), "concepto": "Cuota Ordinaria Administración",
+                "descripcion": f"Movimiento {dia} del apartamento {apartamento_id}",
+                "tipo": tipo, "monto": monto, "saldo": saldo,
+            })
+        estados.append({
+            "apartamento_id": apartamento_id, "identificador": f"Torre {apartamento_id % 3 + 1} - {apartamento_id}",
+            "propietario": f"Propietario {apartamento_id}", "documento_identidad": str(10_000_000 + apartamento_id),
+            "saldo_anterior": Decimal(azar.randrange(0, 900_000)), "movimientos": movimientos,
+        })
+    return estados
+
+
+@pytest.mark.parametrize("procesos", sorted({1, NUCLEOS}))
+def test_renderizar_estados(benchmark, ritmo, tmp_path, procesos):
+    estados = _estados(ESTADOS)
+    entradas = benchmark.pedantic(renderizar_estados, args=(estados, tmp_path, 2025, 3, procesos), rounds=1)
+
+    assert len(entradas) == ESTADOS
+    assert len(list(tmp_path.glob("*.pdf"))) == ESTADOS
+    benchmark.extra_info["estados"] = ESTADOS
+    benchmark.extra_info["procesos"] = procesos
+    ritmo("estados_por_segundo", ESTADOS)
+
+
+def test_leer_estados_mes(benchmark, base_sembrada):
+    from src.models import db_manager
+    from src.services.estados_cuenta import leer_estados_mes
+
+    def leer():
+        with db_manager.get_session() as session:
+            return leer_estados_mes(session, base_sembrada["año_final"], 12)
+
+    estados = benchmark(leer)
+    assert len(estados) == base_sembrada["apartamentos"]
+    benchmark.extra_info["movimientos"] = sum(len(e["movimientos"]) for e in estados)
@@ -0,0 +1,20 @@
+"""
+Benchmarks de la reconstrucción de hecho_mensual
+
+Reconstruye la tabla completa con uno y con varios rangos de apartamentos
+en paralelo; al terminar debe coincidir con el libro.
+"""
+import pytest
+
+
+@pytest.mark.parametrize("hilos", [1, 4])
+def test_reconstruir_hechos(benchmark, base_sembrada, hilos):
+    from src.models import db_manager
+    from src.services.hechos import diferencias, reconstruir
+
+    engine = db_manager.get_engine()
+    resumen = benchmark.pedantic(reconstruir, args=(engine, hilos), rounds=3)
+    assert resumen["filas"] > 0
+    assert len(resumen["rangos"]) == hilos
+    assert diferencias(engine) == []
+    benchmark.extra_info["filas"] = resumen["filas"]
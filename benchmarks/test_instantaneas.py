@@ -0,0 +1,41 @@
+"""
+Benchmarks de la instantánea Parquet del libro
+
+"completa" reescribe todas las particiones; "incremental" corre sobre una
+instantánea al día y no debe reescribir ninguna. Al final DuckDB debe ver
+las mismas filas y montos que el libro.
+"""
+import pytest
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.mark.parametrize("modo", ["completa", "incremental"])
+def test_exportar_instantanea(benchmark, base_sembrada, tmp_path, modo):
+    from src.models import db_manager
+    from src.services.instantaneas import exportar
+
+    engine = db_manager.get_engine()
+    exportar(engine, tmp_path)
+    resumen = benchmark.pedantic(exportar, args=(engine, tmp_path, modo == "completa"), rounds=3)
+    if modo == "completa":
+        assert resumen["exportadas"] > 0 and resumen["filas"] > 0
+    else:
+        assert resumen["exportadas"] == 0 and resumen["sin_cambios"] > 0
+    benchmark.extra_info["filas"] = resumen["filas"]
+    benchmark.extra_info["particiones"] = resumen["exportadas"] + resumen["sin_cambios"]
+
+
+def test_consultar_instantanea(base_sembrada, tmp_path):
+    pytest.importorskip("duckdb")
+    from sqlmodel import text
+
+    from src.models import db_manager
+    from src.services.instantaneas import consultar, exportar
+
+    engine = db_manager.get_engine()
+    exportar(engine, tmp_path)
+    _, filas = consultar("SELECT COUNT(*), SUM(monto), COUNT(DISTINCT (año, mes)) FROM libro", tmp_path)
+    with engine.connect() as conn:
+        esperado = conn.execute(text("SELECT COUNT(*), SUM(monto) FROM registro_financiero_apartamento")).one()
+    assert filas[0][:2] == tuple(esperado)
@@ -0,0 +1,61 @@
+"""
+Benchmarks del login con scrypt en el pool de trabajo
+
+test_verificar_contrasena mide el costo de una verificación (no necesita
+base). test_rafaga_de_logins lanza BENCH_LOGINS logins concurrentes a través
+de la aplicación ASGI y registra logins por segundo y por hilo del pool, y la
+peor latencia de GET / durante la ráfaga: si el hash bloqueara el event loop,
+esa latencia sería la de toda la ráfaga.
+"""
+import asyncio
+import os
+import time
+
+from src.config import settings
+from src.utils.contrasenas import hashear, verificar
+
+LOGINS_CONCURRENTES = int(os.environ.get("BENCH_LOGINS", "64"))
+
+
+def test_verificar_contrasena(benchmark):
+    almacenado = hashear("altavista")
+    benchmark.extra_info["scrypt_n"] = settings.SCRYPT_N
+    assert benchmark(verificar, "altavista", almacenado)
+
+
+def test_rafaga_de_logins(benchmark, base_sembrada):
+    import httpx
+    from main import app
+    from src.scripts.sembrar_datos import CLAVE_USUARIOS
+
+    async def login(cliente, usuario: str):
+        respuesta = await cliente.post("/login", data={"username": usuario, "password": CLAVE_USUARIOS})
+        assert respuesta.status_code == 302, f"login de {usuario} respondió {respuesta.status_code}"
+
+    async def sondear(cliente, fin: asyncio.Event) -> float:
+        peor = 0.0
+        while not fin.is_set():
+            inicio = time.perf_counter()
+            await cliente.get("/")
+            peor = max(peor, time.perf_counter() - inicio)
+            await asyncio.sleep(0.005)
+        return peor
+
+    async def rafaga() -> float:
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+            fin = asyncio.Event()
+            sonda = asyncio.create_task(sondear(cliente, fin))
+            usuarios = [f"propietario{i % base_sembrada['apartamentos'] + 1}" for i in range(LOGINS_CONCURRENTES)]
+            await asyncio.gather(*(login(cliente, usuario) for usuario in usuarios))
+            fin.set()
+            return await sonda
+
+    asyncio.run(rafaga())  # Calienta el pool de conexiones y el hash ficticio
+    peor_sondeo = benchmark.pedantic(lambda: asyncio.run(rafaga()), rounds=5)
+
+    logins_por_segundo = LOGINS_CONCURRENTES / benchmark.stats.stats.median
+    benchmark.extra_info["logins_por_segundo"] = round(logins_por_segundo, 1)
+    benchmark.extra_info["logins_por_segundo_por_hilo"] = round(logins_por_segundo / settings.HASH_WORKERS, 1)
+    benchmark.extra_info["hilos_hash"] = settings.HASH_WORKERS
+    benchmark.extra_info["peor_latencia_get_raiz_ms"] = round(peor_sondeo * 1000, 1)
@@ -0,0 +1,110 @@
+"""
+Benchmarks de la entrega de notificaciones
+
+Un servidor SMTP local (aiosmtpd) hace de proveedor de correo: acepta y
+cuenta los mensajes sin entregarlos. test_pool_smtp mide el envío de
+BENCH_CORREOS mensajes por el pool de conexiones persistentes (sin base);
+test_despachar_outbox encola los mismos mensajes en la outbox sembrada y
+mide el drenado completo (tomar lotes, enviar, marcar).
+"""
+import asyncio
+import os
+import socket
+
+import pytest
+from sqlalchemy import text
+
+CORREOS = int(os.environ.get("BENCH_CORREOS", "2000"))
+CONEXIONES = int(os.environ.get("BENCH_CONEXIONES_SMTP", "8"))
+
+SQL_ENCOLAR = """
+    INSERT INTO outbox (tipo, clave, apartamento_id, destinatario, datos)
+    SELECT 'pago', 'bench:' || :ronda || ':' || n, a.id, 'propietario' || n || '@altavista.local',
+           jsonb_build_object('propietario', 'Propietario ' || n, 'apartamento', a.identificador,
+                              'monto', '250000.00', 'fecha', '2025-03-15', 'referencia', 'BENCH-' || n)
+    FROM generate_series(1, :cantidad) AS n
+    JOIN apartamento a ON a.id = 1 + mod(n, (SELECT COUNT(*) FROM apartamento))
+"""
+
+
+class _Buzon:
+    """Handler de aiosmtpd que solo cuenta lo recibido"""
+
+    def __init__(self):
+        self.recibidos = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.recibidos += 1
+        return "250 OK"
+
+
+@pytest.fixture(scope="module")
+def servidor_smtp():
+    from aiosmtpd.controller import Controller
+
+    with socket.socket() as libre:
+        libre.bind(("127.0.0.1", 0))
+        puerto = libre.getsockname()[1]
+    buzon = _Buzon()
+    controlador = Controller(buzon, hostname="127.0.0.1", port=puerto)
+    controlador.start()
+    yield buzon, puerto
+    controlador.stop()
+
+
+def _pool(puerto):
+    from src.services.despacho_correo import PoolSMTP
+
+    return PoolSMTP("127.0.0.1", puerto, conexiones=CONEXIONES, usuario="", starttls=False)
+
+
+def test_pool_smtp(benchmark, ritmo, servidor_smtp):
+    from src.services.despacho_correo import construir_mensaje
+
+    buzon, puerto = servidor_smtp
+    mensajes = [
+        construir_mensaje(n, "pago", f"propietario{n}@altavista.local", {
+            "propietario": f"Propietario {n}", "apartamento": f"T1-{n}", "monto": "250000.00",
+            "fecha": "2025-03-15", "referencia": f"BENCH-{n}",
+        })
+        for n in range(CORREOS)
+    ]
+    pool = _pool(puerto)
+    try:
+        resultados = benchmark.pedantic(lambda: asyncio.run(pool.enviar(mensajes)), rounds=3)
+    finally:
+        pool.cerrar()
+
+    assert resultados == [None] * CORREOS
+    assert buzon.recibidos >= CORREOS
+    benchmark.extra_info["mensajes"] = CORREOS
+    benchmark.extra_info["conexiones"] = CONEXIONES
+    ritmo("mensajes_por_segundo", CORREOS, estadistica="mean")
+
+
+def test_despachar_outbox(benchmark, base_sembrada, servidor_smtp):
+    from src.models import db_manager
+    from src.services.despacho_correo import Despachador
+
+    _, puerto = servidor_smtp
+    rondas = iter(range(1000))
+
+    def preparar():
+        with db_manager.get_session() as session:
+            session.exec(text(SQL_ENCOLAR).bindparams(ronda=next(rondas), cantidad=CORREOS))
+            session.commit()
+        return (), {}
+
+    def drenar():
+        despachador = Despachador(_pool(puerto))
+        try:
+            return asyncio.run(despachador.drenar())
+        finally:
+            despachador.cerrar()
+
+    resultado = benchmark.pedantic(drenar, setup=preparar, rounds=3)
+    assert resultado["enviados"] >= CORREOS
+    assert resultado["fallidos"] == 0
+
+    benchmark.extra_info["mensajes"] = resultado["enviados"]
+    benchmark.extra_info["mensajes_por_segundo"] = round(resultado["enviados"] / resultado["segundos"])
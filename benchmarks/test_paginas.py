@@ -0,0 +1,39 @@
+"""
+Benchmarks de las páginas a través de la aplicación ASGI
+"""
+import pytest
+
+from benchmarks.medicion import consultas_de_respuesta
+
+PAGINAS_ADMIN = [
+    "/admin/pagos",
+    "/admin/pagos/reportes",
+    "/admin/pagos/procesar",
+    "/api/admin/pagos/indicadores",
+    "/api/admin/pagos/serie-recaudacion",
+]
+
+PAGINAS_PROPIETARIO = [
+    "/propietario/dashboard",
+    "/propietario/estado-cuenta",
+    "/api/propietario/resumen",
+    "/api/propietario/movimientos",
+]
+
+
+def _medir(benchmark, cliente, ruta: str):
+    respuesta = cliente.get(ruta)
+    assert respuesta.status_code == 200, f"{ruta} respondió {respuesta.status_code}"
+    benchmark.extra_info["consultas"] = consultas_de_respuesta(respuesta)
+    benchmark.extra_info["bytes"] = len(respuesta.content)
+    benchmark(cliente.get, ruta)
+
+
+@pytest.mark.parametrize("ruta", PAGINAS_ADMIN)
+def test_pagina_admin(benchmark, cliente_admin, ruta):
+    _medir(benchmark, cliente_admin, ruta)
+
+
+@pytest.mark.parametrize("ruta", PAGINAS_PROPIETARIO)
+def test_pagina_propietario(benchmark, cliente_propietario, ruta):
+    _medir(benchmark, cliente_propietario, ruta)
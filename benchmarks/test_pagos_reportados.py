@@ -0,0 +1,44 @@
+"""
+Benchmark de la aprobación en lote de pagos reportados
+
+Cada ronda crea BENCH_REPORTES reportes pendientes repartidos entre los
+apartamentos sembrados y los aprueba todos con una sola llamada (una
+transacción, un INSERT de abonos).
+"""
+import os
+from datetime import date
+
+from sqlalchemy import text
+
+REPORTES = int(os.environ.get("BENCH_REPORTES", "500"))
+
+SQL_CREAR_REPORTES = """
+    INSERT INTO pago_reportado (apartamento_id, monto, fecha_pago, metodo_pago, referencia)
+    SELECT a.id, 250000 + mod(n, 4) * 50000, :fecha, 'transferencia', 'BENCH-' || n
+    FROM generate_series(1, :cantidad) AS n
+    JOIN apartamento a ON a.id = 1 + mod(n, (SELECT COUNT(*) FROM apartamento))
+    RETURNING id
+"""
+
+
+def test_aprobar_reportes(benchmark, base_sembrada):
+    from src.models import db_manager
+    from src.services.pagos_reportados import aprobar
+
+    fecha = date(base_sembrada["año_final"], 12, 15)
+
+    def preparar():
+        with db_manager.get_session() as session:
+            ids = list(session.exec(text(SQL_CREAR_REPORTES).bindparams(fecha=fecha, cantidad=REPORTES)).scalars())
+            session.commit()
+        return (ids,), {}
+
+    def aprobar_todos(ids):
+        with db_manager.get_session() as session:
+            return aprobar(session, ids, None)
+
+    resultado = benchmark.pedantic(aprobar_todos, setup=preparar, rounds=3)
+    assert resultado["aprobados"] == REPORTES
+
+    benchmark.extra_info["reportes"] = REPORTES
+    benchmark.extra_info["movimientos"] = resultado["movimientos"]
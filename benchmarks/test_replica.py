@@ -0,0 +1,54 @@
+"""
+Benchmarks de las lecturas enrutadas a la réplica
+
+Requieren BENCH_DATABASE_READ_URL (ver conftest.py). La misma página del
+propietario se mide servida por la réplica y, justo después de que el
+usuario reporta un pago, por la primaria (lectura de lo propio).
+"""
+import os
+import time
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("BENCH_DATABASE_READ_URL"), reason="Defina BENCH_DATABASE_READ_URL"
+)
+
+RUTA = "/api/propietario/resumen"
+
+
+def _sesiones(destino: str) -> float:
+    from src.utils.metricas import SESIONES_LECTURA
+
+    return sum(valor for (d, _), valor in SESIONES_LECTURA._valores.items() if d == destino)
+
+
+def _esperar_replica(limite: float = 30):
+    """Tras sembrar, la réplica puede tardar en aplicar la carga"""
+    from src.models import db_manager
+
+    fin = time.monotonic() + limite
+    while db_manager.get_read_engine() is not db_manager.engine_lectura:
+        assert time.monotonic() < fin, "La réplica no se puso al día"
+        time.sleep(0.5)
+
+
+def test_lectura_en_replica(benchmark, cliente_propietario):
+    _esperar_replica()
+    antes = _sesiones("replica")
+    benchmark(cliente_propietario.get, RUTA)
+    assert _sesiones("replica") > antes
+
+
+def test_lectura_tras_escritura(benchmark, cliente_propietario):
+    _esperar_replica()
+
+    def reportar():
+        respuesta = cliente_propietario.post("/propietario/reportar-pago", data={
+            "monto_reportado": "1000", "fecha_pago_reportado": "2025-01-10", "metodo_pago": "transferencia",
+        }, follow_redirects=False)
+        assert respuesta.status_code == 302
+
+    antes = _sesiones("primaria")
+    benchmark.pedantic(cliente_propietario.get, args=(RUTA,), setup=reportar, rounds=5)
+    assert _sesiones("primaria") - antes >= 5
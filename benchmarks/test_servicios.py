@@ -0,0 +1,128 @@
+"""
+Benchmarks de los servicios del libro: pagos automáticos, resumen de deuda y generador mensual
+"""
+import itertools
+from datetime import date
+
+from benchmarks.medicion import contar_consultas
+
+
+def test_procesar_pago_automatico(benchmark, base_sembrada):
+    from src.services.pago_automatico import PagoAutomaticoService
+
+    servicio = PagoAutomaticoService()
+    apartamentos = itertools.cycle(range(1, base_sembrada["apartamentos"] + 1))
+
+    def preparar():
+        return (next(apartamentos), 300000.0), {"fecha_pago": date(base_sembrada["año_final"], 12, 20)}
+
+    args, kwargs = preparar()
+    _, consultas = contar_consultas(servicio.procesar_pago_automatico, *args, **kwargs)
+    benchmark.extra_info["consultas"] = consultas
+    benchmark.pedantic(servicio.procesar_pago_automatico, setup=preparar, rounds=30)
+
+
+def test_obtener_resumen_deuda(benchmark, base_sembrada):
+    from src.services.pago_automatico import PagoAutomaticoService
+
+    servicio = PagoAutomaticoService()
+    apartamento_id = base_sembrada["apartamentos"] // 2
+
+    _, consultas = contar_consultas(servicio.obtener_resumen_deuda, apartamento_id)
+    benchmark.extra_info["consultas"] = consultas
+    benchmark(servicio.obtener_resumen_deuda, apartamento_id)
+
+
+def test_pendientes_descuentan_pagos(benchmark, base_sembrada):
+    """El pago individual ve los mismos pendientes que el lote: los pagos ya netean su cargo"""
+    from sqlmodel import text
+    from src.models import db_manager
+    from src.services.pago_automatico import PagoAutomaticoService, SQL_PENDIENTES_LOTE
+
+    servicio = PagoAutomaticoService()
+    apartamentos = list(range(1, min(base_sembrada["apartamentos"], 40) + 1))
+    with db_manager.get_session() as session:
+        lote = {
+            (fila.apartamento_id, fila.año, fila.mes, fila.concepto_id): float(fila.saldo)
+            for fila in session.exec(text(SQL_PENDIENTES_LOTE).bindparams(
+                apartamentos=apartamentos,
+                concepto_cuota_id=servicio.concepto_cuota_id,
+                concepto_pago_cuota_id=servicio.concepto_pago_cuota_id,
+                concepto_interes_id=servicio.concepto_interes_id,
+                concepto_pago_interes_id=servicio.concepto_pago_interes_id,
+            ))
+        }
+        individual = {
+            (apartamento_id, p["año"], p["mes"], p["concepto_id"]): round(p["saldo"], 2)
+            for apartamento_id in apartamentos
+            for p in servicio._obtener_registros_pendientes(session, apartamento_id)
+        }
+        assert individual == lote
+        benchmark(servicio._obtener_registros_pendientes, session, apartamentos[-1])
+
+
+def test_generador_procesar_mes(benchmark, base_sembrada):
+    from sqlalchemy import text
+    from src.models import db_manager
+    from src.scripts.generador_v3_funcional import GeneradorAutomaticoV3
+
+    generador = GeneradorAutomaticoV3()
+    año, mes = base_sembrada["año_final"] + 1, 1
+
+    def limpiar_mes():
+        """Borra lo generado en la ronda anterior para medir siempre el mes completo"""
+        with db_manager.get_engine().begin() as conn:
+            conn.execute(text("""
+                DELETE FROM registro_financiero_apartamento
+                WHERE fecha_efectiva >= make_date(:año, 1, 1)
+                AND año_aplicable = :año AND mes_aplicable IN (:mes, :mes + 1)
+            """), {"año": año, "mes": mes})
+            conn.execute(text("DELETE FROM control_procesamiento_mensual WHERE año = :año"), {"año": año})
+
+    limpiar_mes()
+    resultado, consultas = contar_consultas(generador.procesar_mes, año, mes, True)
+    assert not resultado["errores"], resultado["errores"]
+    benchmark.extra_info["consultas"] = consultas
+    benchmark.extra_info["cuotas_generadas"] = resultado["cuotas_generadas"]
+
+    benchmark.pedantic(generador.procesar_mes, args=(año, mes, True), setup=limpiar_mes, rounds=3)
+
+
+def test_movimiento_sin_particion_del_año(base_sembrada):
+    """
+    Un movimiento de un año sin partición queda en la DEFAULT (0015) y
+    crear_particion_rfa() lo mueve a la del año sin alterar el saldo acumulado
+    """
+    from sqlalchemy import text
+    from src.models import db_manager
+
+    año = base_sembrada["año_final"] + 10
+    particion = f"registro_financiero_apartamento_{año}"
+    with db_manager.get_engine().begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {particion}"))
+        ids = conn.execute(text("""
+            INSERT INTO registro_financiero_apartamento
+                (apartamento_id, concepto_id, tipo_movimiento, monto, fecha_efectiva, año_aplicable, mes_aplicable)
+            VALUES (1, 1, 'DEBITO', 1000, make_date(:año - 1, 12, 31), :año - 1, 12),
+                   (1, 1, 'DEBITO', 500, make_date(:año, 1, 1), :año, 1)
+            RETURNING id
+        """), {"año": año}).scalars().all()
+
+    consulta = text("""
+        SELECT tableoid::regclass::text, saldo_acumulado FROM registro_financiero_apartamento
+        WHERE id = ANY(CAST(:ids AS BIGINT[])) ORDER BY fecha_efectiva
+    """).bindparams(ids=ids)
+    try:
+        with db_manager.get_engine().begin() as conn:
+            antes = conn.execute(consulta).all()
+            assert [tabla for tabla, _ in antes] == ["registro_financiero_apartamento_default"] * 2
+            conn.execute(text("SELECT crear_particion_rfa(:año)"), {"año": año})
+            despues = conn.execute(consulta).all()
+            assert [tabla for tabla, _ in despues] == ["registro_financiero_apartamento_default", particion]
+            assert [saldo for _, saldo in despues] == [saldo for _, saldo in antes]
+            assert conn.execute(text("SELECT recalcular_saldo_acumulado(1)")).scalar() == 0
+    finally:
+        with db_manager.get_engine().begin() as conn:
+            conn.execute(text("DELETE FROM registro_financiero_apartamento WHERE id = ANY(CAST(:ids AS BIGINT[]))"),
+                         {"ids": ids})
+            conn.execute(text(f"DROP TABLE IF EXISTS {particion}"))
@@ -1,36 +1,148 @@
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from starlette.middleware.sessions import SessionMiddleware
 from contextlib import asynccontextmanager
+import hmac
+import logging
+import time
+from pathlib import Path
 
 
 # Importar configuración y servicios
+# (los modelos, el engine y los routers que no son de login se cargan al
+# primer uso; ver src/routes/__init__.py y python src/scripts/medir_arranque.py)
 from src.config import settings
-from src.models import db_manager
-from src.services.initial_data import crear_datos_iniciales
+from src.utils.instrumentacion_sql import iniciar_medicion, finalizar_medicion
+from src.utils import metricas
+from src.utils.estaticos import EstaticosComprimidos
+from src.utils.rutas_diferidas import registrar_diferidos, cargar_todos
+from src.dependencies import registrar_escritura
 
 # Importar rutas
-from src.routes import auth_router, admin_router, admin_pagos_router, propietario_router
+from src.routes import auth_router, ROUTERS_DIFERIDOS
 
 
 
+logger = logging.getLogger(__name__)
+
+
+# Eventos de inicio y cierre
+def calentar(app: FastAPI):
+    """
+    Importa los routers diferidos, carga las plantillas y abre la primera
+    conexión del pool, para que la primera petición no pague ese costo
+    """
+    from sqlalchemy import text
+    from src.dependencies import templates
+    from src.models import db_manager
+
+    inicio = time.perf_counter()
+    routers = cargar_todos(app)
+    # ModuleLoader (plantillas precompiladas) no implementa list_templates
+    plantillas = [
+        ruta.relative_to(settings.TEMPLATES_DIR).as_posix()
+        for ruta in Path(settings.TEMPLATES_DIR).rglob("*.html")
+    ]
+    for nombre in plantillas:
+        templates.env.get_template(nombre)
+    try:
+        with db_manager.get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        logger.warning(f"Calentamiento sin conexión a la base de datos: {e}")
+    logger.info(
+        f"Calentamiento: {routers} routers y {len(plantillas)} plantillas "
+        f"en {(time.perf_counter() - inicio) * 1000:.0f} ms"
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Calienta la app y, si VERIFICAR_INDICES lo pide, verifica los índices críticos del esquema"""
+    if settings.VERIFICAR_INDICES != "omitir":
+        from src.migrations import verificar_indices
+        from src.models import db_manager
+
+        faltantes = verificar_indices(db_manager.get_engine())
+        for tabla, columnas, unico in faltantes:
+            logger.error(
+                f"Falta índice {'único ' if unico else ''}en {tabla}({', '.join(columnas)}); "
+                "ejecute: python src/scripts/migrar.py aplicar"
+            )
+        if faltantes and settings.VERIFICAR_INDICES == "estricto":
+            raise RuntimeError(f"Faltan {len(faltantes)} índices críticos en la base de datos")
+    if settings.calentar_al_iniciar:
+        calentar(app)
+    yield
+
+
 # Crear la aplicación FastAPI
 app = FastAPI(
     title=settings.APP_TITLE,
     description=settings.APP_DESCRIPTION,
     version=settings.APP_VERSION,
+    lifespan=lifespan,
 )
 
+# Instrumentación por petición: consultas SQL, Server-Timing y métricas de la ruta
+@app.middleware("http")
+async def instrumentar_peticion(request: Request, call_next):
+    estadisticas, token = iniciar_medicion()
+    inicio = time.perf_counter()
+    estado = 500
+    try:
+        response = await call_next(request)
+        estado = response.status_code
+    finally:
+        finalizar_medicion(token)
+        duracion = time.perf_counter() - inicio
+        # Plantilla de la ruta (no la URL) para no crear una serie por cada ID
+        ruta = getattr(request.scope.get("route"), "path", "sin_ruta")
+        metricas.PETICIONES_TOTAL.inc(metodo=request.method, ruta=ruta, estado=str(estado))
+        metricas.PETICIONES_DURACION.observe(duracion, metodo=request.method, ruta=ruta)
+
+    response.headers["Server-Timing"] = estadisticas.server_timing(duracion)
+    for forma, veces in estadisticas.formas_repetidas(settings.SQL_ALERTA_REPETICIONES):
+        logger.warning(f"Posible N+1 en {request.method} {request.url.path}: {veces} ejecuciones de: {forma[:200]}")
+    return response
+
+# Con réplica de lectura: tras una escritura exitosa, las lecturas del mismo
+# usuario (ej. la redirección después de reportar un pago) van a la primaria
+# hasta que la réplica la haya aplicado
+if settings.DATABASE_READ_URL:
+    @app.middleware("http")
+    async def marcar_escrituras(request: Request, call_next):
+        response = await call_next(request)
+        if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+            registrar_escritura(request)
+        return response
+
 # Agregar middleware de sesiones
 app.add_middleware(SessionMiddleware, secret_key="building-management-secret-key-2024")
 
 # Configurar archivos estáticos
-app.mount("/static", StaticFiles(directory=settings.STATIC_DIR), name="static")
+# (check_dir=False: el directorio puede no existir y no se crea al importar;
+# static/uploads guardaba los documentos de soporte antes de /documentos/{id}:
+# no se sirve, ver src/scripts/migrar_documentos_antiguos.py)
+app.mount(
+    "/static",
+    EstaticosComprimidos(
+        directory=settings.STATIC_DIR, subdirectorio_dist=settings.ESTATICOS_DIST,
+        directorio_fuentes=settings.ASSETS_DIR, privados=("uploads",), check_dir=False,
+    ),
+    name="static",
+)
 
 # Incluir rutas
 app.include_router(auth_router)
-app.include_router(admin_router)
-app.include_router(admin_pagos_router)
-app.include_router(propietario_router)
+registrar_diferidos(app, ROUTERS_DIFERIDOS)
+
 
-# Eventos de inicio y cierre
\ No newline at end of file
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Métricas en formato de texto de Prometheus, con el token de METRICAS_TOKEN"""
+    esperado = f"Bearer {settings.METRICAS_TOKEN}"
+    recibido = request.headers.get("authorization", "")
+    if not settings.METRICAS_TOKEN or not hmac.compare_digest(recibido.encode(), esperado.encode()):
+        raise HTTPException(status_code=404)
+    return PlainTextResponse(metricas.exponer(), media_type="text/plain; version=0.0.4")
@@ -1,4 +1,15 @@
+import os
+import tempfile
 from pathlib import Path
+from typing import Optional
+
+# Variables de .env para desarrollo local. En el despliegue no hay archivo y
+# no se importa python-dotenv.
+_ARCHIVO_ENV = Path(__file__).resolve().parent.parent / ".env"
+if _ARCHIVO_ENV.exists():
+    from dotenv import load_dotenv
+
+    load_dotenv(_ARCHIVO_ENV)
 
 class Settings:
     """Configuración de la aplicación"""
@@ -11,10 +22,97 @@ class Settings:
     # Directorios
     STATIC_DIR: str = "static"
     TEMPLATES_DIR: str = "templates"
-    UPLOADS_DIR: Path = Path("static/uploads")
+    PLANTILLAS_COMPILADAS_DIR: str = "templates_compiladas"  # Generado por src/scripts/precompilar_plantillas.py
+    JINJA_CACHE_DIR: Path = Path(os.environ.get(
+        "JINJA_CACHE_DIR", Path(tempfile.gettempdir()) / "altavista_jinja"
+    ))
+    # Documentos de soporte: fuera de STATIC_DIR, solo se sirven por /documentos/{id}
+    UPLOADS_DIR: Path = Path(os.environ.get("UPLOADS_DIR", "uploads"))
+    # Detrás de nginx: prefijo de una location `internal` con alias a UPLOADS_DIR.
+    # La app autoriza y nginx envía el archivo con sendfile (X-Accel-Redirect)
+    DOCUMENTOS_X_ACCEL: str = os.environ.get("DOCUMENTOS_X_ACCEL", "")
+    DOCUMENTO_MAX_BYTES: int = int(os.environ.get("DOCUMENTO_MAX_BYTES", str(20 * 1024 * 1024)))
+    ASSETS_DIR: str = "assets"  # Fuentes de los estáticos (librerías vendorizadas y propios)
+    ESTATICOS_DIST: str = "dist"  # Subdirectorio de STATIC_DIR generado por src/scripts/construir_estaticos.py
+    
+    # Base de datos (el engine se crea en la primera consulta)
+    DATABASE_URL: str = os.environ.get("DATABASE_URL")
+    # Réplica de lectura opcional para el portal del propietario y los reportes
+    # (get_db_read_session): se usa mientras su retraso no pase de
+    # REPLICA_RETRASO_MAXIMO segundos, medido cada REPLICA_VERIFICAR_CADA
+    DATABASE_READ_URL: Optional[str] = os.environ.get("DATABASE_READ_URL") or None
+    REPLICA_RETRASO_MAXIMO: float = float(os.environ.get("REPLICA_RETRASO_MAXIMO", "5"))
+    REPLICA_VERIFICAR_CADA: float = float(os.environ.get("REPLICA_VERIFICAR_CADA", "2"))
+    # Índices críticos al iniciar: "omitir" (se verifican al desplegar con
+    # python src/scripts/migrar.py aplicar | verificar-indices), "reportar" o
+    # "estricto" (falla si falta alguno). Verificar cuesta importar los modelos
+    # y una consulta al catálogo en cada arranque en frío
+    VERIFICAR_INDICES: str = os.environ.get("VERIFICAR_INDICES", "omitir")
+    
+    # Instrumentación SQL por petición
+    SQL_DEBUG: bool = os.environ.get("SQL_DEBUG", "false").lower() == "true"  # Panel para administradores
+    SQL_ALERTA_REPETICIONES: int = int(os.environ.get("SQL_ALERTA_REPETICIONES", "20"))
+    # /metrics (tiempos y consultas SQL por ruta) solo responde a
+    # "Authorization: Bearer <METRICAS_TOKEN>"; sin token configurado, 404
+    METRICAS_TOKEN: Optional[str] = os.environ.get("METRICAS_TOKEN") or None
+    
+    # Páginas del propietario renderizadas en memoria, por proceso (src/services/cache_paginas.py)
+    CACHE_PAGINAS_MAX: int = int(os.environ.get("CACHE_PAGINAS_MAX", "2000"))
+    
+    # Conciliación bancaria: días de diferencia aceptados entre la consignación
+    # y la fecha que reportó el propietario
+    CONCILIACION_TOLERANCIA_DIAS: int = int(os.environ.get("CONCILIACION_TOLERANCIA_DIAS", "3"))
+    
+    # Ejecución presupuestal: días después de terminar un mes en los que aún
+    # se registran gastos; pasado ese plazo el mes se guarda y no se recalcula
+    EJECUCION_DIAS_CIERRE: int = int(os.environ.get("EJECUCION_DIAS_CIERRE", "10"))
+
+    # Estados de cuenta mensuales en PDF (src/scripts/generar_estados_cuenta.py):
+    # un subdirectorio AAAA-MM por mes y procesos que los dibujan (por defecto, uno por núcleo)
+    ESTADOS_CUENTA_DIR: Path = Path(os.environ.get("ESTADOS_CUENTA_DIR", "estados_cuenta"))
+    ESTADOS_CUENTA_PROCESOS: int = int(os.environ.get("ESTADOS_CUENTA_PROCESOS", "0")) or (os.cpu_count() or 1)
+
+    # Instantáneas Parquet del libro (src/scripts/exportar_instantanea.py):
+    # directorio de salida y filas por lote del cursor del servidor
+    INSTANTANEAS_DIR: Path = Path(os.environ.get("INSTANTANEAS_DIR", "instantaneas"))
+    INSTANTANEAS_LOTE: int = int(os.environ.get("INSTANTANEAS_LOTE", "50000"))
+    
+    # Correo saliente (src/services/despacho_correo.py): conexiones SMTP
+    # persistentes que comparte el despachador de la outbox
+    SMTP_HOST: str = os.environ.get("SMTP_HOST", "localhost")
+    SMTP_PORT: int = int(os.environ.get("SMTP_PORT", "587"))
+    SMTP_USUARIO: str = os.environ.get("SMTP_USUARIO", "")
+    SMTP_CLAVE: str = os.environ.get("SMTP_CLAVE", "")
+    SMTP_STARTTLS: bool = os.environ.get("SMTP_STARTTLS", "true").lower() == "true"
+    SMTP_REMITENTE: str = os.environ.get("SMTP_REMITENTE", "administracion@altavista.local")
+    SMTP_CONEXIONES: int = int(os.environ.get("SMTP_CONEXIONES", "4"))
+
+    # Outbox de notificaciones: mensajes por lote, plazo para enviar un lote
+    # tomado, reintentos (espera exponencial desde la base hasta la máxima,
+    # en segundos) y pausa entre pasadas del despachador
+    OUTBOX_LOTE: int = int(os.environ.get("OUTBOX_LOTE", "200"))
+    OUTBOX_PLAZO: int = int(os.environ.get("OUTBOX_PLAZO", "300"))
+    OUTBOX_MAX_INTENTOS: int = int(os.environ.get("OUTBOX_MAX_INTENTOS", "8"))
+    OUTBOX_ESPERA_BASE: float = float(os.environ.get("OUTBOX_ESPERA_BASE", "30"))
+    OUTBOX_ESPERA_MAXIMA: float = float(os.environ.get("OUTBOX_ESPERA_MAXIMA", str(6 * 3600)))
+    OUTBOX_INTERVALO: float = float(os.environ.get("OUTBOX_INTERVALO", "5"))
+
+    # Contraseñas: costo de scrypt (N potencia de 2; ~16 MiB y ~50 ms con 2**14)
+    # e hilos que las calculan fuera del event loop (por defecto, uno por núcleo)
+    SCRYPT_N: int = int(os.environ.get("SCRYPT_N", str(2 ** 14)))
+    SCRYPT_R: int = int(os.environ.get("SCRYPT_R", "8"))
+    SCRYPT_P: int = int(os.environ.get("SCRYPT_P", "1"))
+    HASH_WORKERS: int = int(os.environ.get("HASH_WORKERS", "0")) or (os.cpu_count() or 1)
+    
+    # Arranque: "si" importa los routers, plantillas y abre la primera conexión
+    # al iniciar; "no" lo deja para la primera petición; "auto" calienta salvo
+    # en funciones serverless, donde lo paga la petición que provocó el arranque
+    CALENTAR_AL_INICIAR: str = os.environ.get("CALENTAR_AL_INICIAR", "auto")
     
-    def __init__(self):
-        # Crear directorios necesarios
-        self.UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+    @property
+    def calentar_al_iniciar(self) -> bool:
+        if self.CALENTAR_AL_INICIAR == "auto":
+            return not (os.environ.get("VERCEL") or os.environ.get("AWS_LAMBDA_FUNCTION_NAME"))
+        return self.CALENTAR_AL_INICIAR == "si"
 
 settings = Settings()
@@ -1,19 +1,79 @@
 from fastapi import HTTPException, status, Request
 from fastapi.templating import Jinja2Templates
-from sqlmodel import Session, select
-from typing import Optional
-from src.models import db_manager, Usuario, Propietario, RolUsuarioEnum
+from typing import Optional, TYPE_CHECKING
+import time
+from pathlib import Path
 from src.config import settings
+from src.utils.instrumentacion_sql import estadisticas_actuales
+from src.utils.metricas import PLANTILLA_RENDER
+from src.utils.plantillas import configurar_carga
+from src.utils.estaticos import Estaticos
+
+# Los modelos (SQLModel/SQLAlchemy) se importan en el primer uso: la página de
+# login y los estáticos responden sin cargarlos en un arranque en frío
+if TYPE_CHECKING:
+    from sqlmodel import Session
+    from src.models import Usuario, Propietario
+
+
+class _PlantillaMedida:
+    """Envuelve una plantilla Jinja2 para medir el tiempo de render"""
+
+    def __init__(self, plantilla):
+        self._plantilla = plantilla
+
+    def render(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return self._plantilla.render(*args, **kwargs)
+        finally:
+            PLANTILLA_RENDER.observe(time.perf_counter() - inicio, plantilla=self._plantilla.name)
+
+    def __getattr__(self, nombre):
+        return getattr(self._plantilla, nombre)
+
+
+class Jinja2TemplatesMedidas(Jinja2Templates):
+    def get_template(self, name: str):
+        return _PlantillaMedida(super().get_template(name))
+
 
 # Configurar plantillas
-templates = Jinja2Templates(directory=settings.TEMPLATES_DIR)
+templates = Jinja2TemplatesMedidas(directory=settings.TEMPLATES_DIR)
+configurar_carga(
+    templates.env,
+    Path(settings.TEMPLATES_DIR),
+    Path(settings.PLANTILLAS_COMPILADAS_DIR),
+    settings.JINJA_CACHE_DIR,
+)
+templates.env.globals["sql_debug"] = settings.SQL_DEBUG
+templates.env.globals["estadisticas_sql"] = estadisticas_actuales
+templates.env.globals["asset"] = Estaticos(Path(settings.STATIC_DIR), settings.ESTATICOS_DIST).asset
 
-def get_db_session() -> Session:
+def get_db_session() -> "Session":
     """Obtener sesión de base de datos"""
+    from src.models import db_manager
+
     return db_manager.get_session()
 
-def get_current_user(request: Request) -> Usuario:
+def registrar_escritura(request: Request):
+    """Marca en la sesión del usuario que acaba de escribir en la primaria (ver main.py)"""
+    request.session["ultima_escritura"] = time.time()
+
+def get_db_read_session(request: Request) -> "Session":
+    """
+    Sesión de solo lectura para el portal del propietario, los reportes y las
+    exportaciones: la réplica si está configurada, al día y ya tiene lo último
+    que escribió este usuario (lectura de lo propio); si no, la primaria
+    """
+    from src.models import db_manager
+
+    return db_manager.get_read_session(request.session.get("ultima_escritura", 0.0))
+
+def get_current_user(request: Request) -> "Usuario":
     """Obtener el usuario actual desde la sesión"""
+    from src.models import Usuario
+
     user_id = request.session.get("user_id")
     if not user_id:
         raise HTTPException(
@@ -30,8 +90,10 @@ def get_current_user(request: Request) -> Usuario:
             )
         return user
 
-def require_admin(request: Request) -> Usuario:
+def require_admin(request: Request) -> "Usuario":
     """Verificar que el usuario actual sea administrador"""
+    from src.models import RolUsuarioEnum
+
     user = get_current_user(request)
     if user.rol != RolUsuarioEnum.ADMIN:
         raise HTTPException(
@@ -40,8 +102,10 @@ def require_admin(request: Request) -> Usuario:
         )
     return user
 
-def require_propietario(request: Request) -> tuple[Usuario, Propietario]:
+def require_propietario(request: Request) -> tuple["Usuario", "Propietario"]:
     """Verificar que el usuario actual sea propietario"""
+    from src.models import Propietario, RolUsuarioEnum
+
     user = get_current_user(request)
     if user.rol != RolUsuarioEnum.PROPIETARIO:
         raise HTTPException(
@@ -0,0 +1,151 @@
+-- Migración: saldo acumulado por apartamento en registro_financiero_apartamento
+-- Cada movimiento guarda el saldo del apartamento después de aplicarlo
+-- (DEBITO suma, CREDITO resta), ordenado por (fecha_efectiva, id).
+-- El saldo a una fecha pasa a ser un único index seek sobre
+-- (apartamento_id, fecha_efectiva DESC, id DESC).
+
+ALTER TABLE registro_financiero_apartamento
+    ADD COLUMN IF NOT EXISTS saldo_acumulado DECIMAL(14, 2);
+
+CREATE INDEX IF NOT EXISTS idx_rfa_apartamento_fecha_id
+    ON registro_financiero_apartamento (apartamento_id, fecha_efectiva DESC, id DESC);
+
+-- Recalcula el saldo acumulado desde cero (todos los apartamentos o uno solo).
+-- Solo toca las filas cuyo valor guardado difiere del esperado.
+CREATE OR REPLACE FUNCTION recalcular_saldo_acumulado(p_apartamento_id BIGINT DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    v_filas INTEGER;
+BEGIN
+    UPDATE registro_financiero_apartamento r
+    SET saldo_acumulado = e.esperado
+    FROM (
+        SELECT
+            id,
+            SUM(CASE WHEN tipo_movimiento::text = 'DEBITO' THEN monto ELSE -monto END)
+                OVER (PARTITION BY apartamento_id ORDER BY fecha_efectiva, id) AS esperado
+        FROM registro_financiero_apartamento
+        WHERE p_apartamento_id IS NULL OR apartamento_id = p_apartamento_id
+    ) e
+    WHERE r.id = e.id
+    AND r.saldo_acumulado IS DISTINCT FROM e.esperado;
+
+    GET DIAGNOSTICS v_filas = ROW_COUNT;
+    RETURN v_filas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- INSERT: toma el saldo del movimiento anterior y desplaza los posteriores
+-- (necesario cuando el movimiento llega con fecha retroactiva).
+CREATE OR REPLACE FUNCTION trigger_rfa_saldo_insert()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_delta NUMERIC(14, 2);
+    v_anterior NUMERIC(14, 2);
+BEGIN
+    v_delta := CASE WHEN NEW.tipo_movimiento::text = 'DEBITO' THEN NEW.monto ELSE -NEW.monto END;
+
+    -- Serializar movimientos concurrentes del mismo apartamento
+    PERFORM pg_advisory_xact_lock(hashtext('rfa_saldo_acumulado'), NEW.apartamento_id::INTEGER);
+
+    SELECT saldo_acumulado INTO v_anterior
+    FROM registro_financiero_apartamento
+    WHERE apartamento_id = NEW.apartamento_id
+    AND (fecha_efectiva, id) < (NEW.fecha_efectiva, NEW.id)
+    ORDER BY fecha_efectiva DESC, id DESC
+    LIMIT 1;
+
+    NEW.saldo_acumulado := COALESCE(v_anterior, 0) + v_delta;
+
+    UPDATE registro_financiero_apartamento
+    SET saldo_acumulado = saldo_acumulado + v_delta
+    WHERE apartamento_id = NEW.apartamento_id
+    AND (fecha_efectiva, id) > (NEW.fecha_efectiva, NEW.id);
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- UPDATE de columnas que afectan el saldo: equivale a retirar el movimiento
+-- anterior e insertar el nuevo.
+CREATE OR REPLACE FUNCTION trigger_rfa_saldo_update()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_delta_anterior NUMERIC(14, 2);
+    v_delta NUMERIC(14, 2);
+    v_anterior NUMERIC(14, 2);
+BEGIN
+    v_delta_anterior := CASE WHEN OLD.tipo_movimiento::text = 'DEBITO' THEN OLD.monto ELSE -OLD.monto END;
+    v_delta := CASE WHEN NEW.tipo_movimiento::text = 'DEBITO' THEN NEW.monto ELSE -NEW.monto END;
+
+    PERFORM pg_advisory_xact_lock(hashtext('rfa_saldo_acumulado'), OLD.apartamento_id::INTEGER);
+    IF NEW.apartamento_id <> OLD.apartamento_id THEN
+        PERFORM pg_advisory_xact_lock(hashtext('rfa_saldo_acumulado'), NEW.apartamento_id::INTEGER);
+    END IF;
+
+    UPDATE registro_financiero_apartamento
+    SET saldo_acumulado = saldo_acumulado - v_delta_anterior
+    WHERE apartamento_id = OLD.apartamento_id
+    AND (fecha_efectiva, id) > (OLD.fecha_efectiva, OLD.id)
+    AND id <> OLD.id;
+
+    SELECT saldo_acumulado INTO v_anterior
+    FROM registro_financiero_apartamento
+    WHERE apartamento_id = NEW.apartamento_id
+    AND (fecha_efectiva, id) < (NEW.fecha_efectiva, NEW.id)
+    AND id <> NEW.id
+    ORDER BY fecha_efectiva DESC, id DESC
+    LIMIT 1;
+
+    NEW.saldo_acumulado := COALESCE(v_anterior, 0) + v_delta;
+
+    UPDATE registro_financiero_apartamento
+    SET saldo_acumulado = saldo_acumulado + v_delta
+    WHERE apartamento_id = NEW.apartamento_id
+    AND (fecha_efectiva, id) > (NEW.fecha_efectiva, NEW.id)
+    AND id <> NEW.id;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- DELETE: los movimientos posteriores dejan de incluir el eliminado
+CREATE OR REPLACE FUNCTION trigger_rfa_saldo_delete()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_delta NUMERIC(14, 2);
+BEGIN
+    v_delta := CASE WHEN OLD.tipo_movimiento::text = 'DEBITO' THEN OLD.monto ELSE -OLD.monto END;
+
+    PERFORM pg_advisory_xact_lock(hashtext('rfa_saldo_acumulado'), OLD.apartamento_id::INTEGER);
+
+    UPDATE registro_financiero_apartamento
+    SET saldo_acumulado = saldo_acumulado - v_delta
+    WHERE apartamento_id = OLD.apartamento_id
+    AND (fecha_efectiva, id) > (OLD.fecha_efectiva, OLD.id);
+
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Los UPDATE internos solo modifican saldo_acumulado, por eso el trigger de
+-- UPDATE se limita a las columnas que cambian el saldo y no se dispara en cascada.
+DROP TRIGGER IF EXISTS rfa_saldo_insert ON registro_financiero_apartamento;
+CREATE TRIGGER rfa_saldo_insert
+    BEFORE INSERT ON registro_financiero_apartamento
+    FOR EACH ROW EXECUTE FUNCTION trigger_rfa_saldo_insert();
+
+DROP TRIGGER IF EXISTS rfa_saldo_update ON registro_financiero_apartamento;
+CREATE TRIGGER rfa_saldo_update
+    BEFORE UPDATE OF apartamento_id, fecha_efectiva, monto, tipo_movimiento ON registro_financiero_apartamento
+    FOR EACH ROW EXECUTE FUNCTION trigger_rfa_saldo_update();
+
+DROP TRIGGER IF EXISTS rfa_saldo_delete ON registro_financiero_apartamento;
+CREATE TRIGGER rfa_saldo_delete
+    AFTER DELETE ON registro_financiero_apartamento
+    FOR EACH ROW EXECUTE FUNCTION trigger_rfa_saldo_delete();
+
+-- Poblar los registros existentes
+SELECT recalcular_saldo_acumulado();
+
+COMMENT ON COLUMN registro_financiero_apartamento.saldo_acumulado IS 'Saldo del apartamento (débitos - créditos) después de este movimiento, en orden (fecha_efectiva, id)';
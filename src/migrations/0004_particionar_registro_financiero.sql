@@ -0,0 +1,266 @@
+-- Migración: particionamiento por año de registro_financiero_apartamento
+-- Requiere PostgreSQL 13+ y la migración 0003 (saldo acumulado).
+--
+-- La tabla pasa a estar particionada por RANGE (fecha_efectiva), una partición
+-- por año (registro_financiero_apartamento_AAAA). La clave primaria pasa a ser
+-- (id, fecha_efectiva) porque PostgreSQL exige incluir la columna de partición;
+-- id sigue saliendo de la misma secuencia, así que los modelos ORM no cambian.
+
+-- Saldo de apertura por apartamento: lo que sumaban las particiones ya archivadas.
+-- recalcular_saldo_acumulado() parte de este valor en lugar de cero.
+CREATE TABLE IF NOT EXISTS saldo_apertura_apartamento (
+    apartamento_id BIGINT PRIMARY KEY REFERENCES apartamento(id) ON DELETE CASCADE,
+    saldo DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    archivado_hasta DATE NOT NULL
+);
+
+-- Crea (si no existe) la partición del año indicado
+CREATE OR REPLACE FUNCTION crear_particion_rfa(p_año INTEGER)
+RETURNS TEXT AS $$
+DECLARE
+    v_nombre TEXT := format('registro_financiero_apartamento_%s', p_año);
+BEGIN
+    IF to_regclass(v_nombre) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF registro_financiero_apartamento FOR VALUES FROM (%L) TO (%L)',
+            v_nombre, make_date(p_año, 1, 1), make_date(p_año + 1, 1, 1)
+        );
+    END IF;
+    RETURN v_nombre;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Conversión de la tabla existente (solo la primera vez)
+DO $$
+DECLARE
+    v_secuencia TEXT;
+    v_pk TEXT;
+    v_año_min INTEGER;
+    v_año_max INTEGER;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = 'registro_financiero_apartamento'
+        AND c.relnamespace = current_schema()::regnamespace
+    ) THEN
+        RETURN;
+    END IF;
+
+    v_secuencia := pg_get_serial_sequence('registro_financiero_apartamento', 'id');
+    EXECUTE format('ALTER SEQUENCE %s OWNED BY NONE', v_secuencia);
+
+    ALTER TABLE registro_financiero_apartamento RENAME TO registro_financiero_apartamento_anterior;
+
+    -- Liberar los nombres de índices y PK para la tabla nueva
+    SELECT conname INTO v_pk FROM pg_constraint
+    WHERE conrelid = 'registro_financiero_apartamento_anterior'::regclass AND contype = 'p';
+    EXECUTE format('ALTER TABLE registro_financiero_apartamento_anterior DROP CONSTRAINT %I', v_pk);
+    DROP INDEX IF EXISTS idx_rfa_apartamento_id;
+    DROP INDEX IF EXISTS idx_rfa_fecha_efectiva;
+    DROP INDEX IF EXISTS idx_rfa_concepto_id;
+    DROP INDEX IF EXISTS idx_rfa_mes_año_aplicable;
+    DROP INDEX IF EXISTS idx_rfa_apartamento_fecha_id;
+
+    CREATE TABLE registro_financiero_apartamento (
+        LIKE registro_financiero_apartamento_anterior INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+    ) PARTITION BY RANGE (fecha_efectiva);
+
+    ALTER TABLE registro_financiero_apartamento ADD PRIMARY KEY (id, fecha_efectiva);
+    ALTER TABLE registro_financiero_apartamento
+        ADD FOREIGN KEY (apartamento_id) REFERENCES apartamento(id) ON DELETE CASCADE;
+    ALTER TABLE registro_financiero_apartamento
+        ADD FOREIGN KEY (concepto_id) REFERENCES concepto(id) ON DELETE RESTRICT;
+
+    SELECT
+        COALESCE(EXTRACT(YEAR FROM MIN(fecha_efectiva))::INTEGER, EXTRACT(YEAR FROM CURRENT_DATE)::INTEGER),
+        GREATEST(
+            COALESCE(EXTRACT(YEAR FROM MAX(fecha_efectiva))::INTEGER, 0),
+            EXTRACT(YEAR FROM CURRENT_DATE)::INTEGER + 1
+        )
+    INTO v_año_min, v_año_max
+    FROM registro_financiero_apartamento_anterior;
+
+    FOR v_año IN v_año_min..v_año_max LOOP
+        PERFORM crear_particion_rfa(v_año);
+    END LOOP;
+
+    -- La tabla nueva aún no tiene triggers: el saldo acumulado se copia tal cual
+    INSERT INTO registro_financiero_apartamento
+    SELECT * FROM registro_financiero_apartamento_anterior;
+
+    DROP TABLE registro_financiero_apartamento_anterior;
+
+    EXECUTE format('ALTER SEQUENCE %s OWNED BY registro_financiero_apartamento.id', v_secuencia);
+END$$;
+
+-- Índices sobre la tabla particionada (se crean en cada partición)
+CREATE INDEX IF NOT EXISTS idx_rfa_apartamento_id ON registro_financiero_apartamento(apartamento_id);
+CREATE INDEX IF NOT EXISTS idx_rfa_fecha_efectiva ON registro_financiero_apartamento(fecha_efectiva);
+CREATE INDEX IF NOT EXISTS idx_rfa_concepto_id ON registro_financiero_apartamento(concepto_id);
+CREATE INDEX IF NOT EXISTS idx_rfa_mes_año_aplicable ON registro_financiero_apartamento(año_aplicable, mes_aplicable);
+CREATE INDEX IF NOT EXISTS idx_rfa_apartamento_fecha_id
+    ON registro_financiero_apartamento (apartamento_id, fecha_efectiva DESC, id DESC);
+
+-- Triggers de saldo acumulado sobre la tabla particionada
+DROP TRIGGER IF EXISTS rfa_saldo_insert ON registro_financiero_apartamento;
+CREATE TRIGGER rfa_saldo_insert
+    BEFORE INSERT ON registro_financiero_apartamento
+    FOR EACH ROW EXECUTE FUNCTION trigger_rfa_saldo_insert();
+
+DROP TRIGGER IF EXISTS rfa_saldo_update ON registro_financiero_apartamento;
+CREATE TRIGGER rfa_saldo_update
+    BEFORE UPDATE OF apartamento_id, fecha_efectiva, monto, tipo_movimiento ON registro_financiero_apartamento
+    FOR EACH ROW EXECUTE FUNCTION trigger_rfa_saldo_update();
+
+DROP TRIGGER IF EXISTS rfa_saldo_delete ON registro_financiero_apartamento;
+CREATE TRIGGER rfa_saldo_delete
+    AFTER DELETE ON registro_financiero_apartamento
+    FOR EACH ROW EXECUTE FUNCTION trigger_rfa_saldo_delete();
+
+-- El recálculo parte del saldo de apertura de las particiones archivadas
+CREATE OR REPLACE FUNCTION recalcular_saldo_acumulado(p_apartamento_id BIGINT DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    v_filas INTEGER;
+BEGIN
+    UPDATE registro_financiero_apartamento r
+    SET saldo_acumulado = e.esperado
+    FROM (
+        SELECT
+            rfa.id,
+            rfa.fecha_efectiva,
+            COALESCE(sa.saldo, 0) + SUM(CASE WHEN rfa.tipo_movimiento::text = 'DEBITO' THEN rfa.monto ELSE -rfa.monto END)
+                OVER (PARTITION BY rfa.apartamento_id ORDER BY rfa.fecha_efectiva, rfa.id) AS esperado
+        FROM registro_financiero_apartamento rfa
+        LEFT JOIN saldo_apertura_apartamento sa ON sa.apartamento_id = rfa.apartamento_id
+        WHERE p_apartamento_id IS NULL OR rfa.apartamento_id = p_apartamento_id
+    ) e
+    WHERE r.id = e.id
+    AND r.fecha_efectiva = e.fecha_efectiva
+    AND r.saldo_acumulado IS DISTINCT FROM e.esperado;
+
+    GET DIAGNOSTICS v_filas = ROW_COUNT;
+    RETURN v_filas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Los triggers de 0003, igual que el recálculo, parten del saldo de apertura
+-- cuando el movimiento no tiene uno anterior en las particiones vigentes
+-- (p. ej. el primero de un apartamento, o uno retroactivo, tras archivar)
+CREATE OR REPLACE FUNCTION trigger_rfa_saldo_insert()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_delta NUMERIC(14, 2);
+    v_anterior NUMERIC(14, 2);
+BEGIN
+    v_delta := CASE WHEN NEW.tipo_movimiento::text = 'DEBITO' THEN NEW.monto ELSE -NEW.monto END;
+
+    -- Serializar movimientos concurrentes del mismo apartamento
+    PERFORM pg_advisory_xact_lock(hashtext('rfa_saldo_acumulado'), NEW.apartamento_id::INTEGER);
+
+    SELECT saldo_acumulado INTO v_anterior
+    FROM registro_financiero_apartamento
+    WHERE apartamento_id = NEW.apartamento_id
+    AND (fecha_efectiva, id) < (NEW.fecha_efectiva, NEW.id)
+    ORDER BY fecha_efectiva DESC, id DESC
+    LIMIT 1;
+
+    IF v_anterior IS NULL THEN
+        SELECT saldo INTO v_anterior
+        FROM saldo_apertura_apartamento
+        WHERE apartamento_id = NEW.apartamento_id;
+    END IF;
+
+    NEW.saldo_acumulado := COALESCE(v_anterior, 0) + v_delta;
+
+    UPDATE registro_financiero_apartamento
+    SET saldo_acumulado = saldo_acumulado + v_delta
+    WHERE apartamento_id = NEW.apartamento_id
+    AND (fecha_efectiva, id) > (NEW.fecha_efectiva, NEW.id);
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trigger_rfa_saldo_update()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_delta_anterior NUMERIC(14, 2);
+    v_delta NUMERIC(14, 2);
+    v_anterior NUMERIC(14, 2);
+BEGIN
+    v_delta_anterior := CASE WHEN OLD.tipo_movimiento::text = 'DEBITO' THEN OLD.monto ELSE -OLD.monto END;
+    v_delta := CASE WHEN NEW.tipo_movimiento::text = 'DEBITO' THEN NEW.monto ELSE -NEW.monto END;
+
+    PERFORM pg_advisory_xact_lock(hashtext('rfa_saldo_acumulado'), OLD.apartamento_id::INTEGER);
+    IF NEW.apartamento_id <> OLD.apartamento_id THEN
+        PERFORM pg_advisory_xact_lock(hashtext('rfa_saldo_acumulado'), NEW.apartamento_id::INTEGER);
+    END IF;
+
+    UPDATE registro_financiero_apartamento
+    SET saldo_acumulado = saldo_acumulado - v_delta_anterior
+    WHERE apartamento_id = OLD.apartamento_id
+    AND (fecha_efectiva, id) > (OLD.fecha_efectiva, OLD.id)
+    AND id <> OLD.id;
+
+    SELECT saldo_acumulado INTO v_anterior
+    FROM registro_financiero_apartamento
+    WHERE apartamento_id = NEW.apartamento_id
+    AND (fecha_efectiva, id) < (NEW.fecha_efectiva, NEW.id)
+    AND id <> NEW.id
+    ORDER BY fecha_efectiva DESC, id DESC
+    LIMIT 1;
+
+    IF v_anterior IS NULL THEN
+        SELECT saldo INTO v_anterior
+        FROM saldo_apertura_apartamento
+        WHERE apartamento_id = NEW.apartamento_id;
+    END IF;
+
+    NEW.saldo_acumulado := COALESCE(v_anterior, 0) + v_delta;
+
+    UPDATE registro_financiero_apartamento
+    SET saldo_acumulado = saldo_acumulado + v_delta
+    WHERE apartamento_id = NEW.apartamento_id
+    AND (fecha_efectiva, id) > (NEW.fecha_efectiva, NEW.id)
+    AND id <> NEW.id;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Desvincula la partición más antigua para archivarla (pg_dump + DROP TABLE).
+-- Antes guarda el saldo con que cada apartamento cerró ese año como saldo de
+-- apertura, de modo que el saldo acumulado de los años restantes sigue verificable.
+CREATE OR REPLACE FUNCTION archivar_particion_rfa(p_año INTEGER)
+RETURNS TEXT AS $$
+DECLARE
+    v_nombre TEXT := format('registro_financiero_apartamento_%s', p_año);
+BEGIN
+    IF to_regclass(v_nombre) IS NULL THEN
+        RAISE EXCEPTION 'No existe la partición %', v_nombre;
+    END IF;
+
+    IF EXISTS (
+        SELECT 1 FROM registro_financiero_apartamento
+        WHERE fecha_efectiva < make_date(p_año, 1, 1)
+    ) THEN
+        RAISE EXCEPTION 'Solo se puede archivar la partición más antigua (hay movimientos anteriores a %)', p_año;
+    END IF;
+
+    EXECUTE format($sql$
+        INSERT INTO saldo_apertura_apartamento (apartamento_id, saldo, archivado_hasta)
+        SELECT DISTINCT ON (apartamento_id) apartamento_id, saldo_acumulado, %L::date
+        FROM %I
+        ORDER BY apartamento_id, fecha_efectiva DESC, id DESC
+        ON CONFLICT (apartamento_id) DO UPDATE
+        SET saldo = EXCLUDED.saldo, archivado_hasta = EXCLUDED.archivado_hasta
+    $sql$, make_date(p_año, 12, 31), v_nombre);
+
+    EXECUTE format('ALTER TABLE registro_financiero_apartamento DETACH PARTITION %I', v_nombre);
+    RETURN v_nombre;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON TABLE saldo_apertura_apartamento IS 'Saldo acumulado al cierre de las particiones archivadas de registro_financiero_apartamento';
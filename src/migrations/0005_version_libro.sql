@@ -0,0 +1,73 @@
+-- Migración: versión del libro por apartamento
+-- Cada sentencia que inserta, modifica o borra movimientos de un apartamento
+-- le asigna una versión nueva. Las páginas del propietario usan la versión
+-- para ETags y caché de render sin leer registro_financiero_apartamento.
+
+-- Secuencia global (no se reinicia con TRUNCATE ... RESTART IDENTITY), así una
+-- versión nunca se repite aunque la base se vuelva a sembrar
+CREATE SEQUENCE IF NOT EXISTS version_libro_seq;
+
+CREATE TABLE IF NOT EXISTS version_libro_apartamento (
+    apartamento_id BIGINT PRIMARY KEY REFERENCES apartamento(id) ON DELETE CASCADE,
+    version BIGINT NOT NULL DEFAULT nextval('version_libro_seq'),
+    actualizado_en TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+-- Triggers por sentencia con tablas de transición: un solo UPSERT por
+-- sentencia aunque inserte miles de filas (ej. el generador mensual).
+-- Los apartamentos se deduplican antes del UPSERT (ON CONFLICT no admite
+-- la misma clave dos veces) y se ordenan para evitar deadlocks.
+CREATE OR REPLACE FUNCTION trigger_rfa_version_libro()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO version_libro_apartamento (apartamento_id, version)
+        SELECT apartamento_id, nextval('version_libro_seq')
+        FROM (SELECT DISTINCT apartamento_id FROM nuevos ORDER BY apartamento_id) afectados
+        ON CONFLICT (apartamento_id) DO UPDATE
+        SET version = EXCLUDED.version, actualizado_en = CURRENT_TIMESTAMP;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO version_libro_apartamento (apartamento_id, version)
+        SELECT apartamento_id, nextval('version_libro_seq')
+        FROM (SELECT DISTINCT apartamento_id FROM anteriores ORDER BY apartamento_id) afectados
+        ON CONFLICT (apartamento_id) DO UPDATE
+        SET version = EXCLUDED.version, actualizado_en = CURRENT_TIMESTAMP;
+    ELSE
+        INSERT INTO version_libro_apartamento (apartamento_id, version)
+        SELECT apartamento_id, nextval('version_libro_seq')
+        FROM (
+            SELECT apartamento_id FROM nuevos
+            UNION
+            SELECT apartamento_id FROM anteriores
+            ORDER BY apartamento_id
+        ) afectados
+        ON CONFLICT (apartamento_id) DO UPDATE
+        SET version = EXCLUDED.version, actualizado_en = CURRENT_TIMESTAMP;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Una tabla de transición solo admite un evento por trigger
+DROP TRIGGER IF EXISTS rfa_version_libro_insert ON registro_financiero_apartamento;
+CREATE TRIGGER rfa_version_libro_insert
+    AFTER INSERT ON registro_financiero_apartamento
+    REFERENCING NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_rfa_version_libro();
+
+DROP TRIGGER IF EXISTS rfa_version_libro_update ON registro_financiero_apartamento;
+CREATE TRIGGER rfa_version_libro_update
+    AFTER UPDATE ON registro_financiero_apartamento
+    REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_rfa_version_libro();
+
+DROP TRIGGER IF EXISTS rfa_version_libro_delete ON registro_financiero_apartamento;
+CREATE TRIGGER rfa_version_libro_delete
+    AFTER DELETE ON registro_financiero_apartamento
+    REFERENCING OLD TABLE AS anteriores
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_rfa_version_libro();
+
+-- Versión inicial para los apartamentos existentes
+INSERT INTO version_libro_apartamento (apartamento_id)
+SELECT id FROM apartamento
+ON CONFLICT (apartamento_id) DO NOTHING;
@@ -0,0 +1,104 @@
+-- Migración: documentos de soporte direccionados por contenido
+-- Cada archivo subido se guarda una sola vez, en una ruta derivada de su
+-- SHA-256 (ver src/utils/file_handler.py). Los movimientos y gastos apuntan
+-- a la fila del documento, y referencias cuenta cuántos lo usan.
+
+CREATE TABLE IF NOT EXISTS documento_soporte (
+    id BIGSERIAL PRIMARY KEY,
+    sha256 CHAR(64) NOT NULL UNIQUE,
+    ruta VARCHAR(512) NOT NULL,
+    tamaño BIGINT NOT NULL,
+    tipo_contenido VARCHAR(255),
+    nombre_original VARCHAR(255),
+    referencias INTEGER NOT NULL DEFAULT 0 CHECK (referencias >= 0),
+    creado_en TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    -- Último alta o baja de una referencia: los documentos sin referencias se
+    -- purgan pasado un margen, no en cuanto se suben
+    ultimo_uso TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+ALTER TABLE registro_financiero_apartamento
+    ADD COLUMN IF NOT EXISTS documento_soporte_id BIGINT REFERENCES documento_soporte(id);
+ALTER TABLE gasto_comunidad
+    ADD COLUMN IF NOT EXISTS documento_soporte_id BIGINT REFERENCES documento_soporte(id);
+
+-- Conteo de referencias por sentencia, con tablas de transición como en
+-- 0005: una sola actualización neta por documento aunque la sentencia toque
+-- miles de filas (las actualizaciones masivas de saldos no cambian nada).
+-- Sirve para las dos tablas porque ambas llaman documento_soporte_id a la columna.
+CREATE OR REPLACE FUNCTION trigger_referencias_documento()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE documento_soporte d
+        SET referencias = d.referencias + c.delta, ultimo_uso = CURRENT_TIMESTAMP
+        FROM (
+            SELECT documento_soporte_id, COUNT(*) AS delta FROM nuevos
+            WHERE documento_soporte_id IS NOT NULL GROUP BY documento_soporte_id
+        ) c
+        WHERE d.id = c.documento_soporte_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE documento_soporte d
+        SET referencias = d.referencias - c.delta, ultimo_uso = CURRENT_TIMESTAMP
+        FROM (
+            SELECT documento_soporte_id, COUNT(*) AS delta FROM anteriores
+            WHERE documento_soporte_id IS NOT NULL GROUP BY documento_soporte_id
+        ) c
+        WHERE d.id = c.documento_soporte_id;
+    ELSE
+        UPDATE documento_soporte d
+        SET referencias = d.referencias + c.delta, ultimo_uso = CURRENT_TIMESTAMP
+        FROM (
+            SELECT documento_soporte_id, SUM(delta) AS delta
+            FROM (
+                SELECT documento_soporte_id, 1 AS delta FROM nuevos
+                WHERE documento_soporte_id IS NOT NULL
+                UNION ALL
+                SELECT documento_soporte_id, -1 FROM anteriores
+                WHERE documento_soporte_id IS NOT NULL
+            ) cambios
+            GROUP BY documento_soporte_id
+            HAVING SUM(delta) <> 0
+        ) c
+        WHERE d.id = c.documento_soporte_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Una tabla de transición solo admite un evento por trigger
+DROP TRIGGER IF EXISTS rfa_referencias_documento_insert ON registro_financiero_apartamento;
+CREATE TRIGGER rfa_referencias_documento_insert
+    AFTER INSERT ON registro_financiero_apartamento
+    REFERENCING NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_referencias_documento();
+
+DROP TRIGGER IF EXISTS rfa_referencias_documento_update ON registro_financiero_apartamento;
+CREATE TRIGGER rfa_referencias_documento_update
+    AFTER UPDATE ON registro_financiero_apartamento
+    REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_referencias_documento();
+
+DROP TRIGGER IF EXISTS rfa_referencias_documento_delete ON registro_financiero_apartamento;
+CREATE TRIGGER rfa_referencias_documento_delete
+    AFTER DELETE ON registro_financiero_apartamento
+    REFERENCING OLD TABLE AS anteriores
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_referencias_documento();
+
+DROP TRIGGER IF EXISTS gasto_referencias_documento_insert ON gasto_comunidad;
+CREATE TRIGGER gasto_referencias_documento_insert
+    AFTER INSERT ON gasto_comunidad
+    REFERENCING NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_referencias_documento();
+
+DROP TRIGGER IF EXISTS gasto_referencias_documento_update ON gasto_comunidad;
+CREATE TRIGGER gasto_referencias_documento_update
+    AFTER UPDATE ON gasto_comunidad
+    REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_referencias_documento();
+
+DROP TRIGGER IF EXISTS gasto_referencias_documento_delete ON gasto_comunidad;
+CREATE TRIGGER gasto_referencias_documento_delete
+    AFTER DELETE ON gasto_comunidad
+    REFERENCING OLD TABLE AS anteriores
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_referencias_documento();
@@ -0,0 +1,11 @@
+-- Migración: índices para autorizar la descarga de documentos de soporte
+-- /documentos/{id} busca los movimientos que referencian el documento; la
+-- mayoría no tiene documento, así que el índice parcial solo guarda las filas
+-- que sí (también lo usan las verificaciones de la FK al borrar documentos).
+CREATE INDEX IF NOT EXISTS idx_rfa_documento_soporte
+    ON registro_financiero_apartamento(documento_soporte_id, apartamento_id)
+    WHERE documento_soporte_id IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_gasto_documento_soporte
+    ON gasto_comunidad(documento_soporte_id)
+    WHERE documento_soporte_id IS NOT NULL;
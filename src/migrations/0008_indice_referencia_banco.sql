@@ -0,0 +1,8 @@
+-- Migración: índice de las líneas de extracto ya conciliadas
+-- La conciliación guarda la clave de cada línea del extracto como
+-- referencia_pago = 'BANCO-<clave>' y antes de aplicar busca cuáles ya están
+-- (subir el mismo extracto dos veces no duplica pagos). El índice parcial
+-- solo contiene esas filas.
+CREATE INDEX IF NOT EXISTS idx_rfa_referencia_banco
+    ON registro_financiero_apartamento(referencia_pago)
+    WHERE referencia_pago LIKE 'BANCO-%';
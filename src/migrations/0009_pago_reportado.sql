@@ -0,0 +1,52 @@
+-- Migración: pagos reportados por los propietarios
+-- Hasta ahora el reporte se guardaba como un CREDITO real con
+-- 'PENDIENTE VALIDACIÓN' en la descripción: los saldos contaban dinero sin
+-- verificar y la administración solo encontraba los reportes escaneando
+-- texto. Ahora viven en su propia tabla y entran al libro al aprobarse.
+
+CREATE TABLE IF NOT EXISTS pago_reportado (
+    id BIGSERIAL PRIMARY KEY,
+    apartamento_id INTEGER NOT NULL REFERENCES apartamento(id) ON DELETE CASCADE,
+    usuario_id INTEGER REFERENCES usuario(id) ON DELETE SET NULL,
+    monto DECIMAL(12, 2) NOT NULL CHECK (monto > 0),
+    fecha_pago DATE NOT NULL,
+    metodo_pago VARCHAR(50) NOT NULL,
+    referencia VARCHAR(255),
+    observaciones TEXT,
+    estado VARCHAR(20) NOT NULL DEFAULT 'PENDIENTE'
+        CHECK (estado IN ('PENDIENTE', 'APROBADO', 'RECHAZADO')),
+    motivo_rechazo TEXT,
+    -- referencia_pago con la que quedó en registro_financiero_apartamento
+    -- ('REPORTE-<id>' desde la cola, 'BANCO-<clave>' desde la conciliación)
+    pago_referencia VARCHAR(255),
+    revisado_por INTEGER REFERENCES usuario(id) ON DELETE SET NULL,
+    revisado_en TIMESTAMPTZ,
+    creado_en TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+-- Cola de revisión: filtra por estado y pagina en orden de llegada
+CREATE INDEX IF NOT EXISTS idx_pago_reportado_estado
+    ON pago_reportado (estado, creado_en, id);
+-- Conciliación: reportes pendientes alrededor de las fechas del extracto
+CREATE INDEX IF NOT EXISTS idx_pago_reportado_pendiente_fecha
+    ON pago_reportado (fecha_pago) WHERE estado = 'PENDIENTE';
+CREATE INDEX IF NOT EXISTS idx_pago_reportado_apartamento
+    ON pago_reportado (apartamento_id);
+
+-- Los reportes que ya estaban en el libro pasan a la cola (y dejan de sumar
+-- al saldo). referencia_pago tenía la forma 'REPORTE-<método>: <referencia>'
+WITH movidos AS (
+    DELETE FROM registro_financiero_apartamento
+    WHERE descripcion_adicional LIKE 'PENDIENTE VALIDACIÓN%'
+    RETURNING apartamento_id, monto, fecha_efectiva, referencia_pago, descripcion_adicional, fecha_registro
+)
+INSERT INTO pago_reportado (apartamento_id, monto, fecha_pago, metodo_pago, referencia, observaciones, creado_en)
+SELECT
+    apartamento_id,
+    monto,
+    fecha_efectiva,
+    COALESCE(NULLIF(substring(referencia_pago FROM '^REPORTE-([^:]*):'), ''), 'otro'),
+    NULLIF(NULLIF(substring(referencia_pago FROM '^REPORTE-[^:]*: (.*)$'), 'Sin referencia'), ''),
+    NULLIF(regexp_replace(descripcion_adicional, '^PENDIENTE VALIDACIÓN( - )?', ''), ''),
+    COALESCE(fecha_registro, CURRENT_TIMESTAMP)
+FROM movidos;
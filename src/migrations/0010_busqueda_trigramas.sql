@@ -0,0 +1,22 @@
+-- Migración: índices de trigramas para la búsqueda global del administrador
+-- /admin/buscar y /api/admin/buscar buscan subcadenas y palabras parecidas
+-- (ILIKE '%texto%' y el operador <% de pg_trgm) en propietarios,
+-- apartamentos y el libro. Sin estos índices cada búsqueda recorre
+-- registro_financiero_apartamento completo.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_propietario_nombre_trgm
+    ON propietario USING gin (nombre_completo gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_propietario_documento_trgm
+    ON propietario USING gin (documento_identidad gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_apartamento_identificador_trgm
+    ON apartamento USING gin (identificador gin_trgm_ops);
+
+-- En la tabla particionada: Postgres crea el índice en cada partición y en
+-- las que cree crear_particion_rfa más adelante
+CREATE INDEX IF NOT EXISTS idx_rfa_referencia_pago_trgm
+    ON registro_financiero_apartamento USING gin (referencia_pago gin_trgm_ops)
+    WHERE referencia_pago IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_rfa_descripcion_trgm
+    ON registro_financiero_apartamento USING gin (descripcion_adicional gin_trgm_ops)
+    WHERE descripcion_adicional IS NOT NULL;
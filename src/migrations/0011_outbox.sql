@@ -0,0 +1,31 @@
+-- Migración: bandeja de salida de notificaciones (outbox)
+-- Los cargos del mes, los pagos aplicados y la mora se notifican por correo.
+-- El mensaje se escribe en esta tabla en la misma transacción que el
+-- movimiento del libro y lo entrega src/scripts/despachar_notificaciones.py:
+-- ni las peticiones ni el generador esperan al servidor SMTP, y si la
+-- transacción se revierte el correo tampoco existe.
+
+CREATE TABLE IF NOT EXISTS outbox (
+    id BIGSERIAL PRIMARY KEY,
+    tipo VARCHAR(30) NOT NULL,
+    -- Evita duplicados al reprocesar un mes o reintentar un lote:
+    -- 'cargos:<apartamento>:<año>-<mes>', 'pago:<apartamento>:<referencia>'...
+    clave VARCHAR(255) NOT NULL UNIQUE,
+    apartamento_id INTEGER REFERENCES apartamento(id) ON DELETE CASCADE,
+    destinatario VARCHAR(255) NOT NULL,
+    -- Variables de la plantilla del tipo (src/services/notificaciones.py)
+    datos JSONB NOT NULL DEFAULT '{}',
+    estado VARCHAR(20) NOT NULL DEFAULT 'PENDIENTE'
+        CHECK (estado IN ('PENDIENTE', 'ENVIADO', 'FALLIDO')),
+    intentos INTEGER NOT NULL DEFAULT 0,
+    -- Reintentos con espera exponencial; también es el plazo del lote que
+    -- tomó un despachador (si el proceso muere, el mensaje vuelve a salir)
+    proximo_intento TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    ultimo_error TEXT,
+    creado_en TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    enviado_en TIMESTAMPTZ
+);
+
+-- El despachador solo recorre los pendientes, en orden de vencimiento
+CREATE INDEX IF NOT EXISTS idx_outbox_pendiente
+    ON outbox (proximo_intento, id) WHERE estado = 'PENDIENTE';
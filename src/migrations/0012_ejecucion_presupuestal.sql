@@ -0,0 +1,74 @@
+-- Migración: ejecución presupuestal con meses cerrados en caché
+-- El informe de presupuesto contra ejecución (src/services/ejecucion_presupuestal.py)
+-- guarda aquí el resultado de cada mes cerrado; los meses en curso se
+-- calculan en cada consulta. Un mes guardado se descarta cuando cambia un
+-- gasto o un ítem de presupuesto de ese período.
+
+-- Un registro por mes guardado (un mes sin presupuesto ni gastos también
+-- queda guardado, sin filas de detalle)
+CREATE TABLE IF NOT EXISTS ejecucion_presupuestal_cierre (
+    año INTEGER NOT NULL,
+    mes INTEGER NOT NULL CHECK (mes BETWEEN 1 AND 12),
+    calculado_en TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    PRIMARY KEY (año, mes)
+);
+
+CREATE TABLE IF NOT EXISTS ejecucion_presupuestal_mes (
+    año INTEGER NOT NULL,
+    mes INTEGER NOT NULL,
+    concepto_id INTEGER NOT NULL REFERENCES concepto(id) ON DELETE CASCADE,
+    tipo_item tipo_item_presupuesto_enum NOT NULL,
+    presupuestado DECIMAL(14, 2) NOT NULL,
+    ejecutado DECIMAL(14, 2) NOT NULL,
+    PRIMARY KEY (año, mes, concepto_id, tipo_item),
+    FOREIGN KEY (año, mes) REFERENCES ejecucion_presupuestal_cierre (año, mes) ON DELETE CASCADE
+);
+
+-- Gastos del período agrupados por concepto sin leer la tabla (index-only scan)
+CREATE INDEX IF NOT EXISTS idx_gasto_comunidad_periodo
+    ON gasto_comunidad (año_gasto, mes_gasto, concepto_id) INCLUDE (fecha_gasto, monto);
+
+-- Invalidación: tablas pequeñas y cambios esporádicos, alcanza con triggers por fila
+CREATE OR REPLACE FUNCTION trigger_gasto_ejecucion_presupuestal()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM ejecucion_presupuestal_cierre
+        WHERE año = OLD.año_gasto
+        AND mes = COALESCE(OLD.mes_gasto, EXTRACT(MONTH FROM OLD.fecha_gasto)::INTEGER);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        DELETE FROM ejecucion_presupuestal_cierre
+        WHERE año = NEW.año_gasto
+        AND mes = COALESCE(NEW.mes_gasto, EXTRACT(MONTH FROM NEW.fecha_gasto)::INTEGER);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS gasto_ejecucion_presupuestal ON gasto_comunidad;
+CREATE TRIGGER gasto_ejecucion_presupuestal
+    AFTER INSERT OR UPDATE OR DELETE ON gasto_comunidad
+    FOR EACH ROW EXECUTE FUNCTION trigger_gasto_ejecucion_presupuestal();
+
+CREATE OR REPLACE FUNCTION trigger_item_ejecucion_presupuestal()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM ejecucion_presupuestal_cierre c
+        USING presupuesto_anual pa
+        WHERE pa.id = OLD.presupuesto_anual_id AND c.año = pa.año AND c.mes = OLD.mes;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        DELETE FROM ejecucion_presupuestal_cierre c
+        USING presupuesto_anual pa
+        WHERE pa.id = NEW.presupuesto_anual_id AND c.año = pa.año AND c.mes = NEW.mes;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS item_ejecucion_presupuestal ON item_presupuesto;
+CREATE TRIGGER item_ejecucion_presupuestal
+    AFTER INSERT OR UPDATE OR DELETE ON item_presupuesto
+    FOR EACH ROW EXECUTE FUNCTION trigger_item_ejecucion_presupuestal();
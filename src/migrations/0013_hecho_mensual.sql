@@ -0,0 +1,147 @@
+-- Migración: tabla de hechos mensual del libro
+-- Débitos, créditos y movimientos por (apartamento, concepto, año, mes). El
+-- período es el aplicable del movimiento; si no lo tiene, el de fecha_efectiva.
+-- Los reportes leen esta tabla en lugar de agrupar registro_financiero_apartamento.
+-- Reconstrucción completa en paralelo: src/scripts/reconstruir_hechos.py
+
+CREATE TABLE IF NOT EXISTS hecho_mensual (
+    apartamento_id BIGINT NOT NULL REFERENCES apartamento(id) ON DELETE CASCADE,
+    concepto_id INTEGER NOT NULL REFERENCES concepto(id) ON DELETE CASCADE,
+    año INTEGER NOT NULL,
+    mes INTEGER NOT NULL CHECK (mes BETWEEN 1 AND 12),
+    debitos DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    creditos DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    movimientos INTEGER NOT NULL DEFAULT 0,
+    actualizado_en TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    PRIMARY KEY (apartamento_id, concepto_id, año, mes)
+);
+
+CREATE INDEX IF NOT EXISTS idx_hecho_mensual_periodo
+    ON hecho_mensual (año, mes, concepto_id);
+
+-- Triggers por sentencia con tablas de transición, como los de
+-- 0005_version_libro.sql: cada sentencia aplica sus filas en un solo UPSERT,
+-- agrupado por clave y ordenado para evitar deadlocks. En UPDATE solo cuentan
+-- las filas que cambian alguna columna del hecho, así los UPDATE de
+-- saldo_acumulado que hacen los triggers de 0003 no escriben nada.
+-- Las filas que quedan sin movimientos se borran.
+CREATE OR REPLACE FUNCTION trigger_rfa_hecho_mensual()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_filas INTEGER;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO hecho_mensual AS h (apartamento_id, concepto_id, año, mes, debitos, creditos, movimientos)
+        SELECT apartamento_id, concepto_id,
+               COALESCE(año_aplicable, EXTRACT(YEAR FROM fecha_efectiva)::INTEGER),
+               COALESCE(mes_aplicable, EXTRACT(MONTH FROM fecha_efectiva)::INTEGER),
+               COALESCE(SUM(monto) FILTER (WHERE tipo_movimiento::text = 'DEBITO'), 0),
+               COALESCE(SUM(monto) FILTER (WHERE tipo_movimiento::text = 'CREDITO'), 0),
+               COUNT(*)
+        FROM nuevos
+        GROUP BY 1, 2, 3, 4
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (apartamento_id, concepto_id, año, mes) DO UPDATE
+        SET debitos = h.debitos + EXCLUDED.debitos,
+            creditos = h.creditos + EXCLUDED.creditos,
+            movimientos = h.movimientos + EXCLUDED.movimientos,
+            actualizado_en = CURRENT_TIMESTAMP;
+        RETURN NULL;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO hecho_mensual AS h (apartamento_id, concepto_id, año, mes, debitos, creditos, movimientos)
+        SELECT apartamento_id, concepto_id,
+               COALESCE(año_aplicable, EXTRACT(YEAR FROM fecha_efectiva)::INTEGER),
+               COALESCE(mes_aplicable, EXTRACT(MONTH FROM fecha_efectiva)::INTEGER),
+               -COALESCE(SUM(monto) FILTER (WHERE tipo_movimiento::text = 'DEBITO'), 0),
+               -COALESCE(SUM(monto) FILTER (WHERE tipo_movimiento::text = 'CREDITO'), 0),
+               -COUNT(*)
+        FROM anteriores
+        GROUP BY 1, 2, 3, 4
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (apartamento_id, concepto_id, año, mes) DO UPDATE
+        SET debitos = h.debitos + EXCLUDED.debitos,
+            creditos = h.creditos + EXCLUDED.creditos,
+            movimientos = h.movimientos + EXCLUDED.movimientos,
+            actualizado_en = CURRENT_TIMESTAMP;
+    ELSE
+        -- Versión anterior restando y nueva sumando, solo de las filas que cambiaron
+        INSERT INTO hecho_mensual AS h (apartamento_id, concepto_id, año, mes, debitos, creditos, movimientos)
+        SELECT d.apartamento_id, d.concepto_id, d.año, d.mes, SUM(d.debitos), SUM(d.creditos), SUM(d.movimientos)
+        FROM nuevos n
+        JOIN anteriores a ON a.id = n.id
+        CROSS JOIN LATERAL (
+            VALUES
+                (n.apartamento_id, n.concepto_id,
+                 COALESCE(n.año_aplicable, EXTRACT(YEAR FROM n.fecha_efectiva)::INTEGER),
+                 COALESCE(n.mes_aplicable, EXTRACT(MONTH FROM n.fecha_efectiva)::INTEGER),
+                 CASE WHEN n.tipo_movimiento::text = 'DEBITO' THEN n.monto ELSE 0 END,
+                 CASE WHEN n.tipo_movimiento::text = 'CREDITO' THEN n.monto ELSE 0 END,
+                 1),
+                (a.apartamento_id, a.concepto_id,
+                 COALESCE(a.año_aplicable, EXTRACT(YEAR FROM a.fecha_efectiva)::INTEGER),
+                 COALESCE(a.mes_aplicable, EXTRACT(MONTH FROM a.fecha_efectiva)::INTEGER),
+                 CASE WHEN a.tipo_movimiento::text = 'DEBITO' THEN -a.monto ELSE 0 END,
+                 CASE WHEN a.tipo_movimiento::text = 'CREDITO' THEN -a.monto ELSE 0 END,
+                 -1)
+        ) AS d(apartamento_id, concepto_id, año, mes, debitos, creditos, movimientos)
+        WHERE (n.apartamento_id, n.concepto_id, n.año_aplicable, n.mes_aplicable,
+               n.fecha_efectiva, n.tipo_movimiento, n.monto)
+            IS DISTINCT FROM
+              (a.apartamento_id, a.concepto_id, a.año_aplicable, a.mes_aplicable,
+               a.fecha_efectiva, a.tipo_movimiento, a.monto)
+        GROUP BY 1, 2, 3, 4
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (apartamento_id, concepto_id, año, mes) DO UPDATE
+        SET debitos = h.debitos + EXCLUDED.debitos,
+            creditos = h.creditos + EXCLUDED.creditos,
+            movimientos = h.movimientos + EXCLUDED.movimientos,
+            actualizado_en = CURRENT_TIMESTAMP;
+    END IF;
+
+    GET DIAGNOSTICS v_filas = ROW_COUNT;
+    IF v_filas > 0 THEN
+        DELETE FROM hecho_mensual h
+        USING (
+            SELECT DISTINCT apartamento_id, concepto_id,
+                   COALESCE(año_aplicable, EXTRACT(YEAR FROM fecha_efectiva)::INTEGER) AS año,
+                   COALESCE(mes_aplicable, EXTRACT(MONTH FROM fecha_efectiva)::INTEGER) AS mes
+            FROM anteriores
+        ) a
+        WHERE (h.apartamento_id, h.concepto_id, h.año, h.mes) = (a.apartamento_id, a.concepto_id, a.año, a.mes)
+        AND h.movimientos = 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Una tabla de transición solo admite un evento por trigger
+DROP TRIGGER IF EXISTS rfa_hecho_mensual_insert ON registro_financiero_apartamento;
+CREATE TRIGGER rfa_hecho_mensual_insert
+    AFTER INSERT ON registro_financiero_apartamento
+    REFERENCING NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_rfa_hecho_mensual();
+
+DROP TRIGGER IF EXISTS rfa_hecho_mensual_update ON registro_financiero_apartamento;
+CREATE TRIGGER rfa_hecho_mensual_update
+    AFTER UPDATE ON registro_financiero_apartamento
+    REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_rfa_hecho_mensual();
+
+DROP TRIGGER IF EXISTS rfa_hecho_mensual_delete ON registro_financiero_apartamento;
+CREATE TRIGGER rfa_hecho_mensual_delete
+    AFTER DELETE ON registro_financiero_apartamento
+    REFERENCING OLD TABLE AS anteriores
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_rfa_hecho_mensual();
+
+-- Poblar con el libro existente (en bases grandes, mejor en paralelo con
+-- src/scripts/reconstruir_hechos.py)
+INSERT INTO hecho_mensual (apartamento_id, concepto_id, año, mes, debitos, creditos, movimientos)
+SELECT apartamento_id, concepto_id,
+       COALESCE(año_aplicable, EXTRACT(YEAR FROM fecha_efectiva)::INTEGER),
+       COALESCE(mes_aplicable, EXTRACT(MONTH FROM fecha_efectiva)::INTEGER),
+       COALESCE(SUM(monto) FILTER (WHERE tipo_movimiento::text = 'DEBITO'), 0),
+       COALESCE(SUM(monto) FILTER (WHERE tipo_movimiento::text = 'CREDITO'), 0),
+       COUNT(*)
+FROM registro_financiero_apartamento
+GROUP BY 1, 2, 3, 4
+ON CONFLICT (apartamento_id, concepto_id, año, mes) DO NOTHING;
@@ -0,0 +1,46 @@
+-- Migración: invalidar la ejecución presupuestal guardada desde el libro
+-- Los ingresos ejecutados salen de registro_financiero_apartamento, así que
+-- un movimiento con fecha atrasada cambia un mes cerrado que 0012 no descarta.
+-- Cada cambio del libro ya pasa por hecho_mensual (0013) agrupado por período;
+-- un trigger por sentencia sobre esa tabla descarta los meses guardados de los
+-- períodos que tocó. Los meses en curso no están guardados: el DELETE no
+-- encuentra filas y no cuesta nada.
+
+CREATE OR REPLACE FUNCTION trigger_hecho_ejecucion_presupuestal()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        DELETE FROM ejecucion_presupuestal_cierre c
+        USING (SELECT DISTINCT año, mes FROM nuevos) p
+        WHERE c.año = p.año AND c.mes = p.mes;
+    ELSIF TG_OP = 'UPDATE' THEN
+        DELETE FROM ejecucion_presupuestal_cierre c
+        USING (SELECT año, mes FROM nuevos UNION SELECT año, mes FROM anteriores) p
+        WHERE c.año = p.año AND c.mes = p.mes;
+    ELSE
+        DELETE FROM ejecucion_presupuestal_cierre c
+        USING (SELECT DISTINCT año, mes FROM anteriores) p
+        WHERE c.año = p.año AND c.mes = p.mes;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- El UPSERT de 0013 dispara los triggers de INSERT y de UPDATE de la sentencia
+DROP TRIGGER IF EXISTS hecho_ejecucion_presupuestal_insert ON hecho_mensual;
+CREATE TRIGGER hecho_ejecucion_presupuestal_insert
+    AFTER INSERT ON hecho_mensual
+    REFERENCING NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_hecho_ejecucion_presupuestal();
+
+DROP TRIGGER IF EXISTS hecho_ejecucion_presupuestal_update ON hecho_mensual;
+CREATE TRIGGER hecho_ejecucion_presupuestal_update
+    AFTER UPDATE ON hecho_mensual
+    REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_hecho_ejecucion_presupuestal();
+
+DROP TRIGGER IF EXISTS hecho_ejecucion_presupuestal_delete ON hecho_mensual;
+CREATE TRIGGER hecho_ejecucion_presupuestal_delete
+    AFTER DELETE ON hecho_mensual
+    REFERENCING OLD TABLE AS anteriores
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_hecho_ejecucion_presupuestal();
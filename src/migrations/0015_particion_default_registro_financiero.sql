@@ -0,0 +1,57 @@
+-- Migración: partición DEFAULT de registro_financiero_apartamento
+-- Sin ella, un movimiento con fecha_efectiva posterior al último año creado
+-- (p. ej. un pago de enero antes de que el generador cree ese año) falla con
+-- "no partition of relation found for row". Esos movimientos quedan en la
+-- partición DEFAULT hasta que crear_particion_rfa() crea su año y los mueve.
+
+CREATE TABLE IF NOT EXISTS registro_financiero_apartamento_default
+    PARTITION OF registro_financiero_apartamento DEFAULT;
+
+-- Crea (si no existe) la partición del año indicado. Si la DEFAULT ya tiene
+-- movimientos de ese año, PostgreSQL no deja crear la partición: se desvincula
+-- la DEFAULT (así sus filas se mueven sin disparar los triggers de saldo
+-- acumulado, que no cambia), se copian a la partición nueva y se vuelven a
+-- vincular ambas.
+CREATE OR REPLACE FUNCTION crear_particion_rfa(p_año INTEGER)
+RETURNS TEXT AS $$
+DECLARE
+    v_nombre TEXT := format('registro_financiero_apartamento_%s', p_año);
+    v_desde DATE := make_date(p_año, 1, 1);
+    v_hasta DATE := make_date(p_año + 1, 1, 1);
+BEGIN
+    IF to_regclass(v_nombre) IS NOT NULL THEN
+        RETURN v_nombre;
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM registro_financiero_apartamento_default
+        WHERE fecha_efectiva >= v_desde AND fecha_efectiva < v_hasta
+    ) THEN
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF registro_financiero_apartamento FOR VALUES FROM (%L) TO (%L)',
+            v_nombre, v_desde, v_hasta
+        );
+        RETURN v_nombre;
+    END IF;
+
+    ALTER TABLE registro_financiero_apartamento DETACH PARTITION registro_financiero_apartamento_default;
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE registro_financiero_apartamento INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+        v_nombre
+    );
+    EXECUTE format(
+        'INSERT INTO %I SELECT * FROM registro_financiero_apartamento_default
+         WHERE fecha_efectiva >= %L AND fecha_efectiva < %L',
+        v_nombre, v_desde, v_hasta
+    );
+    DELETE FROM registro_financiero_apartamento_default
+    WHERE fecha_efectiva >= v_desde AND fecha_efectiva < v_hasta;
+    EXECUTE format(
+        'ALTER TABLE registro_financiero_apartamento ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        v_nombre, v_desde, v_hasta
+    );
+    ALTER TABLE registro_financiero_apartamento
+        ATTACH PARTITION registro_financiero_apartamento_default DEFAULT;
+    RETURN v_nombre;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,188 @@
+"""
+Migraciones versionadas del esquema
+===================================
+
+Los archivos NNNN_descripcion.sql de este directorio son la única fuente del DDL.
+Se aplican en orden y cada versión aplicada queda registrada en schema_version.
+Además, verificar_indices compara los índices esperados contra pg_indexes.
+"""
+import hashlib
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from sqlalchemy import Engine, text
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_MIGRACIONES = Path(__file__).parent
+
+# Clave del advisory lock que evita que dos procesos migren a la vez
+LOCK_MIGRACIONES = 7_401_028
+
+SQL_CREAR_SCHEMA_VERSION = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        nombre VARCHAR(255) NOT NULL,
+        checksum VARCHAR(64) NOT NULL,
+        aplicada_en TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL
+    )
+"""
+
+# Índices críticos para el rendimiento que no están declarados en los modelos:
+# (tabla, columnas, único)
+INDICES_CRITICOS: List[Tuple[str, Tuple[str, ...], bool]] = [
+    ("item_presupuesto", ("presupuesto_anual_id", "concepto_id", "mes", "tipo_item"), True),
+    ("cuota_configuracion", ("apartamento_id", "año", "mes"), True),
+    ("cuota_configuracion", ("año", "mes"), False),
+    ("tasa_interes_mora", ("año", "mes"), True),
+    ("apartamento", ("propietario_id",), False),
+    ("gasto_comunidad", ("fecha_gasto",), False),
+    ("gasto_comunidad", ("concepto_id",), False),
+    ("usuario", ("propietario_id",), False),
+]
+
+_PATRON_ARCHIVO = re.compile(r"^(\d{4})_(\w+)\.sql$")
+_PATRON_INDEXDEF = re.compile(
+    r"^CREATE (UNIQUE )?INDEX \S+ ON (?:ONLY )?(?:\S+\.)?(\S+) USING \w+ \((.*)\)"
+)
+
+
+@dataclass
+class Migracion:
+    version: int
+    nombre: str
+    ruta: Path
+
+    @property
+    def contenido(self) -> str:
+        return self.ruta.read_text(encoding="utf-8")
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.ruta.read_bytes()).hexdigest()
+
+
+def listar_migraciones() -> List[Migracion]:
+    """Migraciones disponibles en disco, ordenadas por versión"""
+    migraciones = []
+    for ruta in sorted(DIRECTORIO_MIGRACIONES.glob("*.sql")):
+        coincidencia = _PATRON_ARCHIVO.match(ruta.name)
+        if not coincidencia:
+            raise ValueError(f"Nombre de migración inválido: {ruta.name}")
+        migraciones.append(Migracion(int(coincidencia.group(1)), coincidencia.group(2), ruta))
+
+    versiones = [m.version for m in migraciones]
+    if len(versiones) != len(set(versiones)):
+        raise ValueError("Hay migraciones con el mismo número de versión")
+    return migraciones
+
+
+def versiones_aplicadas(engine: Engine) -> Dict[int, str]:
+    """version -> checksum de las migraciones registradas en schema_version"""
+    with engine.connect() as conn:
+        conn.execute(text(SQL_CREAR_SCHEMA_VERSION))
+        conn.commit()
+        filas = conn.execute(text("SELECT version, checksum FROM schema_version")).all()
+    return {fila.version: fila.checksum for fila in filas}
+
+
+def migraciones_pendientes(engine: Engine) -> List[Migracion]:
+    """Migraciones en disco que aún no se han aplicado"""
+    aplicadas = versiones_aplicadas(engine)
+    pendientes = []
+    for migracion in listar_migraciones():
+        if migracion.version not in aplicadas:
+            pendientes.append(migracion)
+        elif aplicadas[migracion.version] != migracion.checksum:
+            logger.warning(
+                f"La migración {migracion.ruta.name} cambió después de aplicarse; "
+                "cree una migración nueva en lugar de editarla"
+            )
+    return pendientes
+
+
+def aplicar_migraciones(engine: Engine) -> List[str]:
+    """
+    Aplica en orden las migraciones pendientes, cada una en su propia transacción.
+
+    Returns:
+        List[str]: Nombres de archivo de las migraciones aplicadas
+    """
+    aplicadas = []
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:clave)"), {"clave": LOCK_MIGRACIONES})
+        conn.commit()
+        try:
+            for migracion in migraciones_pendientes(engine):
+                logger.info(f"Aplicando migración {migracion.ruta.name}")
+                with conn.begin():
+                    # Evitar que el driver interprete los '%' del SQL como parámetros
+                    conn.execution_options(no_parameters=True).exec_driver_sql(migracion.contenido)
+                    conn.execute(
+                        text("""
+                            INSERT INTO schema_version (version, nombre, checksum)
+                            VALUES (:version, :nombre, :checksum)
+                        """),
+                        {
+                            "version": migracion.version,
+                            "nombre": migracion.nombre,
+                            "checksum": migracion.checksum,
+                        },
+                    )
+                aplicadas.append(migracion.ruta.name)
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:clave)"), {"clave": LOCK_MIGRACIONES})
+            conn.commit()
+    return aplicadas
+
+
+def _normalizar_columna(columna: str) -> str:
+    return columna.replace('"', "").strip().lower()
+
+
+def indices_esperados() -> List[Tuple[str, Tuple[str, ...], bool]]:
+    """Índices declarados en los modelos más los INDICES_CRITICOS"""
+    from sqlmodel import SQLModel
+    import src.models  # noqa: F401 - registra todas las tablas en el metadata
+
+    esperados = list(INDICES_CRITICOS)
+    for tabla in SQLModel.metadata.tables.values():
+        for indice in tabla.indexes:
+            columnas = tuple(
+                _normalizar_columna(getattr(expresion, "name", None) or str(expresion))
+                for expresion in indice.expressions
+            )
+            esperados.append((tabla.name, columnas, bool(indice.unique)))
+    return esperados
+
+
+def verificar_indices(engine: Engine) -> List[Tuple[str, Tuple[str, ...], bool]]:
+    """
+    Compara los índices esperados con pg_indexes (por tabla y columnas, no por nombre).
+
+    Returns:
+        List: Índices esperados que no existen en la base de datos
+    """
+    with engine.connect() as conn:
+        filas = conn.execute(text("""
+            SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema()
+        """)).all()
+
+    existentes = set()
+    for fila in filas:
+        coincidencia = _PATRON_INDEXDEF.match(fila.indexdef)
+        if not coincidencia:
+            continue
+        columnas = tuple(_normalizar_columna(c) for c in coincidencia.group(3).split(","))
+        existentes.add((coincidencia.group(2).replace('"', ""), columnas, bool(coincidencia.group(1))))
+
+    faltantes = []
+    for tabla, columnas, unico in indices_esperados():
+        # Un índice único también cubre la necesidad de uno no único
+        if (tabla, columnas, unico) in existentes or (tabla, columnas, True) in existentes:
+            continue
+        faltantes.append((tabla, columnas, unico))
+    return faltantes
@@ -1,5 +1,5 @@
 # Importaciones de enums
-from .enums import RolUsuarioEnum, TipoMovimientoEnum, TipoItemPresupuestoEnum
+from .enums import RolUsuarioEnum, TipoMovimientoEnum, TipoItemPresupuestoEnum, EstadoPagoReportadoEnum
 
 # Importaciones de modelos
 from .propietario import Propietario
@@ -12,6 +12,10 @@ from .registro_financiero_apartamento import RegistroFinancieroApartamento
 from .gasto_comunidad import GastoComunidad
 from .usuario import Usuario
 from .control_procesamiento import ControlProcesamientoMensual
+from .version_libro import VersionLibroApartamento
+from .hecho_mensual import HechoMensual
+from .documento_soporte import DocumentoSoporte
+from .pago_reportado import PagoReportado
 
 # Importaciones de utilidades de base de datos
 from .database import db_manager, DatabaseManager
@@ -21,6 +25,7 @@ __all__ = [
     "RolUsuarioEnum",
     "TipoMovimientoEnum", 
     "TipoItemPresupuestoEnum",
+    "EstadoPagoReportadoEnum",
     
     # Modelos
     "Propietario",
@@ -34,6 +39,10 @@ __all__ = [
     "GastoComunidad",
     "Usuario",
     "ControlProcesamientoMensual",
+    "VersionLibroApartamento",
+    "HechoMensual",
+    "DocumentoSoporte",
+    "PagoReportado",
     
     # Database utilities
     "db_manager",
@@ -1,12 +1,18 @@
-from dotenv import load_dotenv
-import os
-from sqlalchemy import create_engine, UniqueConstraint, Index
+import logging
+import threading
+import time
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import QueuePool
 from sqlmodel import SQLModel, Session, create_engine as sqlmodel_create_engine
 from typing import Optional
+from src.config import settings
+from src.utils.instrumentacion_sql import registrar_eventos
+from src.utils.metricas import POOL_ESPERA, SESIONES_LECTURA, Medidor, registrar_pool
 
-# Cambia aquí la cadena de conexión para usar PostgreSQL con pg8000
-load_dotenv()
-url_database = os.environ.get('DATABASE_URL')
+logger = logging.getLogger(__name__)
+
+# La cadena de conexión viene de DATABASE_URL (ver src/config.py, que carga .env)
+url_database = settings.DATABASE_URL
 
 # Convertir la URL para usar pg8000 en lugar de psycopg2
 """
@@ -15,82 +21,134 @@ if url_database and url_database.startswith('postgresql://'):
 elif url_database and url_database.startswith('postgres://'):
     url_database = url_database.replace('postgres://', 'postgresql+pg8000://')
 """
-engine = create_engine(url_database, echo=False)
+# Nombre usado por los scripts (generador, verificaciones)
+DATABASE_URL = url_database
+
+# Segundos que la réplica va detrás de la primaria. Sin WAL pendiente por
+# aplicar está al día aunque la última transacción aplicada sea antigua (una
+# primaria sin escrituras); una base que no está en recuperación es una copia
+# independiente (pruebas locales) y no tiene retraso. NULL: aún no aplica nada.
+SQL_RETRASO_REPLICA = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+# Consultas por petición (Server-Timing, panel SQL) de todos los engines
+registrar_eventos()
+
+
+class QueuePoolMedido(QueuePool):
+    """QueuePool que registra cuánto espera cada checkout por una conexión"""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_ESPERA.observe(time.perf_counter() - inicio)
+
+
+def _solo_lectura(conexion, registro):
+    """Las conexiones a la réplica rechazan escrituras también contra una copia independiente"""
+    cursor = conexion.cursor()
+    cursor.execute("SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY")
+    cursor.close()
+    conexion.commit()
+
 
 class DatabaseManager:
-    def __init__(self, engine):
-        self.engine = engine
+    def __init__(self, url: Optional[str], url_lectura: Optional[str] = None):
+        self.url = url
+        self.url_lectura = url_lectura
+        self._engine = None
+        self._engine_lectura = None
+        self._lock = threading.Lock()
+        self._lock_replica = threading.Lock()
+        # Última medición del retraso (None: réplica caída o sin medir) y el
+        # instante, en el reloj de la app, hasta el que la réplica estaba al día
+        self._retraso_replica: Optional[float] = None
+        self._replica_hasta = 0.0
+        self._replica_verificada = float("-inf")
 
-    def create_tables(self):
-        """Crear todas las tablas con constraints y índices"""
-        # Importar todos los modelos para asegurar que estén registrados
-        from .propietario import Propietario
-        from .apartamento import Apartamento
-        from .concepto import Concepto
-        from .presupuesto_anual import PresupuestoAnual, ItemPresupuesto
-        from .cuota_configuracion import CuotaConfiguracion
-        from .tasa_interes_mora import TasaInteresMora
-        from .registro_financiero_apartamento import RegistroFinancieroApartamento
-        from .gasto_comunidad import GastoComunidad
-        from .usuario import Usuario
-        
-        # Crear todas las tablas
-        SQLModel.metadata.create_all(self.engine)
-        
-        # Agregar constraints únicos después de crear las tablas base
-        with self.engine.connect() as conn:
-            # Para ItemPresupuesto: UNIQUE (presupuesto_anual_id, concepto_id, mes, tipo_item)
-            try:
-                conn.execute("""
-                    CREATE UNIQUE INDEX IF NOT EXISTS uq_item_presupuesto_unique 
-                    ON item_presupuesto(presupuesto_anual_id, concepto_id, mes, tipo_item)
-                """)
-            except Exception:
-                pass  # Índice ya existe
-            
-            # Para CuotaConfiguracion: UNIQUE (apartamento_id, año, mes)
-            try:
-                conn.execute("""
-                    CREATE UNIQUE INDEX IF NOT EXISTS uq_cuota_config_apartamento_año_mes 
-                    ON cuota_configuracion(apartamento_id, año, mes)
-                """)
-            except Exception:
-                pass
-            
-            # Para TasaInteresMora: UNIQUE (año, mes)
+    @property
+    def engine(self):
+        """
+        Engine creado en el primer uso: importar la app (arranque en frío) no
+        carga el driver ni configura el pool
+        """
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    engine = create_engine(self.url, echo=False, poolclass=QueuePoolMedido)
+                    registrar_pool(engine.pool)
+                    self._engine = engine
+        return self._engine
+
+    @property
+    def engine_lectura(self):
+        """Engine de la réplica (DATABASE_READ_URL), o None si no hay réplica"""
+        if self.url_lectura is None:
+            return None
+        if self._engine_lectura is None:
+            with self._lock:
+                if self._engine_lectura is None:
+                    engine = create_engine(self.url_lectura, echo=False, poolclass=QueuePoolMedido)
+                    event.listen(engine, "connect", _solo_lectura)
+                    Medidor("db_replica_retraso_segundos", "Último retraso medido de la réplica de lectura (-1: no disponible)",
+                            funcion=lambda: -1 if self._retraso_replica is None else self._retraso_replica)
+                    self._engine_lectura = engine
+        return self._engine_lectura
+
+    def _verificar_replica(self):
+        """
+        Mide el retraso de la réplica como mucho cada REPLICA_VERIFICAR_CADA
+        segundos. Mientras un hilo mide, los demás usan la medición anterior.
+        """
+        if time.monotonic() - self._replica_verificada < settings.REPLICA_VERIFICAR_CADA:
+            return
+        if not self._lock_replica.acquire(blocking=False):
+            return
+        try:
+            medido_en = time.time()
             try:
-                conn.execute("""
-                    CREATE UNIQUE INDEX IF NOT EXISTS uq_tasa_interes_año_mes 
-                    ON tasa_interes_mora(año, mes)
-                """)
-            except Exception:
-                pass
-            
-            # Crear índices adicionales para mejor rendimiento
-            indices_adicionales = [
-                "CREATE INDEX IF NOT EXISTS idx_apartamento_propietario_id ON apartamento(propietario_id)",
-                "CREATE INDEX IF NOT EXISTS idx_item_presupuesto_anual_id ON item_presupuesto(presupuesto_anual_id)",
-                "CREATE INDEX IF NOT EXISTS idx_item_presupuesto_concepto_id ON item_presupuesto(concepto_id)",
-                "CREATE INDEX IF NOT EXISTS idx_cuota_configuracion_apartamento_id ON cuota_configuracion(apartamento_id)",
-                "CREATE INDEX IF NOT EXISTS idx_cuota_configuracion_año_mes ON cuota_configuracion(año, mes)",
-                "CREATE INDEX IF NOT EXISTS idx_rfa_apartamento_id ON registro_financiero_apartamento(apartamento_id)",
-                "CREATE INDEX IF NOT EXISTS idx_rfa_fecha_efectiva ON registro_financiero_apartamento(fecha_efectiva)",
-                "CREATE INDEX IF NOT EXISTS idx_rfa_concepto_id ON registro_financiero_apartamento(concepto_id)",
-                "CREATE INDEX IF NOT EXISTS idx_rfa_mes_año_aplicable ON registro_financiero_apartamento(año_aplicable, mes_aplicable)",
-                "CREATE INDEX IF NOT EXISTS idx_gasto_comunidad_fecha ON gasto_comunidad(fecha_gasto)",
-                "CREATE INDEX IF NOT EXISTS idx_gasto_comunidad_concepto_id ON gasto_comunidad(concepto_id)",
-                "CREATE INDEX IF NOT EXISTS idx_gasto_comunidad_presupuesto_id ON gasto_comunidad(presupuesto_anual_id)",
-                "CREATE INDEX IF NOT EXISTS idx_usuario_propietario_id ON usuario(propietario_id)"
-            ]
-            
-            for indice in indices_adicionales:
-                try:
-                    conn.execute(indice)
-                except Exception:# NqYMCFXBEQYYJ60u
-
-                    pass  # Índice ya existe
-            
-            conn.commit()
+                with self.engine_lectura.connect() as conn:
+                    retraso = conn.execute(text(SQL_RETRASO_REPLICA)).scalar()
+            except Exception as e:
+                # Solo al perderla (o si nunca respondió), no en cada verificación
+                if self._retraso_replica is not None or self._replica_verificada == float("-inf"):
+                    logger.warning(f"Réplica de lectura no disponible, se lee de la primaria: {e}")
+                retraso = None
+            self._retraso_replica = None if retraso is None else float(retraso)
+            self._replica_hasta = medido_en - self._retraso_replica if retraso is not None else 0.0
+            self._replica_verificada = time.monotonic()
+        finally:
+            self._lock_replica.release()
+
+    def _motivo_primaria(self, ultima_escritura: float) -> Optional[str]:
+        """Por qué una lectura no puede ir a la réplica (None si puede)"""
+        if self.url_lectura is None:
+            return "sin_replica"
+        self._verificar_replica()
+        if self._retraso_replica is None or self._retraso_replica > settings.REPLICA_RETRASO_MAXIMO:
+            return "retraso"
+        # Lectura de lo propio: "sin retraso" solo dice que la réplica aplicó
+        # lo que recibió, así que además la escritura debe tener la antigüedad
+        # tolerada
+        if ultima_escritura > min(self._replica_hasta, time.time() - settings.REPLICA_RETRASO_MAXIMO):
+            return "escritura_reciente"
+        return None
+
+    def create_tables(self):
+        """
+        Crear o actualizar el esquema aplicando las migraciones pendientes
+        (src/migrations/NNNN_*.sql, registradas en schema_version)
+        """
+        from src.migrations import aplicar_migraciones
+
+        return aplicar_migraciones(self.engine)
     
     def get_session(self) -> Session:
         return Session(self.engine)
@@ -98,5 +156,23 @@ class DatabaseManager:
     def get_engine(self):
         return self.engine
 
+    def get_read_session(self, ultima_escritura: float = 0.0) -> Session:
+        """
+        Sesión para consultas de solo lectura: en la réplica si está al día
+        (retraso de hasta REPLICA_RETRASO_MAXIMO segundos) y la última
+        escritura del usuario (su time.time()) ya le llegó; si no, en la
+        primaria
+        """
+        motivo = self._motivo_primaria(ultima_escritura)
+        if motivo is None:
+            SESIONES_LECTURA.inc(destino="replica", motivo="replica")
+            return Session(self.engine_lectura)
+        SESIONES_LECTURA.inc(destino="primaria", motivo=motivo)
+        return Session(self.engine)
+
+    def get_read_engine(self):
+        """Engine para lecturas largas de los scripts (reportes, verificaciones), con el mismo criterio"""
+        return self.engine if self._motivo_primaria(0.0) else self.engine_lectura
+
 # Instancia global del manager de base de datos
-db_manager = DatabaseManager(engine)
+db_manager = DatabaseManager(url_database, settings.DATABASE_READ_URL)
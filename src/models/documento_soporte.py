@@ -0,0 +1,27 @@
+"""
+Documento de Soporte
+====================
+
+Archivo subido (recibo, factura, consignación) guardado una sola vez por
+contenido: la ruta se deriva del SHA-256. referencias la mantienen los
+triggers de src/migrations/0006_documento_soporte.sql a partir de los
+movimientos y gastos que apuntan al documento.
+"""
+
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+from typing import Optional
+
+
+class DocumentoSoporte(SQLModel, table=True):
+    __tablename__ = "documento_soporte"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    sha256: str = Field(max_length=64, unique=True, description="SHA-256 del contenido, en hexadecimal")
+    ruta: str = Field(max_length=512, description="Ruta relativa a UPLOADS_DIR")
+    tamaño: int = Field(description="Tamaño en bytes")
+    tipo_contenido: Optional[str] = Field(default=None, max_length=255)
+    nombre_original: Optional[str] = Field(default=None, max_length=255, description="Nombre de la primera subida")
+    referencias: int = Field(default=0, description="Movimientos y gastos que lo usan (mantenido por triggers)")
+    creado_en: datetime = Field(default_factory=datetime.utcnow)
+    ultimo_uso: datetime = Field(default_factory=datetime.utcnow)
@@ -11,3 +11,8 @@ class TipoMovimientoEnum(str, Enum):
 class TipoItemPresupuestoEnum(str, Enum):
     INGRESO = "INGRESO"
     GASTO = "GASTO"
+
+class EstadoPagoReportadoEnum(str, Enum):
+    PENDIENTE = "PENDIENTE"  # Reportado por el propietario, sin validar
+    APROBADO = "APROBADO"  # Registrado en el libro
+    RECHAZADO = "RECHAZADO"
@@ -16,6 +16,7 @@ class GastoComunidad(SQLModel, table=True):
     descripcion_adicional: Optional[str] = None
     monto: Decimal = Field(decimal_places=2, max_digits=12)
     documento_soporte_path: Optional[str] = Field(default=None, max_length=512)
+    documento_soporte_id: Optional[int] = Field(default=None, foreign_key="documento_soporte.id")
     presupuesto_anual_id: Optional[int] = Field(default=None, foreign_key="presupuesto_anual.id")
     mes_gasto: Optional[int] = Field(default=None, ge=1, le=12)
     año_gasto: int
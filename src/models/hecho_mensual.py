@@ -0,0 +1,30 @@
+"""
+Hecho Mensual del Libro
+=======================
+
+Débitos, créditos y número de movimientos por apartamento, concepto y
+período (año/mes aplicable). Mantenido por triggers
+(src/migrations/0013_hecho_mensual.sql); los reportes lo leen en lugar de
+agrupar registro_financiero_apartamento.
+"""
+
+from sqlmodel import SQLModel, Field, Index
+from datetime import datetime
+from decimal import Decimal
+
+
+class HechoMensual(SQLModel, table=True):
+    __tablename__ = "hecho_mensual"
+    __table_args__ = (
+        # Reportes de un período para todos los apartamentos
+        Index('idx_hecho_mensual_periodo', 'año', 'mes', 'concepto_id'),
+    )
+
+    apartamento_id: int = Field(primary_key=True, foreign_key="apartamento.id")
+    concepto_id: int = Field(primary_key=True, foreign_key="concepto.id")
+    año: int = Field(primary_key=True)
+    mes: int = Field(primary_key=True)
+    debitos: Decimal = Field(default=0, max_digits=14, decimal_places=2)
+    creditos: Decimal = Field(default=0, max_digits=14, decimal_places=2)
+    movimientos: int = Field(default=0, description="Movimientos del libro agregados en la fila")
+    actualizado_en: datetime = Field(default_factory=datetime.utcnow)
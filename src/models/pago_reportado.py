@@ -0,0 +1,34 @@
+"""
+Pago Reportado
+==============
+
+Pago que el propietario dice haber hecho, pendiente de que la administración
+lo valide. No afecta saldos: al aprobarse (en la cola de /admin/pagos/reportados
+o al conciliarse con el extracto) se registra en el libro con el distribuidor
+de pagos, y pago_referencia guarda la referencia_pago de ese registro.
+"""
+
+from sqlmodel import SQLModel, Field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional
+from .enums import EstadoPagoReportadoEnum
+
+
+class PagoReportado(SQLModel, table=True):
+    __tablename__ = "pago_reportado"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    apartamento_id: int = Field(foreign_key="apartamento.id")
+    usuario_id: Optional[int] = Field(default=None, foreign_key="usuario.id", description="Quién lo reportó")
+    monto: Decimal = Field(decimal_places=2, max_digits=12)
+    fecha_pago: date
+    metodo_pago: str = Field(max_length=50)
+    referencia: Optional[str] = Field(default=None, max_length=255, description="Comprobante que informa el propietario")
+    observaciones: Optional[str] = None
+    estado: EstadoPagoReportadoEnum = Field(default=EstadoPagoReportadoEnum.PENDIENTE)
+    motivo_rechazo: Optional[str] = None
+    pago_referencia: Optional[str] = Field(default=None, max_length=255, description="referencia_pago del pago registrado")
+    revisado_por: Optional[int] = Field(default=None, foreign_key="usuario.id")
+    revisado_en: Optional[datetime] = None
+    creado_en: datetime = Field(default_factory=datetime.utcnow)
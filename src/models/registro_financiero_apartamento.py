@@ -2,7 +2,7 @@ from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime, date
 from decimal import Decimal
 from typing import Optional, TYPE_CHECKING
-from sqlalchemy import Column, Index
+from sqlalchemy import Column, Index, text
 from .enums import TipoMovimientoEnum
 
 if TYPE_CHECKING:
@@ -77,12 +77,26 @@ class RegistroFinancieroApartamento(SQLModel, table=True):
         description="Ruta al archivo digital de soporte (VARCHAR(512))"
     )
     
+    documento_soporte_id: Optional[int] = Field(
+        default=None,
+        foreign_key="documento_soporte.id",
+        description="Documento de soporte direccionado por contenido (BIGINT, ver 0006_documento_soporte.sql)"
+    )
+    
     referencia_pago: Optional[str] = Field(
         default=None, 
         max_length=100,
         description="Referencia del pago: Nro de consignación, ID de transacción, etc. (VARCHAR(100))"
     )
 
+    saldo_acumulado: Optional[Decimal] = Field(
+        default=None,
+        decimal_places=2,
+        max_digits=14,
+        description="Saldo del apartamento después de este movimiento (DECIMAL(14, 2)). "
+                    "Lo mantiene un trigger de PostgreSQL; no se asigna desde la aplicación"
+    )
+
     # Relaciones
     apartamento: "Apartamento" = Relationship(back_populates="registros_financieros")
     concepto: "Concepto" = Relationship(back_populates="registros_financieros")
@@ -115,4 +129,6 @@ class RegistroFinancieroApartamento(SQLModel, table=True):
         Index('idx_rfa_fecha_efectiva', 'fecha_efectiva'),
         Index('idx_rfa_concepto_id', 'concepto_id'),
         Index('idx_rfa_mes_año_aplicable', 'año_aplicable', 'mes_aplicable'),
+        # Búsqueda del saldo a una fecha: un solo index seek por apartamento
+        Index('idx_rfa_apartamento_fecha_id', 'apartamento_id', text('fecha_efectiva DESC'), text('id DESC')),
     )
@@ -0,0 +1,18 @@
+"""
+Versión del Libro por Apartamento
+=================================
+
+Mantenida por triggers (src/migrations/0005_version_libro.sql): cambia cada
+vez que se insertan, modifican o borran movimientos del apartamento.
+"""
+
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+
+
+class VersionLibroApartamento(SQLModel, table=True):
+    __tablename__ = "version_libro_apartamento"
+
+    apartamento_id: int = Field(primary_key=True, foreign_key="apartamento.id")
+    version: int = Field(description="Valor de version_libro_seq asignado en el último cambio")
+    actualizado_en: datetime = Field(default_factory=datetime.utcnow)
@@ -1,6 +1,18 @@
+"""
+Routers de la aplicación
+auth (login) se registra al iniciar; los demás se importan con la primera
+petición bajo su prefijo (ver src/utils/rutas_diferidas.py), para que un
+arranque en frío solo cargue lo que la petición necesita.
+"""
 from .auth import router as auth_router
-from .admin import router as admin_router
-from .admin_pagos import router as admin_pagos_router
-from .propietario import router as propietario_router
 
-__all__ = ["auth_router", "admin_router", "admin_pagos_router", "propietario_router"]
+# (prefijo, módulo que define `router`), en el orden de registro
+ROUTERS_DIFERIDOS = (
+    ("/admin", "src.routes.admin"),
+    ("/admin/pagos", "src.routes.admin_pagos"),
+    ("/propietario", "src.routes.propietario"),
+    ("/api", "src.routes.api"),
+    ("/documentos", "src.routes.documentos"),
+)
+
+__all__ = ["auth_router", "ROUTERS_DIFERIDOS"]
@@ -1,15 +1,17 @@
 from fastapi import APIRouter, Request, Form, HTTPException, status, Depends, File, UploadFile
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from sqlmodel import Session, select, func
 from typing import Optional, List
 from datetime import datetime, date
 from src.models import (
     db_manager, Usuario, Propietario, Apartamento, Concepto,
     PresupuestoAnual, RolUsuarioEnum, TipoMovimientoEnum,
-    RegistroFinancieroApartamento, ItemPresupuesto, TipoItemPresupuestoEnum
+    RegistroFinancieroApartamento, ItemPresupuesto, TipoItemPresupuestoEnum, HechoMensual
 )
 from src.dependencies import templates, require_admin, get_db_session
-from src.utils import guardar_documento
+from src.utils import DocumentoDemasiadoGrande, guardar_documento
+from src.services.documentos import registrar_documento
+from src.utils.contrasenas import hashear_async
 
 router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
 
@@ -37,10 +39,9 @@ async def admin_dashboard(request: Request):
         año_actual = datetime.now().year
         
         total_ingresos = session.exec(
-            select(func.sum(RegistroFinancieroApartamento.monto))
-            .where(RegistroFinancieroApartamento.tipo_movimiento == TipoMovimientoEnum.CREDITO.value)
-            .where(RegistroFinancieroApartamento.mes_aplicable == mes_actual)
-            .where(RegistroFinancieroApartamento.año_aplicable == año_actual)
+            select(func.sum(HechoMensual.creditos))
+            .where(HechoMensual.año == año_actual)
+            .where(HechoMensual.mes == mes_actual)
         ).first() or 0
         
         # Crear objeto stats con todas las estadísticas que necesita el template
@@ -92,6 +93,22 @@ async def admin_apartamentos(request: Request):
             "propietarios": propietarios
         })
 
+@router.get("/buscar", response_class=HTMLResponse)
+async def admin_buscar(request: Request, q: str = ""):
+    """Búsqueda global de propietarios, apartamentos y referencias de pago"""
+    from src.services.busqueda import buscar
+
+    resultados = []
+    if q.strip():
+        with get_db_session() as session:
+            resultados = buscar(session, q, limite=100)
+
+    return templates.TemplateResponse("admin/busqueda.html", {
+        "request": request,
+        "q": q,
+        "resultados": resultados
+    })
+
 @router.get("/finanzas", response_class=HTMLResponse)
 async def admin_finanzas(request: Request):
     """Vista de finanzas"""
@@ -114,6 +131,54 @@ async def admin_finanzas(request: Request):
             "registros_recientes": registros_recientes
         })
 
+@router.get("/presupuestos/ejecucion", response_class=HTMLResponse)
+async def admin_ejecucion_presupuestal(request: Request, año: Optional[int] = None, mes: Optional[int] = None,
+                                       recalculados: Optional[int] = None):
+    """Presupuesto contra ejecución por concepto, al corte de un mes"""
+    from src.services.ejecucion_presupuestal import MESES, ejecucion_anual
+
+    hoy = date.today()
+    año = año or hoy.year
+    mes = min(max(mes or (hoy.month if año == hoy.year else 12), 1), 12)
+    with get_db_session() as session:
+        reporte = ejecucion_anual(session, año)
+
+    return templates.TemplateResponse("admin/presupuesto_ejecucion.html", {
+        "request": request,
+        "reporte": reporte,
+        "año": año,
+        "mes": mes,
+        "meses": MESES,
+        "años": range(hoy.year - 5, hoy.year + 2),
+        "recalculados": recalculados
+    })
+
+@router.get("/presupuestos/ejecucion.csv")
+async def exportar_ejecucion_presupuestal(año: int):
+    """Ejecución del año completa (concepto y mes) en CSV"""
+    from src.services.ejecucion_presupuestal import ejecucion_anual, exportar_csv
+
+    with get_db_session() as session:
+        contenido = exportar_csv(ejecucion_anual(session, año))
+    # BOM: Excel abre el archivo como UTF-8
+    return Response(
+        "\ufeff" + contenido,
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="ejecucion_presupuestal_{año}.csv"'}
+    )
+
+@router.post("/presupuestos/ejecucion/recalcular")
+async def recalcular_ejecucion_presupuestal(año: int = Form(...)):
+    """Descarta los meses guardados del año (ej. tras corregir movimientos antiguos)"""
+    from src.services.ejecucion_presupuestal import invalidar
+
+    with get_db_session() as session:
+        descartados = invalidar(session, año)
+    return RedirectResponse(
+        f"/admin/presupuestos/ejecucion?año={año}&recalculados={descartados}",
+        status_code=status.HTTP_302_FOUND
+    )
+
 @router.post("/propietarios/crear")
 async def crear_propietario(
     request: Request,
@@ -141,7 +206,7 @@ async def crear_propietario(
         # Crear usuario
         nuevo_usuario = Usuario(
             username=username,
-            password=password,
+            hashed_password=await hashear_async(password),
             nombre_completo=nombre_completo,
             email=email,
             rol=RolUsuarioEnum.PROPIETARIO
@@ -482,11 +547,16 @@ async def crear_registro_financiero(
     documento_soporte: Optional[UploadFile] = File(None)
 ):
     """Crear nuevo registro financiero"""
-    ruta_documento = None
+    documento = None
     if documento_soporte and documento_soporte.filename:
-        ruta_documento = guardar_documento(documento_soporte, "registros_financieros")
+        try:
+            documento = await guardar_documento(documento_soporte)
+        except DocumentoDemasiadoGrande as e:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
     
     with get_db_session() as session:
+        # El documento y el movimiento que lo referencia, en la misma transacción
+        documento_id = registrar_documento(session, documento) if documento else None
         nuevo_registro = RegistroFinancieroApartamento(
             apartamento_id=apartamento_id,
             concepto_id=concepto_id,
@@ -497,7 +567,8 @@ async def crear_registro_financiero(
             año_aplicable=año_aplicable,
             referencia_pago=referencia_pago,
             descripcion_adicional=descripcion_adicional,
-            ruta_documento_soporte=ruta_documento,
+            documento_soporte_path=documento.ruta if documento else None,
+            documento_soporte_id=documento_id,
             fecha_creacion=datetime.now()
         )
         session.add(nuevo_registro)
@@ -1,5 +1,9 @@
-from fastapi import APIRouter, Request, Form, HTTPException, status, Depends
+import json
+from decimal import Decimal
+from fastapi import APIRouter, Request, Form, HTTPException, status, Depends, File, UploadFile, Query
+from starlette.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse, RedirectResponse
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select, func
 from typing import Optional, List
 from datetime import datetime, date
@@ -8,7 +12,9 @@ from src.models import (
     RegistroFinancieroApartamento, CuotaConfiguracion,
     TasaInteresMora, ControlProcesamientoMensual
 )
-from src.dependencies import templates, require_admin, get_db_session
+from src.dependencies import templates, require_admin, get_db_session, get_db_read_session
+from src.services.ejecucion_presupuestal import MESES
+from src.services.tableros import indicadores_pagos, reporte_recaudacion
 
 router = APIRouter(prefix="/admin/pagos", dependencies=[Depends(require_admin)])
 
@@ -41,89 +47,9 @@ async def admin_pagos(
             session.commit()
             session.refresh(concepto_cuota)
         
-        # Obtener todos los apartamentos
-        apartamentos = session.exec(select(Apartamento)).all()
-        total_apartamentos = len(apartamentos)
-        
-        # Calcular total a recaudar basado en configuraciones
-        total_a_recaudar = 0
-        configuraciones_mes = session.exec(
-            select(CuotaConfiguracion)
-            .where(CuotaConfiguracion.mes == mes)
-            .where(CuotaConfiguracion.año == año)
-        ).all()
-        
-        # Si hay configuraciones específicas, usar esos montos
-        if configuraciones_mes:
-            total_a_recaudar = sum(config.monto_cuota_ordinaria_mensual for config in configuraciones_mes)
-        else:
-            # Si no hay configuraciones, usar un monto por defecto o buscar en meses anteriores
-            config_anterior = session.exec(
-                select(CuotaConfiguracion)
-                .order_by(CuotaConfiguracion.año.desc(), CuotaConfiguracion.mes.desc())
-                .limit(1)
-            ).first()
-            
-            if config_anterior:
-                # Usar el último monto configurado para todos los apartamentos
-                total_a_recaudar = config_anterior.monto_cuota_ordinaria_mensual * total_apartamentos
-            else:
-                # Valor por defecto si no hay configuraciones
-                total_a_recaudar = 100000.0 * total_apartamentos  # Monto por defecto por apartamento
-        
-        # Obtener pagos realizados este mes
-        pagos_mes = []
-        total_recaudado = 0
-        apartamentos_pagados = 0
-        apartamentos_pendientes = []
-        
-        if concepto_cuota:
-            # Pagos realizados este mes
-            pagos_mes = session.exec(
-                select(RegistroFinancieroApartamento)
-                .where(RegistroFinancieroApartamento.concepto_id == concepto_cuota.id)
-                .where(RegistroFinancieroApartamento.tipo_movimiento == TipoMovimientoEnum.CREDITO.value)
-                .where(RegistroFinancieroApartamento.mes_aplicable == mes)
-                .where(RegistroFinancieroApartamento.año_aplicable == año)
-            ).all()
-            
-            total_recaudado = sum(pago.monto for pago in pagos_mes)
-            apartamentos_pagados = len(set(pago.apartamento_id for pago in pagos_mes))
-            
-            # Apartamentos que han pagado este mes
-            apartamentos_ids_pagados = {pago.apartamento_id for pago in pagos_mes}
-            
-            # Apartamentos pendientes de pago
-            apartamentos_pendientes = [
-                apt for apt in apartamentos 
-                if apt.id not in apartamentos_ids_pagados
-            ]
-        
-        # Generar datos para el gráfico
-        meses_labels = []
-        recaudacion_data = []
-        
-        for i in range(6):  # Últimos 6 meses
-            mes_calc = mes - i
-            año_calc = año
-            if mes_calc <= 0:
-                mes_calc += 12
-                año_calc -= 1
-            
-            meses_labels.insert(0, f"{mes_calc:02d}/{año_calc}")
-            
-            recaudado_mes = session.exec(
-                select(func.sum(RegistroFinancieroApartamento.monto))
-                .where(RegistroFinancieroApartamento.concepto_id == concepto_cuota.id)
-                .where(RegistroFinancieroApartamento.tipo_movimiento == TipoMovimientoEnum.CREDITO.value)
-                .where(RegistroFinancieroApartamento.mes_aplicable == mes_calc)
-                .where(RegistroFinancieroApartamento.año_aplicable == año_calc)
-            ).first() or 0
-            
-            recaudacion_data.insert(0, float(recaudado_mes))
-        
-        # Calcular porcentaje de recaudo basado en monto, no en número de apartamentos
-        porcentaje_recaudado = round((total_recaudado / total_a_recaudar * 100) if total_a_recaudar > 0 else 0, 1)
+        # Indicadores del mes en una sola consulta; la serie del gráfico se
+        # pide a /api/admin/pagos/serie-recaudacion después del primer pintado
+        indicadores = indicadores_pagos(session, mes, año)
         
         # Obtener información del procesamiento automático V3
         control_v3 = session.exec(
@@ -139,19 +65,15 @@ async def admin_pagos(
                 "request": request,
                 "mes_actual": mes,
                 "año_actual": año,
-                "total_apartamentos": total_apartamentos,
-                "apartamentos_pagados": apartamentos_pagados,
-                "apartamentos_pendientes": len(apartamentos_pendientes),
-                "total_recaudado": total_recaudado,
-                "total_a_recaudar": total_a_recaudar,
-                "porcentaje_recaudacion": round((apartamentos_pagados / total_apartamentos * 100) if total_apartamentos > 0 else 0, 1),
-                "porcentaje_recaudado": porcentaje_recaudado,
-                "apartamentos_pendientes_lista": apartamentos_pendientes,
-                "pagos_mes": pagos_mes,
-                "meses_labels": meses_labels,
-                "recaudacion_data": recaudacion_data,
-                "apartamentos_configurados": len(configuraciones_mes),
-                "apartamentos_con_cargo": len(configuraciones_mes),
+                "total_apartamentos": indicadores["total_apartamentos"],
+                "apartamentos_pagados": indicadores["apartamentos_pagados"],
+                "apartamentos_pendientes": indicadores["apartamentos_pendientes"],
+                "total_recaudado": indicadores["total_recaudado"],
+                "total_a_recaudar": indicadores["total_a_recaudar"],
+                "porcentaje_recaudacion": indicadores["porcentaje_recaudacion"],
+                "porcentaje_recaudado": indicadores["porcentaje_recaudado"],
+                "apartamentos_configurados": indicadores["apartamentos_configurados"],
+                "apartamentos_con_cargo": indicadores["apartamentos_configurados"],
                 "concepto_cuota": concepto_cuota,
                 "control_v3": control_v3
             }
@@ -478,60 +400,35 @@ async def admin_pagos_reportes(
     mes: Optional[int] = None,
     año: Optional[int] = None
 ):
-    """Reportes del sistema de pagos"""
+    """Reportes del sistema de pagos: recaudación del año y deudores"""
     # Usar mes y año actuales si no se especifican
     if not mes:
         mes = datetime.now().month
     if not año:
         año = datetime.now().year
     
-    with get_db_session() as session:
-        # Obtener el concepto de cuota ordinaria
-        concepto_cuota = session.exec(
-            select(Concepto).where(Concepto.nombre.ilike("%cuota%ordinaria%administr%"))
-        ).first()
-        
-        # Obtener todos los apartamentos con sus pagos
-        apartamentos = session.exec(select(Apartamento)).all()
-        
-        reporte_apartamentos = []
-        total_cargado = 0
-        total_pagado = 0
+    with get_db_read_session(request) as session:
+        reporte = reporte_recaudacion(session, año)
+        total_apartamentos = session.exec(select(func.count(Apartamento.id))).one()
+        
+        # Solo se cargan los apartamentos del top de deudores
+        deudores = reporte["top_deudores"]
+        apartamentos = {
+            apartamento.id: apartamento
+            for apartamento in session.exec(
+                select(Apartamento)
+                .where(Apartamento.id.in_([d["apartamento_id"] for d in deudores]))
+                .options(selectinload(Apartamento.propietario))
+            ).all()
+        } if deudores else {}
+        top_deudores = [
+            {**deudor, "apartamento": apartamentos[deudor["apartamento_id"]]}
+            for deudor in deudores
+        ]
         
-        for apartamento in apartamentos:
-            # Cargos del mes
-            cargos = session.exec(
-                select(func.sum(RegistroFinancieroApartamento.monto))
-                .where(RegistroFinancieroApartamento.apartamento_id == apartamento.id)
-                .where(RegistroFinancieroApartamento.concepto_id == concepto_cuota.id)
-                .where(RegistroFinancieroApartamento.tipo_movimiento == TipoMovimientoEnum.DEBITO.value)
-                .where(RegistroFinancieroApartamento.mes_aplicable == mes)
-                .where(RegistroFinancieroApartamento.año_aplicable == año)
-            ).first() or 0
-            
-            # Pagos del mes
-            pagos = session.exec(
-                select(func.sum(RegistroFinancieroApartamento.monto))
-                .where(RegistroFinancieroApartamento.apartamento_id == apartamento.id)
-                .where(RegistroFinancieroApartamento.concepto_id == concepto_cuota.id)
-                .where(RegistroFinancieroApartamento.tipo_movimiento == TipoMovimientoEnum.CREDITO.value)
-                .where(RegistroFinancieroApartamento.mes_aplicable == mes)
-                .where(RegistroFinancieroApartamento.año_aplicable == año)
-            ).first() or 0
-            
-            saldo = float(pagos) - float(cargos)
-            estado = "Pagado" if saldo >= 0 else "Pendiente"
-            
-            reporte_apartamentos.append({
-                "apartamento": apartamento,
-                "cargos": float(cargos),
-                "pagos": float(pagos),
-                "saldo": saldo,
-                "estado": estado
-            })
-            
-            total_cargado += float(cargos)
-            total_pagado += float(pagos)
+        analisis_mensual = [
+            {**datos, "nombre_mes": MESES[datos["mes"]]} for datos in reporte["analisis_mensual"]
+        ]
         
         return templates.TemplateResponse(
             "admin/pagos_reportes.html",
@@ -539,11 +436,19 @@ async def admin_pagos_reportes(
                 "request": request,
                 "mes_actual": mes,
                 "año_actual": año,
-                "reporte_apartamentos": reporte_apartamentos,
-                "total_cargado": total_cargado,
-                "total_pagado": total_pagado,
-                "total_pendiente": total_cargado - total_pagado,
-                "porcentaje_recaudacion": round((total_pagado / total_cargado * 100) if total_cargado > 0 else 0, 1)
+                "analisis_mensual": analisis_mensual,
+                "top_deudores": top_deudores,
+                "total_cargos_año": reporte["total_cargos"],
+                "total_pagos_año": reporte["total_pagos"],
+                "total_esperado_año": reporte["total_esperado"],
+                "total_recaudado_año": reporte["total_recaudado"],
+                "total_pendiente": reporte["total_pendiente"],
+                "porcentaje_recaudacion": reporte["porcentaje_recaudacion"],
+                "apartamentos_al_dia": total_apartamentos - reporte["apartamentos_en_mora"] - reporte["apartamentos_criticos"],
+                "apartamentos_en_mora": reporte["apartamentos_en_mora"],
+                "apartamentos_criticos": reporte["apartamentos_criticos"],
+                "monto_esperado_mensual": json.dumps([float(m["monto_esperado"]) for m in analisis_mensual]),
+                "monto_recaudado_mensual": json.dumps([float(m["monto_recaudado"]) for m in analisis_mensual]),
             }
         )
 
@@ -762,3 +667,139 @@ async def obtener_resumen_deuda(apartamento_id: int):
         return resumen
     except Exception as e:
         return {"error": str(e)}
+
+def _conciliar(archivo, nombre: Optional[str]):
+    from src.services.conciliacion import conciliar_extracto
+
+    with get_db_session() as session:
+        return conciliar_extracto(session, archivo, nombre)
+
+def _asignar(asignaciones):
+    from src.services.conciliacion import asignar_manualmente
+
+    with get_db_session() as session:
+        return asignar_manualmente(session, asignaciones)
+
+def _pagina_conciliacion(request: Request, **contexto):
+    with get_db_session() as session:
+        apartamentos = session.exec(select(Apartamento).order_by(Apartamento.identificador)).all()
+    return templates.TemplateResponse("admin/pagos_conciliacion.html", {
+        "request": request,
+        "apartamentos": apartamentos,
+        "resultado": None,
+        "asignacion": None,
+        "error": None,
+        **contexto
+    })
+
+@router.get("/conciliacion", response_class=HTMLResponse)
+async def admin_pagos_conciliacion(request: Request):
+    """Página para subir un extracto bancario"""
+    return _pagina_conciliacion(request)
+
+@router.post("/conciliacion", response_class=HTMLResponse)
+async def conciliar_extracto_bancario(
+    request: Request,
+    extracto: UploadFile = File(...)
+):
+    """Concilia un extracto (CSV u OFX) y aplica en lote los pagos asignados"""
+    from src.services.conciliacion import ExtractoInvalido
+
+    try:
+        # Lectura, índices y lote fuera del event loop
+        resultado = await run_in_threadpool(_conciliar, extracto.file, extracto.filename)
+    except ExtractoInvalido as e:
+        return _pagina_conciliacion(request, error=str(e))
+    return _pagina_conciliacion(request, resultado=resultado)
+
+@router.post("/conciliacion/asignar", response_class=HTMLResponse)
+async def asignar_lineas_extracto(request: Request):
+    """Aplica las líneas sin asignar a las que el administrador eligió apartamento"""
+    from src.services.conciliacion import LineaExtracto
+
+    formulario = await request.form()
+    asignaciones = []
+    for numero, clave, fecha, monto, referencia, descripcion, apartamento_id in zip(
+        formulario.getlist("numero"), formulario.getlist("clave"), formulario.getlist("fecha"),
+        formulario.getlist("monto"), formulario.getlist("referencia"), formulario.getlist("descripcion"),
+        formulario.getlist("apartamento_id")
+    ):
+        if apartamento_id:
+            linea = LineaExtracto(int(numero), date.fromisoformat(fecha), Decimal(monto),
+                                  referencia, descripcion, clave)
+            asignaciones.append((linea, int(apartamento_id)))
+
+    asignacion = await run_in_threadpool(_asignar, asignaciones) if asignaciones else None
+    return _pagina_conciliacion(request, asignacion=asignacion)
+
+@router.get("/reportados", response_class=HTMLResponse)
+async def admin_pagos_reportados(
+    request: Request,
+    estado: str = "PENDIENTE",
+    pagina: int = Query(1, ge=1),
+    aprobados: Optional[int] = None,
+    movimientos: Optional[int] = None,
+    rechazados: Optional[int] = None,
+    omitidos: Optional[int] = None
+):
+    """Cola de pagos reportados por los propietarios"""
+    from src.services import pagos_reportados
+
+    if estado not in ("PENDIENTE", "APROBADO", "RECHAZADO"):
+        raise HTTPException(status_code=422, detail="Estado inválido")
+
+    with get_db_session() as session:
+        cola = pagos_reportados.cola(session, estado, pagina)
+
+    return templates.TemplateResponse("admin/pagos_reportados.html", {
+        "request": request,
+        "estado": estado,
+        "cola": cola,
+        "aprobados": aprobados,
+        "movimientos": movimientos,
+        "rechazados": rechazados,
+        "omitidos": omitidos
+    })
+
+def _aprobar_reportes(ids: List[int], usuario_id: int):
+    from src.services.pagos_reportados import aprobar
+
+    with get_db_session() as session:
+        return aprobar(session, ids, usuario_id)
+
+@router.post("/reportados/aprobar")
+async def aprobar_pagos_reportados(
+    request: Request,
+    reporte_id: List[int] = Form([])
+):
+    """Aprueba la selección y registra todos los pagos en una transacción"""
+    user = require_admin(request)
+    resultado = {"aprobados": 0, "movimientos": 0, "omitidos": 0}
+    if reporte_id:
+        resultado = await run_in_threadpool(_aprobar_reportes, reporte_id, user.id)
+
+    return RedirectResponse(
+        url=(f"/admin/pagos/reportados?aprobados={resultado['aprobados']}"
+             f"&movimientos={resultado['movimientos']}&omitidos={resultado['omitidos']}"),
+        status_code=status.HTTP_302_FOUND
+    )
+
+@router.post("/reportados/rechazar")
+async def rechazar_pagos_reportados(
+    request: Request,
+    reporte_id: List[int] = Form([]),
+    motivo: Optional[str] = Form(None)
+):
+    """Rechaza la selección; no toca el libro"""
+    from src.services.pagos_reportados import rechazar
+
+    user = require_admin(request)
+    rechazados = 0
+    if reporte_id:
+        with get_db_session() as session:
+            rechazados = rechazar(session, reporte_id, user.id, motivo or None)
+
+    return RedirectResponse(
+        url=f"/admin/pagos/reportados?rechazados={rechazados}&omitidos={len(reporte_id) - rechazados}",
+        status_code=status.HTTP_302_FOUND
+    )
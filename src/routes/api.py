@@ -0,0 +1,117 @@
+"""
+API JSON de solo lectura para los tableros
+Las páginas renderizan primero lo visible y piden aquí las series de los
+gráficos y los movimientos después del primer pintado. Las respuestas se
+serializan con orjson directamente desde filas Core, sin pasar por
+jsonable_encoder ni por objetos del ORM. Todas son lecturas: van a la réplica
+cuando está configurada (get_db_read_session).
+"""
+from datetime import date
+from decimal import Decimal
+from typing import Any, Optional
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
+
+from src.dependencies import require_admin, require_propietario, get_db_read_session
+from src.services import tableros
+
+router = APIRouter(prefix="/api", default_response_class=ORJSONResponse)
+
+
+def _serializar_decimal(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError
+
+
+class RespuestaJSON(ORJSONResponse):
+    """ORJSONResponse que además serializa Decimal (montos de la base) como número"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_serializar_decimal, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _mes_y_año(mes: Optional[int], año: Optional[int]) -> tuple:
+    hoy = date.today()
+    return mes or hoy.month, año or hoy.year
+
+
+@router.get("/admin/pagos/indicadores", dependencies=[Depends(require_admin)])
+async def api_indicadores_pagos(
+    request: Request,
+    mes: Optional[int] = Query(None, ge=1, le=12),
+    año: Optional[int] = None
+):
+    """Indicadores del mes del tablero de pagos"""
+    mes, año = _mes_y_año(mes, año)
+    with get_db_read_session(request) as session:
+        return RespuestaJSON(tableros.indicadores_pagos(session, mes, año))
+
+
+@router.get("/admin/pagos/serie-recaudacion", dependencies=[Depends(require_admin)])
+async def api_serie_recaudacion(
+    request: Request,
+    mes: Optional[int] = Query(None, ge=1, le=12),
+    año: Optional[int] = None,
+    meses: int = Query(6, ge=1, le=36)
+):
+    """Cargado y recaudado de la cuota ordinaria en los meses que terminan en mes/año"""
+    mes, año = _mes_y_año(mes, año)
+    with get_db_read_session(request) as session:
+        return RespuestaJSON(tableros.serie_recaudacion(session, mes, año, meses))
+
+
+@router.get("/admin/buscar", dependencies=[Depends(require_admin)])
+async def api_buscar(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100),
+    limite: int = Query(8, ge=1, le=50)
+):
+    """Sugerencias de la búsqueda global (typeahead del menú)"""
+    from src.services.busqueda import buscar
+
+    with get_db_read_session(request) as session:
+        return RespuestaJSON(buscar(session, q, limite))
+
+
+@router.get("/propietario/resumen")
+async def api_resumen_propietario(request: Request):
+    """Saldo, cuota actual y total pagado de los apartamentos del propietario"""
+    user, propietario = require_propietario(request)
+    with get_db_read_session(request) as session:
+        return RespuestaJSON(tableros.resumen_propietario(session, propietario.id))
+
+
+@router.get("/propietario/movimientos")
+async def api_movimientos_propietario(
+    request: Request,
+    apartamento: Optional[int] = None,
+    fecha_corte: Optional[date] = None,
+    antes_de_fecha: Optional[date] = None,
+    antes_de_id: Optional[int] = None,
+    limite: int = Query(100, ge=1, le=500)
+):
+    """
+    Movimientos del estado de cuenta, del más reciente al más antiguo. Para la
+    página siguiente se envían la fecha y el id del último movimiento recibido.
+    """
+    user, propietario = require_propietario(request)
+    if (antes_de_fecha is None) != (antes_de_id is None):
+        raise HTTPException(status_code=422, detail="El cursor requiere antes_de_fecha y antes_de_id")
+
+    with get_db_read_session(request) as session:
+        movimientos = tableros.movimientos_propietario(
+            session,
+            propietario.id,
+            apartamento_id=apartamento,
+            fecha_corte=fecha_corte,
+            antes_de=(antes_de_fecha, antes_de_id) if antes_de_id is not None else None,
+            limite=limite,
+        )
+    siguiente = None
+    if len(movimientos) == limite:
+        ultimo = movimientos[-1]
+        siguiente = {"antes_de_fecha": ultimo["fecha_efectiva"], "antes_de_id": ultimo["id"]}
+    return RespuestaJSON({"movimientos": movimientos, "siguiente": siguiente})
@@ -1,7 +1,5 @@
 from fastapi import APIRouter, Request, Form, HTTPException, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlmodel import Session, select
-from src.models import db_manager, Usuario, RolUsuarioEnum
 from src.dependencies import templates
 
 router = APIRouter()
@@ -18,12 +16,19 @@ async def login(
     password: str = Form(...)
 ):
     """Procesar login de usuario"""
+    # Importación diferida: la página de login se sirve sin cargar los modelos
+    from sqlmodel import select
+    from src.models import db_manager, Usuario, RolUsuarioEnum
+    from src.utils.contrasenas import hashear_async, necesita_rehash, verificar_async
+
     with db_manager.get_session() as session:
         user = session.exec(
             select(Usuario).where(Usuario.username == username)
         ).first()
         
-        if not user or user.hashed_password != password:
+        # scrypt corre en el pool de trabajo, no en el event loop
+        valida = await verificar_async(password, user.hashed_password if user else None)
+        if not valida:
             return templates.TemplateResponse(
                 "login.html", 
                 {
@@ -32,6 +37,14 @@ async def login(
                 }
             )
         
+        # Claves en texto plano o con un costo anterior se actualizan ahora
+        # que se conoce la contraseña
+        if necesita_rehash(user.hashed_password):
+            user.hashed_password = await hashear_async(password)
+            session.add(user)
+            session.commit()
+            session.refresh(user)
+        
         # Guardar usuario en sesión
         request.session["user_id"] = user.id
         request.session["user_role"] = user.rol.value
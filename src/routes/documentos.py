@@ -0,0 +1,71 @@
+"""
+Descarga autenticada de documentos de soporte
+Los archivos viven fuera de /static (settings.UPLOADS_DIR). Cada descarga
+se autoriza con una sola consulta y se envía sin cargar el archivo en
+memoria: FileResponse lo transmite por trozos con soporte de Range/If-Range,
+o nginx lo envía con sendfile si DOCUMENTOS_X_ACCEL está configurado.
+"""
+import os
+from urllib.parse import quote
+
+import anyio
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import FileResponse, Response
+
+from src.config import settings
+from src.dependencies import get_db_session
+from src.services.documentos import documento_autorizado
+from src.utils import obtener_ruta_documento
+
+router = APIRouter(prefix="/documentos")
+
+# El contenido de un id nunca cambia (la ruta es su SHA-256)
+CACHE_CONTROL = "private, max-age=86400"
+
+
+def _coincide_etag(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidatos = [valor.strip().removeprefix("W/") for valor in if_none_match.split(",")]
+    return "*" in candidatos or etag in candidatos
+
+
+def _disposicion(nombre: str) -> str:
+    return f"inline; filename*=utf-8''{quote(nombre)}"
+
+
+@router.get("/{documento_id}")
+async def descargar_documento(documento_id: int, request: Request):
+    """Documento de soporte, si el usuario es administrador o propietario del movimiento"""
+    usuario_id = request.session.get("user_id")
+    if not usuario_id:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="No autenticado")
+
+    with get_db_session() as session:
+        documento = documento_autorizado(session, documento_id, usuario_id)
+    # Sin permiso responde igual que si no existiera
+    if not documento:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Documento no encontrado")
+
+    etag = f'"{documento["sha256"]}"'
+    headers = {
+        "etag": etag,
+        "cache-control": CACHE_CONTROL,
+        "content-disposition": _disposicion(documento["nombre_original"] or documento["sha256"]),
+    }
+    if _coincide_etag(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    tipo = documento["tipo_contenido"] or "application/octet-stream"
+    if settings.DOCUMENTOS_X_ACCEL:
+        # nginx atiende Range e If-Range sobre la location interna
+        headers["x-accel-redirect"] = settings.DOCUMENTOS_X_ACCEL.rstrip("/") + "/" + documento["ruta"]
+        return Response(headers=headers, media_type=tipo)
+
+    ruta = obtener_ruta_documento(documento["ruta"])
+    try:
+        estado = await anyio.to_thread.run_sync(os.stat, ruta)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Documento no encontrado")
+    return FileResponse(ruta, media_type=tipo, headers=headers, stat_result=estado)
@@ -3,11 +3,17 @@ from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlmodel import Session, select, func
 from typing import Optional
 from datetime import datetime, date
+from decimal import Decimal
 from src.models import (
     db_manager, Usuario, Propietario, Apartamento, Concepto,
-    TipoMovimientoEnum, RegistroFinancieroApartamento
+    TipoMovimientoEnum, RegistroFinancieroApartamento, PagoReportado
+)
+from src.dependencies import templates, require_propietario, get_db_session, get_db_read_session
+from src.services.saldos import saldo_a_fecha
+from src.services.tableros import cuotas_apartamento
+from src.services.cache_paginas import (
+    versiones_propietario, calcular_etag, respuesta_cacheada, guardar_respuesta
 )
-from src.dependencies import templates, require_propietario, get_db_session
 
 router = APIRouter(prefix="/propietario", dependencies=[Depends(require_propietario)])
 
@@ -16,7 +22,14 @@ async def propietario_dashboard(request: Request):
     """Dashboard del propietario"""
     user, propietario = require_propietario(request)
     
-    with get_db_session() as session:
+    with get_db_read_session(request) as session:
+        # Si el libro de sus apartamentos no cambió, no se vuelve a calcular la página
+        versiones = versiones_propietario(session, propietario.id)
+        etag = calcular_etag("dashboard", user.id, versiones, {})
+        cacheada = respuesta_cacheada(request, "dashboard", etag)
+        if cacheada:
+            return cacheada
+        
         # Obtener todos los apartamentos del propietario
         apartamentos = session.exec(
             select(Apartamento).where(Apartamento.propietario_id == propietario.id)
@@ -31,61 +44,34 @@ async def propietario_dashboard(request: Request):
                 "error": "No tiene apartamentos asignados"
             })
         
-        # Calcular estadísticas financieras para todos los apartamentos
-        total_cargos = 0
-        total_abonos = 0
-        registros_recientes = []
-        
-        for apartamento in apartamentos:
-            # Obtener cargos del apartamento
-            cargos_apt = session.exec(
-                select(func.sum(RegistroFinancieroApartamento.monto))
-                .where(RegistroFinancieroApartamento.apartamento_id == apartamento.id)
-                .where(RegistroFinancieroApartamento.tipo_movimiento == TipoMovimientoEnum.DEBITO)
-            ).first() or 0
-            
-            # Obtener abonos del apartamento
-            abonos_apt = session.exec(
-                select(func.sum(RegistroFinancieroApartamento.monto))
-                .where(RegistroFinancieroApartamento.apartamento_id == apartamento.id)
-                .where(RegistroFinancieroApartamento.tipo_movimiento == TipoMovimientoEnum.CREDITO)
-            ).first() or 0
-            
-            total_cargos += float(cargos_apt)
-            total_abonos += float(abonos_apt)
-            
-            # Obtener registros recientes del apartamento
-            registros_apt = session.exec(
-                select(RegistroFinancieroApartamento)
-                .where(RegistroFinancieroApartamento.apartamento_id == apartamento.id)
-                .order_by(RegistroFinancieroApartamento.fecha_efectiva.desc())
-                .limit(3)  # Menos registros por apartamento para no sobrecargar
-            ).all()
-            registros_recientes.extend(registros_apt)
-        
-        # Ordenar todos los registros recientes por fecha
-        registros_recientes.sort(key=lambda x: x.fecha_efectiva, reverse=True)
-        registros_recientes = registros_recientes[:5]  # Mantener solo los 5 más recientes
-        
-        saldo_actual = total_cargos - total_abonos  # Saldo pendiente (deuda)
-        
-        return templates.TemplateResponse("propietario/dashboard.html", {
+        # El resumen financiero y los movimientos recientes los pide la página
+        # a /api/propietario/* después del primer pintado
+        return guardar_respuesta("dashboard", etag, templates.TemplateResponse("propietario/dashboard.html", {
             "request": request,
             "user": user,
             "propietario": propietario,
-            "apartamentos": apartamentos,  # Cambio de 'apartamento' a 'apartamentos'
-            "total_cargos": total_cargos,
-            "total_abonos": total_abonos,
-            "saldo_actual": saldo_actual,
-            "registros_recientes": registros_recientes
-        })
+            "apartamentos": apartamentos  # Cambio de 'apartamento' a 'apartamentos'
+        }))
 
 @router.get("/estado-cuenta", response_class=HTMLResponse)
-async def propietario_estado_cuenta(request: Request, apartamento: Optional[int] = None):
-    """Estado de cuenta del propietario"""
+async def propietario_estado_cuenta(
+    request: Request,
+    apartamento: Optional[int] = None,
+    fecha_corte: Optional[date] = None
+):
+    """Estado de cuenta del propietario (opcionalmente histórico a una fecha de corte)"""
     user, propietario = require_propietario(request)
     
-    with get_db_session() as session:
+    with get_db_read_session(request) as session:
+        # Si el libro de sus apartamentos no cambió, no se vuelve a calcular la página
+        versiones = versiones_propietario(session, propietario.id)
+        etag = calcular_etag("estado_cuenta", user.id, versiones, {
+            "apartamento": apartamento, "fecha_corte": fecha_corte
+        })
+        cacheada = respuesta_cacheada(request, "estado_cuenta", etag)
+        if cacheada:
+            return cacheada
+        
         # Obtener apartamentos del propietario
         apartamentos_propietario = session.exec(
             select(Apartamento).where(Apartamento.propietario_id == propietario.id)
@@ -109,12 +95,18 @@ async def propietario_estado_cuenta(request: Request, apartamento: Optional[int]
             # Si no se especifica, usar el primer apartamento
             apartamento_seleccionado = apartamentos_propietario[0]
         
-        # Obtener todos los registros financieros del apartamento seleccionado
-        registros_raw = session.exec(
+        # Obtener los registros financieros del apartamento seleccionado hasta la fecha de corte
+        stmt_registros = (
             select(RegistroFinancieroApartamento)
             .where(RegistroFinancieroApartamento.apartamento_id == apartamento_seleccionado.id)
-            .order_by(RegistroFinancieroApartamento.fecha_efectiva.desc())
-        ).all()
+            .order_by(
+                RegistroFinancieroApartamento.fecha_efectiva.desc(),
+                RegistroFinancieroApartamento.id.desc()
+            )
+        )
+        if fecha_corte:
+            stmt_registros = stmt_registros.where(RegistroFinancieroApartamento.fecha_efectiva <= fecha_corte)
+        registros_raw = session.exec(stmt_registros).all()
         
         # Cargar las relaciones manualmente
         registros = []
@@ -139,18 +131,8 @@ async def propietario_estado_cuenta(request: Request, apartamento: Optional[int]
         saldo_total = 0
         
         for apartamento_prop in apartamentos_propietario:
-            # Calcular saldo para este apartamento
-            registros_apt = [r for r in registros if r.apartamento_id == apartamento_prop.id]
-            
-            total_cargos = sum(
-                r.monto for r in registros_apt 
-                if r.tipo_movimiento == TipoMovimientoEnum.DEBITO
-            )
-            total_abonos = sum(
-                r.monto for r in registros_apt 
-                if r.tipo_movimiento == TipoMovimientoEnum.CREDITO
-            )
-            saldo_apartamento = total_cargos - total_abonos
+            # Saldo a la fecha de corte leído del saldo acumulado (sin sumar el historial)
+            saldo_apartamento = saldo_a_fecha(apartamento_prop.id, fecha_corte or date.max, session)
             
             saldos_por_apartamento[apartamento_prop.id] = {
                 'apartamento': apartamento_prop,
@@ -167,9 +149,9 @@ async def propietario_estado_cuenta(request: Request, apartamento: Optional[int]
             r.monto for r in registros 
             if r.tipo_movimiento == TipoMovimientoEnum.CREDITO
         )
-        saldo_actual = total_cargos - total_abonos
+        saldo_actual = saldos_por_apartamento[apartamento_seleccionado.id]['saldo']
         
-        return templates.TemplateResponse("propietario/estado_cuenta.html", {
+        return guardar_respuesta("estado_cuenta", etag, templates.TemplateResponse("propietario/estado_cuenta.html", {
             "request": request,
             "propietario": propietario,
             "apartamento": apartamento_seleccionado,
@@ -179,8 +161,9 @@ async def propietario_estado_cuenta(request: Request, apartamento: Optional[int]
             "saldo_total": saldo_total,
             "total_cargos": total_cargos,
             "total_abonos": total_abonos,
-            "saldo_actual": saldo_actual
-        })
+            "saldo_actual": saldo_actual,
+            "fecha_corte": fecha_corte
+        }))
 
 @router.get("/mis-pagos", response_class=HTMLResponse)
 async def propietario_mis_pagos(
@@ -190,7 +173,7 @@ async def propietario_mis_pagos(
     """Vista de pagos del propietario"""
     user, propietario = require_propietario(request)
     
-    with get_db_session() as session:
+    with get_db_read_session(request) as session:
         # Obtener apartamento del propietario
         apartamento = session.exec(
             select(Apartamento).where(Apartamento.propietario_id == propietario.id)
@@ -204,52 +187,32 @@ async def propietario_mis_pagos(
             select(Concepto).where(Concepto.nombre.ilike("%cuota%ordinaria%administr%"))
         ).first()
         
-        # Obtener historial de pagos de cuotas ordinarias
-        pagos_cuotas = []
+        # Cargos y pagos (concepto Pago de Cuota) de cuotas ordinarias por mes
+        hechos = []
         if concepto_cuota:
-            pagos_cuotas = session.exec(
-                select(RegistroFinancieroApartamento)
-                .where(RegistroFinancieroApartamento.apartamento_id == apartamento.id)
-                .where(RegistroFinancieroApartamento.concepto_id == concepto_cuota.id)
-                .order_by(RegistroFinancieroApartamento.fecha_efectiva.desc())
-            ).all()
-        
-        # Agrupar por mes/año para mostrar estado de pagos
-        pagos_por_mes = {}
-        for pago in pagos_cuotas:
-            key = f"{pago.año_aplicable}-{pago.mes_aplicable:02d}"
-            if key not in pagos_por_mes:
-                pagos_por_mes[key] = {"cargos": 0, "pagos": 0, "registros": []}
-            
-            if pago.tipo_movimiento == TipoMovimientoEnum.DEBITO:
-                pagos_por_mes[key]["cargos"] += pago.monto
-            else:
-                pagos_por_mes[key]["pagos"] += pago.monto
-            
-            pagos_por_mes[key]["registros"].append(pago)
+            hechos = cuotas_apartamento(session, apartamento.id, concepto_cuota.id)
         
         # Calcular estado de cada mes
         estados_mensuales = []
         total_cargos_general = 0
         total_abonos_general = 0
         
-        for mes_año, data in sorted(pagos_por_mes.items(), reverse=True):
-            año, mes = mes_año.split("-")
-            saldo = data["pagos"] - data["cargos"]
+        for hecho in hechos:
+            saldo = hecho.creditos - hecho.debitos
             estado = "Pagado" if saldo >= 0 else "Pendiente"
             
-            total_cargos_general += data["cargos"]
-            total_abonos_general += data["pagos"]
+            total_cargos_general += hecho.debitos
+            total_abonos_general += hecho.creditos
             
             estados_mensuales.append({
-                "mes": int(mes),
-                "año": int(año),
-                "mes_nombre": datetime(int(año), int(mes), 1).strftime("%B"),
-                "cargos": data["cargos"],
-                "pagos": data["pagos"],
+                "mes": hecho.mes,
+                "año": hecho.año,
+                "mes_nombre": datetime(hecho.año, hecho.mes, 1).strftime("%B"),
+                "cargos": hecho.debitos,
+                "pagos": hecho.creditos,
                 "saldo": saldo,
                 "estado": estado,
-                "registros": data["registros"]
+                "movimientos": hecho.movimientos
             })
         
         # Calcular saldo total
@@ -277,47 +240,37 @@ async def propietario_mis_pagos(
 @router.post("/reportar-pago")
 async def reportar_pago(
     request: Request,
-    monto_reportado: float = Form(...),
-    fecha_pago_reportado: str = Form(...),
+    monto_reportado: Decimal = Form(..., gt=0),
+    fecha_pago_reportado: date = Form(...),
     metodo_pago: str = Form(...),
+    apartamento_id: Optional[int] = Form(None),
     referencia_reportada: Optional[str] = Form(None),
     observaciones: Optional[str] = Form(None)
 ):
-    """Reportar pago realizado por el propietario"""
+    """Reportar pago realizado por el propietario (queda pendiente de validación)"""
     user, propietario = require_propietario(request)
     
     with get_db_session() as session:
         # Obtener apartamento del propietario
-        apartamento = session.exec(
-            select(Apartamento).where(Apartamento.propietario_id == propietario.id)
-        ).first()
+        consulta = select(Apartamento).where(Apartamento.propietario_id == propietario.id)
+        if apartamento_id:
+            consulta = consulta.where(Apartamento.id == apartamento_id)
+        apartamento = session.exec(consulta).first()
         
         if not apartamento:
             raise HTTPException(status_code=404, detail="Apartamento no encontrado")
         
-        # Obtener el concepto de cuota ordinaria
-        concepto_cuota = session.exec(
-            select(Concepto).where(Concepto.nombre.ilike("%cuota%ordinaria%administr%"))
-        ).first()
-        
-        if not concepto_cuota:
-            raise HTTPException(status_code=404, detail="Concepto de cuota no encontrado")
-        
-        # Crear registro de reporte de pago (pendiente de validación)
-        reporte_pago = RegistroFinancieroApartamento(
+        # El reporte no toca el libro: entra al saldo cuando la administración
+        # lo aprueba en /admin/pagos/reportados
+        session.add(PagoReportado(
             apartamento_id=apartamento.id,
-            concepto_id=concepto_cuota.id,
-            tipo_movimiento=TipoMovimientoEnum.CREDITO.value,
+            usuario_id=user.id,
             monto=monto_reportado,
-            fecha_efectiva=datetime.strptime(fecha_pago_reportado, "%Y-%m-%d").date(),
-            mes_aplicable=datetime.now().month,
-            año_aplicable=datetime.now().year,
-            referencia_pago=f"REPORTE-{metodo_pago}: {referencia_reportada or 'Sin referencia'}",
-            descripcion_adicional=f"PENDIENTE VALIDACIÓN - {observaciones or 'Pago reportado por propietario'}",
-            fecha_creacion=datetime.now()
-        )
-        
-        session.add(reporte_pago)
+            fecha_pago=fecha_pago_reportado,
+            metodo_pago=metodo_pago[:50],
+            referencia=referencia_reportada or None,
+            observaciones=observaciones or None
+        ))
         session.commit()
     
     return RedirectResponse(
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Script de Construcción de Estáticos
+===================================
+
+1. Verifica que estén en assets/vendor/ las librerías que antes se cargaban
+   desde CDN (Bootstrap, Font Awesome y Chart.js), en versiones fijas, y
+   falla si falta alguna. Con --vendorizar descarga antes las que falten;
+   los archivos descargados se versionan con el repositorio.
+2. Copia assets/ a static/dist/ con el hash del contenido en el nombre,
+   genera las variantes .gz y .br y escribe static/dist/manifiesto.json,
+   que usa el helper asset() de las plantillas.
+
+Ejecutar antes de cada despliegue (después de cambiar cualquier archivo de
+assets/). Sin construir, asset() apunta a /static/<ruta> sin huella, servido
+desde assets/.
+
+Uso:
+    python src/scripts/construir_estaticos.py
+    python src/scripts/construir_estaticos.py --vendorizar        # descarga las que falten y construye
+    python src/scripts/construir_estaticos.py --solo-vendorizar
+"""
+
+import argparse
+import sys
+import urllib.request
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config import settings
+from src.utils.estaticos import LIBRERIAS, construir
+
+
+def vendorizar(directorio_assets: Path) -> int:
+    """Descarga las librerías que no estén en assets/vendor/. Retorna cuántas descargó"""
+    descargadas = 0
+    for ruta, url in LIBRERIAS.items():
+        destino = directorio_assets / ruta
+        if destino.exists():
+            continue
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        print(f"   ⬇️  {url}")
+        with urllib.request.urlopen(url, timeout=60) as respuesta:
+            destino.write_bytes(respuesta.read())
+        descargadas += 1
+    return descargadas
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Construir los estáticos con huella")
+    parser.add_argument("--vendorizar", action="store_true", help="Descargar las librerías que falten")
+    parser.add_argument("--solo-vendorizar", action="store_true", help="Descargar librerías sin construir")
+    args = parser.parse_args()
+
+    origen = project_root / settings.ASSETS_DIR
+    destino = project_root / settings.STATIC_DIR / settings.ESTATICOS_DIST
+
+    if args.vendorizar or args.solo_vendorizar:
+        descargadas = vendorizar(origen)
+        print(f"📦 Librerías vendorizadas ({descargadas} descargadas, {len(LIBRERIAS) - descargadas} ya presentes)")
+        if args.solo_vendorizar:
+            return
+
+    faltantes = [ruta for ruta in LIBRERIAS if not (origen / ruta).is_file()]
+    if faltantes:
+        print(f"❌ Faltan {len(faltantes)} librerías vendorizadas en {origen}:")
+        for ruta in faltantes:
+            print(f"   - {ruta}")
+        print("   Descárguelas con --vendorizar y versione assets/vendor/")
+        sys.exit(1)
+
+    manifiesto = construir(origen, destino)
+    comprimidos = sum(1 for _ in destino.rglob("*.br")) + sum(1 for _ in destino.rglob("*.gz"))
+    print(f"✅ {len(manifiesto)} estáticos con huella en {destino} ({comprimidos} variantes comprimidas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Consulta de la Instantánea del Libro
+====================================
+
+Ejecuta SQL de DuckDB sobre la instantánea Parquet (exportar_instantanea.py),
+sin conexión a la base. La tabla se llama `libro`; año y mes vienen de las
+particiones, así que filtrarlos solo lee los archivos de esos meses.
+
+Requiere: pip install -r requirements-analitica.txt
+
+Uso:
+    python src/scripts/consultar_instantanea.py "SELECT año, SUM(monto) FROM libro GROUP BY 1"
+    python src/scripts/consultar_instantanea.py --directorio /ruta "SELECT ..."
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config import settings
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Consulta la instantánea Parquet del libro con DuckDB")
+    parser.add_argument("sql", help="Consulta sobre la tabla libro")
+    parser.add_argument("--directorio", type=Path, default=settings.INSTANTANEAS_DIR,
+                        help="Directorio de la instantánea")
+    parser.add_argument("--limite", type=int, default=50, help="Filas a mostrar")
+    args = parser.parse_args()
+
+    try:
+        from src.services.instantaneas import consultar
+    except ImportError as e:
+        print(f"❌ Falta una dependencia ({e.name}): pip install -r requirements-analitica.txt")
+        sys.exit(1)
+
+    columnas, filas = consultar(args.sql, args.directorio)
+    print(" | ".join(columnas))
+    for fila in filas[:args.limite]:
+        print(" | ".join("" if v is None else str(v) for v in fila))
+    if len(filas) > args.limite:
+        print(f"... {len(filas) - args.limite} filas más")
+    print(f"📊 {len(filas)} filas")
+
+
+if __name__ == "__main__":
+    main()
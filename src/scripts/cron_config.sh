@@ -54,6 +54,16 @@ else
     log "❌ Error en la generación automática (código de salida: $EXIT_CODE)"
 fi
 
+# Cierre del mes anterior: estados de cuenta en PDF para todos los apartamentos
+ESTADOS_PATH="$SCRIPT_DIR/src/scripts/generar_estados_cuenta.py"
+log "Generando estados de cuenta del mes anterior..."
+$PYTHON_PATH "$ESTADOS_PATH" >> "$LOG_PATH" 2>&1
+if [ $? -eq 0 ]; then
+    log "✅ Estados de cuenta generados"
+else
+    log "❌ Error generando los estados de cuenta"
+fi
+
 log "=== FIN GENERACIÓN AUTOMÁTICA MENSUAL ==="
 echo "" >> "$LOG_PATH"
 
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Despachador de Notificaciones
+=============================
+
+Entrega por SMTP los correos de la outbox (cargos del mes, pagos aplicados
+y mora). Por defecto queda corriendo y revisa la outbox cada
+OUTBOX_INTERVALO segundos hasta recibir SIGTERM o Ctrl+C; con --una-vez
+envía lo pendiente y termina (para cron). Pueden correr varios a la vez.
+
+Uso:
+    python src/scripts/despachar_notificaciones.py
+    python src/scripts/despachar_notificaciones.py --una-vez --conexiones 8
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config import settings
+from src.services.despacho_correo import Despachador, PoolSMTP
+
+
+async def despachar(una_vez: bool, conexiones: int, lote: int):
+    despachador = Despachador(PoolSMTP(conexiones=conexiones), lote=lote)
+    try:
+        if una_vez:
+            resumen = await despachador.drenar()
+            print(f"   📨 Enviados: {resumen['enviados']}")
+            print(f"   ⚠️  Fallidos: {resumen['fallidos']}")
+            print(f"✅ Outbox procesada en {resumen['segundos']} s")
+            return
+
+        detener = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for señal in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(señal, detener.set)
+        print(f"📬 Despachando la outbox cada {settings.OUTBOX_INTERVALO} s (Ctrl+C para detener)...")
+        await despachador.ejecutar(detener)
+        print("👋 Despachador detenido")
+    finally:
+        despachador.cerrar()
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Envía los correos pendientes de la outbox")
+    parser.add_argument("--una-vez", action="store_true", help="Vaciar la outbox y terminar")
+    parser.add_argument("--conexiones", type=int, default=settings.SMTP_CONEXIONES)
+    parser.add_argument("--lote", type=int, default=settings.OUTBOX_LOTE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    print(f"📮 SMTP {settings.SMTP_HOST}:{settings.SMTP_PORT} con {args.conexiones} conexiones")
+    asyncio.run(despachar(args.una_vez, args.conexiones, args.lote))
+
+
+if __name__ == "__main__":
+    main()
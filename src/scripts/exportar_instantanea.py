@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Instantánea Parquet del Libro
+=============================
+
+Exporta registro_financiero_apartamento (con apartamento, propietario y
+concepto) a INSTANTANEAS_DIR/libro/año=AAAA/mes=M/, para analizarlo sin
+cargar la base (ver consultar_instantanea.py). Cada corrida reescribe solo
+los meses nuevos o cuyas filas cambiaron desde la anterior (incluidos los
+nombres de apartamentos, propietarios y conceptos); --completa rehace todo.
+Con DATABASE_READ_URL lee de la réplica.
+
+Requiere: pip install -r requirements-analitica.txt
+
+Uso:
+    python src/scripts/exportar_instantanea.py [--directorio instantaneas] [--completa]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config import settings
+from src.models import db_manager
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Exporta el libro a Parquet particionado por mes")
+    parser.add_argument("--directorio", type=Path, default=settings.INSTANTANEAS_DIR,
+                        help="Directorio de la instantánea")
+    parser.add_argument("--completa", action="store_true", help="Reescribir todas las particiones")
+    parser.add_argument("--lote", type=int, default=settings.INSTANTANEAS_LOTE,
+                        help="Filas por lote del cursor")
+    args = parser.parse_args()
+
+    try:
+        from src.services.instantaneas import exportar
+    except ImportError as e:
+        print(f"❌ Falta una dependencia ({e.name}): pip install -r requirements-analitica.txt")
+        sys.exit(1)
+
+    print(f"📦 Exportando el libro a {args.directorio}...")
+    resumen = exportar(db_manager.get_read_engine(), args.directorio, args.completa, args.lote)
+    print(f"   🔄 {resumen['exportadas']} meses exportados ({resumen['filas']} filas)")
+    print(f"   ⏭️  {resumen['sin_cambios']} meses sin cambios")
+    if resumen["eliminadas"]:
+        print(f"   🗑️  {resumen['eliminadas']} meses sin movimientos eliminados")
+    print(f"✅ Instantánea en {resumen['directorio']} ({resumen['segundos']} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -46,6 +46,8 @@ from src.models import (
     ControlProcesamientoMensual
 )
 from src.models.enums import TipoMovimientoEnum
+from src.services.notificaciones import encolar_cargos_mes
+from src.utils.metricas import medir_paso_generador, exponer as exponer_metricas
 
 
 class GeneradorAutomaticoV3:
@@ -89,28 +91,46 @@ class GeneradorAutomaticoV3:
                     self.logger.info(f"Mes {mes:02d}/{año} ya procesado")
                     return resultado
                 
+                # 1b. Asegurar particiones del año actual y del siguiente (cierre de mes)
+                with medir_paso_generador("particiones"):
+                    self._asegurar_particiones(session, año)
+                
                 # 2. Procesar cuotas ordinarias
                 self.logger.info(f"Generando cuotas ordinarias para {mes:02d}/{año}")
-                resultado_cuotas = self._generar_cuotas_ordinarias(session, año, mes)
+                with medir_paso_generador("cuotas") as paso:
+                    resultado_cuotas = self._generar_cuotas_ordinarias(session, año, mes)
+                    paso["registros"] = resultado_cuotas['cuotas_generadas']
                 resultado.update(resultado_cuotas)
                 
                 # 3. Procesar intereses moratorios
                 self.logger.info(f"Generando intereses moratorios para {mes:02d}/{año}")
-                resultado_intereses = self._generar_intereses_moratorios(session, año, mes)
+                with medir_paso_generador("intereses") as paso:
+                    resultado_intereses = self._generar_intereses_moratorios(session, año, mes)
+                    paso["registros"] = resultado_intereses['intereses_generados']
                 resultado['intereses_generados'] = resultado_intereses['intereses_generados']
                 resultado['monto_intereses'] = resultado_intereses['monto_intereses']
                 
                 # 4. Aplicar saldos a favor al próximo período
                 self.logger.info(f"Aplicando saldos a favor al próximo período después de {mes:02d}/{año}")
-                resultado_saldos_favor = self._aplicar_saldos_a_favor_proximo_periodo(session, año, mes)
+                with medir_paso_generador("saldos_favor") as paso:
+                    resultado_saldos_favor = self._aplicar_saldos_a_favor_proximo_periodo(session, año, mes)
+                    paso["registros"] = resultado_saldos_favor['saldos_aplicados']
                 resultado['saldos_favor_aplicados'] = resultado_saldos_favor['saldos_aplicados']
                 resultado['monto_saldos_favor'] = resultado_saldos_favor['monto_aplicado']
                 
+                # 4b. Avisos de cargos y de mora en la outbox, en la misma transacción
+                with medir_paso_generador("notificaciones") as paso:
+                    notificaciones = encolar_cargos_mes(session, año, mes)
+                    paso["registros"] = notificaciones['cargos'] + notificaciones['mora']
+                resultado['notificaciones'] = notificaciones
+                
                 # 5. Confirmar cambios
-                session.commit()
+                with medir_paso_generador("commit"):
+                    session.commit()
                 
                 # 6. Marcar como procesado
-                self._marcar_procesado(session, año, mes, resultado)
+                with medir_paso_generador("control"):
+                    self._marcar_procesado(session, año, mes, resultado)
                 
                 tiempo_total = datetime.now() - inicio
                 self.logger.info(
@@ -145,6 +165,27 @@ class GeneradorAutomaticoV3:
                 'INTERESES' in tipos_completados and 
                 'SALDOS_FAVOR' in tipos_completados)
     
+    def _asegurar_particiones(self, session: Session, año: int):
+        """
+        Crea, si no existen, las particiones anuales de registro_financiero_apartamento
+        para el año procesado y el siguiente, de modo que los movimientos del próximo
+        período (p. ej. saldos a favor de diciembre) siempre tengan partición destino.
+        """
+        for año_particion in (año, año + 1):
+            particion = session.exec(
+                text("SELECT crear_particion_rfa(:año)").bindparams(año=año_particion)
+            ).scalar()
+            self.logger.info(f"Partición disponible: {particion}")
+    
+    def _rango_año(self, año: int, alias: str = "") -> str:
+        """
+        Filtro por fecha_efectiva del año indicado. Los registros que crea el generador
+        siempre caen en el año aplicable, así que este filtro permite a PostgreSQL
+        podar las particiones de otros años sin cambiar el resultado.
+        """
+        columna = f"{alias}.fecha_efectiva" if alias else "fecha_efectiva"
+        return f"{columna} >= DATE '{año}-01-01' AND {columna} < DATE '{año + 1}-01-01'"
+    
     def _generar_cuotas_ordinarias(self, session: Session, año: int, mes: int) -> Dict:
         """Genera las cuotas ordinarias usando SQL directo para evitar problemas de enum"""
         resultado = {
@@ -173,6 +214,7 @@ class GeneradorAutomaticoV3:
                 SELECT 1 FROM registro_financiero_apartamento rfa
                 WHERE rfa.apartamento_id = cc.apartamento_id 
                 AND rfa.concepto_id = 1
+                AND {self._rango_año(año, 'rfa')}
                 AND rfa.año_aplicable = {año}
                 AND rfa.mes_aplicable = {mes}
                 AND rfa.descripcion_adicional LIKE 'Cuota ordinaria%'
@@ -189,7 +231,8 @@ class GeneradorAutomaticoV3:
                 sql_monto = f"""
                     SELECT COALESCE(SUM(monto), 0) as total
                     FROM registro_financiero_apartamento
-                    WHERE año_aplicable = {año}
+                    WHERE {self._rango_año(año)}
+                    AND año_aplicable = {año}
                     AND mes_aplicable = {mes}
                     AND tipo_movimiento = 'DEBITO'
                     AND descripcion_adicional LIKE 'Cuota ordinaria%'
@@ -307,6 +350,7 @@ class GeneradorAutomaticoV3:
                 SELECT 1 FROM registro_financiero_apartamento rfa
                 WHERE rfa.apartamento_id = sa.apartamento_id 
                 AND rfa.concepto_id = {concepto_interes.id}
+                AND {self._rango_año(año, 'rfa')}
                 AND rfa.año_aplicable = {año}
                 AND rfa.mes_aplicable = {mes}
                 AND rfa.descripcion_adicional LIKE 'Interés moratorio automático%'
@@ -323,7 +367,8 @@ class GeneradorAutomaticoV3:
                 sql_monto = f"""
                     SELECT COALESCE(SUM(monto), 0) as total
                     FROM registro_financiero_apartamento
-                    WHERE año_aplicable = {año}
+                    WHERE {self._rango_año(año)}
+                    AND año_aplicable = {año}
                     AND mes_aplicable = {mes}
                     AND concepto_id = {concepto_interes.id}
                     AND descripcion_adicional LIKE 'Interés moratorio automático%'
@@ -387,22 +432,24 @@ class GeneradorAutomaticoV3:
         
         self.logger.info(f"Concepto para aplicación de saldo: {concepto_aplicacion.nombre} (ID: {concepto_aplicacion.id})")
         
-        # SQL para identificar apartamentos con saldo a favor después del procesamiento del mes actual
+        # SQL para identificar apartamentos con saldo a favor después del procesamiento del mes actual.
+        # El saldo a la fecha se lee del saldo acumulado del último movimiento (un index seek
+        # por apartamento) en lugar de sumar todo el historial.
         sql_saldos_favor = f"""
             WITH saldos_actuales AS (
                 SELECT 
-                    rfa.apartamento_id,
-                    SUM(CASE 
-                        WHEN rfa.tipo_movimiento = 'CREDITO' THEN rfa.monto 
-                        ELSE -rfa.monto 
-                    END) as saldo_a_favor
-                FROM registro_financiero_apartamento rfa
-                WHERE rfa.fecha_efectiva <= DATE('{año}' || '-' || LPAD('{mes}'::text, 2, '0') || '-28')
-                GROUP BY rfa.apartamento_id
-                HAVING SUM(CASE 
-                    WHEN rfa.tipo_movimiento = 'CREDITO' THEN rfa.monto 
-                    ELSE -rfa.monto 
-                END) > 0.01  -- Solo saldos a favor significativos (más de 1 centavo)
+                    a.id AS apartamento_id,
+                    -s.saldo_acumulado AS saldo_a_favor
+                FROM apartamento a
+                JOIN LATERAL (
+                    SELECT rfa.saldo_acumulado
+                    FROM registro_financiero_apartamento rfa
+                    WHERE rfa.apartamento_id = a.id
+                    AND rfa.fecha_efectiva <= DATE('{año}' || '-' || LPAD('{mes}'::text, 2, '0') || '-28')
+                    ORDER BY rfa.fecha_efectiva DESC, rfa.id DESC
+                    LIMIT 1
+                ) s ON TRUE
+                WHERE -s.saldo_acumulado > 0.01  -- Solo saldos a favor significativos (más de 1 centavo)
             )
             INSERT INTO registro_financiero_apartamento 
             (apartamento_id, concepto_id, fecha_efectiva, monto, 
@@ -423,6 +470,7 @@ class GeneradorAutomaticoV3:
                 SELECT 1 FROM registro_financiero_apartamento rfa
                 WHERE rfa.apartamento_id = sa.apartamento_id 
                 AND rfa.concepto_id = {concepto_aplicacion.id}
+                AND {self._rango_año(año_siguiente, 'rfa')}
                 AND rfa.año_aplicable = {año_siguiente}
                 AND rfa.mes_aplicable = {mes_siguiente}
                 AND rfa.descripcion_adicional LIKE 'Aplicación automática saldo a favor%'
@@ -440,7 +488,8 @@ class GeneradorAutomaticoV3:
                 sql_monto = f"""
                     SELECT COALESCE(SUM(monto), 0) as total
                     FROM registro_financiero_apartamento
-                    WHERE año_aplicable = {año_siguiente}
+                    WHERE {self._rango_año(año_siguiente)}
+                    AND año_aplicable = {año_siguiente}
                     AND mes_aplicable = {mes_siguiente}
                     AND concepto_id = {concepto_aplicacion.id}
                     AND descripcion_adicional LIKE 'Aplicación automática saldo a favor%'
@@ -510,6 +559,19 @@ class GeneradorAutomaticoV3:
             pass
 
 
+def _escribir_metricas():
+    """
+    Ejecutado por cron no hay /metrics que consultar: si METRICAS_ARCHIVO está
+    definido, se escriben los tiempos por paso para el textfile collector.
+    """
+    archivo = os.environ.get("METRICAS_ARCHIVO")
+    if archivo:
+        temporal = Path(f"{archivo}.tmp")
+        temporal.write_text(exponer_metricas())
+        temporal.replace(archivo)
+        print(f"📈 Métricas escritas en {archivo}")
+
+
 def main():
     """Función principal"""
     print("🚀 Generador Automático V3 - Funcional")
@@ -560,6 +622,8 @@ def main():
             
             if resultado['ya_procesado']:
                 print("ℹ️  El mes ya había sido procesado")
+        
+        _escribir_metricas()
                 
     except Exception as e:
         print(f"❌ Error crítico: {e}")
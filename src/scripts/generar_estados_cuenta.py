@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Script de Estados de Cuenta Mensuales
+=====================================
+
+Cierre de mes: genera el estado de cuenta en PDF de cada apartamento en
+ESTADOS_CUENTA_DIR/AAAA-MM/ con un manifiesto.json (archivo, sha256 y
+totales de cada uno). Sin argumentos genera el mes anterior.
+
+Uso:
+    python src/scripts/generar_estados_cuenta.py
+    python src/scripts/generar_estados_cuenta.py --año 2025 --mes 3 --procesos 8
+"""
+
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config import settings
+from src.services.estados_cuenta import generar_estados_mes
+
+
+def main():
+    """Función principal"""
+    hoy = date.today()
+    anterior = date(hoy.year - 1, 12, 1) if hoy.month == 1 else date(hoy.year, hoy.month - 1, 1)
+
+    parser = argparse.ArgumentParser(description="Genera los estados de cuenta del mes en PDF")
+    parser.add_argument("--año", type=int, default=anterior.year)
+    parser.add_argument("--mes", type=int, default=anterior.month, choices=range(1, 13))
+    parser.add_argument("--procesos", type=int, default=settings.ESTADOS_CUENTA_PROCESOS)
+    parser.add_argument("--directorio", type=Path, default=settings.ESTADOS_CUENTA_DIR)
+    args = parser.parse_args()
+
+    print(f"📄 Generando estados de cuenta {args.mes:02d}/{args.año} con {args.procesos} procesos...")
+    resumen = generar_estados_mes(args.año, args.mes, args.directorio, args.procesos)
+    print(f"   📚 Lectura de libros: {resumen['segundos_lectura']} s")
+    print(f"   🖨️  Render: {resumen['estados']} PDF en {resumen['segundos_render']} s")
+    print(f"✅ Estados en {resumen['directorio']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Script de Medición del Arranque en Frío
+=======================================
+
+Mide, en procesos Python nuevos (como un arranque en frío de Vercel),
+cuánto tarda `import main` y la primera respuesta de GET / a través de la
+aplicación ASGI, sin lifespan ni base de datos. Con --importtime muestra
+además los módulos más costosos según `python -X importtime`.
+
+Uso:
+    python src/scripts/medir_arranque.py [repeticiones] [--importtime]
+"""
+
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+_PATRON_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+# La app no necesita la base para importar ni para responder GET /
+ENTORNO = {**os.environ, "DATABASE_URL": os.environ.get("DATABASE_URL", "postgresql+pg8000://arranque@localhost/arranque")}
+
+
+def _medir_en_este_proceso() -> dict:
+    """Ejecutado en el proceso hijo"""
+    import asyncio
+
+    inicio = time.perf_counter()
+    import httpx  # noqa: F401 (no cuenta como parte de la app)
+    inicio_app = time.perf_counter()
+    from main import app
+    importacion = time.perf_counter() - inicio_app
+
+    async def primera_peticion():
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://arranque") as cliente:
+            respuesta = await cliente.get("/")
+            assert respuesta.status_code == 200, respuesta.status_code
+
+    inicio_peticion = time.perf_counter()
+    asyncio.run(primera_peticion())
+    peticion = time.perf_counter() - inicio_peticion
+    return {
+        "importacion_ms": importacion * 1000,
+        "primera_respuesta_ms": peticion * 1000,
+        "total_ms": (time.perf_counter() - inicio) * 1000,
+        "modulos_src": sorted(nombre for nombre in sys.modules if nombre.startswith("src.")),
+    }
+
+
+def medir_importtime() -> list:
+    """[(acumulado_us, propio_us, módulo)] de `import main`, del más costoso al menos"""
+    salida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        check=True, capture_output=True, text=True, cwd=project_root, env=ENTORNO,
+    ).stderr
+    modulos = []
+    for linea in salida.splitlines():
+        coincidencia = _PATRON_IMPORTTIME.match(linea)
+        if coincidencia:
+            propio, acumulado, _, modulo = coincidencia.groups()
+            modulos.append((int(acumulado), int(propio), modulo))
+    return sorted(modulos, reverse=True)
+
+
+def _medir() -> dict:
+    salida = subprocess.run(
+        [sys.executable, __file__, "--hijo"],
+        check=True, capture_output=True, text=True, cwd=project_root, env=ENTORNO,
+    ).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+
+def main():
+    """Función principal"""
+    if "--hijo" in sys.argv:
+        print(json.dumps(_medir_en_este_proceso()))
+        return
+
+    argumentos = [a for a in sys.argv[1:] if not a.startswith("--")]
+    repeticiones = int(argumentos[0]) if argumentos else 7
+
+    _medir()  # Descartar la primera: calienta la caché de archivos y los .pyc
+    mediciones = [_medir() for _ in range(repeticiones)]
+    print(f"⏱️  Arranque en frío (mediana de {repeticiones} procesos)")
+    for clave, nombre in (("importacion_ms", "import main"), ("primera_respuesta_ms", "primera respuesta GET /"),
+                          ("total_ms", "total")):
+        print(f"   {nombre:<26} {statistics.median(m[clave] for m in mediciones):8.1f} ms")
+    print(f"   módulos src.* cargados: {len(mediciones[-1]['modulos_src'])}")
+
+    if "--importtime" in sys.argv:
+        print("\n📦 Módulos más costosos (acumulado, -X importtime)")
+        for acumulado, propio, modulo in medir_importtime()[:20]:
+            print(f"   {acumulado / 1000:8.1f} ms  (propio {propio / 1000:6.1f} ms)  {modulo}")
+
+
+if __name__ == "__main__":
+    main()
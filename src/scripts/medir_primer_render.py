@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Script de Medición del Primer Render
+====================================
+
+Mide, en procesos Python nuevos, cuánto tarda la carga inicial de todas las
+plantillas (lo que paga la primera petición de cada worker) en tres modos:
+
+- fuentes:        parseo y compilación en cada proceso (comportamiento anterior)
+- bytecode:       caché de bytecode en disco ya poblada
+- precompiladas:  módulos generados por precompilar_plantillas.py
+
+Uso:
+    python src/scripts/medir_primer_render.py [repeticiones]
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+MODOS = ("fuentes", "bytecode", "precompiladas")
+
+
+def _medir_en_este_proceso(modo: str, directorio_cache: str) -> dict:
+    """Ejecutado en el proceso hijo: carga todas las plantillas y mide"""
+    import jinja2
+    from src.config import settings
+    from src.utils.plantillas import configurar_carga
+
+    plantillas = project_root / settings.TEMPLATES_DIR
+    entorno = jinja2.Environment()
+    if modo == "fuentes":
+        entorno.loader = jinja2.FileSystemLoader(plantillas)
+    else:
+        compiladas = project_root / (settings.PLANTILLAS_COMPILADAS_DIR if modo == "precompiladas" else "_no_existe")
+        configurar_carga(entorno, plantillas, compiladas, Path(directorio_cache))
+
+    # ModuleLoader no implementa list_templates
+    nombres = sorted(ruta.relative_to(plantillas).as_posix() for ruta in plantillas.rglob("*.html"))
+    inicio = time.perf_counter()
+    entorno.get_template("admin/pagos_reportes.html")
+    primera = time.perf_counter() - inicio
+    for nombre in nombres:
+        entorno.get_template(nombre)
+    return {"primera_ms": primera * 1000, "todas_ms": (time.perf_counter() - inicio) * 1000}
+
+
+def _medir(modo: str, directorio_cache: str) -> dict:
+    salida = subprocess.run(
+        [sys.executable, __file__, "--hijo", modo, directorio_cache],
+        check=True, capture_output=True, text=True, cwd=project_root,
+    ).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+
+def main():
+    """Función principal"""
+    if len(sys.argv) > 1 and sys.argv[1] == "--hijo":
+        print(json.dumps(_medir_en_este_proceso(sys.argv[2], sys.argv[3])))
+        return
+
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    from src.config import settings
+    from src.utils.plantillas import precompiladas_vigentes
+
+    if not precompiladas_vigentes(project_root / settings.TEMPLATES_DIR,
+                                  project_root / settings.PLANTILLAS_COMPILADAS_DIR):
+        print("❌ Ejecute primero: python src/scripts/precompilar_plantillas.py")
+        sys.exit(1)
+
+    print(f"⏱️  Carga de plantillas en procesos nuevos (mediana de {repeticiones})")
+    with tempfile.TemporaryDirectory() as directorio_cache:
+        _medir("bytecode", directorio_cache)  # Poblar la caché de bytecode
+        for modo in MODOS:
+            mediciones = [_medir(modo, directorio_cache) for _ in range(repeticiones)]
+            primera = statistics.median(m["primera_ms"] for m in mediciones)
+            todas = statistics.median(m["todas_ms"] for m in mediciones)
+            print(f"   {modo:<14} primera página: {primera:7.2f} ms   todas: {todas:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Script de Medición de Sobrecarga de la Instrumentación
+======================================================
+
+Compara una ruta mínima servida con y sin el middleware de main.py
+(instrumentación SQL + métricas) y expresa la diferencia como porcentaje
+de la latencia mediana de una página real. Falla si supera el presupuesto.
+
+Uso:
+    python src/scripts/medir_sobrecarga_metricas.py [peticiones] [ruta_referencia]
+
+Ejemplo:
+    python src/scripts/medir_sobrecarga_metricas.py 5000 /login
+"""
+
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+from main import app as app_real, instrumentar_peticion
+
+PRESUPUESTO_PORCENTAJE = 2.0
+
+
+def _app_minima(instrumentada: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return PlainTextResponse("ok")
+
+    if instrumentada:
+        app.middleware("http")(instrumentar_peticion)
+    return app
+
+
+def _latencias(cliente: TestClient, ruta: str, peticiones: int) -> list:
+    for _ in range(min(200, peticiones)):  # Calentamiento
+        cliente.get(ruta)
+    latencias = []
+    for _ in range(peticiones):
+        inicio = time.perf_counter()
+        cliente.get(ruta)
+        latencias.append(time.perf_counter() - inicio)
+    return latencias
+
+
+def main():
+    """Función principal"""
+    peticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    ruta_referencia = sys.argv[2] if len(sys.argv) > 2 else "/login"
+
+    print(f"⏱️  Midiendo sobrecarga con {peticiones} peticiones")
+
+    with TestClient(_app_minima(False)) as cliente:
+        base = statistics.median(_latencias(cliente, "/ping", peticiones))
+    with TestClient(_app_minima(True)) as cliente:
+        medida = statistics.median(_latencias(cliente, "/ping", peticiones))
+    with TestClient(app_real) as cliente:
+        referencia = statistics.median(_latencias(cliente, ruta_referencia, max(100, peticiones // 10)))
+
+    sobrecarga = max(medida - base, 0.0)
+    porcentaje = sobrecarga / referencia * 100
+
+    print(f"   Ruta mínima sin instrumentar: {base * 1e6:8.1f} µs")
+    print(f"   Ruta mínima instrumentada:    {medida * 1e6:8.1f} µs")
+    print(f"   Sobrecarga por petición:      {sobrecarga * 1e6:8.1f} µs")
+    print(f"   Mediana de {ruta_referencia}: {referencia * 1e3:8.2f} ms")
+
+    if porcentaje > PRESUPUESTO_PORCENTAJE:
+        print(f"❌ Sobrecarga {porcentaje:.2f}% supera el presupuesto de {PRESUPUESTO_PORCENTAJE}%")
+        sys.exit(1)
+    print(f"✅ Sobrecarga {porcentaje:.2f}% (presupuesto {PRESUPUESTO_PORCENTAJE}%)")
+
+
+if __name__ == "__main__":
+    main()
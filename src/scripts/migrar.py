@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Script de Migraciones del Esquema
+=================================
+
+Aplica las migraciones versionadas de src/migrations y verifica que existan
+los índices críticos para el rendimiento.
+
+Uso:
+    python src/scripts/migrar.py aplicar            # Aplica las migraciones pendientes
+    python src/scripts/migrar.py estado             # Muestra aplicadas y pendientes
+    python src/scripts/migrar.py verificar-indices  # Falla si falta algún índice crítico
+"""
+
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models import db_manager
+from src.migrations import (
+    aplicar_migraciones,
+    listar_migraciones,
+    versiones_aplicadas,
+    verificar_indices,
+)
+
+
+def mostrar_estado():
+    """Lista las migraciones en disco indicando cuáles ya se aplicaron"""
+    aplicadas = versiones_aplicadas(db_manager.get_engine())
+    print("📋 Estado de migraciones")
+    print("=" * 50)
+    for migracion in listar_migraciones():
+        if migracion.version not in aplicadas:
+            icono = "⏳"
+        elif aplicadas[migracion.version] != migracion.checksum:
+            icono = "⚠️ "
+        else:
+            icono = "✅"
+        print(f"{icono} {migracion.ruta.name}")
+
+
+def comprobar_indices() -> bool:
+    """Imprime los índices faltantes y retorna True si no falta ninguno"""
+    faltantes = verificar_indices(db_manager.get_engine())
+    if not faltantes:
+        print("✅ Todos los índices esperados existen")
+        return True
+
+    print(f"❌ Faltan {len(faltantes)} índices:")
+    for tabla, columnas, unico in faltantes:
+        print(f"   → {tabla}({', '.join(columnas)}){' UNIQUE' if unico else ''}")
+    return False
+
+
+def main():
+    """Función principal"""
+    comando = sys.argv[1] if len(sys.argv) > 1 else "estado"
+
+    if comando == "aplicar":
+        aplicadas = aplicar_migraciones(db_manager.get_engine())
+        if aplicadas:
+            for nombre in aplicadas:
+                print(f"✅ Aplicada {nombre}")
+        else:
+            print("✅ El esquema ya está al día")
+        if not comprobar_indices():
+            sys.exit(1)
+    elif comando == "estado":
+        mostrar_estado()
+    elif comando == "verificar-indices":
+        if not comprobar_indices():
+            sys.exit(1)
+    else:
+        print(__doc__)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Script de Migración de Documentos Antiguos
+==========================================
+
+Los documentos subidos antes de documento_soporte quedaron en static/uploads
+(que /static ya no sirve) con solo la ruta en documento_soporte_path. Este
+script los copia al almacenamiento por contenido de UPLOADS_DIR, los
+registra en documento_soporte, enlaza los movimientos y gastos que los usan
+(documento_soporte_id, para servirlos por /documentos/{id}) y borra los
+originales. Se puede repetir: solo toma lo que aún no está enlazado.
+
+Uso:
+    python src/scripts/migrar_documentos_antiguos.py [directorio_antiguo] [--conservar]
+"""
+
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config import settings
+from src.models import db_manager
+from src.services.documentos import migrar_documentos_antiguos
+
+
+def main():
+    """Función principal"""
+    argumentos = [a for a in sys.argv[1:] if a != "--conservar"]
+    directorio = Path(argumentos[0]) if argumentos else Path(settings.STATIC_DIR) / "uploads"
+
+    with db_manager.get_session() as session:
+        resultado = migrar_documentos_antiguos(session, directorio, borrar="--conservar" not in sys.argv)
+    print(f"📎 {resultado['migrados']} documentos migrados a {settings.UPLOADS_DIR} "
+          f"({resultado['borrados']} originales borrados)")
+    if resultado["faltantes"]:
+        print(f"⚠️  {len(resultado['faltantes'])} rutas sin archivo en {directorio}:")
+        for ruta in resultado["faltantes"]:
+            print(f"   - {ruta}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Script de Precompilación de Plantillas
+======================================
+
+Compila todas las plantillas de templates/ a módulos Python en
+templates_compiladas/ para que los procesos nuevos (workers de uvicorn,
+funciones de Vercel) rendericen la primera página sin compilar.
+
+Ejecutar antes de cada despliegue. Si una plantilla cambia y no se vuelve a
+ejecutar, el manifiesto no coincide y la app usa los fuentes (con un aviso).
+
+Uso:
+    python src/scripts/precompilar_plantillas.py
+"""
+
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config import settings
+from src.utils.plantillas import precompilar
+
+
+def main():
+    """Función principal"""
+    origen = project_root / settings.TEMPLATES_DIR
+    destino = project_root / settings.PLANTILLAS_COMPILADAS_DIR
+
+    cantidad = precompilar(origen, destino)
+    print(f"✅ {cantidad} plantillas compiladas en {destino}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Script de Purga de Documentos de Soporte
+========================================
+
+Borra los documentos de soporte que ningún movimiento ni gasto referencia
+desde hace más de N horas (por defecto 24), junto con sus archivos. El margen
+protege las subidas cuyo movimiento todavía se está creando.
+
+Uso:
+    python src/scripts/purgar_documentos.py [horas]
+"""
+
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models import db_manager
+from src.services.documentos import purgar_documentos_huerfanos
+
+
+def main():
+    """Función principal"""
+    horas = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+
+    with db_manager.get_session() as session:
+        rutas = purgar_documentos_huerfanos(session, horas)
+    print(f"🗑️  {len(rutas)} documentos sin referencias purgados (más de {horas} h)")
+
+
+if __name__ == "__main__":
+    main()
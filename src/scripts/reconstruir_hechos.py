@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Reconstrucción de la Tabla de Hechos Mensual
+============================================
+
+Vuelve a calcular hecho_mensual desde registro_financiero_apartamento,
+repartiendo los apartamentos en rangos que se procesan en paralelo. Los
+triggers la mantienen al día; hace falta tras cargas con los triggers
+desactivados o si --verificar encuentra diferencias. Mientras dura, las
+escrituras al libro esperan.
+
+Uso:
+    python src/scripts/reconstruir_hechos.py [--hilos 4]
+    python src/scripts/reconstruir_hechos.py --verificar
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models import db_manager
+from src.services.hechos import diferencias, reconstruir
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Reconstruye hecho_mensual desde el libro")
+    parser.add_argument("--hilos", type=int, default=4, help="Rangos de apartamentos en paralelo")
+    parser.add_argument("--verificar", action="store_true", help="Solo comparar contra el libro")
+    args = parser.parse_args()
+
+    engine = db_manager.get_engine()
+    if args.verificar:
+        print("🔍 Comparando hecho_mensual con el libro...")
+        encontradas = diferencias(engine)
+        if not encontradas:
+            print("✅ hecho_mensual coincide con el libro")
+            return
+        print(f"⚠️  {len(encontradas)} claves con diferencias (máximo 100):")
+        for d in encontradas:
+            print(f"   Apartamento {d['apartamento_id']}, concepto {d['concepto_id']}, "
+                  f"{d['mes']:02d}/{d['año']}: débitos {d['debitos_libro']} vs {d['debitos_hecho']}, "
+                  f"créditos {d['creditos_libro']} vs {d['creditos_hecho']}")
+        print("\n💡 Ejecute sin --verificar para reconstruir la tabla")
+        sys.exit(1)
+
+    print(f"🔄 Reconstruyendo hecho_mensual con {args.hilos} hilos...")
+    resumen = reconstruir(engine, args.hilos)
+    for rango in resumen["rangos"]:
+        print(f"   📦 Apartamentos {rango['desde']}-{rango['hasta']}: {rango['filas']} filas en {rango['segundos']} s")
+    print(f"✅ {resumen['filas']} filas en {resumen['segundos']} s")
+
+
+if __name__ == "__main__":
+    main()
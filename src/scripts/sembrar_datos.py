@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Script de Siembra de Datos Sintéticos
+=====================================
+
+Genera un edificio completo para reproducir localmente el comportamiento de
+producción: propietarios, apartamentos con coeficientes realistas, cuotas y
+tasas de interés mensuales, cargos, intereses, pagos con distintos perfiles
+de morosidad, presupuestos y gastos de la comunidad.
+
+Todo se carga con COPY en lotes y el saldo acumulado se calcula en Python
+(los triggers del libro se desactivan durante la carga). Para una misma
+semilla y año final (por defecto AÑO_FINAL, fijo) el resultado es idéntico.
+
+⚠️  REEMPLAZA todos los datos de la base indicada en DATABASE_URL.
+
+Uso:
+    python src/scripts/sembrar_datos.py [apartamentos] [años] [semilla] [año_final]
+
+Ejemplo:
+    python src/scripts/sembrar_datos.py 5000 10 42 2025
+"""
+
+import calendar
+import csv
+import io
+import random
+import sys
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Agregar el directorio raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from faker import Faker
+from sqlalchemy import Engine, text
+
+from src.services.hechos import reconstruir as reconstruir_hechos
+from src.services.initial_data import CONCEPTOS_BASE
+from src.utils.contrasenas import hashear
+
+CLAVE_USUARIOS = "altavista"
+LOTE_APARTAMENTOS = 500
+# Último año sembrado: fijo, para que la misma semilla genere los mismos datos
+# sin importar la fecha en que se siembra
+AÑO_FINAL = 2025
+
+TABLAS = (
+    "registro_financiero_apartamento", "saldo_apertura_apartamento", "version_libro_apartamento",
+    "hecho_mensual", "documento_soporte", "pago_reportado", "outbox",
+    "ejecucion_presupuestal_mes", "ejecucion_presupuestal_cierre",
+    "control_procesamiento_mensual",
+    "cuota_configuracion", "tasa_interes_mora", "gasto_comunidad", "item_presupuesto",
+    "presupuesto_anual", "usuario", "apartamento", "propietario", "concepto",
+)
+
+COLUMNAS_REGISTRO = (
+    "id", "apartamento_id", "fecha_efectiva", "concepto_id", "descripcion_adicional",
+    "tipo_movimiento", "monto", "mes_aplicable", "año_aplicable", "referencia_pago", "saldo_acumulado",
+)
+
+# Tipologías del edificio: (área en m², proporción de unidades)
+TIPOLOGIAS = ((48, 0.20), (62, 0.35), (78, 0.25), (96, 0.15), (140, 0.05))
+
+# Perfiles de pago: (nombre, proporción, probabilidad de pagar en el mes, fracción pagada)
+PERFILES_PAGO = (
+    ("puntual", 0.68, 0.98, (1.0, 1.0)),
+    ("tardio", 0.17, 0.70, (1.0, 1.6)),
+    ("moroso", 0.10, 0.30, (0.3, 1.0)),
+    ("adelantado", 0.05, 0.95, (1.0, 2.5)),
+)
+
+CONCEPTO_CUOTA, CONCEPTO_INTERES, CONCEPTO_PAGO_INTERES, CONCEPTO_PAGO_CUOTA, CONCEPTO_EXCESO = 1, 3, 4, 5, 15
+
+
+def _pesos(centavos: int) -> str:
+    signo = "-" if centavos < 0 else ""
+    centavos = abs(centavos)
+    return f"{signo}{centavos // 100}.{centavos % 100:02d}"
+
+
+def _copiar(cursor, tabla: str, columnas: Sequence[str], filas: Iterable[Sequence]):
+    """Carga filas con COPY ... FROM STDIN (psycopg2 o pg8000)"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    for fila in filas:
+        escritor.writerow(["" if valor is None else valor for valor in fila])
+    buffer.seek(0)
+
+    lista_columnas = ", ".join(f'"{columna}"' for columna in columnas)
+    sql = f"COPY {tabla} ({lista_columnas}) FROM STDIN WITH (FORMAT csv)"
+    if hasattr(cursor, "copy_expert"):
+        cursor.copy_expert(sql, buffer)
+    else:
+        cursor.execute(sql, stream=buffer)
+
+
+class SembradorEdificio:
+    """Genera y carga un edificio sintético de forma determinista"""
+
+    def __init__(self, apartamentos: int, años: int, semilla: int = 42, año_final: int = AÑO_FINAL):
+        self.apartamentos = apartamentos
+        self.años = años
+        self.año_final = año_final
+        self.año_inicial = self.año_final - años + 1
+        self.azar = random.Random(semilla)
+        self.faker = Faker("es_CO")
+        self.faker.seed_instance(semilla)
+
+        self.siguiente_id_registro = 1
+        self.tasas: Dict[tuple, float] = {}
+        self.contadores = {"registros": 0}
+
+    # ---- Datos maestros ----
+
+    def _propietarios(self) -> List[tuple]:
+        # ~5% de los propietarios tiene dos apartamentos
+        cantidad = max(1, round(self.apartamentos * 0.95))
+        filas = []
+        for i in range(1, cantidad + 1):
+            nombre = self.faker.name()
+            usuario_correo = self.faker.user_name()
+            filas.append((
+                i, nombre, str(10_000_000 + i * 7), f"{usuario_correo}.{i}@example.com",
+                self.faker.msisdn()[:10],
+            ))
+        return filas
+
+    def _apartamentos(self, propietarios: int) -> List[tuple]:
+        areas = self.azar.choices(
+            [area for area, _ in TIPOLOGIAS], weights=[peso for _, peso in TIPOLOGIAS], k=self.apartamentos
+        )
+        area_total = sum(areas)
+
+        unidades_por_piso = 8
+        filas = []
+        coeficiente_asignado = 0.0
+        for i, area in enumerate(areas, start=1):
+            torre = (i - 1) // (unidades_por_piso * 20) + 1
+            piso = ((i - 1) // unidades_por_piso) % 20 + 1
+            unidad = (i - 1) % unidades_por_piso + 1
+            if i < self.apartamentos:
+                coeficiente = round(area / area_total, 6)
+                coeficiente_asignado += coeficiente
+            else:
+                # El último absorbe el redondeo para que la suma sea exactamente 1
+                coeficiente = round(1 - coeficiente_asignado, 6)
+            propietario_id = i if i <= propietarios else self.azar.randint(1, propietarios)
+            filas.append((i, f"Torre {torre} - {piso}{unidad:02d}", f"{coeficiente:.6f}", propietario_id, area))
+        return filas
+
+    def _periodos(self, incluir_siguiente: bool = False):
+        """(año, mes) del historial; con incluir_siguiente también el año por generar"""
+        for año in range(self.año_inicial, self.año_final + (2 if incluir_siguiente else 1)):
+            for mes in range(1, 13):
+                yield año, mes
+
+    def _tasas(self) -> List[tuple]:
+        # Tasa mensual de mora con una caminata aleatoria entre 1.5% y 2.5%
+        tasa = 0.0200
+        filas = []
+        for año, mes in self._periodos(incluir_siguiente=True):
+            tasa = min(0.0250, max(0.0150, tasa + self.azar.uniform(-0.0008, 0.0008)))
+            self.tasas[(año, mes)] = round(tasa, 4)
+            filas.append((año, mes, f"{round(tasa, 4):.4f}"))
+        return filas
+
+    def _valor_m2(self, año: int) -> int:
+        """Valor mensual por m² en centavos, con un incremento anual del 7%"""
+        return round(420_000 * (1.07 ** (año - self.año_inicial)))
+
+    def _cuota(self, area: int, año: int) -> int:
+        # Redondeada a la centena de pesos
+        return round(area * self._valor_m2(año) / 10_000) * 10_000
+
+    # ---- Libro de movimientos ----
+
+    def _movimientos_apartamento(self, apartamento_id: int, area: int) -> List[tuple]:
+        """Cargos, intereses y pagos de un apartamento en orden cronológico, con saldo acumulado"""
+        _, _, probabilidad_base, (fraccion_min, fraccion_max) = self.azar.choices(
+            PERFILES_PAGO, weights=[perfil[1] for perfil in PERFILES_PAGO]
+        )[0]
+
+        filas = []
+        saldo = 0
+        pendiente_cuota = 0
+        pendiente_interes = 0
+        base_interes = 0  # Deuda sin intereses al cierre del mes anterior
+
+        def agregar(fecha, concepto, descripcion, tipo, centavos, mes, año, referencia=None):
+            nonlocal saldo
+            saldo += centavos if tipo == "DEBITO" else -centavos
+            filas.append((
+                self.siguiente_id_registro, apartamento_id, fecha.isoformat(), concepto, descripcion,
+                tipo, _pesos(centavos), mes, año, referencia, _pesos(saldo),
+            ))
+            self.siguiente_id_registro += 1
+
+        for año, mes in self._periodos():
+            cuota = self._cuota(area, año)
+            agregar(date(año, mes, 5), CONCEPTO_CUOTA, f"Cuota ordinaria {mes:02d}/{año}",
+                    "DEBITO", cuota, mes, año)
+            pendiente_cuota += cuota
+
+            # Pago del mes según el perfil (los morosos empeoran si ya deben mucho)
+            probabilidad = probabilidad_base * (0.6 if pendiente_cuota > 3 * cuota else 1.0)
+            if self.azar.random() < probabilidad:
+                # Después del cargo del día 5 y antes del interés del 28, para que el
+                # orden (fecha_efectiva, id) coincida con el orden de generación
+                dia = self.azar.randint(6, 27)
+                monto = round(cuota * self.azar.uniform(fraccion_min, fraccion_max) / 100) * 100
+                monto = max(monto, 100)
+                referencia = f"BCO-{año}{mes:02d}-{apartamento_id}-{dia:02d}"
+
+                a_interes = min(monto, pendiente_interes)
+                if a_interes:
+                    agregar(date(año, mes, dia), CONCEPTO_PAGO_INTERES, f"Pago intereses {mes:02d}/{año}",
+                            "CREDITO", a_interes, mes, año, referencia)
+                    pendiente_interes -= a_interes
+                a_cuota = min(monto - a_interes, max(pendiente_cuota, 0))
+                if a_cuota:
+                    agregar(date(año, mes, dia), CONCEPTO_PAGO_CUOTA, f"Pago automático {mes:02d}/{año}",
+                            "CREDITO", a_cuota, mes, año, referencia)
+                    pendiente_cuota -= a_cuota
+                exceso = monto - a_interes - a_cuota
+                if exceso:
+                    agregar(date(año, mes, dia), CONCEPTO_EXCESO, "Pago en exceso",
+                            "CREDITO", exceso, mes, año, referencia)
+                    pendiente_cuota -= exceso
+
+            # Interés sobre lo adeudado al cierre del mes anterior, con la tasa de ese mes
+            periodo_anterior = (año, mes - 1) if mes > 1 else (año - 1, 12)
+            tasa = self.tasas.get(periodo_anterior)
+            if tasa and base_interes > 0:
+                interes = round(base_interes * tasa)
+                ultimo_dia = calendar.monthrange(*periodo_anterior)[1]
+                agregar(date(año, mes, 28), CONCEPTO_INTERES,
+                        f"Interés moratorio automático - {mes:02d}/{año} (Base: ${_pesos(base_interes)}, "
+                        f"Tasa: {tasa * 100:.2f}%, Saldo al {periodo_anterior[0]}-{periodo_anterior[1]:02d}-{ultimo_dia})",
+                        "DEBITO", interes, mes, año)
+                pendiente_interes += interes
+
+            base_interes = pendiente_cuota
+
+        self.contadores["registros"] += len(filas)
+        return filas
+
+    # ---- Presupuesto y gastos ----
+
+    def _presupuestos_y_gastos(self, total_cuotas_por_año: Dict[int, int]):
+        conceptos_gasto = [c for c in CONCEPTOS_BASE if not c[2] and c[3]]
+        presupuestos, items, gastos = [], [], []
+        for indice, año in enumerate(range(self.año_inicial, self.año_final + 1), start=1):
+            presupuestos.append((indice, año, f"Presupuesto {año}"))
+            ingreso_mensual = total_cuotas_por_año[año] // 12
+            # Reparto del gasto presupuestado entre conceptos (~90% del ingreso)
+            pesos = [self.azar.uniform(0.5, 1.5) for _ in conceptos_gasto]
+            for mes in range(1, 13):
+                items.append((indice, CONCEPTOS_BASE[0][0], mes, _pesos(ingreso_mensual), "INGRESO"))
+                for (concepto_id, nombre, _, _), peso in zip(conceptos_gasto, pesos):
+                    presupuestado = round(ingreso_mensual * 0.9 * peso / sum(pesos) / 100) * 100
+                    items.append((indice, concepto_id, mes, _pesos(presupuestado), "GASTO"))
+                    ejecutado = round(presupuestado * self.azar.uniform(0.8, 1.2) / 100) * 100
+                    dia = self.azar.randint(1, calendar.monthrange(año, mes)[1])
+                    gastos.append((
+                        date(año, mes, dia).isoformat(), concepto_id,
+                        f"{nombre} - {self.faker.company()}", _pesos(ejecutado), indice, mes, año,
+                    ))
+        return presupuestos, items, gastos
+
+    # ---- Carga ----
+
+    def sembrar(self, engine: Engine) -> Dict:
+        """Reemplaza el contenido de la base y retorna un resumen de lo cargado"""
+        inicio = time.perf_counter()
+
+        with engine.begin() as conn:
+            conn.execute(text(f"TRUNCATE {', '.join(TABLAS)} RESTART IDENTITY CASCADE"))
+            # Particiones también hasta el año próximo: la app registra movimientos con fecha de hoy
+            for año in range(self.año_inicial, max(self.año_final, date.today().year) + 2):
+                conn.execute(text("SELECT crear_particion_rfa(:año)"), {"año": año})
+            # Sin triggers de usuario: el saldo acumulado llega calculado
+            conn.execute(text("ALTER TABLE registro_financiero_apartamento DISABLE TRIGGER USER"))
+
+            cursor = conn.connection.cursor()
+
+            _copiar(cursor, "concepto", ("id", "nombre", "es_ingreso_tipico", "es_recurrente_presupuesto"),
+                    CONCEPTOS_BASE)
+
+            propietarios = self._propietarios()
+            _copiar(cursor, "propietario", ("id", "nombre_completo", "documento_identidad", "email", "telefono"),
+                    propietarios)
+
+            apartamentos = self._apartamentos(len(propietarios))
+            _copiar(cursor, "apartamento", ("id", "identificador", "coeficiente_copropiedad", "propietario_id"),
+                    [fila[:4] for fila in apartamentos])
+
+            # Un solo hash (misma sal) para todos: con scrypt por usuario la
+            # siembra tardaría minutos, y son datos de prueba
+            clave = hashear(CLAVE_USUARIOS)
+            _copiar(cursor, "usuario", ("username", "email", "hashed_password", "nombre_completo", "rol", "propietario_id"),
+                    [("admin", "admin@example.com", clave, "Administrador", "ADMIN", None)] + [
+                        (f"propietario{p[0]}", p[3], clave, p[1], "PROPIETARIO", p[0])
+                        for p in propietarios
+                    ])
+
+            _copiar(cursor, "tasa_interes_mora", ("año", "mes", "tasa_interes_mensual"), self._tasas())
+
+            total_cuotas_por_año: Dict[int, int] = {}
+            cuotas = []
+            for apartamento_id, _, _, _, area in apartamentos:
+                for año, mes in self._periodos(incluir_siguiente=True):
+                    cuota = self._cuota(area, año)
+                    cuotas.append((apartamento_id, año, mes, _pesos(cuota)))
+                    if mes == 1:
+                        total_cuotas_por_año[año] = total_cuotas_por_año.get(año, 0) + cuota * 12
+            _copiar(cursor, "cuota_configuracion",
+                    ("apartamento_id", "año", "mes", "monto_cuota_ordinaria_mensual"), cuotas)
+
+            for desde in range(0, len(apartamentos), LOTE_APARTAMENTOS):
+                lote = apartamentos[desde:desde + LOTE_APARTAMENTOS]
+                _copiar(cursor, "registro_financiero_apartamento", COLUMNAS_REGISTRO, (
+                    fila
+                    for apartamento_id, _, _, _, area in lote
+                    for fila in self._movimientos_apartamento(apartamento_id, area)
+                ))
+                print(f"   📒 Movimientos: {min(desde + LOTE_APARTAMENTOS, len(apartamentos))}/{len(apartamentos)} apartamentos")
+
+            presupuestos, items, gastos = self._presupuestos_y_gastos(total_cuotas_por_año)
+            _copiar(cursor, "presupuesto_anual", ("id", "año", "descripcion"), presupuestos)
+            _copiar(cursor, "item_presupuesto",
+                    ("presupuesto_anual_id", "concepto_id", "mes", "monto_presupuestado", "tipo_item"), items)
+            _copiar(cursor, "gasto_comunidad",
+                    ("fecha_gasto", "concepto_id", "descripcion_adicional", "monto",
+                     "presupuesto_anual_id", "mes_gasto", "año_gasto"), gastos)
+
+            conn.execute(text("ALTER TABLE registro_financiero_apartamento ENABLE TRIGGER USER"))
+
+            # Con los triggers desactivados no se registró la versión del libro
+            conn.execute(text("""
+                INSERT INTO version_libro_apartamento (apartamento_id)
+                SELECT id FROM apartamento
+                ON CONFLICT (apartamento_id) DO UPDATE
+                SET version = nextval('version_libro_seq'), actualizado_en = CURRENT_TIMESTAMP
+            """))
+
+            # Las secuencias continúan después de los IDs cargados explícitamente
+            for tabla in ("concepto", "propietario", "apartamento", "presupuesto_anual", "registro_financiero_apartamento"):
+                conn.execute(text(f"""
+                    SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), (SELECT COALESCE(MAX(id), 1) FROM {tabla}))
+                """))
+
+        # Ni los hechos mensuales
+        reconstruir_hechos(engine)
+
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+
+        return {
+            "propietarios": len(propietarios),
+            "apartamentos": len(apartamentos),
+            "registros": self.contadores["registros"],
+            "gastos": len(gastos),
+            "año_inicial": self.año_inicial,
+            "año_final": self.año_final,
+            "segundos": round(time.perf_counter() - inicio, 1),
+        }
+
+
+def sembrar(engine: Engine, apartamentos: int, años: int, semilla: int = 42,
+            año_final: int = AÑO_FINAL) -> Dict:
+    """Aplica las migraciones pendientes y siembra el edificio sintético"""
+    from src.migrations import aplicar_migraciones
+
+    aplicar_migraciones(engine)
+    return SembradorEdificio(apartamentos, años, semilla, año_final).sembrar(engine)
+
+
+def main():
+    """Función principal"""
+    apartamentos = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    años = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    semilla = int(sys.argv[3]) if len(sys.argv) > 3 else 42
+    año_final = int(sys.argv[4]) if len(sys.argv) > 4 else AÑO_FINAL
+
+    from src.models import db_manager
+
+    print(f"🏗️  Sembrando {apartamentos} apartamentos × {años} años hasta {año_final} (semilla {semilla})")
+    resumen = sembrar(db_manager.get_engine(), apartamentos, años, semilla, año_final)
+
+    print(f"\n✅ Siembra completada en {resumen['segundos']}s:")
+    print(f"   👤 Propietarios: {resumen['propietarios']}")
+    print(f"   🏠 Apartamentos: {resumen['apartamentos']}")
+    print(f"   📒 Movimientos: {resumen['registros']} ({resumen['año_inicial']}-{resumen['año_final']})")
+    print(f"   🧾 Gastos de la comunidad: {resumen['gastos']}")
+    print(f"   🔑 Usuarios: admin y propietario<N>, clave '{CLAVE_USUARIOS}'")
+
+
+if __name__ == "__main__":
+    main()
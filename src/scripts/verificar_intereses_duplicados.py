@@ -4,7 +4,9 @@ Script de Verificación de Intereses Duplicados
 ==============================================
 
 Este script verifica si hay registros de intereses calculados incorrectamente
-(interés sobre interés) y proporciona estadísticas detalladas.
+(interés sobre interés) y proporciona estadísticas detalladas. Los totales
+salen de hecho_mensual; solo la búsqueda de intereses altos lee el libro.
+Con DATABASE_READ_URL consulta la réplica de lectura.
 
 Uso:
     python scripts/verificar_intereses_duplicados.py
@@ -17,15 +19,16 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from sqlmodel import create_engine, Session, text
+from sqlmodel import Session, text
 from decimal import Decimal
-from src.models.database import DATABASE_URL
+from src.models import db_manager
 
 
 def verificar_intereses_duplicados():
     """Verifica y reporta problemas con intereses calculados incorrectamente"""
     
-    engine = create_engine(DATABASE_URL)
+    # Solo lee: en la réplica si está configurada y al día
+    engine = db_manager.get_read_engine()
     
     with Session(engine) as session:
         print("🔍 Verificando Registros de Intereses...")
@@ -34,17 +37,17 @@ def verificar_intereses_duplicados():
         # 1. Resumen general de intereses
         sql_resumen = """
             SELECT 
-                COUNT(*) as total_registros_interes,
-                SUM(rfa.monto) as monto_total_intereses,
-                MIN(rfa.fecha_efectiva) as primer_interes,
-                MAX(rfa.fecha_efectiva) as ultimo_interes
-            FROM registro_financiero_apartamento rfa
-            JOIN concepto c ON rfa.concepto_id = c.id
+                SUM(h.movimientos) as total_registros_interes,
+                SUM(h.debitos + h.creditos) as monto_total_intereses,
+                to_char(MIN(make_date(h.año, h.mes, 1)), 'MM/YYYY') as primer_interes,
+                to_char(MAX(make_date(h.año, h.mes, 1)), 'MM/YYYY') as ultimo_interes
+            FROM hecho_mensual h
+            JOIN concepto c ON h.concepto_id = c.id
             WHERE c.nombre ILIKE '%interés%' OR c.nombre ILIKE '%mora%'
         """
         
         resultado_resumen = session.exec(text(sql_resumen)).first()
-        if resultado_resumen:
+        if resultado_resumen and resultado_resumen.total_registros_interes:
             print(f"📊 RESUMEN GENERAL:")
             print(f"   Total registros de interés: {resultado_resumen.total_registros_interes}")
             print(f"   Monto total intereses: ${resultado_resumen.monto_total_intereses:,.2f}")
@@ -55,13 +58,13 @@ def verificar_intereses_duplicados():
         sql_por_apartamento = """
             SELECT 
                 a.identificador,
-                COUNT(*) as total_intereses,
-                SUM(rfa.monto) as total_monto_intereses,
-                AVG(rfa.monto) as promedio_interes,
-                MAX(rfa.fecha_efectiva) as ultimo_interes
-            FROM registro_financiero_apartamento rfa
-            JOIN apartamento a ON rfa.apartamento_id = a.id
-            JOIN concepto c ON rfa.concepto_id = c.id
+                SUM(h.movimientos) as total_intereses,
+                SUM(h.debitos + h.creditos) as total_monto_intereses,
+                SUM(h.debitos + h.creditos) / SUM(h.movimientos) as promedio_interes,
+                MAX(make_date(h.año, h.mes, 1)) as ultimo_interes
+            FROM hecho_mensual h
+            JOIN apartamento a ON h.apartamento_id = a.id
+            JOIN concepto c ON h.concepto_id = c.id
             WHERE c.nombre ILIKE '%interés%' OR c.nombre ILIKE '%mora%'
             GROUP BY a.identificador
             ORDER BY total_monto_intereses DESC
@@ -107,24 +110,17 @@ def verificar_intereses_duplicados():
         sql_saldos_sin_intereses = """
             SELECT 
                 a.identificador,
-                SUM(CASE 
-                    WHEN rfa.tipo_movimiento = 'DEBITO' THEN rfa.monto 
-                    ELSE -rfa.monto 
-                END) as saldo_sin_intereses,
-                COUNT(CASE WHEN rfa.tipo_movimiento = 'DEBITO' THEN 1 END) as total_debitos,
-                COUNT(CASE WHEN rfa.tipo_movimiento = 'CREDITO' THEN 1 END) as total_creditos
-            FROM registro_financiero_apartamento rfa
-            JOIN apartamento a ON rfa.apartamento_id = a.id
-            LEFT JOIN concepto c ON rfa.concepto_id = c.id
+                SUM(h.debitos - h.creditos) as saldo_sin_intereses,
+                SUM(h.movimientos) as total_movimientos
+            FROM hecho_mensual h
+            JOIN apartamento a ON h.apartamento_id = a.id
+            LEFT JOIN concepto c ON h.concepto_id = c.id
             WHERE (c.nombre IS NULL OR (
                 c.nombre NOT ILIKE '%interés%' AND 
                 c.nombre NOT ILIKE '%mora%'
             ))
             GROUP BY a.identificador
-            HAVING SUM(CASE 
-                WHEN rfa.tipo_movimiento = 'DEBITO' THEN rfa.monto 
-                ELSE -rfa.monto 
-            END) > 0
+            HAVING SUM(h.debitos - h.creditos) > 0
             ORDER BY saldo_sin_intereses DESC
             LIMIT 10
         """
@@ -133,39 +129,30 @@ def verificar_intereses_duplicados():
         saldos_pendientes = session.exec(text(sql_saldos_sin_intereses)).all()
         for saldo in saldos_pendientes:
             print(f"   {saldo.identificador}: ${saldo.saldo_sin_intereses:,.2f} "
-                  f"({saldo.total_debitos} débitos, {saldo.total_creditos} créditos)")
+                  f"({saldo.total_movimientos} movimientos)")
         print()
         
         # 5. Comparar saldos con y sin intereses
         sql_comparacion = """
-            WITH saldos_con_intereses AS (
-                SELECT 
-                    apartamento_id,
-                    SUM(CASE WHEN tipo_movimiento = 'DEBITO' THEN monto ELSE -monto END) as saldo_total
-                FROM registro_financiero_apartamento
-                GROUP BY apartamento_id
-            ),
-            saldos_sin_intereses AS (
+            WITH saldos AS (
                 SELECT 
-                    rfa.apartamento_id,
-                    SUM(CASE WHEN rfa.tipo_movimiento = 'DEBITO' THEN rfa.monto ELSE -rfa.monto END) as saldo_base
-                FROM registro_financiero_apartamento rfa
-                LEFT JOIN concepto c ON rfa.concepto_id = c.id
-                WHERE (c.nombre IS NULL OR (
-                    c.nombre NOT ILIKE '%interés%' AND 
-                    c.nombre NOT ILIKE '%mora%'
-                ))
-                GROUP BY rfa.apartamento_id
+                    h.apartamento_id,
+                    SUM(h.debitos - h.creditos) as saldo_total,
+                    SUM(h.debitos - h.creditos) FILTER (
+                        WHERE c.nombre NOT ILIKE '%interés%' AND c.nombre NOT ILIKE '%mora%'
+                    ) as saldo_base
+                FROM hecho_mensual h
+                JOIN concepto c ON h.concepto_id = c.id
+                GROUP BY h.apartamento_id
             )
             SELECT 
                 a.identificador,
-                COALESCE(sci.saldo_total, 0) as saldo_con_intereses,
-                COALESCE(ssi.saldo_base, 0) as saldo_sin_intereses,
-                COALESCE(sci.saldo_total, 0) - COALESCE(ssi.saldo_base, 0) as diferencia_intereses
+                COALESCE(s.saldo_total, 0) as saldo_con_intereses,
+                COALESCE(s.saldo_base, 0) as saldo_sin_intereses,
+                COALESCE(s.saldo_total, 0) - COALESCE(s.saldo_base, 0) as diferencia_intereses
             FROM apartamento a
-            LEFT JOIN saldos_con_intereses sci ON a.id = sci.apartamento_id
-            LEFT JOIN saldos_sin_intereses ssi ON a.id = ssi.apartamento_id
-            WHERE COALESCE(sci.saldo_total, 0) > 0 OR COALESCE(ssi.saldo_base, 0) > 0
+            LEFT JOIN saldos s ON a.id = s.apartamento_id
+            WHERE COALESCE(s.saldo_total, 0) > 0 OR COALESCE(s.saldo_base, 0) > 0
             ORDER BY diferencia_intereses DESC
             LIMIT 10
         """
@@ -182,15 +169,15 @@ def verificar_intereses_duplicados():
         # 6. Estadísticas de procesamiento mensual
         sql_procesamiento = """
             SELECT 
-                año_aplicable,
-                mes_aplicable,
-                COUNT(*) as registros_interes,
-                SUM(monto) as total_intereses_mes
-            FROM registro_financiero_apartamento rfa
-            JOIN concepto c ON rfa.concepto_id = c.id
+                h.año as año_aplicable,
+                h.mes as mes_aplicable,
+                SUM(h.movimientos) as registros_interes,
+                SUM(h.debitos + h.creditos) as total_intereses_mes
+            FROM hecho_mensual h
+            JOIN concepto c ON h.concepto_id = c.id
             WHERE c.nombre ILIKE '%interés%' OR c.nombre ILIKE '%mora%'
-            GROUP BY año_aplicable, mes_aplicable
-            ORDER BY año_aplicable DESC, mes_aplicable DESC
+            GROUP BY h.año, h.mes
+            ORDER BY h.año DESC, h.mes DESC
             LIMIT 12
         """
         
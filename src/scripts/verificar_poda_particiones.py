@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Script de Verificación de Poda de Particiones
+=============================================
+
+Ejecuta EXPLAIN sobre las consultas calientes del generador y de los reportes
+y muestra cuántas particiones anuales de registro_financiero_apartamento
+recorre cada una. Falla si una consulta que debería podar particiones
+termina recorriéndolas todas.
+
+Uso:
+    python src/scripts/verificar_poda_particiones.py [año] [mes]
+"""
+
+import sys
+from pathlib import Path
+from datetime import date
+
+# Agregar el directorio raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlmodel import text
+from src.models import db_manager
+
+TABLA = "registro_financiero_apartamento"
+
+
+def _consultas(año: int, mes: int):
+    """Consultas representativas: (nombre, sql, espera_poda)"""
+    rango = f"fecha_efectiva >= DATE '{año}-01-01' AND fecha_efectiva < DATE '{año + 1}-01-01'"
+    return [
+        (
+            "Generador: cuotas ya generadas",
+            f"""
+                SELECT 1 FROM {TABLA}
+                WHERE {rango}
+                AND concepto_id = 1 AND año_aplicable = {año} AND mes_aplicable = {mes}
+                AND descripcion_adicional LIKE 'Cuota ordinaria%'
+            """,
+            True,
+        ),
+        (
+            "Generador: monto de intereses del mes",
+            f"""
+                SELECT COALESCE(SUM(monto), 0) FROM {TABLA}
+                WHERE {rango}
+                AND año_aplicable = {año} AND mes_aplicable = {mes}
+                AND descripcion_adicional LIKE 'Interés moratorio automático%'
+            """,
+            True,
+        ),
+        (
+            "Saldo a fecha (saldo acumulado)",
+            f"""
+                SELECT saldo_acumulado FROM {TABLA}
+                WHERE apartamento_id = 1 AND fecha_efectiva <= DATE '{año}-{mes:02d}-28'
+                ORDER BY fecha_efectiva DESC, id DESC LIMIT 1
+            """,
+            False,
+        ),
+        (
+            "Reporte mensual por mes/año aplicable",
+            f"""
+                SELECT apartamento_id, SUM(monto) FROM {TABLA}
+                WHERE concepto_id = 1 AND año_aplicable = {año} AND mes_aplicable = {mes}
+                GROUP BY apartamento_id
+            """,
+            False,
+        ),
+    ]
+
+
+def _particiones_en_plan(nodo: dict, encontradas: set):
+    """Recorre el plan JSON y recolecta las particiones escaneadas"""
+    relacion = nodo.get("Relation Name")
+    if relacion and relacion.startswith(f"{TABLA}_"):
+        encontradas.add(relacion)
+    for hijo in nodo.get("Plans", []):
+        _particiones_en_plan(hijo, encontradas)
+
+
+def verificar_poda_particiones(año: int, mes: int) -> bool:
+    """Imprime el resultado por consulta y retorna False si alguna esperada no poda"""
+    todo_ok = True
+
+    with db_manager.get_session() as session:
+        total_particiones = session.exec(text(f"""
+            SELECT COUNT(*) FROM pg_inherits
+            WHERE inhparent = '{TABLA}'::regclass
+        """)).scalar()
+
+        print(f"🔍 Poda de particiones ({total_particiones} particiones, período {mes:02d}/{año})")
+        print("=" * 60)
+
+        for nombre, sql, espera_poda in _consultas(año, mes):
+            plan = session.exec(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+            encontradas = set()
+            _particiones_en_plan(plan[0]["Plan"], encontradas)
+
+            podada = len(encontradas) < total_particiones
+            icono = "✅" if podada or not espera_poda else "❌"
+            if espera_poda and not podada:
+                todo_ok = False
+
+            print(f"{icono} {nombre}: {len(encontradas)}/{total_particiones} particiones")
+            for particion in sorted(encontradas):
+                print(f"      → {particion}")
+            if not espera_poda and not podada:
+                print("      (filtra por año/mes aplicable sin fecha_efectiva: no puede podar)")
+
+    return todo_ok
+
+
+def main():
+    """Función principal"""
+    hoy = date.today()
+    año = int(sys.argv[1]) if len(sys.argv) > 1 else hoy.year
+    mes = int(sys.argv[2]) if len(sys.argv) > 2 else hoy.month
+
+    if not verificar_poda_particiones(año, mes):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
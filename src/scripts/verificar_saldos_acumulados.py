@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Script de Verificación de Saldos Acumulados
+===========================================
+
+Compara el saldo acumulado guardado en cada movimiento con el recalculado
+a partir de los débitos y créditos, y opcionalmente repara las diferencias.
+
+Uso:
+    python src/scripts/verificar_saldos_acumulados.py [reparar]
+"""
+
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.services.saldos import verificar_saldos_acumulados
+
+
+def main():
+    """Función principal"""
+    reparar = len(sys.argv) > 1 and str(sys.argv[1]).lower() in ['reparar', 'true', '1']
+
+    print("🔍 Verificando saldos acumulados...")
+    print("=" * 50)
+
+    resultado = verificar_saldos_acumulados(reparar=reparar)
+    diferencias = resultado['apartamentos_con_diferencias']
+
+    if not diferencias:
+        print("✅ Todos los saldos acumulados son consistentes")
+        return
+
+    print(f"⚠️  {len(diferencias)} apartamentos con diferencias "
+          f"({resultado['registros_con_diferencia']} registros):")
+    for diferencia in diferencias:
+        print(f"   Apartamento {diferencia['apartamento_id']}: "
+              f"{diferencia['registros_con_diferencia']} registros "
+              f"(primer registro afectado: {diferencia['primer_registro_id']})")
+
+    if reparar:
+        print(f"\n🔧 Registros reparados: {resultado['registros_reparados']}")
+    else:
+        print("\n💡 Ejecute con el argumento 'reparar' para recalcular los saldos")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
 from .initial_data import crear_datos_iniciales
+from .saldos import saldo_a_fecha, saldos_a_fecha, verificar_saldos_acumulados
 
-__all__ = ["crear_datos_iniciales"]
+__all__ = ["crear_datos_iniciales", "saldo_a_fecha", "saldos_a_fecha", "verificar_saldos_acumulados"]
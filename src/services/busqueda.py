@@ -0,0 +1,116 @@
+"""
+Servicio de búsqueda global del administrador
+Busca un texto en propietarios (nombre y documento), apartamentos
+(identificador) y el libro (referencias de pago y descripciones) con los
+índices de trigramas de src/migrations/0010_busqueda_trigramas.sql, y
+retorna resultados tipados ordenados por parecido.
+
+Cada columna acepta la subcadena exacta (ILIKE '%texto%') o una palabra
+parecida (operador <% de pg_trgm, tolera errores de digitación). En el libro
+se ordena solo sobre los primeros CANDIDATOS_LIBRO candidatos de cada
+columna, para que un texto muy común ("cuota") no recorra millones de filas.
+"""
+from typing import Dict, List
+
+from sqlmodel import Session, text
+
+# Los trigramas necesitan al menos 3 caracteres; con menos solo se buscan
+# propietarios y apartamentos (tablas pequeñas)
+MINIMO_LIBRO = 3
+CANDIDATOS_LIBRO = 200
+
+# Coincidencia al inicio del texto primero, después por parecido de palabra
+_PUNTAJE = "(CASE WHEN {col} ILIKE :prefijo THEN 1 ELSE 0 END + word_similarity(:q, {col}))"
+# pg8000 usa el paramstyle format: el % del operador <% va escapado
+_COINCIDE = "({col} ILIKE :patron OR :q <%% {col})"
+
+SQL_BUSCAR_CATALOGO = f"""
+    (
+        SELECT 'propietario' AS tipo, p.id, p.nombre_completo AS titulo, p.documento_identidad AS detalle,
+               NULL::date AS fecha, NULL::numeric AS monto, NULL::bigint AS movimientos,
+               GREATEST({_PUNTAJE.format(col="p.nombre_completo")},
+                        {_PUNTAJE.format(col="p.documento_identidad")}) AS puntaje
+        FROM propietario p
+        WHERE {_COINCIDE.format(col="p.nombre_completo")} OR {_COINCIDE.format(col="p.documento_identidad")}
+        ORDER BY puntaje DESC, p.id
+        LIMIT :limite
+    )
+    UNION ALL
+    (
+        SELECT 'apartamento', a.id, a.identificador, p.nombre_completo,
+               NULL::date, NULL::numeric, NULL::bigint,
+               {_PUNTAJE.format(col="a.identificador")}
+        FROM apartamento a
+        LEFT JOIN propietario p ON p.id = a.propietario_id
+        WHERE {_COINCIDE.format(col="a.identificador")}
+        ORDER BY 8 DESC, a.id
+        LIMIT :limite
+    )
+"""
+
+# Un pago distribuido deja varias filas con la misma referencia: se agrupan
+# por apartamento y referencia (idem las descripciones repetidas)
+SQL_BUSCAR_LIBRO = f"""
+    UNION ALL
+    (
+        SELECT 'pago', r.apartamento_id, r.referencia_pago, a.identificador,
+               MAX(r.fecha_efectiva), SUM(r.monto), COUNT(*), MAX(r.puntaje)
+        FROM (
+            SELECT apartamento_id, referencia_pago, fecha_efectiva, monto,
+                   {_PUNTAJE.format(col="referencia_pago")} AS puntaje
+            FROM registro_financiero_apartamento
+            WHERE referencia_pago IS NOT NULL AND {_COINCIDE.format(col="referencia_pago")}
+            LIMIT :candidatos
+        ) r
+        JOIN apartamento a ON a.id = r.apartamento_id
+        GROUP BY r.apartamento_id, r.referencia_pago, a.identificador
+        ORDER BY 8 DESC, 5 DESC
+        LIMIT :limite
+    )
+    UNION ALL
+    (
+        SELECT 'movimiento', r.apartamento_id, r.descripcion_adicional, a.identificador,
+               MAX(r.fecha_efectiva), SUM(r.monto), COUNT(*), MAX(r.puntaje)
+        FROM (
+            SELECT apartamento_id, descripcion_adicional, fecha_efectiva, monto,
+                   {_PUNTAJE.format(col="descripcion_adicional")} AS puntaje
+            FROM registro_financiero_apartamento
+            WHERE descripcion_adicional IS NOT NULL AND {_COINCIDE.format(col="descripcion_adicional")}
+            LIMIT :candidatos
+        ) r
+        JOIN apartamento a ON a.id = r.apartamento_id
+        GROUP BY r.apartamento_id, r.descripcion_adicional, a.identificador
+        ORDER BY 8 DESC, 5 DESC
+        LIMIT :limite
+    )
+"""
+
+SQL_ORDEN = "ORDER BY puntaje DESC, tipo, id LIMIT :limite"
+
+
+def _escapar_like(texto: str) -> str:
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _url(resultado: Dict) -> str:
+    if resultado["tipo"] == "propietario":
+        return f"/admin/propietarios#propietario-{resultado['id']}"
+    return f"/admin/registros-financieros/{resultado['id']}"
+
+
+def buscar(session: Session, termino: str, limite: int = 20) -> List[Dict]:
+    """
+    Resultados de todos los tipos ordenados por parecido, a lo sumo `limite`.
+    En los de tipo pago y movimiento, id es el apartamento del movimiento.
+    """
+    termino = " ".join(termino.split())
+    if not termino:
+        return []
+    escapado = _escapar_like(termino)
+    sql = SQL_BUSCAR_CATALOGO
+    parametros = {"q": termino, "patron": f"%{escapado}%", "prefijo": f"{escapado}%", "limite": limite}
+    if len(termino) >= MINIMO_LIBRO:
+        sql += SQL_BUSCAR_LIBRO
+        parametros["candidatos"] = CANDIDATOS_LIBRO
+    filas = session.exec(text(f"SELECT * FROM ({sql}) resultados {SQL_ORDEN}").bindparams(**parametros)).mappings()
+    return [{**fila, "puntaje": round(float(fila["puntaje"]), 3), "url": _url(fila)} for fila in filas]
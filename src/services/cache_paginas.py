@@ -0,0 +1,109 @@
+"""
+Caché de páginas del propietario por versión del libro
+Las páginas del propietario solo cambian cuando cambia algún movimiento de
+sus apartamentos. La versión del libro (src/migrations/0005_version_libro.sql)
+se consulta sin tocar registro_financiero_apartamento y define:
+
+- un ETag fuerte, para responder 304 Not Modified a las recargas del navegador;
+- la clave de una caché LRU del HTML ya renderizado.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.responses import HTMLResponse
+from sqlmodel import Session, text
+
+from src.config import settings
+from src.utils.metricas import CACHE_PAGINAS
+
+# Apartamentos del propietario con su versión del libro, en una sola consulta
+SQL_VERSIONES_PROPIETARIO = """
+    SELECT a.id AS apartamento_id, COALESCE(v.version, 0) AS version
+    FROM apartamento a
+    LEFT JOIN version_libro_apartamento v ON v.apartamento_id = a.id
+    WHERE a.propietario_id = :propietario_id
+    ORDER BY a.id
+"""
+
+class CachePaginas:
+    """LRU en memoria del proceso: ETag -> HTML renderizado"""
+
+    def __init__(self, max_entradas: int):
+        self.max_entradas = max_entradas
+        self._entradas: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, etag: str) -> Optional[bytes]:
+        with self._lock:
+            cuerpo = self._entradas.get(etag)
+            if cuerpo is not None:
+                self._entradas.move_to_end(etag)
+            return cuerpo
+
+    def guardar(self, etag: str, cuerpo: bytes):
+        with self._lock:
+            self._entradas[etag] = cuerpo
+            self._entradas.move_to_end(etag)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+
+cache_paginas = CachePaginas(settings.CACHE_PAGINAS_MAX)
+
+
+def versiones_propietario(session: Session, propietario_id: int) -> Tuple[Tuple[int, int], ...]:
+    """((apartamento_id, version), ...) de los apartamentos del propietario"""
+    filas = session.exec(text(SQL_VERSIONES_PROPIETARIO).bindparams(propietario_id=propietario_id)).all()
+    return tuple((fila.apartamento_id, fila.version) for fila in filas)
+
+
+def calcular_etag(pagina: str, usuario_id: int, versiones: Tuple, parametros: Dict) -> str:
+    """
+    ETag fuerte de la página. Incluye el usuario (la barra de navegación es
+    personal), los parámetros de la consulta y el día, porque el contenido
+    también depende de la fecha actual.
+    """
+    partes = [
+        pagina,
+        str(usuario_id),
+        date.today().isoformat(),
+        ",".join(f"{apartamento}:{version}" for apartamento, version in versiones),
+        "&".join(f"{clave}={valor}" for clave, valor in sorted(parametros.items()) if valor is not None),
+    ]
+    return '"' + hashlib.sha256("|".join(partes).encode()).hexdigest()[:32] + '"'
+
+
+def _cabeceras(etag: str) -> Dict[str, str]:
+    # El navegador guarda la página, pero revalida siempre con If-None-Match
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def respuesta_cacheada(request: Request, pagina: str, etag: str) -> Optional[Response]:
+    """304 si el navegador ya tiene esta versión, el HTML guardado si está en caché, o None"""
+    if etag in [valor.strip() for valor in request.headers.get("if-none-match", "").split(",")]:
+        CACHE_PAGINAS.inc(pagina=pagina, resultado="304")
+        return Response(status_code=304, headers=_cabeceras(etag))
+
+    cuerpo = cache_paginas.obtener(etag)
+    if cuerpo is not None:
+        CACHE_PAGINAS.inc(pagina=pagina, resultado="acierto")
+        return HTMLResponse(cuerpo, headers=_cabeceras(etag))
+
+    CACHE_PAGINAS.inc(pagina=pagina, resultado="fallo")
+    return None
+
+
+def guardar_respuesta(pagina: str, etag: str, respuesta: Response) -> Response:
+    """Guarda el HTML renderizado y agrega las cabeceras de validación"""
+    if respuesta.status_code == 200:
+        cache_paginas.guardar(etag, bytes(respuesta.body))
+        respuesta.headers.update(_cabeceras(etag))
+    return respuesta
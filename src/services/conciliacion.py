@@ -0,0 +1,492 @@
+"""
+Conciliación de extractos bancarios
+Lee un extracto (CSV u OFX) por líneas, sin cargar el archivo completo, y
+asigna cada consignación a un apartamento con índices en memoria que se
+construyen una vez por extracto:
+
+1. la clave de la línea ya está registrada: el extracto se subió antes;
+2. la referencia coincide exactamente con una referencia de pago conocida
+   de un solo apartamento (pagos anteriores, reportes de los propietarios);
+3. la referencia o la descripción contienen el identificador del
+   apartamento ("TORRE 1 APTO 502", "T1-502", "Ap. 1203", o la referencia
+   es el identificador);
+4. el monto coincide con un pago reportado por un propietario con una
+   diferencia de fechas de hasta CONCILIACION_TOLERANCIA_DIAS.
+
+Las líneas asignadas pasan por PagoAutomaticoService.procesar_pagos_lote en
+una sola transacción; las demás se devuelven para asignarlas a mano.
+"""
+import csv
+import hashlib
+import io
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlmodel import Session, text
+
+from src.config import settings
+
+PREFIJO_REFERENCIA = "BANCO-"
+
+# Líneas del extracto que se leen y concilian juntas (una consulta de claves
+# ya aplicadas por lote)
+LOTE_LINEAS = 2000
+
+# Claves de líneas ya conciliadas (índice parcial idx_rfa_referencia_banco)
+SQL_CLAVES_APLICADAS = """
+    SELECT DISTINCT referencia_pago
+    FROM registro_financiero_apartamento
+    WHERE referencia_pago LIKE 'BANCO-%'
+    AND referencia_pago = ANY(:referencias)
+"""
+
+# Referencias de pagos anteriores que pertenecen a un solo apartamento
+SQL_REFERENCIAS_CONOCIDAS = """
+    SELECT referencia_pago, MIN(apartamento_id) AS apartamento_id
+    FROM registro_financiero_apartamento
+    WHERE tipo_movimiento = 'CREDITO'
+    AND referencia_pago IS NOT NULL
+    AND referencia_pago NOT LIKE 'BANCO-%'
+    AND fecha_efectiva >= :desde
+    GROUP BY referencia_pago
+    HAVING COUNT(DISTINCT apartamento_id) = 1
+"""
+
+SQL_APARTAMENTOS = "SELECT id, identificador FROM apartamento"
+
+# Pagos reportados por los propietarios, pendientes de validar
+# (idx_pago_reportado_pendiente_fecha)
+SQL_REPORTES_PENDIENTES = """
+    SELECT id, apartamento_id, monto, fecha_pago AS fecha, referencia
+    FROM pago_reportado
+    WHERE estado = 'PENDIENTE'
+    AND fecha_pago BETWEEN :desde AND :hasta
+"""
+
+# El reporte confirmado por el banco queda aprobado y apunta a la línea del
+# extracto con la que se registró el pago
+SQL_RESOLVER_REPORTES = """
+    UPDATE pago_reportado pr
+    SET estado = 'APROBADO', revisado_en = CURRENT_TIMESTAMP, pago_referencia = confirmado.referencia
+    FROM unnest(CAST(:ids AS BIGINT[]), CAST(:referencias AS TEXT[])) AS confirmado(id, referencia)
+    WHERE pr.id = confirmado.id
+    AND pr.estado = 'PENDIENTE'
+"""
+
+ALIAS_COLUMNAS = {
+    "fecha": ("fecha", "date", "fecha transaccion", "fecha movimiento", "fecha operacion", "dtposted"),
+    "monto": ("valor", "monto", "importe", "credito", "creditos", "abono", "abonos", "amount", "trnamt"),
+    "debito": ("debito", "debitos", "cargo", "cargos", "retiro"),
+    "referencia": ("referencia", "ref", "referencia 1", "documento", "numero documento", "comprobante", "fitid"),
+    "descripcion": ("descripcion", "concepto", "detalle", "memo", "name", "oficina"),
+}
+
+FORMATOS_FECHA = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d", "%d/%m/%y", "%Y%m%d")
+
+_PATRON_APARTAMENTO = re.compile(
+    r"\b(?:APARTAMENTO|APTO|APT|AP|UNIDAD|UND)\b\.?\s*(?:NO\.?|N°|#)?\s*([A-Z]?\d+[A-Z]?(?:-\d+)?)"
+)
+# "TORRE 2 APTO 305", "T2-305", "BLOQUE 2 # 305" -> T2305
+_PATRON_TORRE = re.compile(
+    r"\b(?:TORRE|BLOQUE|INTERIOR|INT|BLQ|T)\.?\s*(\d+)\s*[-/,]?\s*"
+    r"(?:(?:APARTAMENTO|APTO|APT|AP)\b\.?)?\s*(?:NO\.?|#)?\s*(\d+[A-Z]?)\b"
+)
+_PALABRAS_APARTAMENTO = re.compile(r"\b(?:APARTAMENTO|APTO|APT|AP|UNIDAD|UND)\b\.?")
+_PALABRAS_TORRE = re.compile(r"\b(?:TORRE|BLOQUE|INTERIOR|INT|BLQ)\b\.?")
+_PATRON_OFX = re.compile(r"<(/?)([A-Z0-9.]+)>([^<\r\n]*)", re.IGNORECASE)
+
+
+class ExtractoInvalido(ValueError):
+    """El archivo no tiene el formato esperado (columnas o etiquetas)"""
+
+
+@dataclass
+class LineaExtracto:
+    numero: int
+    fecha: date
+    monto: Decimal
+    referencia: str
+    descripcion: str
+    clave: str  # Identifica la línea entre subidas: va en referencia_pago
+
+    @property
+    def referencia_pago(self) -> str:
+        return PREFIJO_REFERENCIA + self.clave
+
+
+@dataclass
+class LineaConciliada:
+    linea: LineaExtracto
+    estado: str  # "asignada", "sin_asignar" o "ya_aplicada"
+    apartamento_id: Optional[int] = None
+    metodo: Optional[str] = None  # "referencia", "identificador" o "reporte"
+    reporte_id: Optional[int] = None
+
+
+# ---------------------------------------------------------------------------
+# Lectura por líneas
+# ---------------------------------------------------------------------------
+
+def _normalizar_texto(valor: str) -> str:
+    sin_tildes = unicodedata.normalize("NFKD", valor).encode("ascii", "ignore").decode("ascii")
+    return " ".join(sin_tildes.upper().split())
+
+
+def _parsear_fecha(valor: str) -> Optional[date]:
+    valor = valor.strip()[:10]
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(valor, formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parsear_monto(valor: str) -> Optional[Decimal]:
+    """Acepta 1.234.567,89 / 1,234,567.89 / 1234567 / $ 150.000"""
+    limpio = re.sub(r"[^\d,.\-]", "", valor or "")
+    if not limpio or limpio in "-,.":
+        return None
+    separadores = [c for c in limpio if c in ",."]
+    if separadores:
+        ultimo = separadores[-1]
+        decimales = limpio.rsplit(ultimo, 1)[1]
+        # Un único tipo de separador seguido de tres dígitos es de miles
+        if len(set(separadores)) == 1 and (len(decimales) == 3 or len(separadores) > 1):
+            limpio = limpio.replace(ultimo, "")
+        else:
+            otro = "." if ultimo == "," else ","
+            limpio = limpio.replace(otro, "").replace(ultimo, ".")
+    try:
+        return Decimal(limpio)
+    except InvalidOperation:
+        return None
+
+
+def _clave(partes: Iterable[str]) -> str:
+    return hashlib.sha1("|".join(partes).encode("utf-8")).hexdigest()[:32]
+
+
+def _texto(archivo: BinaryIO) -> io.TextIOWrapper:
+    # Quien lo use debe llamar detach(): al destruirse cerraría el archivo subido
+    return io.TextIOWrapper(archivo, encoding="utf-8-sig", errors="replace", newline="")
+
+
+def leer_csv(archivo: BinaryIO) -> Iterator[LineaExtracto]:
+    """Consignaciones de un CSV con encabezado (separador , ; o tabulador)"""
+    texto = _texto(archivo)
+    try:
+        muestra = texto.read(4096)
+        texto.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t")
+        except csv.Error:
+            dialecto = csv.excel
+        lector = csv.reader(texto, dialecto)
+
+        encabezado = [_normalizar_texto(c).lower() for c in next(lector, [])]
+        columnas = {}
+        for campo, alias in ALIAS_COLUMNAS.items():
+            for indice, nombre in enumerate(encabezado):
+                if nombre in alias:
+                    columnas[campo] = indice
+                    break
+        if "fecha" not in columnas or "monto" not in columnas:
+            raise ExtractoInvalido("El CSV debe tener columnas de fecha y valor")
+
+        repetidas: Counter = Counter()
+        for numero, fila in enumerate(lector, start=2):
+            valores = {
+                campo: fila[indice].strip() if indice < len(fila) else ""
+                for campo, indice in columnas.items()
+            }
+            fecha = _parsear_fecha(valores["fecha"])
+            monto = _parsear_monto(valores["monto"])
+            debito = _parsear_monto(valores.get("debito", ""))
+            if fecha is None or monto is None or monto <= 0 or debito:
+                continue
+            referencia, descripcion = valores.get("referencia", ""), valores.get("descripcion", "")
+            # Dos consignaciones idénticas el mismo día se distinguen por su orden
+            base = (fecha.isoformat(), str(monto), referencia, descripcion)
+            repetidas[base] += 1
+            yield LineaExtracto(numero, fecha, monto, referencia, descripcion,
+                                _clave(base + (str(repetidas[base]),)))
+    finally:
+        texto.detach()
+
+
+def _linea_ofx(transaccion: Dict[str, str], cuenta: Dict[str, str]) -> Optional[LineaExtracto]:
+    fecha = _parsear_fecha(transaccion.get("DTPOSTED", "")[:8])
+    monto = _parsear_monto(transaccion.get("TRNAMT", ""))
+    if not fecha or not monto or monto <= 0:
+        return None
+    referencia = transaccion.get("REFNUM") or transaccion.get("CHECKNUM") or ""
+    descripcion = " ".join(filter(None, (transaccion.get("NAME"), transaccion.get("MEMO"))))
+    # FITID es único solo dentro de una cuenta: la clave lleva el banco y la
+    # cuenta. Sin FITID, los datos de la transacción y su posición
+    partes = (cuenta.get("BANKID", ""), cuenta.get("ACCTID", "")) + (
+        (transaccion["FITID"],) if transaccion.get("FITID") else
+        (fecha.isoformat(), str(monto), referencia, descripcion, transaccion["_numero"]))
+    return LineaExtracto(int(transaccion["_numero"]), fecha, monto, referencia, descripcion, _clave(partes))
+
+
+def leer_ofx(archivo: BinaryIO) -> Iterator[LineaExtracto]:
+    """Consignaciones (<STMTTRN> con TRNAMT positivo) de un OFX 1.x (SGML) o 2.x (XML)"""
+    transaccion: Optional[Dict[str, str]] = None
+    # <BANKACCTFROM>/<CCACCTFROM> del estado de cuenta en curso (un OFX puede traer varios)
+    cuenta: Dict[str, str] = {}
+    encontradas = False
+    texto = _texto(archivo)
+    try:
+        for numero, linea in enumerate(texto, start=1):
+            for cierre, etiqueta, valor in _PATRON_OFX.findall(linea):
+                etiqueta = etiqueta.upper()
+                if etiqueta == "STMTTRN":
+                    if not cierre:
+                        transaccion = {"_numero": str(numero)}
+                        continue
+                    encontradas = True
+                    if transaccion:
+                        linea_extracto = _linea_ofx(transaccion, cuenta)
+                        if linea_extracto:
+                            yield linea_extracto
+                    transaccion = None
+                elif transaccion is not None and not cierre and valor.strip():
+                    transaccion[etiqueta] = valor.strip()
+                elif etiqueta in ("BANKID", "ACCTID") and not cierre:
+                    cuenta[etiqueta] = valor.strip()
+    finally:
+        texto.detach()
+    if not encontradas:
+        raise ExtractoInvalido("El OFX no tiene transacciones <STMTTRN>")
+
+
+def leer_extracto(archivo: BinaryIO, nombre: Optional[str] = None) -> Iterator[LineaExtracto]:
+    """Detecta el formato por extensión o por contenido"""
+    inicio = archivo.read(1024)
+    archivo.seek(0)
+    es_ofx = (nombre or "").lower().endswith((".ofx", ".qfx")) or b"OFXHEADER" in inicio or b"<OFX>" in inicio.upper()
+    return leer_ofx(archivo) if es_ofx else leer_csv(archivo)
+
+
+# ---------------------------------------------------------------------------
+# Índices y asignación
+# ---------------------------------------------------------------------------
+
+def normalizar_identificador(identificador: str) -> str:
+    """'Apto 101' -> '101', 'Torre 1 - 502' -> 'T1502', 'T1-502' -> 'T1502'"""
+    texto = _PALABRAS_APARTAMENTO.sub("", _normalizar_texto(identificador))
+    return re.sub(r"[^A-Z0-9]", "", _PALABRAS_TORRE.sub("T", texto))
+
+
+def normalizar_referencia(referencia: str) -> str:
+    return re.sub(r"[^A-Z0-9]", "", _normalizar_texto(referencia)).lstrip("0")
+
+
+class IndicesConciliacion:
+    """
+    Diccionarios de búsqueda de un extracto. Los apartamentos se cargan una
+    vez; las claves ya aplicadas, con cada lote de líneas (preparar), y las
+    referencias y reportes cuando un lote sale de las fechas ya cubiertas
+    """
+
+    def __init__(self, identificadores: Dict[str, int], referencias: Dict[str, Optional[int]],
+                 reportes: Iterable[Dict], aplicadas: Set[str]):
+        self.identificadores = identificadores
+        # None: referencia de varios apartamentos (ambigua)
+        self.referencias = referencias
+        self.aplicadas = aplicadas
+        self.reportes_por_monto: Dict[Decimal, List[Dict]] = defaultdict(list)
+        self._reportes: Dict[int, Dict] = {}
+        self._agregar_reportes(reportes)
+        self.desde: Optional[date] = None
+        self.hasta: Optional[date] = None
+
+    @classmethod
+    def cargar(cls, session: Session) -> "IndicesConciliacion":
+        """Identificadores de los apartamentos; el resto lo completa preparar()"""
+        identificadores: Dict[str, Optional[int]] = {}
+        for fila in session.exec(text(SQL_APARTAMENTOS)).mappings():
+            normalizado = normalizar_identificador(fila["identificador"])
+            # Dos apartamentos con el mismo identificador normalizado: ambiguo
+            identificadores[normalizado] = None if normalizado in identificadores else fila["id"]
+        return cls({k: v for k, v in identificadores.items() if v is not None}, {}, [], set())
+
+    def _agregar_reportes(self, reportes: Iterable[Dict]):
+        for reporte in reportes:
+            if reporte["id"] in self._reportes:
+                continue
+            self._reportes[reporte["id"]] = reporte = {**reporte, "usado": False}
+            self.reportes_por_monto[Decimal(reporte["monto"])].append(reporte)
+            normalizada = normalizar_referencia(reporte["referencia"] or "")
+            if normalizada and normalizada not in self.referencias:
+                self.referencias[normalizada] = reporte["apartamento_id"]
+
+    def _cargar_referencias(self, session: Session, desde: date):
+        referencias: Dict[str, Optional[int]] = {}
+        filas = session.exec(text(SQL_REFERENCIAS_CONOCIDAS).bindparams(desde=desde - timedelta(days=365)))
+        for referencia, apartamento_id in filas:
+            normalizada = normalizar_referencia(referencia)
+            if normalizada:
+                anterior = referencias.get(normalizada, apartamento_id)
+                referencias[normalizada] = apartamento_id if anterior == apartamento_id else None
+        # Las de los reportes ya cargados, después de las del libro
+        for reporte in self._reportes.values():
+            normalizada = normalizar_referencia(reporte["referencia"] or "")
+            if normalizada and normalizada not in referencias:
+                referencias[normalizada] = reporte["apartamento_id"]
+        self.referencias = referencias
+
+    def preparar(self, session: Session, lineas: List[LineaExtracto]):
+        """Una consulta por lote, más dos si el lote trae fechas nuevas"""
+        desde = min(linea.fecha for linea in lineas)
+        hasta = max(linea.fecha for linea in lineas)
+        if self.desde is None or desde < self.desde or hasta > self.hasta:
+            tolerancia = timedelta(days=settings.CONCILIACION_TOLERANCIA_DIAS)
+            if self.desde is not None:
+                desde, hasta = min(desde, self.desde), max(hasta, self.hasta)
+            # Los reportes ya cargados conservan su marca de usado
+            self._agregar_reportes(dict(fila) for fila in session.exec(
+                text(SQL_REPORTES_PENDIENTES).bindparams(desde=desde - tolerancia, hasta=hasta + tolerancia)
+            ).mappings())
+            if self.desde is None or desde < self.desde:
+                self._cargar_referencias(session, desde)
+            self.desde, self.hasta = desde, hasta
+
+        self.aplicadas.update(session.exec(text(SQL_CLAVES_APLICADAS).bindparams(
+            referencias=[linea.referencia_pago for linea in lineas])).scalars())
+
+    def por_identificador(self, linea: LineaExtracto) -> Optional[int]:
+        candidatos = set()
+        referencia = normalizar_identificador(linea.referencia) if linea.referencia else ""
+        if referencia in self.identificadores:
+            candidatos.add(self.identificadores[referencia])
+        texto = _normalizar_texto(f"{linea.referencia} {linea.descripcion}")
+        capturados = [f"T{torre}{unidad}" for torre, unidad in _PATRON_TORRE.findall(texto)]
+        capturados += [re.sub(r"[^A-Z0-9]", "", unidad) for unidad in _PATRON_APARTAMENTO.findall(texto)]
+        for capturado in capturados:
+            apartamento_id = self.identificadores.get(capturado)
+            if apartamento_id:
+                candidatos.add(apartamento_id)
+        return candidatos.pop() if len(candidatos) == 1 else None
+
+    def tomar_reporte(self, linea: LineaExtracto, apartamento_id: Optional[int] = None) -> Optional[Dict]:
+        """
+        Reporte del mismo monto con la fecha más cercana dentro de la
+        tolerancia. Sin apartamento, solo si el más cercano no es ambiguo
+        """
+        tolerancia = settings.CONCILIACION_TOLERANCIA_DIAS
+        candidatos = [
+            (abs((reporte["fecha"] - linea.fecha).days), reporte)
+            for reporte in self.reportes_por_monto.get(linea.monto, ())
+            if not reporte["usado"]
+            and abs((reporte["fecha"] - linea.fecha).days) <= tolerancia
+            and (apartamento_id is None or reporte["apartamento_id"] == apartamento_id)
+        ]
+        if not candidatos:
+            return None
+        candidatos.sort(key=lambda c: (c[0], c[1]["id"]))
+        distancia = candidatos[0][0]
+        cercanos = {reporte["apartamento_id"] for d, reporte in candidatos if d == distancia}
+        if len(cercanos) > 1:
+            return None
+        reporte = candidatos[0][1]
+        reporte["usado"] = True
+        return reporte
+
+    def conciliar(self, linea: LineaExtracto) -> LineaConciliada:
+        if linea.referencia_pago in self.aplicadas:
+            return LineaConciliada(linea, "ya_aplicada")
+        # Dentro del mismo extracto la clave ya no se puede repetir
+        self.aplicadas.add(linea.referencia_pago)
+
+        metodo = None
+        apartamento_id = self.referencias.get(normalizar_referencia(linea.referencia)) if linea.referencia else None
+        if apartamento_id:
+            metodo = "referencia"
+        else:
+            apartamento_id = self.por_identificador(linea)
+            metodo = "identificador" if apartamento_id else None
+
+        reporte = self.tomar_reporte(linea, apartamento_id)
+        if reporte and not apartamento_id:
+            apartamento_id, metodo = reporte["apartamento_id"], "reporte"
+        if not apartamento_id:
+            return LineaConciliada(linea, "sin_asignar")
+        return LineaConciliada(linea, "asignada", apartamento_id, metodo, reporte["id"] if reporte else None)
+
+
+def _descripcion(linea: LineaExtracto) -> str:
+    return f"Extracto bancario {linea.fecha:%d/%m/%Y}: {linea.referencia or linea.descripcion or 'sin referencia'}"
+
+
+def aplicar(session: Session, conciliadas: List[LineaConciliada]) -> Dict:
+    """
+    Registra las líneas asignadas en una transacción: aprueba los reportes que
+    el banco confirmó y distribuye los pagos con procesar_pagos_lote
+    """
+    from src.services.pago_automatico import PagoAutomaticoService
+
+    asignadas = [c for c in conciliadas if c.estado == "asignada"]
+    reportes = [c for c in asignadas if c.reporte_id]
+    if reportes:
+        session.exec(text(SQL_RESOLVER_REPORTES).bindparams(
+            ids=[c.reporte_id for c in reportes], referencias=[c.linea.referencia_pago for c in reportes]))
+    resultado = PagoAutomaticoService().procesar_pagos_lote(session, [
+        {
+            "apartamento_id": c.apartamento_id,
+            "monto": c.linea.monto,
+            "fecha": c.linea.fecha,
+            "referencia": c.linea.referencia_pago,
+            "descripcion": _descripcion(c.linea),
+        }
+        for c in asignadas
+    ])
+    session.commit()
+    return {**resultado, "reportes_confirmados": len(reportes)}
+
+
+def conciliar_extracto(session: Session, archivo: BinaryIO, nombre: Optional[str] = None,
+                       aplicar_asignadas: bool = True) -> Dict:
+    """
+    Lee, concilia y (por defecto) aplica un extracto
+
+    Returns:
+        Dict con las líneas conciliadas, el conteo por estado y por método,
+        y el resultado del lote
+    """
+    indices = IndicesConciliacion.cargar(session)
+    conciliadas: List[LineaConciliada] = []
+    lineas = leer_extracto(archivo, nombre)
+    while lote := list(islice(lineas, LOTE_LINEAS)):
+        indices.preparar(session, lote)
+        conciliadas.extend(indices.conciliar(linea) for linea in lote)
+    if not conciliadas:
+        return {"lineas": [], "estados": {}, "metodos": {}, "lote": None}
+
+    lote = aplicar(session, conciliadas) if aplicar_asignadas else None
+    return {
+        "lineas": conciliadas,
+        "estados": dict(Counter(c.estado for c in conciliadas)),
+        "metodos": dict(Counter(c.metodo for c in conciliadas if c.metodo)),
+        "lote": lote,
+    }
+
+
+def asignar_manualmente(session: Session, asignaciones: List[Tuple[LineaExtracto, int]]) -> Dict:
+    """Aplica las líneas que el administrador asignó; ignora las que ya se registraron"""
+    aplicadas = set(session.exec(text(SQL_CLAVES_APLICADAS).bindparams(
+        referencias=[linea.referencia_pago for linea, _ in asignaciones])).scalars())
+    conciliadas = [
+        LineaConciliada(linea, "asignada", apartamento_id, "manual")
+        for linea, apartamento_id in asignaciones
+        if linea.referencia_pago not in aplicadas
+    ]
+    resultado = aplicar(session, conciliadas)
+    return {**resultado, "omitidas": len(asignaciones) - len(conciliadas)}
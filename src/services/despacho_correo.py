@@ -0,0 +1,290 @@
+"""
+Despachador de la outbox de notificaciones
+Toma lotes de mensajes pendientes (FOR UPDATE SKIP LOCKED, así pueden
+correr varios despachadores), los envía por un pool de conexiones SMTP
+persistentes y marca el resultado de todo el lote en una sentencia.
+
+Cada conexión del pool envía en su propio hilo (smtplib es bloqueante);
+el event loop solo reparte mensajes y espera. Los errores temporales se
+reintentan con espera exponencial; los rechazos 5xx del servidor y los
+mensajes que agotan OUTBOX_MAX_INTENTOS quedan como FALLIDO.
+"""
+import asyncio
+import json
+import logging
+import random
+import smtplib
+import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from email.utils import formatdate
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlmodel import Session, text
+
+from src.config import settings
+from src.services.notificaciones import componer
+
+logger = logging.getLogger(__name__)
+
+# Toma el lote y adelanta proximo_intento por el plazo: si el proceso muere
+# a mitad del envío, los mensajes vuelven a estar disponibles al vencer.
+# El intento se cuenta al tomarlo.
+SQL_TOMAR_LOTE = """
+    UPDATE outbox o
+    SET intentos = o.intentos + 1,
+        proximo_intento = CURRENT_TIMESTAMP + make_interval(secs => :plazo)
+    FROM (
+        SELECT id FROM outbox
+        WHERE estado = 'PENDIENTE' AND proximo_intento <= CURRENT_TIMESTAMP
+        ORDER BY proximo_intento, id
+        LIMIT :lote
+        FOR UPDATE SKIP LOCKED
+    ) pendientes
+    WHERE o.id = pendientes.id
+    RETURNING o.id, o.tipo, o.destinatario, o.datos, o.intentos
+"""
+
+SQL_MARCAR_ENVIADOS = """
+    UPDATE outbox
+    SET estado = 'ENVIADO', enviado_en = CURRENT_TIMESTAMP, ultimo_error = NULL
+    WHERE id = ANY(:ids)
+"""
+
+SQL_REPROGRAMAR = """
+    UPDATE outbox o
+    SET estado = CASE WHEN f.definitivo OR o.intentos >= :max_intentos THEN 'FALLIDO' ELSE 'PENDIENTE' END,
+        proximo_intento = CURRENT_TIMESTAMP + make_interval(secs => f.espera),
+        ultimo_error = f.error
+    FROM unnest(
+        CAST(:ids AS BIGINT[]), CAST(:esperas AS DOUBLE PRECISION[]),
+        CAST(:errores AS TEXT[]), CAST(:definitivos AS BOOLEAN[])
+    ) AS f(id, espera, error, definitivo)
+    WHERE o.id = f.id
+"""
+
+# (definitivo, descripción) de un envío fallido
+Fallo = Tuple[bool, str]
+
+
+def espera_reintento(intentos: int) -> float:
+    """Segundos hasta el próximo intento: exponencial con tope y jitter"""
+    espera = min(settings.OUTBOX_ESPERA_BASE * 2 ** (intentos - 1), settings.OUTBOX_ESPERA_MAXIMA)
+    # Jitter: los mensajes que fallaron juntos no vuelven todos al mismo tiempo
+    return espera * random.uniform(0.5, 1.0)
+
+
+def _clasificar(error: Exception) -> Fallo:
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codigos = [codigo for codigo, _ in error.recipients.values()]
+        return all(codigo >= 500 for codigo in codigos), f"Destinatario rechazado: {error.recipients}"
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500, f"{error.smtp_code} {error.smtp_error!r}"
+    if isinstance(error, (smtplib.SMTPException, OSError)):
+        return False, f"{type(error).__name__}: {error}"
+    # Cualquier otro error (ej. un mensaje que no se puede codificar) se
+    # repetiría en cada intento: definitivo
+    return True, f"{type(error).__name__}: {error}"
+
+
+class _ConexionSMTP:
+    """Una conexión persistente; se reabre si el servidor la cerró"""
+
+    def __init__(self, pool: "PoolSMTP"):
+        self.pool = pool
+        self.smtp: Optional[smtplib.SMTP] = None
+
+    def _abrir(self):
+        pool = self.pool
+        self.smtp = smtplib.SMTP(pool.host, pool.port, timeout=pool.timeout)
+        if pool.starttls:
+            self.smtp.starttls(context=ssl.create_default_context())
+        if pool.usuario:
+            self.smtp.login(pool.usuario, pool.clave)
+
+    def enviar(self, mensaje: EmailMessage):
+        if self.smtp is None:
+            self._abrir()
+        try:
+            self.smtp.send_message(mensaje)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Conexión vencida por inactividad: un intento con una nueva
+            self.cerrar()
+            self._abrir()
+            self.smtp.send_message(mensaje)
+        except smtplib.SMTPResponseException as error:
+            # smtplib ya hizo RSET; con 421 el servidor cierra la sesión
+            if error.smtp_code == 421:
+                self.cerrar()
+            raise
+        except (smtplib.SMTPException, OSError):
+            raise
+        except Exception:
+            # Error inesperado a mitad del envío: la sesión puede quedar desincronizada
+            self.cerrar()
+            raise
+
+    def cerrar(self):
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                self.smtp.close()
+            self.smtp = None
+
+
+class PoolSMTP:
+    """
+    Conexiones SMTP persistentes, cada una atendida por un hilo.
+    enviar() reparte los mensajes entre las conexiones y retorna el fallo de
+    cada uno (None si se entregó), en el mismo orden.
+    """
+
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None,
+                 conexiones: Optional[int] = None, usuario: Optional[str] = None,
+                 clave: Optional[str] = None, starttls: Optional[bool] = None, timeout: float = 30):
+        self.host = host or settings.SMTP_HOST
+        self.port = port or settings.SMTP_PORT
+        self.usuario = settings.SMTP_USUARIO if usuario is None else usuario
+        self.clave = settings.SMTP_CLAVE if clave is None else clave
+        self.starttls = settings.SMTP_STARTTLS if starttls is None else starttls
+        self.timeout = timeout
+        self._conexiones = [_ConexionSMTP(self) for _ in range(conexiones or settings.SMTP_CONEXIONES)]
+        self._hilos = ThreadPoolExecutor(max_workers=len(self._conexiones), thread_name_prefix="smtp")
+
+    async def enviar(self, mensajes: Sequence[EmailMessage]) -> List[Optional[Fallo]]:
+        loop = asyncio.get_running_loop()
+        resultados: List[Optional[Fallo]] = [None] * len(mensajes)
+        cola: asyncio.Queue = asyncio.Queue()
+        for indice in range(len(mensajes)):
+            cola.put_nowait(indice)
+
+        async def trabajar(conexion: _ConexionSMTP):
+            while not cola.empty():
+                indice = cola.get_nowait()
+                try:
+                    await loop.run_in_executor(self._hilos, conexion.enviar, mensajes[indice])
+                except Exception as error:
+                    # Todo fallo queda registrado: el mensaje no se pierde del lote
+                    resultados[indice] = _clasificar(error)
+
+        await asyncio.gather(*(trabajar(conexion) for conexion in self._conexiones))
+        return resultados
+
+    def cerrar(self):
+        for conexion in self._conexiones:
+            conexion.cerrar()
+        self._hilos.shutdown()
+
+
+def construir_mensaje(id_mensaje: int, tipo: str, destinatario: str, datos: Dict) -> EmailMessage:
+    asunto, cuerpo = componer(tipo, datos)
+    mensaje = EmailMessage()
+    mensaje["From"] = settings.SMTP_REMITENTE
+    mensaje["To"] = destinatario
+    mensaje["Subject"] = asunto
+    mensaje["Date"] = formatdate(localtime=True)
+    # El mismo Message-ID en cada reintento: el receptor puede descartar duplicados
+    dominio = settings.SMTP_REMITENTE.rpartition("@")[2] or "localhost"
+    mensaje["Message-ID"] = f"<outbox-{id_mensaje}@{dominio}>"
+    mensaje.set_content(cuerpo)
+    return mensaje
+
+
+class Despachador:
+    """
+    Vacía la outbox por lotes. Las consultas corren en hilos para no
+    bloquear el event loop; el envío del lote se reparte en el PoolSMTP.
+    """
+
+    def __init__(self, pool: Optional[PoolSMTP] = None, sesiones: Optional[Callable[[], Session]] = None,
+                 lote: Optional[int] = None):
+        if sesiones is None:
+            from src.models import db_manager
+
+            sesiones = db_manager.get_session
+        self.pool = pool or PoolSMTP()
+        self.sesiones = sesiones
+        self.lote = lote or settings.OUTBOX_LOTE
+
+    def _tomar(self) -> List[Dict]:
+        with self.sesiones() as session:
+            filas = [dict(fila) for fila in session.exec(text(SQL_TOMAR_LOTE).bindparams(
+                lote=self.lote, plazo=settings.OUTBOX_PLAZO)).mappings()]
+            session.commit()
+        for fila in filas:
+            if isinstance(fila["datos"], str):
+                fila["datos"] = json.loads(fila["datos"])
+        return filas
+
+    def _registrar(self, enviados: List[int], fallidos: List[Tuple[Dict, Fallo]]):
+        with self.sesiones() as session:
+            if enviados:
+                session.exec(text(SQL_MARCAR_ENVIADOS).bindparams(ids=enviados))
+            if fallidos:
+                session.exec(text(SQL_REPROGRAMAR).bindparams(
+                    ids=[fila["id"] for fila, _ in fallidos],
+                    esperas=[espera_reintento(fila["intentos"]) for fila, _ in fallidos],
+                    errores=[error[:1000] for _, (_, error) in fallidos],
+                    definitivos=[definitivo for _, (definitivo, _) in fallidos],
+                    max_intentos=settings.OUTBOX_MAX_INTENTOS,
+                ))
+            session.commit()
+
+    async def procesar_lote(self) -> Dict:
+        """Envía un lote; retorna cuántos se tomaron, enviaron y fallaron"""
+        filas = await asyncio.to_thread(self._tomar)
+        if not filas:
+            return {"tomados": 0, "enviados": 0, "fallidos": 0}
+
+        mensajes, fallidos = [], []
+        validas = []
+        for fila in filas:
+            try:
+                mensajes.append(construir_mensaje(fila["id"], fila["tipo"], fila["destinatario"], fila["datos"]))
+                validas.append(fila)
+            except (KeyError, ValueError) as error:
+                # Plantilla o datos inválidos: reintentar no lo arregla
+                fallidos.append((fila, (True, f"Mensaje inválido: {error!r}")))
+
+        resultados = await self.pool.enviar(mensajes)
+        enviados = [fila["id"] for fila, fallo in zip(validas, resultados) if fallo is None]
+        fallidos.extend((fila, fallo) for fila, fallo in zip(validas, resultados) if fallo is not None)
+        await asyncio.to_thread(self._registrar, enviados, fallidos)
+        if fallidos:
+            logger.warning("Outbox: %s de %s mensajes fallaron (primero: %s)",
+                           len(fallidos), len(filas), fallidos[0][1][1])
+        return {"tomados": len(filas), "enviados": len(enviados), "fallidos": len(fallidos)}
+
+    async def drenar(self) -> Dict:
+        """Procesa lotes hasta que no quedan mensajes vencidos"""
+        totales = {"tomados": 0, "enviados": 0, "fallidos": 0}
+        inicio = time.perf_counter()
+        while True:
+            resultado = await self.procesar_lote()
+            for clave, valor in resultado.items():
+                totales[clave] += valor
+            if resultado["tomados"] < self.lote:
+                break
+        totales["segundos"] = round(time.perf_counter() - inicio, 3)
+        return totales
+
+    async def ejecutar(self, detener: asyncio.Event):
+        """Drena la outbox y espera OUTBOX_INTERVALO entre pasadas hasta que se pida detener"""
+        while not detener.is_set():
+            try:
+                resultado = await self.drenar()
+                if resultado["tomados"]:
+                    logger.info("Outbox: %s enviados, %s fallidos en %.2f s", resultado["enviados"],
+                                resultado["fallidos"], resultado["segundos"])
+            except Exception:
+                # Base o red caídas: se registra y se reintenta en la próxima pasada
+                logger.exception("Error despachando la outbox")
+            try:
+                await asyncio.wait_for(detener.wait(), timeout=settings.OUTBOX_INTERVALO)
+            except asyncio.TimeoutError:
+                pass
+
+    def cerrar(self):
+        self.pool.cerrar()
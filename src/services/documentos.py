@@ -0,0 +1,162 @@
+"""
+Servicio de documentos de soporte
+Registra en documento_soporte los archivos guardados por
+src/utils/file_handler.py (uno por contenido) y purga los que quedaron sin
+referencias. Las referencias las cuentan los triggers de
+src/migrations/0006_documento_soporte.sql.
+"""
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlmodel import Session, text
+
+from src.utils.file_handler import DocumentoGuardado, importar_archivo, obtener_ruta_documento
+
+logger = logging.getLogger(__name__)
+
+# Un solo viaje: inserta el documento o, si el contenido ya existía, lo marca
+# como usado (así la purga no lo borra mientras se crea el movimiento)
+SQL_REGISTRAR_DOCUMENTO = """
+    INSERT INTO documento_soporte (sha256, ruta, tamaño, tipo_contenido, nombre_original)
+    VALUES (:sha256, :ruta, :tamano, :tipo_contenido, :nombre_original)
+    ON CONFLICT (sha256) DO UPDATE SET ultimo_uso = CURRENT_TIMESTAMP
+    RETURNING id
+"""
+
+SQL_PURGAR_HUERFANOS = """
+    DELETE FROM documento_soporte
+    WHERE referencias = 0
+    AND ultimo_uso < CURRENT_TIMESTAMP - make_interval(hours => :horas)
+    RETURNING ruta
+"""
+
+# Documento y permiso en una sola consulta: el administrador ve todos; el
+# propietario, los que soportan movimientos de sus apartamentos
+# (idx_rfa_documento_soporte, parcial)
+SQL_DOCUMENTO_AUTORIZADO = """
+    SELECT d.sha256, d.ruta, d.tamaño, d.tipo_contenido, d.nombre_original
+    FROM documento_soporte d
+    JOIN usuario u ON u.id = :usuario_id
+    WHERE d.id = :documento_id
+    AND (
+        u.rol = 'ADMIN'
+        OR EXISTS (
+            SELECT 1
+            FROM registro_financiero_apartamento r
+            JOIN apartamento a ON a.id = r.apartamento_id
+            WHERE r.documento_soporte_id = d.id
+            AND a.propietario_id = u.propietario_id
+        )
+    )
+"""
+
+SQL_RUTAS_REGISTRADAS = "SELECT ruta FROM documento_soporte WHERE ruta = ANY(:rutas)"
+
+# Documentos subidos antes de documento_soporte: solo la ruta, relativa al
+# antiguo static/uploads, con nombre <uuid4>_<nombre original>
+SQL_DOCUMENTOS_ANTIGUOS = """
+    SELECT documento_soporte_path FROM registro_financiero_apartamento
+    WHERE documento_soporte_path IS NOT NULL AND documento_soporte_id IS NULL
+    UNION
+    SELECT documento_soporte_path FROM gasto_comunidad
+    WHERE documento_soporte_path IS NOT NULL AND documento_soporte_id IS NULL
+"""
+
+# Las dos tablas en un viaje cada una; los triggers de 0006 cuentan las referencias
+SQL_ENLAZAR_ANTIGUOS = """
+    UPDATE {tabla} t
+    SET documento_soporte_id = m.documento_id, documento_soporte_path = m.ruta
+    FROM unnest(CAST(:antiguas AS TEXT[]), CAST(:documentos AS BIGINT[]), CAST(:rutas AS TEXT[]))
+        AS m(antigua, documento_id, ruta)
+    WHERE t.documento_soporte_path = m.antigua AND t.documento_soporte_id IS NULL
+"""
+
+_PREFIJO_UUID = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}_")
+
+
+def registrar_documento(session: Session, documento: DocumentoGuardado) -> int:
+    """
+    Retorna el id de documento_soporte para el contenido. No hace commit: el
+    movimiento o gasto que lo referencia se inserta en la misma transacción
+    """
+    return session.exec(text(SQL_REGISTRAR_DOCUMENTO).bindparams(
+        sha256=documento.sha256,
+        ruta=documento.ruta,
+        tamano=documento.tamaño,
+        tipo_contenido=documento.tipo_contenido,
+        nombre_original=documento.nombre_original,
+    )).scalar_one()
+
+
+def documento_autorizado(session: Session, documento_id: int, usuario_id: int) -> Optional[Dict]:
+    """Metadatos del documento si el usuario puede verlo; None si no existe o no tiene permiso"""
+    fila = session.exec(text(SQL_DOCUMENTO_AUTORIZADO).bindparams(
+        documento_id=documento_id, usuario_id=usuario_id
+    )).mappings().first()
+    return dict(fila) if fila else None
+
+
+def purgar_documentos_huerfanos(session: Session, horas: int = 24) -> List[str]:
+    """
+    Borra los documentos sin referencias desde hace más de `horas` y sus
+    archivos. Retorna las rutas borradas
+    """
+    rutas = list(session.exec(text(SQL_PURGAR_HUERFANOS).bindparams(horas=horas)).scalars())
+    session.commit()
+    if not rutas:
+        return []
+    # Una subida del mismo contenido pudo volver a registrarlo mientras se
+    # purgaba: ese archivo se conserva
+    registradas = set(session.exec(text(SQL_RUTAS_REGISTRADAS).bindparams(rutas=rutas)).scalars())
+    rutas = [ruta for ruta in rutas if ruta not in registradas]
+    for ruta in rutas:
+        try:
+            os.unlink(obtener_ruta_documento(ruta))
+        except FileNotFoundError:
+            logger.warning(f"Documento {ruta} ya no estaba en disco")
+    return rutas
+
+
+def migrar_documentos_antiguos(session: Session, directorio_antiguo: Path, borrar: bool = True) -> Dict:
+    """
+    Pasa los documentos del esquema anterior (archivos en static/uploads, sin
+    fila en documento_soporte) al almacenamiento por contenido: los copia a
+    UPLOADS_DIR, los registra y enlaza los movimientos y gastos que los
+    usan. Los originales se borran después del commit, así una corrida
+    interrumpida se puede repetir.
+
+    Returns:
+        Dict con migrados, faltantes (rutas sin archivo) y borrados
+    """
+    antiguas = list(session.exec(text(SQL_DOCUMENTOS_ANTIGUOS)).scalars())
+    enlaces = {"antiguas": [], "documentos": [], "rutas": []}
+    faltantes = []
+    for antigua in antiguas:
+        origen = directorio_antiguo / antigua
+        if not origen.is_file():
+            faltantes.append(antigua)
+            continue
+        documento = importar_archivo(origen, _PREFIJO_UUID.sub("", origen.name))
+        enlaces["antiguas"].append(antigua)
+        enlaces["documentos"].append(registrar_documento(session, documento))
+        enlaces["rutas"].append(documento.ruta)
+
+    if enlaces["antiguas"]:
+        for tabla in ("registro_financiero_apartamento", "gasto_comunidad"):
+            session.exec(text(SQL_ENLAZAR_ANTIGUOS.format(tabla=tabla)).bindparams(**enlaces))
+    session.commit()
+
+    borrados = 0
+    if borrar:
+        for antigua in enlaces["antiguas"]:
+            try:
+                os.unlink(directorio_antiguo / antigua)
+                borrados += 1
+            except FileNotFoundError:
+                pass
+    for antigua in faltantes:
+        logger.warning(f"Documento antiguo {antigua} no está en {directorio_antiguo}")
+    return {"migrados": len(enlaces["antiguas"]), "faltantes": faltantes, "borrados": borrados}
@@ -0,0 +1,225 @@
+"""
+Servicio de ejecución presupuestal
+Presupuesto contra ejecución por concepto y mes, con acumulado y variación.
+
+- Gastos: lo presupuestado (item_presupuesto) contra gasto_comunidad.
+- Ingresos: lo presupuestado contra lo causado en el libro (débitos de los
+  conceptos presupuestados como ingreso, ej. la cuota ordinaria).
+
+Los meses que faltan se calculan con una sola consulta agrupada. Los meses
+cerrados (EJECUCION_DIAS_CIERRE días después de terminar) se guardan en
+ejecucion_presupuestal_mes y no se vuelven a calcular; los triggers de
+src/migrations/0012_ejecucion_presupuestal.sql los descartan si cambia un
+gasto o un ítem del período, los de 0014_invalidar_ejecucion_por_libro.sql
+si cambia un movimiento del libro de ese período, e invalidar() los descarta
+a mano.
+"""
+import csv
+import io
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import Session, text
+
+from src.config import settings
+
+MESES = ("", "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio",
+         "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre")
+TIPOS = ("INGRESO", "GASTO")
+
+SQL_EJECUCION = """
+    WITH presupuestado AS (
+        SELECT ip.concepto_id, ip.tipo_item::text AS tipo, ip.mes,
+               SUM(ip.monto_presupuestado) AS presupuestado
+        FROM item_presupuesto ip
+        JOIN presupuesto_anual pa ON pa.id = ip.presupuesto_anual_id
+        WHERE pa.año = :año
+        GROUP BY ip.concepto_id, ip.tipo_item, ip.mes
+    )
+    SELECT t.concepto_id, c.nombre AS concepto, t.tipo, t.mes,
+           SUM(t.presupuestado) AS presupuestado, SUM(t.ejecutado) AS ejecutado
+    FROM (
+        SELECT concepto_id, tipo, mes, presupuestado, 0 AS ejecutado
+        FROM presupuestado
+        WHERE mes = ANY(:meses)
+        UNION ALL
+        SELECT concepto_id, 'GASTO', COALESCE(mes_gasto, EXTRACT(MONTH FROM fecha_gasto)::INTEGER), 0, SUM(monto)
+        FROM gasto_comunidad
+        WHERE año_gasto = :año
+        AND COALESCE(mes_gasto, EXTRACT(MONTH FROM fecha_gasto)::INTEGER) = ANY(:meses)
+        GROUP BY 1, 3
+        UNION ALL
+        SELECT rfa.concepto_id, 'INGRESO', rfa.mes_aplicable, 0, SUM(rfa.monto)
+        FROM registro_financiero_apartamento rfa
+        WHERE rfa.fecha_efectiva BETWEEN :desde AND :hasta
+        AND rfa.año_aplicable = :año AND rfa.mes_aplicable = ANY(:meses)
+        AND rfa.tipo_movimiento = 'DEBITO'
+        AND rfa.concepto_id IN (SELECT concepto_id FROM presupuestado WHERE tipo = 'INGRESO')
+        GROUP BY rfa.concepto_id, rfa.mes_aplicable
+    ) t
+    JOIN concepto c ON c.id = t.concepto_id
+    GROUP BY t.concepto_id, c.nombre, t.tipo, t.mes
+"""
+
+SQL_GUARDADOS = """
+    SELECT c.mes, e.concepto_id, co.nombre AS concepto, e.tipo_item::text AS tipo,
+           e.presupuestado, e.ejecutado
+    FROM ejecucion_presupuestal_cierre c
+    LEFT JOIN ejecucion_presupuestal_mes e ON e.año = c.año AND e.mes = c.mes
+    LEFT JOIN concepto co ON co.id = e.concepto_id
+    WHERE c.año = :año
+"""
+
+SQL_GUARDAR_CIERRE = """
+    INSERT INTO ejecucion_presupuestal_cierre (año, mes)
+    SELECT :año, mes FROM unnest(CAST(:meses AS INTEGER[])) AS mes
+    ON CONFLICT (año, mes) DO NOTHING
+    RETURNING mes
+"""
+
+SQL_GUARDAR_DETALLE = """
+    INSERT INTO ejecucion_presupuestal_mes (año, mes, concepto_id, tipo_item, presupuestado, ejecutado)
+    SELECT :año, mes, concepto_id, CAST(tipo AS tipo_item_presupuesto_enum), presupuestado, ejecutado
+    FROM unnest(
+        CAST(:meses AS INTEGER[]), CAST(:conceptos AS INTEGER[]), CAST(:tipos AS TEXT[]),
+        CAST(:presupuestados AS NUMERIC[]), CAST(:ejecutados AS NUMERIC[])
+    ) AS fila(mes, concepto_id, tipo, presupuestado, ejecutado)
+    ON CONFLICT DO NOTHING
+"""
+
+SQL_INVALIDAR = "DELETE FROM ejecucion_presupuestal_cierre WHERE año = :año"
+
+
+def meses_cerrados(año: int, hoy: Optional[date] = None) -> List[int]:
+    """Meses del año que ya no deberían recibir gastos ni cargos"""
+    limite = (hoy or date.today()) - timedelta(days=settings.EJECUCION_DIAS_CIERRE)
+    cerrados = []
+    for mes in range(1, 13):
+        siguiente = date(año + 1, 1, 1) if mes == 12 else date(año, mes + 1, 1)
+        if siguiente <= limite:
+            cerrados.append(mes)
+    return cerrados
+
+
+def _guardar(session: Session, año: int, meses: List[int], filas: List[Dict]):
+    nuevos = set(session.exec(text(SQL_GUARDAR_CIERRE).bindparams(año=año, meses=meses)).scalars())
+    filas = [fila for fila in filas if fila["mes"] in nuevos]
+    if filas:
+        session.exec(text(SQL_GUARDAR_DETALLE).bindparams(
+            año=año,
+            meses=[f["mes"] for f in filas],
+            conceptos=[f["concepto_id"] for f in filas],
+            tipos=[f["tipo"] for f in filas],
+            presupuestados=[f["presupuestado"] for f in filas],
+            ejecutados=[f["ejecutado"] for f in filas],
+        ))
+    session.commit()
+
+
+def _porcentaje(ejecutado: Decimal, presupuestado: Decimal) -> Optional[float]:
+    return round(float(ejecutado / presupuestado * 100), 1) if presupuestado else None
+
+
+def _serie(por_mes: Dict[int, Tuple[Decimal, Decimal]]) -> Dict:
+    """Los 12 meses con acumulados y variación, más el total del año"""
+    meses = []
+    presupuestado_acumulado = ejecutado_acumulado = Decimal("0")
+    for mes in range(1, 13):
+        presupuestado, ejecutado = por_mes.get(mes, (Decimal("0"), Decimal("0")))
+        presupuestado_acumulado += presupuestado
+        ejecutado_acumulado += ejecutado
+        meses.append({
+            "mes": mes,
+            "presupuestado": presupuestado,
+            "ejecutado": ejecutado,
+            "variacion": ejecutado - presupuestado,
+            "porcentaje": _porcentaje(ejecutado, presupuestado),
+            "presupuestado_acumulado": presupuestado_acumulado,
+            "ejecutado_acumulado": ejecutado_acumulado,
+            "variacion_acumulada": ejecutado_acumulado - presupuestado_acumulado,
+            "porcentaje_acumulado": _porcentaje(ejecutado_acumulado, presupuestado_acumulado),
+        })
+    return {
+        "meses": meses,
+        "presupuestado": presupuestado_acumulado,
+        "ejecutado": ejecutado_acumulado,
+        "variacion": ejecutado_acumulado - presupuestado_acumulado,
+        "porcentaje": _porcentaje(ejecutado_acumulado, presupuestado_acumulado),
+    }
+
+
+def ejecucion_anual(session: Session, año: int, hoy: Optional[date] = None) -> Dict:
+    """
+    Ejecución del año por tipo (INGRESO, GASTO) y concepto
+
+    Returns:
+        Dict con conceptos (concepto_id, concepto, tipo y la serie de 12
+        meses), totales por tipo, y cuántos meses salieron de la caché
+    """
+    filas = []
+    guardados = set()
+    for fila in session.exec(text(SQL_GUARDADOS).bindparams(año=año)).mappings():
+        guardados.add(fila["mes"])
+        if fila["concepto_id"] is not None:
+            filas.append(dict(fila))
+
+    por_calcular = [mes for mes in range(1, 13) if mes not in guardados]
+    if por_calcular:
+        calculadas = [dict(fila) for fila in session.exec(text(SQL_EJECUCION).bindparams(
+            año=año, meses=por_calcular, desde=date(año, 1, 1), hasta=date(año, 12, 31))).mappings()]
+        filas.extend(calculadas)
+        cerrar = [mes for mes in meses_cerrados(año, hoy) if mes in por_calcular]
+        if cerrar:
+            _guardar(session, año, cerrar, calculadas)
+
+    series: Dict[Tuple, Dict[int, Tuple[Decimal, Decimal]]] = defaultdict(dict)
+    totales: Dict[str, Dict[int, Tuple[Decimal, Decimal]]] = {tipo: {} for tipo in TIPOS}
+    for fila in filas:
+        clave = (fila["tipo"], fila["concepto"], fila["concepto_id"])
+        valores = (Decimal(fila["presupuestado"]), Decimal(fila["ejecutado"]))
+        series[clave][fila["mes"]] = valores
+        anterior = totales[fila["tipo"]].get(fila["mes"], (Decimal("0"), Decimal("0")))
+        totales[fila["tipo"]][fila["mes"]] = (anterior[0] + valores[0], anterior[1] + valores[1])
+
+    conceptos = [
+        {"concepto_id": concepto_id, "concepto": concepto, "tipo": tipo, **_serie(por_mes)}
+        for (tipo, concepto, concepto_id), por_mes in sorted(
+            series.items(), key=lambda e: (TIPOS.index(e[0][0]), e[0][1]))
+    ]
+    return {
+        "año": año,
+        "conceptos": conceptos,
+        "totales": {tipo: _serie(por_mes) for tipo, por_mes in totales.items()},
+        "meses_guardados": len(guardados),
+        "meses_calculados": len(por_calcular),
+    }
+
+
+def invalidar(session: Session, año: int) -> int:
+    """Descarta los meses guardados del año; se recalculan en la próxima consulta"""
+    resultado = session.exec(text(SQL_INVALIDAR).bindparams(año=año))
+    session.commit()
+    return resultado.rowcount
+
+
+def exportar_csv(reporte: Dict) -> str:
+    """Una fila por concepto y mes (más los totales por tipo), separada por ';'"""
+    salida = io.StringIO()
+    escritor = csv.writer(salida, delimiter=";")
+    escritor.writerow([
+        "año", "tipo", "concepto", "mes", "presupuestado", "ejecutado", "variacion", "porcentaje",
+        "presupuestado_acumulado", "ejecutado_acumulado", "variacion_acumulada", "porcentaje_acumulado",
+    ])
+    filas = [(c["tipo"], c["concepto"], c["meses"]) for c in reporte["conceptos"]]
+    filas += [(tipo, "TOTAL", serie["meses"]) for tipo, serie in reporte["totales"].items()]
+    for tipo, concepto, meses in filas:
+        for m in meses:
+            escritor.writerow([
+                reporte["año"], tipo, concepto, m["mes"], m["presupuestado"], m["ejecutado"], m["variacion"],
+                "" if m["porcentaje"] is None else m["porcentaje"],
+                m["presupuestado_acumulado"], m["ejecutado_acumulado"], m["variacion_acumulada"],
+                "" if m["porcentaje_acumulado"] is None else m["porcentaje_acumulado"],
+            ])
+    return salida.getvalue()
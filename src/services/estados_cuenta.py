@@ -0,0 +1,195 @@
+"""
+Servicio de estados de cuenta mensuales
+Cierre de mes: un PDF por apartamento en ESTADOS_CUENTA_DIR/AAAA-MM/ y un
+manifiesto.json con el archivo, el sha256 y los totales de cada uno.
+
+Los libros del mes se leen con una sola consulta agrupada por apartamento;
+los PDF se dibujan en un ProcessPoolExecutor (el render es CPU puro y con
+hilos lo serializaría el GIL). Cada proceso recibe un lote de estados ya
+leídos y no abre conexiones.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlmodel import Session, text
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Saldo al cierre del mes anterior (seek por apartamento, como
+# SQL_SALDOS_A_FECHA) y los movimientos del mes agregados por apartamento.
+# Los montos viajan como texto para no perder precisión en el JSON.
+SQL_ESTADOS_MES = """
+    SELECT
+        a.id AS apartamento_id,
+        a.identificador,
+        p.nombre_completo AS propietario,
+        p.documento_identidad,
+        COALESCE(anterior.saldo_acumulado, sa.saldo, 0) AS saldo_anterior,
+        COALESCE(m.movimientos, '[]'::json) AS movimientos
+    FROM apartamento a
+    LEFT JOIN propietario p ON p.id = a.propietario_id
+    LEFT JOIN saldo_apertura_apartamento sa
+        ON sa.apartamento_id = a.id AND sa.archivado_hasta <= :cierre_anterior
+    LEFT JOIN LATERAL (
+        SELECT rfa.saldo_acumulado
+        FROM registro_financiero_apartamento rfa
+        WHERE rfa.apartamento_id = a.id
+        AND rfa.fecha_efectiva <= :cierre_anterior
+        ORDER BY rfa.fecha_efectiva DESC, rfa.id DESC
+        LIMIT 1
+    ) anterior ON TRUE
+    LEFT JOIN (
+        SELECT
+            rfa.apartamento_id,
+            json_agg(json_build_object(
+                'fecha', rfa.fecha_efectiva,
+                'concepto', c.nombre,
+                'descripcion', rfa.descripcion_adicional,
+                'tipo', rfa.tipo_movimiento::text,
+                'monto', rfa.monto::text,
+                'saldo', rfa.saldo_acumulado::text
+            ) ORDER BY rfa.fecha_efectiva, rfa.id) AS movimientos
+        FROM registro_financiero_apartamento rfa
+        JOIN concepto c ON c.id = rfa.concepto_id
+        WHERE rfa.fecha_efectiva BETWEEN :desde AND :hasta
+        GROUP BY rfa.apartamento_id
+    ) m ON m.apartamento_id = a.id
+    ORDER BY a.id
+"""
+
+MANIFIESTO = "manifiesto.json"
+
+
+def _limites_mes(año: int, mes: int):
+    desde = date(año, mes, 1)
+    hasta = (desde + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return desde, hasta
+
+
+def leer_estados_mes(session: Session, año: int, mes: int) -> List[Dict]:
+    """Estados de todos los apartamentos para el mes, listos para dibujar"""
+    desde, hasta = _limites_mes(año, mes)
+    filas = session.exec(text(SQL_ESTADOS_MES).bindparams(
+        cierre_anterior=desde - timedelta(days=1), desde=desde, hasta=hasta)).mappings()
+    estados = []
+    for fila in filas:
+        movimientos = fila["movimientos"]
+        if isinstance(movimientos, str):
+            movimientos = json.loads(movimientos)
+        estados.append({
+            "apartamento_id": fila["apartamento_id"],
+            "identificador": fila["identificador"],
+            "propietario": fila["propietario"],
+            "documento_identidad": fila["documento_identidad"],
+            "saldo_anterior": Decimal(fila["saldo_anterior"]),
+            "movimientos": [
+                {
+                    **movimiento,
+                    "fecha": date.fromisoformat(movimiento["fecha"]),
+                    "monto": Decimal(movimiento["monto"]),
+                    "saldo": Decimal(movimiento["saldo"]) if movimiento["saldo"] is not None else None,
+                }
+                for movimiento in movimientos
+            ],
+        })
+    return estados
+
+
+def _lotes(estados: List[Dict], cantidad: int) -> List[List[Dict]]:
+    """Reparte por cantidad de movimientos (el costo del PDF), no por apartamentos"""
+    lotes: List[List[Dict]] = [[] for _ in range(cantidad)]
+    cargas = [0] * cantidad
+    for estado in sorted(estados, key=lambda e: len(e["movimientos"]), reverse=True):
+        indice = cargas.index(min(cargas))
+        lotes[indice].append(estado)
+        cargas[indice] += 1 + len(estado["movimientos"])
+    return [lote for lote in lotes if lote]
+
+
+def renderizar_estados(estados: List[Dict], directorio: Path, año: int, mes: int,
+                       procesos: Optional[int] = None) -> List[Dict]:
+    """
+    Dibuja los PDF en `directorio` y retorna las entradas del manifiesto
+    ordenadas por apartamento. Con procesos=1 se dibujan en este proceso.
+    """
+    from src.utils.estado_cuenta_pdf import renderizar_lote
+
+    procesos = procesos or settings.ESTADOS_CUENTA_PROCESOS
+    argumentos = (str(directorio), año, mes, settings.APP_TITLE, date.today())
+    if procesos == 1 or len(estados) < 2:
+        entradas = renderizar_lote(*argumentos, estados)
+    else:
+        # Varios lotes por proceso: si uno tarda más, los demás toman los que quedan.
+        # spawn: los procesos no heredan el pool de conexiones ni hilos del padre
+        entradas = []
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+            futuros = [pool.submit(renderizar_lote, *argumentos, lote)
+                       for lote in _lotes(estados, procesos * 4)]
+            for futuro in futuros:
+                entradas.extend(futuro.result())
+    return sorted(entradas, key=lambda e: e["apartamento_id"])
+
+
+def generar_estados_mes(año: int, mes: int, directorio_base: Optional[Path] = None,
+                        procesos: Optional[int] = None, session: Optional[Session] = None) -> Dict:
+    """
+    Genera los estados de cuenta del mes y escribe el manifiesto
+
+    Returns:
+        Dict con el directorio, la cantidad de estados, los procesos y los
+        segundos de lectura y de render
+    """
+    procesos = procesos or settings.ESTADOS_CUENTA_PROCESOS
+    directorio = Path(directorio_base or settings.ESTADOS_CUENTA_DIR) / f"{año}-{mes:02d}"
+    directorio.mkdir(parents=True, exist_ok=True)
+    # Mientras se regenera, el mes no figura como completo
+    (directorio / MANIFIESTO).unlink(missing_ok=True)
+
+    inicio = time.perf_counter()
+    if session is None:
+        from src.models import db_manager
+
+        # La conexión vuelve al pool antes del render
+        with db_manager.get_session() as session:
+            estados = leer_estados_mes(session, año, mes)
+    else:
+        estados = leer_estados_mes(session, año, mes)
+    lectura = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    entradas = renderizar_estados(estados, directorio, año, mes, procesos)
+    render = time.perf_counter() - inicio
+
+    # El manifiesto se escribe al final y de forma atómica: si existe, el mes está completo
+    manifiesto = {
+        "año": año,
+        "mes": mes,
+        "generado_en": datetime.now().isoformat(timespec="seconds"),
+        "estados": len(entradas),
+        "bytes": sum(e["bytes"] for e in entradas),
+        "archivos": entradas,
+    }
+    temporal = directorio / f".{MANIFIESTO}.tmp"
+    temporal.write_text(json.dumps(manifiesto, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(temporal, directorio / MANIFIESTO)
+
+    logger.info("Estados de cuenta %s-%02d: %s PDF en %.1f s con %s procesos",
+                año, mes, len(entradas), render, procesos)
+    return {
+        "directorio": str(directorio),
+        "estados": len(entradas),
+        "procesos": procesos,
+        "segundos_lectura": round(lectura, 2),
+        "segundos_render": round(render, 2),
+    }
@@ -0,0 +1,132 @@
+"""
+Servicio de la tabla de hechos mensual
+hecho_mensual guarda débitos, créditos y movimientos por apartamento,
+concepto y período. Los triggers de src/migrations/0013_hecho_mensual.sql la
+mantienen con cada sentencia sobre el libro; aquí está la reconstrucción
+completa (tras cargas con triggers desactivados o para verificar) y la
+comparación contra el libro. Los hechos de los meses ya archivados
+(archivar_particion_rfa, src/migrations/0004_particionar_registro_financiero.sql)
+se conservan: su libro ya no está en la base.
+
+La reconstrucción reparte los apartamentos en rangos contiguos y procesa
+cada rango en su propia conexión y transacción, en paralelo.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Dict, List, Tuple
+
+from sqlalchemy.engine import Engine
+from sqlmodel import text
+
+# Mismo período que los triggers: el aplicable, o el de fecha_efectiva
+SQL_AGRUPAR_LIBRO = """
+    SELECT apartamento_id, concepto_id,
+           COALESCE(año_aplicable, EXTRACT(YEAR FROM fecha_efectiva)::INTEGER) AS año,
+           COALESCE(mes_aplicable, EXTRACT(MONTH FROM fecha_efectiva)::INTEGER) AS mes,
+           COALESCE(SUM(monto) FILTER (WHERE tipo_movimiento = 'DEBITO'), 0) AS debitos,
+           COALESCE(SUM(monto) FILTER (WHERE tipo_movimiento = 'CREDITO'), 0) AS creditos,
+           COUNT(*) AS movimientos
+    FROM registro_financiero_apartamento
+    WHERE apartamento_id BETWEEN :desde AND :hasta
+    GROUP BY 1, 2, 3, 4
+"""
+
+SQL_ARCHIVADO_HASTA = "SELECT MAX(archivado_hasta) FROM saldo_apertura_apartamento"
+
+# Solo los períodos posteriores a la última partición archivada
+FILTRO_VIGENTE = "make_date(año, mes, 1) > :archivado_hasta"
+
+SQL_RANGOS = """
+    SELECT MIN(id) AS desde, MAX(id) AS hasta
+    FROM (SELECT id, ntile(:partes) OVER (ORDER BY id) AS parte FROM apartamento) t
+    GROUP BY parte
+    ORDER BY desde
+"""
+
+# SHARE deja leer el libro y que los demás rangos se reconstruyan a la vez,
+# pero espera a las escrituras en curso y frena las nuevas hasta el COMMIT:
+# un trigger no puede sumar sobre un rango a medio reconstruir
+SQL_BLOQUEAR_LIBRO = "LOCK TABLE registro_financiero_apartamento IN SHARE MODE"
+
+SQL_BORRAR_RANGO = f"""
+    DELETE FROM hecho_mensual
+    WHERE apartamento_id BETWEEN :desde AND :hasta AND {FILTRO_VIGENTE}
+"""
+
+SQL_LLENAR_RANGO = f"""
+    INSERT INTO hecho_mensual (apartamento_id, concepto_id, año, mes, debitos, creditos, movimientos)
+    SELECT * FROM ({SQL_AGRUPAR_LIBRO}) libro
+    WHERE {FILTRO_VIGENTE}
+    ORDER BY apartamento_id, concepto_id, año, mes
+"""
+
+SQL_DIFERENCIAS = f"""
+    SELECT COALESCE(l.apartamento_id, h.apartamento_id) AS apartamento_id,
+           COALESCE(l.concepto_id, h.concepto_id) AS concepto_id,
+           COALESCE(l.año, h.año) AS año, COALESCE(l.mes, h.mes) AS mes,
+           l.debitos AS debitos_libro, h.debitos AS debitos_hecho,
+           l.creditos AS creditos_libro, h.creditos AS creditos_hecho
+    FROM (SELECT * FROM ({SQL_AGRUPAR_LIBRO}) libro WHERE {FILTRO_VIGENTE}) l
+    FULL JOIN (
+        SELECT * FROM hecho_mensual
+        WHERE apartamento_id BETWEEN :desde AND :hasta AND {FILTRO_VIGENTE}
+    ) h USING (apartamento_id, concepto_id, año, mes)
+    WHERE (l.debitos, l.creditos, l.movimientos) IS DISTINCT FROM (h.debitos, h.creditos, h.movimientos)
+    ORDER BY 1, 2, 3, 4
+    LIMIT :limite
+"""
+
+
+def rangos_apartamentos(engine: Engine, partes: int) -> List[Tuple[int, int]]:
+    """Rangos contiguos de IDs de apartamento con la misma cantidad de apartamentos"""
+    with engine.connect() as conn:
+        return [tuple(fila) for fila in conn.execute(text(SQL_RANGOS), {"partes": partes})]
+
+
+def archivado_hasta(engine: Engine) -> date:
+    """Último día archivado del libro (date.min si no se ha archivado nada)"""
+    with engine.connect() as conn:
+        return conn.execute(text(SQL_ARCHIVADO_HASTA)).scalar() or date.min
+
+
+def _reconstruir_rango(engine: Engine, desde: int, hasta: int, archivado: date) -> Dict:
+    inicio = time.perf_counter()
+    parametros = {"desde": desde, "hasta": hasta, "archivado_hasta": archivado}
+    with engine.begin() as conn:
+        conn.execute(text(SQL_BLOQUEAR_LIBRO))
+        conn.execute(text(SQL_BORRAR_RANGO), parametros)
+        filas = conn.execute(text(SQL_LLENAR_RANGO), parametros).rowcount
+    return {"desde": desde, "hasta": hasta, "filas": filas,
+            "segundos": round(time.perf_counter() - inicio, 2)}
+
+
+def reconstruir(engine: Engine, hilos: int = 4) -> Dict:
+    """
+    Reconstruye hecho_mensual desde el libro, un rango de apartamentos por hilo
+
+    Returns:
+        Dict con filas escritas, segundos y el detalle de cada rango
+    """
+    inicio = time.perf_counter()
+    archivado = archivado_hasta(engine)
+    rangos = rangos_apartamentos(engine, max(1, hilos))
+    with ThreadPoolExecutor(max_workers=max(1, len(rangos))) as ejecutor:
+        detalle = list(ejecutor.map(lambda rango: _reconstruir_rango(engine, *rango, archivado), rangos))
+    return {
+        "filas": sum(r["filas"] for r in detalle),
+        "segundos": round(time.perf_counter() - inicio, 2),
+        "rangos": detalle,
+    }
+
+
+def diferencias(engine: Engine, limite: int = 100) -> List[Dict]:
+    """Claves donde hecho_mensual no coincide con el libro (vacío si está al día)"""
+    rangos = rangos_apartamentos(engine, 1)
+    if not rangos:
+        return []
+    desde, hasta = rangos[0]
+    with engine.connect() as conn:
+        return [dict(fila) for fila in conn.execute(text(SQL_DIFERENCIAS), {
+            "desde": desde, "hasta": hasta, "archivado_hasta": archivado_hasta(engine), "limite": limite,
+        }).mappings()]
@@ -1,10 +1,27 @@
-from sqlmodel import Session, select
+from sqlmodel import Session, select, text
 from src.models import (
     db_manager, Usuario, Propietario, Apartamento, Concepto,
-    PresupuestoAnual, RolUsuarioEnum, TipoMovimientoEnum,
-    RegistroFinancieroApartamento, ItemPresupuesto, TipoItemPresupuestoEnum
+    PresupuestoAnual, RolUsuarioEnum, ItemPresupuesto, TipoItemPresupuestoEnum
 )
+from src.utils.contrasenas import hashear
 from datetime import datetime
+from decimal import Decimal
+
+# Conceptos base: (id, nombre, es_ingreso_tipico, es_recurrente_presupuesto)
+# Los IDs son fijos porque PagoAutomaticoService y el generador los referencian
+CONCEPTOS_BASE = [
+    (1, "Cuota Ordinaria Administración", True, True),
+    (2, "Cuota Extraordinaria", True, False),
+    (3, "Interés por Mora", True, False),
+    (4, "Pago Intereses", True, False),
+    (5, "Pago de Cuota", True, False),
+    (6, "Mantenimiento Ascensor", False, True),
+    (7, "Servicios Públicos", False, True),
+    (8, "Vigilancia", False, True),
+    (9, "Aseo", False, True),
+    (15, "Pago en Exceso", True, False),
+    (16, "Aplicación Saldo a Favor", True, False),
+]
 
 async def crear_datos_iniciales():
     """Crear algunos datos de ejemplo para testing"""
@@ -13,24 +30,25 @@ async def crear_datos_iniciales():
         admin_existente = session.exec(
             select(Usuario).where(Usuario.username == "admin")
         ).first()
-        
+
         if not admin_existente:
             # Crear conceptos básicos
-            conceptos = [
-                Concepto(nombre="Cuota Ordinaria Administración", es_ingreso_tipico=True),
-                Concepto(nombre="Mantenimiento Ascensor", es_ingreso_tipico=False),
-                Concepto(nombre="Servicios Públicos", es_ingreso_tipico=False),
-                Concepto(nombre="Vigilancia", es_ingreso_tipico=False),
-                Concepto(nombre="Aseo", es_ingreso_tipico=False),
-            ]
-            for concepto in conceptos:
-                session.add(concepto)
+            for concepto_id, nombre, es_ingreso, es_recurrente in CONCEPTOS_BASE:
+                if not session.get(Concepto, concepto_id):
+                    session.add(Concepto(
+                        id=concepto_id,
+                        nombre=nombre,
+                        es_ingreso_tipico=es_ingreso,
+                        es_recurrente_presupuesto=es_recurrente
+                    ))
             session.commit()
+            # Los IDs explícitos no avanzan la secuencia
+            session.exec(text("SELECT setval(pg_get_serial_sequence('concepto', 'id'), (SELECT MAX(id) FROM concepto))"))
 
             # Crear usuario administrador
             admin_usuario = Usuario(
                 username="admin",
-                password="admin123",  # En producción debería estar hasheada
+                hashed_password=hashear("admin123"),
                 nombre_completo="Administrador del Sistema",
                 email="admin@edificio.com",
                 rol=RolUsuarioEnum.ADMIN
@@ -40,12 +58,8 @@ async def crear_datos_iniciales():
 
             # Crear algunos apartamentos
             apartamentos = [
-                Apartamento(numero="101", piso=1, propietario_id=None),
-                Apartamento(numero="102", piso=1, propietario_id=None),
-                Apartamento(numero="201", piso=2, propietario_id=None),
-                Apartamento(numero="202", piso=2, propietario_id=None),
-                Apartamento(numero="301", piso=3, propietario_id=None),
-                Apartamento(numero="302", piso=3, propietario_id=None),
+                Apartamento(identificador=identificador, coeficiente_copropiedad=Decimal("0.166667"))
+                for identificador in ["Apto 101", "Apto 102", "Apto 201", "Apto 202", "Apto 301", "Apto 302"]
             ]
             for apartamento in apartamentos:
                 session.add(apartamento)
@@ -56,7 +70,7 @@ async def crear_datos_iniciales():
                 {
                     "usuario": Usuario(
                         username="prop101",
-                        password="prop123",
+                        hashed_password=hashear("prop123"),
                         nombre_completo="María García",
                         email="maria@email.com",
                         rol=RolUsuarioEnum.PROPIETARIO
@@ -67,12 +81,12 @@ async def crear_datos_iniciales():
                         telefono="123456789",
                         email="maria@email.com"
                     ),
-                    "apartamento": "101"
+                    "apartamento": "Apto 101"
                 },
                 {
                     "usuario": Usuario(
                         username="prop201",
-                        password="prop123",
+                        hashed_password=hashear("prop123"),
                         nombre_completo="Juan Pérez",
                         email="juan@email.com",
                         rol=RolUsuarioEnum.PROPIETARIO
@@ -83,25 +97,23 @@ async def crear_datos_iniciales():
                         telefono="987654321",
                         email="juan@email.com"
                     ),
-                    "apartamento": "201"
+                    "apartamento": "Apto 201"
                 }
             ]
 
             for prop_data in propietarios:
-                # Crear usuario
-                session.add(prop_data["usuario"])
-                session.commit()
-                session.refresh(prop_data["usuario"])
-
                 # Crear propietario
-                prop_data["propietario"].usuario_id = prop_data["usuario"].id
                 session.add(prop_data["propietario"])
                 session.commit()
                 session.refresh(prop_data["propietario"])
 
+                # Crear usuario asociado al propietario
+                prop_data["usuario"].propietario_id = prop_data["propietario"].id
+                session.add(prop_data["usuario"])
+
                 # Asignar apartamento
                 apartamento = session.exec(
-                    select(Apartamento).where(Apartamento.numero == prop_data["apartamento"])
+                    select(Apartamento).where(Apartamento.identificador == prop_data["apartamento"])
                 ).first()
                 if apartamento:
                     apartamento.propietario_id = prop_data["propietario"].id
@@ -112,46 +124,28 @@ async def crear_datos_iniciales():
             # Crear presupuesto anual
             presupuesto = PresupuestoAnual(
                 año=datetime.now().year,
-                descripcion="Presupuesto anual de prueba",
-                total_presupuestado=0
+                descripcion="Presupuesto anual de prueba"
             )
             session.add(presupuesto)
             session.commit()
+            session.refresh(presupuesto)
 
-            # Crear items del presupuesto
-            items_presupuesto = [
-                ItemPresupuesto(
-                    presupuesto_id=presupuesto.id,
-                    concepto_id=conceptos[0].id,
-                    tipo=TipoItemPresupuestoEnum.INGRESO,
-                    monto_presupuestado=1000000,
-                    descripcion="Cuotas de administración anuales"
-                ),
-                ItemPresupuesto(
-                    presupuesto_id=presupuesto.id,
-                    concepto_id=conceptos[1].id,
-                    tipo=TipoItemPresupuestoEnum.GASTO,
-                    monto_presupuestado=600000,
-                    descripcion="Mantenimiento preventivo ascensor"
-                ),
-                ItemPresupuesto(
-                    presupuesto_id=presupuesto.id,
-                    concepto_id=conceptos[2].id,
-                    tipo=TipoItemPresupuestoEnum.GASTO,
-                    monto_presupuestado=200000,
-                    descripcion="Servicios públicos zonas comunes"
-                )
+            # Crear items mensuales del presupuesto: (concepto_id, tipo, monto mensual)
+            items_mensuales = [
+                (1, TipoItemPresupuestoEnum.INGRESO, Decimal("1000000")),
+                (6, TipoItemPresupuestoEnum.GASTO, Decimal("600000")),
+                (7, TipoItemPresupuestoEnum.GASTO, Decimal("200000")),
             ]
+            for mes in range(1, 13):
+                for concepto_id, tipo, monto in items_mensuales:
+                    session.add(ItemPresupuesto(
+                        presupuesto_anual_id=presupuesto.id,
+                        concepto_id=concepto_id,
+                        mes=mes,
+                        monto_presupuestado=monto,
+                        tipo_item=tipo
+                    ))
 
-            for item in items_presupuesto:
-                session.add(item)
-
-            # Actualizar total del presupuesto
-            presupuesto.total_presupuestado = sum(
-                item.monto_presupuestado for item in items_presupuesto 
-                if item.tipo == TipoItemPresupuestoEnum.INGRESO
-            )
-            
             session.commit()
 
             print("Datos iniciales creados exitosamente")
@@ -0,0 +1,284 @@
+"""
+Servicio de instantáneas Parquet del libro
+Copia de registro_financiero_apartamento, con apartamento, propietario y
+concepto, para consultas analíticas fuera de Postgres (DuckDB, pandas).
+
+INSTANTANEAS_DIR/libro/año=AAAA/mes=M/datos.parquet, particionado por el
+período del movimiento (el aplicable o el de fecha_efectiva, como
+hecho_mensual) y un _manifiesto.json con la huella de cada partición. La
+huella se calcula en la base sobre las mismas columnas que se exportan (una
+lectura agrupada por mes, sin traer filas): cada corrida reescribe solo los
+meses nuevos o cuyo contenido cambió, leyéndolos con un cursor del servidor
+en lotes de INSTANTANEAS_LOTE filas. Los meses ya archivados conservan su
+última exportación.
+Requiere pyarrow (y duckdb para consultar): requirements-analitica.txt.
+"""
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy.engine import Engine
+from sqlmodel import text
+
+from src.config import settings
+from src.services.hechos import archivado_hasta
+
+logger = logging.getLogger(__name__)
+
+TABLA = "libro"
+MANIFIESTO = "_manifiesto.json"
+ARCHIVO = "datos.parquet"
+
+ESQUEMA = pa.schema([
+    ("id", pa.int64()),
+    ("fecha_efectiva", pa.date32()),
+    ("fecha_registro", pa.timestamp("us", tz="UTC")),
+    ("apartamento_id", pa.int64()),
+    ("apartamento", pa.string()),
+    ("propietario_id", pa.int64()),
+    ("propietario", pa.string()),
+    ("concepto_id", pa.int32()),
+    ("concepto", pa.string()),
+    ("tipo_movimiento", pa.string()),
+    ("monto", pa.decimal128(14, 2)),
+    ("saldo_acumulado", pa.decimal128(14, 2)),
+    ("año_aplicable", pa.int32()),
+    ("mes_aplicable", pa.int32()),
+    ("referencia_pago", pa.string()),
+    ("descripcion_adicional", pa.string()),
+])
+
+# (expresión, columna) de cada columna exportada, en el orden de ESQUEMA
+COLUMNAS = (
+    ("rfa.id", "id"),
+    ("rfa.fecha_efectiva", "fecha_efectiva"),
+    ("rfa.fecha_registro", "fecha_registro"),
+    ("rfa.apartamento_id", "apartamento_id"),
+    ("a.identificador", "apartamento"),
+    ("a.propietario_id", "propietario_id"),
+    ("pr.nombre_completo", "propietario"),
+    ("rfa.concepto_id", "concepto_id"),
+    ("c.nombre", "concepto"),
+    ("rfa.tipo_movimiento::text", "tipo_movimiento"),
+    ("rfa.monto", "monto"),
+    ("rfa.saldo_acumulado", "saldo_acumulado"),
+    ("rfa.año_aplicable", "año_aplicable"),
+    ("rfa.mes_aplicable", "mes_aplicable"),
+    ("rfa.referencia_pago", "referencia_pago"),
+    ("rfa.descripcion_adicional", "descripcion_adicional"),
+)
+
+# Período del movimiento: el aplicable, o el de fecha_efectiva (como hecho_mensual)
+DESDE_LIBRO = """
+    FROM registro_financiero_apartamento rfa
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(rfa.año_aplicable, EXTRACT(YEAR FROM rfa.fecha_efectiva)::INTEGER) AS año,
+               COALESCE(rfa.mes_aplicable, EXTRACT(MONTH FROM rfa.fecha_efectiva)::INTEGER) AS mes
+    ) p
+    JOIN apartamento a ON a.id = rfa.apartamento_id
+    LEFT JOIN propietario pr ON pr.id = a.propietario_id
+    JOIN concepto c ON c.id = rfa.concepto_id
+"""
+
+# Huella de cada mes: filas y suma de un hash de cada fila tal como se
+# exporta. Cambia con cualquier escritura que altere una columna exportada,
+# incluido el saldo_acumulado que desplaza un movimiento retroactivo y los
+# nombres de apartamento, propietario o concepto
+SQL_HUELLAS = f"""
+    SELECT p.año, p.mes, COUNT(*) AS filas,
+           SUM(hashtextextended(ROW({", ".join(e for e, _ in COLUMNAS)})::text, 0)) AS suma
+    {DESDE_LIBRO}
+    WHERE make_date(p.año, p.mes, 1) > :archivado_hasta
+    GROUP BY p.año, p.mes
+    ORDER BY p.año, p.mes
+"""
+
+# Ordenado por partición: cada archivo se escribe de corrido y se cierra
+# antes de abrir el siguiente
+SQL_EXPORTAR = f"""
+    SELECT p.año, p.mes, {", ".join(f"{e} AS {c}" for e, c in COLUMNAS)}
+    {DESDE_LIBRO}
+    WHERE (p.año, p.mes) IN (
+        SELECT * FROM unnest(CAST(:años AS INTEGER[]), CAST(:meses AS INTEGER[]))
+    )
+    ORDER BY p.año, p.mes, rfa.id
+"""
+
+
+def _huella(fila) -> str:
+    return f"{fila.filas}:{fila.suma}"
+
+
+def _clave(año: int, mes: int) -> str:
+    return f"{año}-{mes:02d}"
+
+
+def directorio_particion(raiz: Path, año: int, mes: int) -> Path:
+    return raiz / TABLA / f"año={año}" / f"mes={mes}"
+
+
+def leer_manifiesto(raiz: Path) -> Dict:
+    ruta = raiz / TABLA / MANIFIESTO
+    if not ruta.exists():
+        return {"particiones": {}}
+    return json.loads(ruta.read_text(encoding="utf-8"))
+
+
+def _guardar_manifiesto(raiz: Path, manifiesto: Dict):
+    """Escritura atómica: una corrida interrumpida deja el manifiesto de la última partición completa"""
+    manifiesto["actualizado_en"] = datetime.now().isoformat(timespec="seconds")
+    temporal = raiz / TABLA / f".{MANIFIESTO}.tmp"
+    temporal.write_text(json.dumps(manifiesto, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(temporal, raiz / TABLA / MANIFIESTO)
+
+
+def _lotes_por_particion(engine: Engine, periodos: List[Tuple[int, int]],
+                         lote: int) -> Iterator[Tuple[Tuple[int, int], pa.RecordBatch]]:
+    """(período, lote Arrow) en el orden de SQL_EXPORTAR, sin tener el libro en memoria"""
+    columnas = ESQUEMA.names
+    with engine.connect() as conn:
+        resultado = conn.execution_options(stream_results=True, yield_per=lote).execute(
+            text(SQL_EXPORTAR),
+            {"años": [p[0] for p in periodos], "meses": [p[1] for p in periodos]},
+        )
+        for filas in resultado.mappings().partitions():
+            inicio = 0
+            while inicio < len(filas):
+                periodo = (filas[inicio]["año"], filas[inicio]["mes"])
+                fin = inicio
+                while fin < len(filas) and (filas[fin]["año"], filas[fin]["mes"]) == periodo:
+                    fin += 1
+                tramo = filas[inicio:fin]
+                yield periodo, pa.RecordBatch.from_arrays(
+                    [pa.array([f[c] for f in tramo], type=ESQUEMA.field(c).type) for c in columnas],
+                    schema=ESQUEMA,
+                )
+                inicio = fin
+
+
+def _reemplazar_particion(raiz: Path, año: int, mes: int, temporal: Path):
+    destino = directorio_particion(raiz, año, mes)
+    destino.mkdir(parents=True, exist_ok=True)
+    os.replace(temporal, destino / ARCHIVO)
+
+
+def exportar(engine: Engine, directorio: Optional[Path] = None, completa: bool = False,
+             lote: Optional[int] = None) -> Dict:
+    """
+    Exporta las particiones nuevas o cambiadas desde la última corrida
+
+    Returns:
+        Dict con las particiones exportadas, eliminadas y sin cambios, las
+        filas escritas y los segundos
+    """
+    inicio = time.perf_counter()
+    raiz = Path(directorio or settings.INSTANTANEAS_DIR)
+    (raiz / TABLA).mkdir(parents=True, exist_ok=True)
+    lote = lote or settings.INSTANTANEAS_LOTE
+    manifiesto = {"particiones": {}} if completa else leer_manifiesto(raiz)
+    anteriores = manifiesto["particiones"]
+
+    archivado = archivado_hasta(engine)
+    with engine.connect() as conn:
+        huellas = {
+            (fila.año, fila.mes): _huella(fila)
+            for fila in conn.execute(text(SQL_HUELLAS), {"archivado_hasta": archivado})
+        }
+
+    por_exportar = [
+        periodo for periodo, huella in huellas.items()
+        if anteriores.get(_clave(*periodo), {}).get("huella") != huella
+    ]
+    # Meses que ya no tienen movimientos (los archivados se conservan)
+    eliminadas = [
+        clave for clave in anteriores
+        if tuple(map(int, clave.split("-"))) not in huellas
+        and date(*map(int, clave.split("-")), 1) > archivado
+    ]
+
+    filas_totales = 0
+    escritor: Optional[pq.ParquetWriter] = None
+    actual: Optional[Tuple[int, int]] = None
+    temporal = raiz / TABLA / f".{ARCHIVO}.tmp"
+    filas_particion = 0
+
+    def cerrar_particion():
+        nonlocal escritor
+        escritor.close()
+        escritor = None
+        _reemplazar_particion(raiz, actual[0], actual[1], temporal)
+        anteriores[_clave(*actual)] = {
+            "huella": huellas[actual],
+            "filas": filas_particion,
+            "exportado_en": datetime.now().isoformat(timespec="seconds"),
+        }
+        _guardar_manifiesto(raiz, manifiesto)
+
+    try:
+        if por_exportar:
+            for periodo, datos in _lotes_por_particion(engine, sorted(por_exportar), lote):
+                if periodo != actual:
+                    if escritor is not None:
+                        cerrar_particion()
+                    actual, filas_particion = periodo, 0
+                    escritor = pq.ParquetWriter(temporal, ESQUEMA, compression="zstd")
+                escritor.write_batch(datos)
+                filas_particion += datos.num_rows
+                filas_totales += datos.num_rows
+            if escritor is not None:
+                cerrar_particion()
+    finally:
+        if escritor is not None:
+            escritor.close()
+        temporal.unlink(missing_ok=True)
+
+    for clave in eliminadas:
+        año, mes = map(int, clave.split("-"))
+        shutil.rmtree(directorio_particion(raiz, año, mes), ignore_errors=True)
+        del anteriores[clave]
+    _guardar_manifiesto(raiz, manifiesto)
+
+    segundos = time.perf_counter() - inicio
+    logger.info("Instantánea del libro: %s particiones exportadas, %s filas en %.1f s",
+                len(por_exportar), filas_totales, segundos)
+    return {
+        "directorio": str(raiz / TABLA),
+        "exportadas": len(por_exportar),
+        "eliminadas": len(eliminadas),
+        "sin_cambios": len(huellas) - len(por_exportar),
+        "filas": filas_totales,
+        "segundos": round(segundos, 2),
+    }
+
+
+def conectar(directorio: Optional[Path] = None):
+    """
+    Conexión DuckDB en memoria con la vista `libro` sobre la instantánea
+    (las columnas año y mes salen de los directorios de partición)
+    """
+    import duckdb
+
+    raiz = Path(directorio or settings.INSTANTANEAS_DIR)
+    patron = str(raiz / TABLA / "*" / "*" / ARCHIVO).replace("'", "''")
+    conexion = duckdb.connect()
+    conexion.execute(
+        f"CREATE VIEW {TABLA} AS SELECT * FROM read_parquet('{patron}', hive_partitioning = true)"
+    )
+    return conexion
+
+
+def consultar(sql: str, directorio: Optional[Path] = None) -> Tuple[List[str], List[tuple]]:
+    """Ejecuta `sql` sobre la instantánea y retorna (columnas, filas)"""
+    conexion = conectar(directorio)
+    try:
+        cursor = conexion.execute(sql)
+        return [d[0] for d in cursor.description], cursor.fetchall()
+    finally:
+        conexion.close()
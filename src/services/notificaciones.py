@@ -0,0 +1,199 @@
+"""
+Servicio de notificaciones a propietarios
+Escribe en la tabla outbox (src/migrations/0011_outbox.sql) los correos de
+cargos del mes, pagos aplicados y mora. Las funciones encolar_* no hacen
+commit: se llaman con la sesión que registra el movimiento del libro, así
+el mensaje existe solo si el movimiento existe. La entrega la hace
+src/services/despacho_correo.py fuera del proceso web.
+
+Solo se encolan propietarios con email; la clave única de cada mensaje hace
+que reprocesar un mes o reintentar un lote no duplique correos.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Tuple
+
+from sqlmodel import Session, text
+
+MESES = ("", "enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+         "agosto", "septiembre", "octubre", "noviembre", "diciembre")
+
+SQL_ENCOLAR_PAGOS = """
+    INSERT INTO outbox (tipo, clave, apartamento_id, destinatario, datos)
+    SELECT
+        'pago',
+        'pago:' || a.id || ':' || pago.referencia,
+        a.id,
+        p.email,
+        jsonb_build_object(
+            'propietario', p.nombre_completo,
+            'apartamento', a.identificador,
+            'monto', pago.monto::text,
+            'fecha', pago.fecha,
+            'referencia', pago.referencia
+        )
+    FROM unnest(
+        CAST(:apartamentos AS BIGINT[]), CAST(:montos AS NUMERIC[]),
+        CAST(:fechas AS DATE[]), CAST(:referencias AS TEXT[])
+    ) AS pago(apartamento_id, monto, fecha, referencia)
+    JOIN apartamento a ON a.id = pago.apartamento_id
+    JOIN propietario p ON p.id = a.propietario_id
+    WHERE p.email <> ''
+    ON CONFLICT (clave) DO NOTHING
+"""
+
+# Un correo por apartamento con los cargos del período (cuota, intereses y
+# cualquier otro débito). fecha_efectiva acota la partición del año.
+SQL_ENCOLAR_CARGOS = """
+    INSERT INTO outbox (tipo, clave, apartamento_id, destinatario, datos)
+    SELECT
+        'cargos',
+        'cargos:' || a.id || ':' || :periodo,
+        a.id,
+        p.email,
+        jsonb_build_object(
+            'propietario', p.nombre_completo,
+            'apartamento', a.identificador,
+            'año', CAST(:año AS INTEGER),
+            'mes', CAST(:mes AS INTEGER),
+            'cuota', SUM(rfa.monto) FILTER (WHERE rfa.concepto_id = :concepto_cuota_id)::text,
+            'intereses', SUM(rfa.monto) FILTER (WHERE rfa.concepto_id = :concepto_interes_id)::text,
+            'total', SUM(rfa.monto)::text
+        )
+    FROM registro_financiero_apartamento rfa
+    JOIN apartamento a ON a.id = rfa.apartamento_id
+    JOIN propietario p ON p.id = a.propietario_id
+    WHERE rfa.fecha_efectiva BETWEEN :desde AND :hasta
+    AND rfa.año_aplicable = :año AND rfa.mes_aplicable = :mes
+    AND rfa.tipo_movimiento = 'DEBITO'
+    AND p.email <> ''
+    GROUP BY a.id, a.identificador, p.nombre_completo, p.email
+    ON CONFLICT (clave) DO NOTHING
+"""
+
+# Mora: apartamentos a los que el generador les liquidó interés en el
+# período, con el saldo que tenían al cierre del mes anterior
+SQL_ENCOLAR_MORA = """
+    INSERT INTO outbox (tipo, clave, apartamento_id, destinatario, datos)
+    SELECT
+        'mora',
+        'mora:' || a.id || ':' || :periodo,
+        a.id,
+        p.email,
+        jsonb_build_object(
+            'propietario', p.nombre_completo,
+            'apartamento', a.identificador,
+            'año', CAST(:año AS INTEGER),
+            'mes', CAST(:mes AS INTEGER),
+            'interes', i.interes::text,
+            'saldo', COALESCE(s.saldo_acumulado, 0)::text,
+            'corte', CAST(:corte AS DATE)
+        )
+    FROM (
+        SELECT apartamento_id, SUM(monto) AS interes
+        FROM registro_financiero_apartamento
+        WHERE fecha_efectiva BETWEEN :desde AND :hasta
+        AND año_aplicable = :año AND mes_aplicable = :mes
+        AND concepto_id = :concepto_interes_id
+        AND tipo_movimiento = 'DEBITO'
+        GROUP BY apartamento_id
+    ) i
+    JOIN apartamento a ON a.id = i.apartamento_id
+    JOIN propietario p ON p.id = a.propietario_id
+    LEFT JOIN LATERAL (
+        SELECT rfa.saldo_acumulado
+        FROM registro_financiero_apartamento rfa
+        WHERE rfa.apartamento_id = a.id
+        AND rfa.fecha_efectiva <= :corte
+        ORDER BY rfa.fecha_efectiva DESC, rfa.id DESC
+        LIMIT 1
+    ) s ON TRUE
+    WHERE p.email <> ''
+    ON CONFLICT (clave) DO NOTHING
+"""
+
+# (asunto, cuerpo) por tipo; se completan con los datos del mensaje
+PLANTILLAS = {
+    "pago": (
+        "Pago aplicado - Apartamento {apartamento}",
+        "Hola {propietario},\n\n"
+        "Registramos un pago de {monto} del {fecha} (referencia {referencia}) "
+        "para el apartamento {apartamento}.\n\n"
+        "Puede consultar el detalle en su estado de cuenta.\n",
+    ),
+    "cargos": (
+        "Cargos de {periodo} - Apartamento {apartamento}",
+        "Hola {propietario},\n\n"
+        "Se generaron los cargos de {periodo} para el apartamento {apartamento}:\n\n"
+        "  Cuota ordinaria: {cuota}\n"
+        "  Intereses de mora: {intereses}\n"
+        "  Total del período: {total}\n\n"
+        "Puede consultar el detalle en su estado de cuenta.\n",
+    ),
+    "mora": (
+        "Saldo en mora - Apartamento {apartamento}",
+        "Hola {propietario},\n\n"
+        "El apartamento {apartamento} tenía un saldo pendiente de {saldo} al {corte}. "
+        "En {periodo} se liquidaron intereses de mora por {interes}.\n\n"
+        "Si ya realizó el pago, puede reportarlo desde el portal de propietarios.\n",
+    ),
+}
+
+
+def _dinero(valor) -> str:
+    return f"${Decimal(valor or 0):,.2f}"
+
+
+def _fecha(valor: str) -> str:
+    return f"{date.fromisoformat(valor):%d/%m/%Y}"
+
+
+def componer(tipo: str, datos: Dict) -> Tuple[str, str]:
+    """(asunto, cuerpo) del mensaje de la outbox"""
+    valores = dict(datos)
+    for clave in ("monto", "cuota", "intereses", "total", "interes", "saldo"):
+        if clave in valores:
+            valores[clave] = _dinero(valores[clave])
+    for clave in ("fecha", "corte"):
+        if valores.get(clave):
+            valores[clave] = _fecha(valores[clave])
+    if "mes" in valores:
+        valores["periodo"] = f"{MESES[int(valores['mes'])]} de {valores['año']}"
+    asunto, cuerpo = PLANTILLAS[tipo]
+    return asunto.format_map(valores), cuerpo.format_map(valores)
+
+
+def encolar_pagos(session: Session, pagos: Iterable[Dict]) -> int:
+    """
+    Un aviso por pago aplicado (dicts con apartamento_id, monto, fecha y
+    referencia, los mismos de procesar_pagos_lote). No hace commit.
+    """
+    pagos = list(pagos)
+    if not pagos:
+        return 0
+    resultado = session.exec(text(SQL_ENCOLAR_PAGOS).bindparams(
+        apartamentos=[p["apartamento_id"] for p in pagos],
+        montos=[p["monto"] for p in pagos],
+        fechas=[p["fecha"] for p in pagos],
+        referencias=[p.get("referencia") or f"{p['fecha']:%Y%m%d}" for p in pagos],
+    ))
+    return resultado.rowcount
+
+
+def encolar_cargos_mes(session: Session, año: int, mes: int,
+                       concepto_cuota_id: int = 1, concepto_interes_id: int = 3) -> Dict:
+    """
+    Avisos de cargos del período y de mora para los apartamentos a los que
+    se les liquidó interés. No hace commit.
+    """
+    desde = date(año, mes, 1)
+    hasta = (desde + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    parametros = {
+        "año": año, "mes": mes, "periodo": f"{año}-{mes:02d}", "desde": desde, "hasta": hasta,
+        "concepto_interes_id": concepto_interes_id,
+    }
+    cargos = session.exec(text(SQL_ENCOLAR_CARGOS).bindparams(
+        **parametros, concepto_cuota_id=concepto_cuota_id)).rowcount
+    mora = session.exec(text(SQL_ENCOLAR_MORA).bindparams(
+        **parametros, corte=desde - timedelta(days=1))).rowcount
+    return {"cargos": cargos, "mora": mora}
@@ -2,15 +2,58 @@
 Servicio para procesamiento automático de pagos
 Aplica lógica de distribución inteligente de pagos
 """
+from collections import defaultdict
 from datetime import datetime, date
-from typing import List, Dict, Tuple, Optional
-from sqlmodel import Session, select
+from typing import Iterable, List, Dict, Tuple, Optional
+from sqlmodel import Session, select, text
 from decimal import Decimal, ROUND_HALF_UP
 from src.models import (
     RegistroFinancieroApartamento, Apartamento, Concepto,
     TipoMovimientoEnum
 )
 from src.dependencies import get_db_session
+from src.services.notificaciones import encolar_pagos
+
+# Saldo pendiente por período y concepto de varios apartamentos en una
+# consulta. Los pagos se registran con su propio concepto (Pago de Cuota,
+# Pago Intereses), así que se agrupan bajo el concepto del cargo que cubren.
+SQL_PENDIENTES_LOTE = """
+    SELECT apartamento_id, año, mes, concepto_id, SUM(delta) AS saldo
+    FROM (
+        SELECT
+            apartamento_id,
+            año_aplicable AS año,
+            mes_aplicable AS mes,
+            CASE concepto_id
+                WHEN :concepto_pago_cuota_id THEN :concepto_cuota_id
+                WHEN :concepto_pago_interes_id THEN :concepto_interes_id
+                ELSE concepto_id
+            END AS concepto_id,
+            CASE WHEN tipo_movimiento::text = 'DEBITO' THEN monto ELSE -monto END AS delta
+        FROM registro_financiero_apartamento
+        WHERE apartamento_id = ANY(:apartamentos)
+        AND año_aplicable IS NOT NULL AND mes_aplicable IS NOT NULL
+    ) movimientos
+    GROUP BY apartamento_id, año, mes, concepto_id
+    HAVING SUM(delta) > 0
+"""
+
+# Todos los abonos del lote en una sola sentencia (un viaje a la base)
+SQL_INSERTAR_ABONOS = """
+    INSERT INTO registro_financiero_apartamento (
+        apartamento_id, concepto_id, tipo_movimiento, monto, fecha_efectiva,
+        mes_aplicable, año_aplicable, referencia_pago, descripcion_adicional
+    )
+    SELECT apartamento_id, concepto_id, 'CREDITO', monto, fecha_efectiva,
+           mes_aplicable, año_aplicable, referencia_pago, descripcion_adicional
+    FROM unnest(
+        CAST(:apartamentos AS BIGINT[]), CAST(:conceptos AS INTEGER[]), CAST(:montos AS NUMERIC[]),
+        CAST(:fechas AS DATE[]), CAST(:meses AS INTEGER[]), CAST(:años AS INTEGER[]),
+        CAST(:referencias AS TEXT[]), CAST(:descripciones AS TEXT[])
+    ) AS abono(apartamento_id, concepto_id, monto, fecha_efectiva,
+               mes_aplicable, año_aplicable, referencia_pago, descripcion_adicional)
+    ORDER BY apartamento_id, fecha_efectiva
+"""
 
 class PagoAutomaticoService:
     """Servicio para procesar pagos automáticamente con lógica de distribución"""
@@ -54,6 +97,12 @@ class PagoAutomaticoService:
             if not apartamento:
                 return {"error": "Apartamento no encontrado"}
             
+            # Aviso al propietario: entra con el commit que registra el pago
+            encolar_pagos(session, [{
+                "apartamento_id": apartamento_id, "monto": self._to_decimal(monto_pago),
+                "fecha": fecha_pago, "referencia": referencia,
+            }])
+            
             # Obtener todos los registros pendientes del apartamento
             registros_pendientes = self._obtener_registros_pendientes(session, apartamento_id)
             
@@ -82,17 +131,20 @@ class PagoAutomaticoService:
             )
         ).all()
         
-        # Agrupar por año/mes/concepto para calcular saldos
+        # Agrupar por año/mes/concepto para calcular saldos; los pagos (Pago de
+        # Cuota, Pago Intereses) bajo el concepto del cargo que cubren, como en
+        # SQL_PENDIENTES_LOTE
         saldos_por_periodo = {}
         
         for registro in registros:
-            key = (registro.año_aplicable, registro.mes_aplicable, registro.concepto_id)
+            concepto_id = self._concepto_cargo(registro.concepto_id)
+            key = (registro.año_aplicable, registro.mes_aplicable, concepto_id)
             
             if key not in saldos_por_periodo:
                 saldos_por_periodo[key] = {
                     'año': registro.año_aplicable,
                     'mes': registro.mes_aplicable,
-                    'concepto_id': registro.concepto_id,
+                    'concepto_id': concepto_id,
                     'debitos': 0.0,
                     'creditos': 0.0,
                     'saldo': 0.0
@@ -103,8 +155,9 @@ class PagoAutomaticoService:
             else:  # CREDITO
                 saldos_por_periodo[key]['creditos'] += float(registro.monto)
             
-            saldos_por_periodo[key]['saldo'] = (
-                saldos_por_periodo[key]['debitos'] - saldos_por_periodo[key]['creditos']
+            # Redondeo a centavos: la suma en float deja residuos como 1e-12
+            saldos_por_periodo[key]['saldo'] = round(
+                saldos_por_periodo[key]['debitos'] - saldos_por_periodo[key]['creditos'], 2
             )
         
         # Filtrar solo los que tienen saldo pendiente > 0
@@ -114,15 +167,7 @@ class PagoAutomaticoService:
                 pendientes.append(saldo_info)
         
         # Ordenar por prioridad: año, mes, tipo (intereses primero, luego cuotas)
-        def prioridad_concepto(concepto_id):
-            if concepto_id == self.concepto_interes_id:  # Intereses
-                return 1
-            elif concepto_id == self.concepto_cuota_id:  # Cuotas
-                return 2
-            else:
-                return 3
-        
-        pendientes.sort(key=lambda x: (x['año'], x['mes'], prioridad_concepto(x['concepto_id'])))
+        pendientes.sort(key=lambda x: (x['año'], x['mes'], self._prioridad_concepto(x['concepto_id'])))
         
         return pendientes
     
@@ -199,6 +244,92 @@ class PagoAutomaticoService:
         session.commit()
         return resultado
     
+    def _prioridad_concepto(self, concepto_id: int) -> int:
+        """Orden dentro de un período: intereses, luego cuotas, luego el resto"""
+        if concepto_id == self.concepto_interes_id:  # Intereses
+            return 1
+        elif concepto_id == self.concepto_cuota_id:  # Cuotas
+            return 2
+        return 3
+
+    def procesar_pagos_lote(self, session: Session, pagos: Iterable[Dict]) -> Dict:
+        """
+        Distribuye muchos pagos a la vez con las mismas prioridades que
+        procesar_pago_automatico (período más antiguo primero, intereses antes
+        que cuotas, el sobrante como exceso).
+        
+        Args:
+            session: Sesión abierta; no se hace commit, para que el llamador
+                registre los pagos junto con sus propios cambios
+            pagos: dicts con apartamento_id, monto (Decimal), fecha (date),
+                referencia y descripcion
+            
+        Returns:
+            Dict con pagos, movimientos insertados, totales por tipo y
+            avisos encolados en la outbox (en la misma transacción)
+        """
+        pagos = sorted(pagos, key=lambda p: (p["apartamento_id"], p["fecha"]))
+        if not pagos:
+            return {"pagos": 0, "movimientos": 0, "total": Decimal("0"), "por_tipo": {}, "notificaciones": 0}
+
+        # Saldos pendientes de todos los apartamentos del lote, en memoria
+        pendientes: Dict[int, List[Dict]] = defaultdict(list)
+        filas = session.exec(text(SQL_PENDIENTES_LOTE).bindparams(
+            apartamentos=sorted({p["apartamento_id"] for p in pagos}),
+            concepto_cuota_id=self.concepto_cuota_id,
+            concepto_pago_cuota_id=self.concepto_pago_cuota_id,
+            concepto_interes_id=self.concepto_interes_id,
+            concepto_pago_interes_id=self.concepto_pago_interes_id,
+        )).mappings()
+        for fila in filas:
+            pendientes[fila["apartamento_id"]].append(dict(fila))
+        for lista in pendientes.values():
+            lista.sort(key=lambda x: (x["año"], x["mes"], self._prioridad_concepto(x["concepto_id"])))
+
+        columnas = defaultdict(list)
+        por_tipo: Dict[str, Decimal] = defaultdict(Decimal)
+
+        def abonar(apartamento_id, concepto_id, monto, fecha, mes, año, referencia, descripcion, tipo):
+            for clave, valor in (("apartamentos", apartamento_id), ("conceptos", concepto_id),
+                                 ("montos", monto), ("fechas", fecha), ("meses", mes), ("años", año),
+                                 ("referencias", referencia), ("descripciones", descripcion)):
+                columnas[clave].append(valor)
+            por_tipo[tipo] += monto
+
+        for pago in pagos:
+            disponible = self._to_decimal(pago["monto"])
+            fecha_pago = pago["fecha"]
+            for pendiente in pendientes.get(pago["apartamento_id"], ()):
+                if disponible <= 0:
+                    break
+                if pendiente["saldo"] <= 0:
+                    continue
+                monto = min(disponible, pendiente["saldo"])
+                pendiente["saldo"] -= monto
+                disponible -= monto
+                abonar(
+                    pago["apartamento_id"], self._obtener_concepto_pago(pendiente["concepto_id"]), monto,
+                    date(pendiente["año"], pendiente["mes"], 15), pendiente["mes"], pendiente["año"],
+                    pago["referencia"],
+                    pago.get("descripcion") or f"Pago automático {pendiente['mes']:02d}/{pendiente['año']}",
+                    "Interés" if pendiente["concepto_id"] == self.concepto_interes_id else "Cuota",
+                )
+            if disponible > 0:
+                abonar(
+                    pago["apartamento_id"], self.concepto_exceso_id, disponible,
+                    fecha_pago, fecha_pago.month, fecha_pago.year,
+                    pago["referencia"], pago.get("descripcion") or "Pago en exceso", "Exceso",
+                )
+
+        session.exec(text(SQL_INSERTAR_ABONOS).bindparams(**columnas))
+        return {
+            "pagos": len(pagos),
+            "movimientos": len(columnas["montos"]),
+            "total": sum(por_tipo.values(), Decimal("0")),
+            "por_tipo": dict(por_tipo),
+            "notificaciones": encolar_pagos(session, pagos),
+        }
+
     def _obtener_concepto_pago(self, concepto_cargo_id: int) -> int:
         """Obtiene el concepto de pago correspondiente al concepto de cargo"""
         if concepto_cargo_id == self.concepto_cuota_id:  # Cuota
@@ -208,6 +339,14 @@ class PagoAutomaticoService:
         else:
             return self.concepto_pago_cuota_id  # Por defecto
     
+    def _concepto_cargo(self, concepto_id: int) -> int:
+        """Concepto del cargo que cubre un pago (el inverso de _obtener_concepto_pago)"""
+        if concepto_id == self.concepto_pago_cuota_id:
+            return self.concepto_cuota_id
+        elif concepto_id == self.concepto_pago_interes_id:
+            return self.concepto_interes_id
+        return concepto_id
+    
     def _registrar_pago_exceso(self, session: Session, apartamento_id: int, monto: float,
                               fecha_pago: date, referencia: str) -> Dict:
         """Registra un pago en exceso"""
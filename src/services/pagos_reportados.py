@@ -0,0 +1,96 @@
+"""
+Servicio de pagos reportados
+Cola de revisión de los pagos que informan los propietarios
+(src/migrations/0009_pago_reportado.sql). Aprobar registra los pagos en el
+libro con el distribuidor por lotes; rechazar solo cambia el estado.
+"""
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from sqlmodel import Session, text
+
+# Una página de la cola y el total del filtro en la misma consulta
+# (idx_pago_reportado_estado)
+SQL_COLA = """
+    SELECT pr.id, pr.apartamento_id, a.identificador, p.nombre_completo AS propietario,
+           pr.monto, pr.fecha_pago, pr.metodo_pago, pr.referencia, pr.observaciones,
+           pr.estado, pr.motivo_rechazo, pr.pago_referencia, pr.revisado_en, pr.creado_en,
+           COUNT(*) OVER () AS total
+    FROM pago_reportado pr
+    JOIN apartamento a ON a.id = pr.apartamento_id
+    LEFT JOIN propietario p ON p.id = a.propietario_id
+    WHERE pr.estado = :estado
+    ORDER BY pr.creado_en, pr.id
+    LIMIT :limite OFFSET :desplazamiento
+"""
+
+SQL_CONTEO_POR_ESTADO = "SELECT estado, COUNT(*) FROM pago_reportado GROUP BY estado"
+
+# Toma los pendientes de la selección y los marca en la misma sentencia: dos
+# administradores aprobando a la vez no registran el mismo pago dos veces
+SQL_APROBAR = """
+    UPDATE pago_reportado
+    SET estado = 'APROBADO', revisado_por = :usuario_id, revisado_en = CURRENT_TIMESTAMP,
+        pago_referencia = 'REPORTE-' || id
+    WHERE id = ANY(:ids) AND estado = 'PENDIENTE'
+    RETURNING id, apartamento_id, monto, fecha_pago, metodo_pago, referencia
+"""
+
+SQL_RECHAZAR = """
+    UPDATE pago_reportado
+    SET estado = 'RECHAZADO', revisado_por = :usuario_id, revisado_en = CURRENT_TIMESTAMP,
+        motivo_rechazo = :motivo
+    WHERE id = ANY(:ids) AND estado = 'PENDIENTE'
+"""
+
+POR_PAGINA = 50
+
+
+def cola(session: Session, estado: str = "PENDIENTE", pagina: int = 1, por_pagina: int = POR_PAGINA) -> Dict:
+    """Página de reportes en orden de llegada, con el total y el conteo por estado"""
+    filas = [dict(fila) for fila in session.exec(text(SQL_COLA).bindparams(
+        estado=estado, limite=por_pagina, desplazamiento=(pagina - 1) * por_pagina)).mappings()]
+    total = filas[0]["total"] if filas else 0
+    return {
+        "reportes": filas,
+        "total": total,
+        "pagina": pagina,
+        "paginas": max(1, -(-total // por_pagina)),
+        "por_estado": {estado: cantidad for estado, cantidad in session.exec(text(SQL_CONTEO_POR_ESTADO))},
+    }
+
+
+def _descripcion(reporte: Dict) -> str:
+    referencia = f" {reporte['referencia']}" if reporte["referencia"] else ""
+    return f"Pago reportado ({reporte['metodo_pago']}{referencia}) aprobado"
+
+
+def aprobar(session: Session, ids: List[int], usuario_id: Optional[int]) -> Dict:
+    """
+    Aprueba los reportes pendientes de la selección y los registra con
+    procesar_pagos_lote, todo en una transacción. Los que otro administrador
+    ya revisó se omiten.
+    """
+    from src.services.pago_automatico import PagoAutomaticoService
+
+    aprobados = [dict(fila) for fila in session.exec(text(SQL_APROBAR).bindparams(
+        ids=ids, usuario_id=usuario_id)).mappings()]
+    resultado = PagoAutomaticoService().procesar_pagos_lote(session, [
+        {
+            "apartamento_id": reporte["apartamento_id"],
+            "monto": Decimal(reporte["monto"]),
+            "fecha": reporte["fecha_pago"],
+            "referencia": f"REPORTE-{reporte['id']}",
+            "descripcion": _descripcion(reporte),
+        }
+        for reporte in aprobados
+    ])
+    session.commit()
+    return {**resultado, "aprobados": len(aprobados), "omitidos": len(ids) - len(aprobados)}
+
+
+def rechazar(session: Session, ids: List[int], usuario_id: Optional[int], motivo: Optional[str]) -> int:
+    """Rechaza los reportes pendientes de la selección; retorna cuántos cambiaron"""
+    resultado = session.exec(text(SQL_RECHAZAR).bindparams(ids=ids, usuario_id=usuario_id, motivo=motivo))
+    session.commit()
+    return resultado.rowcount
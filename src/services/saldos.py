@@ -0,0 +1,148 @@
+"""
+Servicio de saldos a una fecha
+Usa el saldo acumulado que cada movimiento guarda (ver src/migrations/0003_saldo_acumulado.sql
+y src/migrations/0004_particionar_registro_financiero.sql)
+para responder "¿cuánto debía el apartamento al día X?" sin sumar el historial.
+"""
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional
+from sqlmodel import Session, text
+from src.dependencies import get_db_session
+
+# Último movimiento del apartamento hasta la fecha: un index seek sobre
+# idx_rfa_apartamento_fecha_id (apartamento_id, fecha_efectiva DESC, id DESC).
+# Si no hay movimientos se usa el saldo de apertura de las particiones archivadas.
+SQL_SALDO_A_FECHA = """
+    SELECT COALESCE(
+        (
+            SELECT rfa.saldo_acumulado
+            FROM registro_financiero_apartamento rfa
+            WHERE rfa.apartamento_id = :apartamento_id
+            AND rfa.fecha_efectiva <= :fecha
+            ORDER BY rfa.fecha_efectiva DESC, rfa.id DESC
+            LIMIT 1
+        ),
+        (
+            SELECT sa.saldo
+            FROM saldo_apertura_apartamento sa
+            WHERE sa.apartamento_id = :apartamento_id
+            AND sa.archivado_hasta <= :fecha
+        ),
+        0
+    ) AS saldo
+"""
+
+# Variante masiva: el mismo seek por cada apartamento mediante LATERAL
+SQL_SALDOS_A_FECHA = """
+    SELECT a.id AS apartamento_id, COALESCE(s.saldo_acumulado, sa.saldo, 0) AS saldo
+    FROM apartamento a
+    LEFT JOIN saldo_apertura_apartamento sa
+        ON sa.apartamento_id = a.id AND sa.archivado_hasta <= :fecha
+    LEFT JOIN LATERAL (
+        SELECT rfa.saldo_acumulado
+        FROM registro_financiero_apartamento rfa
+        WHERE rfa.apartamento_id = a.id
+        AND rfa.fecha_efectiva <= :fecha
+        ORDER BY rfa.fecha_efectiva DESC, rfa.id DESC
+        LIMIT 1
+    ) s ON TRUE
+"""
+
+SQL_DIFERENCIAS_SALDO = """
+    WITH esperado AS (
+        SELECT
+            rfa.id,
+            rfa.apartamento_id,
+            rfa.saldo_acumulado,
+            COALESCE(sa.saldo, 0) + SUM(CASE WHEN rfa.tipo_movimiento::text = 'DEBITO' THEN rfa.monto ELSE -rfa.monto END)
+                OVER (PARTITION BY rfa.apartamento_id ORDER BY rfa.fecha_efectiva, rfa.id) AS saldo_esperado
+        FROM registro_financiero_apartamento rfa
+        LEFT JOIN saldo_apertura_apartamento sa ON sa.apartamento_id = rfa.apartamento_id
+    )
+    SELECT
+        apartamento_id,
+        COUNT(*) AS registros_con_diferencia,
+        MIN(id) AS primer_registro_id
+    FROM esperado
+    WHERE saldo_acumulado IS DISTINCT FROM saldo_esperado
+    GROUP BY apartamento_id
+    ORDER BY apartamento_id
+"""
+
+
+def saldo_a_fecha(apartamento_id: int, fecha: date, session: Optional[Session] = None) -> Decimal:
+    """
+    Saldo del apartamento (débitos - créditos) al final del día indicado.
+
+    Args:
+        apartamento_id: ID del apartamento
+        fecha: Fecha de corte (inclusive)
+        session: Sesión existente (opcional); si no se indica se abre una
+
+    Returns:
+        Decimal: Saldo pendiente; negativo si el apartamento tiene saldo a favor
+    """
+    if session is None:
+        with get_db_session() as session:
+            return saldo_a_fecha(apartamento_id, fecha, session)
+
+    saldo = session.exec(
+        text(SQL_SALDO_A_FECHA).bindparams(apartamento_id=apartamento_id, fecha=fecha)
+    ).scalar()
+    return Decimal(saldo) if saldo is not None else Decimal('0.00')
+
+
+def saldos_a_fecha(fecha: date, session: Optional[Session] = None) -> Dict[int, Decimal]:
+    """
+    Saldo de todos los apartamentos al final del día indicado.
+
+    Returns:
+        Dict[int, Decimal]: apartamento_id -> saldo (0 si no tiene movimientos)
+    """
+    if session is None:
+        with get_db_session() as session:
+            return saldos_a_fecha(fecha, session)
+
+    filas = session.exec(text(SQL_SALDOS_A_FECHA).bindparams(fecha=fecha)).all()
+    return {fila.apartamento_id: Decimal(fila.saldo) for fila in filas}
+
+
+def verificar_saldos_acumulados(reparar: bool = False, session: Optional[Session] = None) -> Dict:
+    """
+    Compara el saldo acumulado guardado con el recalculado desde los movimientos.
+
+    Args:
+        reparar: Si es True, recalcula los apartamentos con diferencias
+        session: Sesión existente (opcional)
+
+    Returns:
+        Dict con los apartamentos afectados y la cantidad de registros reparados
+    """
+    if session is None:
+        with get_db_session() as session:
+            return verificar_saldos_acumulados(reparar, session)
+
+    diferencias: List[Dict] = [
+        {
+            "apartamento_id": fila.apartamento_id,
+            "registros_con_diferencia": fila.registros_con_diferencia,
+            "primer_registro_id": fila.primer_registro_id,
+        }
+        for fila in session.exec(text(SQL_DIFERENCIAS_SALDO)).all()
+    ]
+
+    registros_reparados = 0
+    if reparar and diferencias:
+        for diferencia in diferencias:
+            registros_reparados += session.exec(
+                text("SELECT recalcular_saldo_acumulado(:apartamento_id)")
+                .bindparams(apartamento_id=diferencia["apartamento_id"])
+            ).scalar() or 0
+        session.commit()
+
+    return {
+        "apartamentos_con_diferencias": diferencias,
+        "registros_con_diferencia": sum(d["registros_con_diferencia"] for d in diferencias),
+        "registros_reparados": registros_reparados,
+    }
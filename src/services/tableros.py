@@ -0,0 +1,372 @@
+"""
+Servicio de datos de los tableros
+Consultas Core (SQL directo, filas como diccionarios) para los indicadores
+y series de los tableros de administración y propietario. Las usa la API
+JSON (src/routes/api.py) y las páginas que renderizan solo los indicadores.
+Los totales por período salen de hecho_mensual (src/services/hechos.py).
+"""
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from sqlmodel import Session, text
+
+# Concepto de cuota ordinaria, con el mismo criterio de las rutas de pagos
+SQL_CONCEPTO_CUOTA = """
+    SELECT id FROM concepto
+    WHERE nombre ILIKE '%cuota%ordinaria%administr%'
+    ORDER BY id
+    LIMIT 1
+"""
+
+# Los pagos de la cuota se registran con su propio concepto (Pago de Cuota,
+# ver PagoAutomaticoService): lo recaudado de la cuota son los créditos de
+# los dos conceptos, como en SQL_PENDIENTES_LOTE
+SQL_CONCEPTO_PAGO_CUOTA = """
+    SELECT id FROM concepto
+    WHERE nombre ILIKE 'pago de cuota'
+    ORDER BY id
+    LIMIT 1
+"""
+
+# Cuota ordinaria de cada apartamento por período, con sus pagos
+HECHOS_CUOTA = """
+    SELECT apartamento_id, año, mes,
+           SUM(debitos) AS debitos, SUM(creditos) AS creditos, SUM(movimientos) AS movimientos
+    FROM hecho_mensual
+    WHERE concepto_id IN (:concepto_id, :concepto_pago_id) {filtro}
+    GROUP BY apartamento_id, año, mes
+"""
+
+# Indicadores del mes en una sola consulta
+SQL_INDICADORES_PAGOS = f"""
+    SELECT
+        (SELECT COUNT(*) FROM apartamento) AS total_apartamentos,
+        configuracion.apartamentos_configurados,
+        configuracion.total_configurado,
+        pagos.apartamentos_pagados,
+        pagos.total_recaudado
+    FROM (
+        SELECT COUNT(*) AS apartamentos_configurados,
+               COALESCE(SUM(monto_cuota_ordinaria_mensual), 0) AS total_configurado
+        FROM cuota_configuracion
+        WHERE año = :año AND mes = :mes
+    ) configuracion
+    CROSS JOIN (
+        SELECT COUNT(*) FILTER (WHERE creditos > 0) AS apartamentos_pagados,
+               COALESCE(SUM(creditos), 0) AS total_recaudado
+        FROM ({HECHOS_CUOTA.format(filtro="AND año = :año AND mes = :mes")}) h
+    ) pagos
+"""
+
+SQL_ULTIMA_CUOTA = """
+    SELECT monto_cuota_ordinaria_mensual
+    FROM cuota_configuracion
+    ORDER BY año DESC, mes DESC
+    LIMIT 1
+"""
+
+# Cargado y recaudado por mes aplicable, incluidos los meses sin movimientos
+SQL_SERIE_RECAUDACION = """
+    SELECT
+        EXTRACT(YEAR FROM periodo)::int AS año,
+        EXTRACT(MONTH FROM periodo)::int AS mes,
+        COALESCE(SUM(h.debitos), 0) AS cargado,
+        COALESCE(SUM(h.creditos), 0) AS recaudado
+    FROM generate_series(CAST(:desde AS date), CAST(:hasta AS date), INTERVAL '1 month') AS periodo
+    LEFT JOIN hecho_mensual h
+        ON h.año = EXTRACT(YEAR FROM periodo)
+        AND h.mes = EXTRACT(MONTH FROM periodo)
+        AND h.concepto_id IN (:concepto_id, :concepto_pago_id)
+    GROUP BY periodo
+    ORDER BY periodo
+"""
+
+# Cargado y recaudado de la cuota ordinaria en cada mes del año
+SQL_ANALISIS_MENSUAL = f"""
+    SELECT mes,
+           COUNT(*) FILTER (WHERE debitos > 0) AS cargos_generados,
+           COALESCE(SUM(debitos), 0) AS monto_esperado,
+           COUNT(*) FILTER (WHERE creditos > 0) AS pagos_recibidos,
+           COALESCE(SUM(creditos), 0) AS monto_recaudado
+    FROM ({HECHOS_CUOTA.format(filtro="AND año = :año")}) h
+    GROUP BY mes
+"""
+
+# Estado de la cuota de un apartamento mes a mes, del más reciente al más antiguo
+SQL_CUOTAS_APARTAMENTO = f"""
+    SELECT año, mes, debitos, creditos, movimientos
+    FROM ({HECHOS_CUOTA.format(filtro="AND apartamento_id = :apartamento_id")}) h
+    ORDER BY año DESC, mes DESC
+"""
+
+# Apartamentos con saldo pendiente. Los pagos cubren primero las cuotas más
+# antiguas, así que los meses en mora son las últimas cuotas que suman la deuda
+SQL_DEUDORES = """
+    WITH deuda AS (
+        SELECT apartamento_id, SUM(debitos - creditos) AS deuda_total
+        FROM hecho_mensual
+        GROUP BY apartamento_id
+        HAVING SUM(debitos - creditos) > 0
+    ),
+    cuotas AS (
+        SELECT h.apartamento_id,
+               SUM(h.debitos) OVER (
+                   PARTITION BY h.apartamento_id ORDER BY h.año DESC, h.mes DESC
+               ) - h.debitos AS posteriores
+        FROM hecho_mensual h
+        JOIN deuda d ON d.apartamento_id = h.apartamento_id
+        WHERE h.concepto_id = :concepto_id AND h.debitos > 0
+    )
+    SELECT d.apartamento_id, d.deuda_total,
+           COUNT(c.apartamento_id) FILTER (WHERE c.posteriores < d.deuda_total) AS meses_mora
+    FROM deuda d
+    LEFT JOIN cuotas c ON c.apartamento_id = d.apartamento_id
+    GROUP BY d.apartamento_id, d.deuda_total
+    ORDER BY d.deuda_total DESC
+"""
+
+SQL_ULTIMOS_PAGOS = """
+    SELECT apartamento_id, MAX(fecha_efectiva) AS ultimo_pago
+    FROM registro_financiero_apartamento
+    WHERE apartamento_id = ANY(:apartamentos) AND tipo_movimiento = 'CREDITO'
+    GROUP BY apartamento_id
+"""
+
+# Resumen por apartamento del propietario: saldo actual leído del saldo
+# acumulado (mismo seek que src/services/saldos.py), total pagado y cuota del mes
+SQL_RESUMEN_PROPIETARIO = """
+    SELECT
+        a.id AS apartamento_id,
+        a.identificador,
+        COALESCE(s.saldo_acumulado, sa.saldo, 0) AS saldo,
+        COALESCE(cc.monto_cuota_ordinaria_mensual, 0) AS cuota_actual,
+        COALESCE((
+            SELECT SUM(h.creditos) FROM hecho_mensual h WHERE h.apartamento_id = a.id
+        ), 0) AS total_pagado
+    FROM apartamento a
+    LEFT JOIN saldo_apertura_apartamento sa
+        ON sa.apartamento_id = a.id AND sa.archivado_hasta <= :fecha
+    LEFT JOIN LATERAL (
+        SELECT rfa.saldo_acumulado
+        FROM registro_financiero_apartamento rfa
+        WHERE rfa.apartamento_id = a.id
+        AND rfa.fecha_efectiva <= :fecha
+        ORDER BY rfa.fecha_efectiva DESC, rfa.id DESC
+        LIMIT 1
+    ) s ON TRUE
+    LEFT JOIN cuota_configuracion cc
+        ON cc.apartamento_id = a.id AND cc.año = :año AND cc.mes = :mes
+    WHERE a.propietario_id = :propietario_id
+    ORDER BY a.id
+"""
+
+# Movimientos del estado de cuenta con paginación por cursor (fecha_efectiva, id)
+SQL_MOVIMIENTOS = """
+    SELECT
+        rfa.id,
+        rfa.apartamento_id,
+        a.identificador AS apartamento,
+        rfa.fecha_efectiva,
+        c.nombre AS concepto,
+        rfa.descripcion_adicional,
+        rfa.tipo_movimiento::text AS tipo_movimiento,
+        rfa.monto,
+        rfa.saldo_acumulado,
+        rfa.mes_aplicable,
+        rfa.año_aplicable,
+        rfa.referencia_pago
+    FROM registro_financiero_apartamento rfa
+    JOIN apartamento a ON a.id = rfa.apartamento_id
+    JOIN concepto c ON c.id = rfa.concepto_id
+    WHERE a.propietario_id = :propietario_id
+    {filtros}
+    ORDER BY rfa.fecha_efectiva DESC, rfa.id DESC
+    LIMIT :limite
+"""
+
+
+def concepto_cuota_id(session: Session) -> Optional[int]:
+    """ID del concepto de cuota ordinaria de administración"""
+    return session.exec(text(SQL_CONCEPTO_CUOTA)).scalar()
+
+
+def concepto_pago_cuota_id(session: Session) -> Optional[int]:
+    """ID del concepto con el que se registran los pagos de la cuota ordinaria"""
+    return session.exec(text(SQL_CONCEPTO_PAGO_CUOTA)).scalar()
+
+
+def indicadores_pagos(session: Session, mes: int, año: int) -> Dict:
+    """
+    Indicadores del tablero de pagos para el mes.
+
+    Si el mes no tiene cuotas configuradas, el total a recaudar se estima con
+    la última cuota configurada (o 100.000 por apartamento), como antes.
+    """
+    concepto_id = concepto_cuota_id(session)
+    fila = session.exec(
+        text(SQL_INDICADORES_PAGOS).bindparams(
+            mes=mes, año=año, concepto_id=concepto_id, concepto_pago_id=concepto_pago_cuota_id(session)
+        )
+    ).mappings().one()
+    indicadores = dict(fila)
+
+    if indicadores["apartamentos_configurados"]:
+        total_a_recaudar = indicadores["total_configurado"]
+    else:
+        ultima_cuota = session.exec(text(SQL_ULTIMA_CUOTA)).scalar()
+        total_a_recaudar = (ultima_cuota or Decimal("100000")) * indicadores["total_apartamentos"]
+
+    indicadores.update(
+        mes=mes,
+        año=año,
+        concepto_cuota_id=concepto_id,
+        total_a_recaudar=total_a_recaudar,
+        apartamentos_pendientes=indicadores["total_apartamentos"] - indicadores["apartamentos_pagados"],
+        porcentaje_recaudado=round(
+            float(indicadores["total_recaudado"]) / float(total_a_recaudar) * 100 if total_a_recaudar else 0, 1
+        ),
+        porcentaje_recaudacion=round(
+            indicadores["apartamentos_pagados"] / indicadores["total_apartamentos"] * 100
+            if indicadores["total_apartamentos"] else 0, 1
+        ),
+    )
+    return indicadores
+
+
+def serie_recaudacion(session: Session, mes: int, año: int, meses: int = 6) -> Dict[str, List]:
+    """
+    Cargado y recaudado de la cuota ordinaria en los `meses` que terminan en
+    mes/año, en formato de columnas (listo para Chart.js).
+    """
+    indice_final = año * 12 + mes - 1
+    indice_inicial = indice_final - meses + 1
+    desde = date(indice_inicial // 12, indice_inicial % 12 + 1, 1)
+    hasta = date(año, mes, 1)
+
+    filas = session.exec(text(SQL_SERIE_RECAUDACION).bindparams(
+        desde=desde, hasta=hasta, concepto_id=concepto_cuota_id(session),
+        concepto_pago_id=concepto_pago_cuota_id(session),
+    )).all()
+    return {
+        "etiquetas": [f"{fila.mes:02d}/{fila.año}" for fila in filas],
+        "cargado": [fila.cargado for fila in filas],
+        "recaudado": [fila.recaudado for fila in filas],
+    }
+
+
+def reporte_recaudacion(session: Session, año: int, meses_criticos: int = 3, top: int = 10) -> Dict:
+    """
+    Recaudación de la cuota ordinaria mes a mes en el año y apartamentos con
+    deuda: al día, en mora o críticos (`meses_criticos` o más cuotas sin cubrir).
+    """
+    concepto_id = concepto_cuota_id(session)
+    por_mes = {
+        fila["mes"]: fila
+        for fila in session.exec(text(SQL_ANALISIS_MENSUAL).bindparams(
+            año=año, concepto_id=concepto_id, concepto_pago_id=concepto_pago_cuota_id(session)
+        )).mappings()
+    }
+    analisis_mensual = []
+    for mes in range(1, 13):
+        fila = por_mes.get(mes, {})
+        esperado = fila.get("monto_esperado", Decimal("0"))
+        recaudado = fila.get("monto_recaudado", Decimal("0"))
+        analisis_mensual.append({
+            "mes": mes,
+            "cargos_generados": fila.get("cargos_generados", 0),
+            "monto_esperado": esperado,
+            "pagos_recibidos": fila.get("pagos_recibidos", 0),
+            "monto_recaudado": recaudado,
+            "monto_pendiente": esperado - recaudado,
+            "porcentaje_recaudacion": round(float(recaudado / esperado * 100), 1) if esperado else 0,
+        })
+
+    deudores = [dict(fila) for fila in session.exec(
+        text(SQL_DEUDORES).bindparams(concepto_id=concepto_id)
+    ).mappings()]
+    top_deudores = deudores[:top]
+    if top_deudores:
+        ultimos = dict(session.exec(text(SQL_ULTIMOS_PAGOS).bindparams(
+            apartamentos=[d["apartamento_id"] for d in top_deudores]
+        )).all())
+        for deudor in top_deudores:
+            deudor["ultimo_pago"] = ultimos.get(deudor["apartamento_id"])
+
+    total_esperado = sum((m["monto_esperado"] for m in analisis_mensual), Decimal("0"))
+    total_recaudado = sum((m["monto_recaudado"] for m in analisis_mensual), Decimal("0"))
+    criticos = sum(1 for d in deudores if d["meses_mora"] >= meses_criticos)
+    return {
+        "año": año,
+        "analisis_mensual": analisis_mensual,
+        "total_cargos": sum(m["cargos_generados"] for m in analisis_mensual),
+        "total_pagos": sum(m["pagos_recibidos"] for m in analisis_mensual),
+        "total_esperado": total_esperado,
+        "total_recaudado": total_recaudado,
+        "total_pendiente": total_esperado - total_recaudado,
+        "porcentaje_recaudacion": round(float(total_recaudado / total_esperado * 100), 1) if total_esperado else 0,
+        "apartamentos_en_mora": len(deudores) - criticos,
+        "apartamentos_criticos": criticos,
+        "top_deudores": top_deudores,
+    }
+
+
+def cuotas_apartamento(session: Session, apartamento_id: int, concepto_id: int) -> List:
+    """Cargos y pagos de la cuota ordinaria del apartamento por mes, ya agrupados"""
+    return session.exec(text(SQL_CUOTAS_APARTAMENTO).bindparams(
+        apartamento_id=apartamento_id, concepto_id=concepto_id,
+        concepto_pago_id=concepto_pago_cuota_id(session),
+    )).all()
+
+
+def resumen_propietario(session: Session, propietario_id: int, fecha: Optional[date] = None) -> Dict:
+    """Saldo, cuota del mes y total pagado de cada apartamento del propietario, y sus totales"""
+    fecha = fecha or date.today()
+    apartamentos = [
+        dict(fila)
+        for fila in session.exec(text(SQL_RESUMEN_PROPIETARIO).bindparams(
+            propietario_id=propietario_id, fecha=fecha, año=fecha.year, mes=fecha.month
+        )).mappings()
+    ]
+    saldo_total = sum((a["saldo"] for a in apartamentos), Decimal("0"))
+    return {
+        "fecha": fecha,
+        "apartamentos": apartamentos,
+        "saldo_pendiente": max(saldo_total, Decimal("0")),
+        "saldo_a_favor": max(-saldo_total, Decimal("0")),
+        "cuota_actual": sum((a["cuota_actual"] for a in apartamentos), Decimal("0")),
+        "total_pagado": sum((a["total_pagado"] for a in apartamentos), Decimal("0")),
+    }
+
+
+def movimientos_propietario(
+    session: Session,
+    propietario_id: int,
+    apartamento_id: Optional[int] = None,
+    fecha_corte: Optional[date] = None,
+    antes_de: Optional[tuple] = None,
+    limite: int = 100,
+) -> List[Dict]:
+    """
+    Movimientos de los apartamentos del propietario, del más reciente al más antiguo.
+
+    Args:
+        apartamento_id: Limitar a un apartamento (debe ser del propietario)
+        fecha_corte: Solo movimientos hasta esta fecha (inclusive)
+        antes_de: Cursor (fecha_efectiva, id) del último movimiento de la página anterior
+        limite: Cantidad máxima de movimientos
+    """
+    filtros = []
+    parametros = {"propietario_id": propietario_id, "limite": limite}
+    if apartamento_id is not None:
+        filtros.append("AND rfa.apartamento_id = :apartamento_id")
+        parametros["apartamento_id"] = apartamento_id
+    if fecha_corte is not None:
+        filtros.append("AND rfa.fecha_efectiva <= :fecha_corte")
+        parametros["fecha_corte"] = fecha_corte
+    if antes_de is not None:
+        filtros.append("AND (rfa.fecha_efectiva, rfa.id) < (:cursor_fecha, :cursor_id)")
+        parametros["cursor_fecha"], parametros["cursor_id"] = antes_de
+
+    sql = SQL_MOVIMIENTOS.format(filtros="\n    ".join(filtros))
+    return [dict(fila) for fila in session.exec(text(sql).bindparams(**parametros)).mappings()]
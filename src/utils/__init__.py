@@ -1,3 +1,5 @@
-from .file_handler import guardar_documento, obtener_ruta_documento
+from .file_handler import (
+    DocumentoDemasiadoGrande, DocumentoGuardado, guardar_documento, obtener_ruta_documento
+)
 
-__all__ = ["guardar_documento", "obtener_ruta_documento"]
+__all__ = ["DocumentoDemasiadoGrande", "DocumentoGuardado", "guardar_documento", "obtener_ruta_documento"]
@@ -0,0 +1,113 @@
+"""
+Hash de contraseñas con scrypt (hashlib, sin dependencias externas)
+
+El formato guardado en usuario.hashed_password es
+    scrypt$<n>$<r>$<p>$<sal base64>$<hash base64>
+y lleva su propio costo, así que subir SCRYPT_N no invalida los hashes
+existentes: se rehashean en el siguiente login exitoso, igual que las
+claves heredadas en texto plano.
+
+hashlib.scrypt libera el GIL, por eso las versiones async corren en un
+ThreadPoolExecutor acotado (HASH_WORKERS): el event loop sigue atendiendo
+otras peticiones mientras se calcula y una ráfaga de logins hace cola en
+el pool en lugar de ocupar todos los hilos del servidor.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from src.config import settings
+from src.utils.metricas import CONTRASENA_DURACION
+
+PREFIJO = "scrypt"
+LONGITUD_SAL = 16
+LONGITUD_HASH = 32
+
+_pool: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_hash_ficticio: Optional[str] = None
+
+
+def _b64(datos: bytes) -> str:
+    return base64.b64encode(datos).decode("ascii")
+
+
+def _scrypt(password: str, sal: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        password.encode("utf-8"), salt=sal, n=n, r=r, p=p,
+        # scrypt usa 128 * n * r bytes; el límite por defecto de OpenSSL (32 MiB) es justo
+        maxmem=256 * n * r + 1024 * 1024, dklen=LONGITUD_HASH,
+    )
+
+
+def hashear(password: str) -> str:
+    """Hash nuevo con el costo configurado (bloqueante, ~SCRYPT_N)"""
+    inicio = time.perf_counter()
+    sal = os.urandom(LONGITUD_SAL)
+    n, r, p = settings.SCRYPT_N, settings.SCRYPT_R, settings.SCRYPT_P
+    digest = _scrypt(password, sal, n, r, p)
+    CONTRASENA_DURACION.observe(time.perf_counter() - inicio, operacion="hashear")
+    return f"{PREFIJO}${n}${r}${p}${_b64(sal)}${_b64(digest)}"
+
+
+def verificar(password: str, almacenado: str) -> bool:
+    """
+    Compara en tiempo constante. Acepta el formato scrypt y, mientras queden,
+    las claves heredadas guardadas en texto plano
+    """
+    inicio = time.perf_counter()
+    try:
+        if not almacenado.startswith(PREFIJO + "$"):
+            return hmac.compare_digest(password.encode("utf-8"), almacenado.encode("utf-8"))
+        try:
+            _, n, r, p, sal, digest = almacenado.split("$")
+            esperado = base64.b64decode(digest)
+            calculado = _scrypt(password, base64.b64decode(sal), int(n), int(r), int(p))
+        except ValueError:
+            return False
+        return hmac.compare_digest(calculado, esperado)
+    finally:
+        CONTRASENA_DURACION.observe(time.perf_counter() - inicio, operacion="verificar")
+
+
+def necesita_rehash(almacenado: str) -> bool:
+    """True si es texto plano o se generó con otro costo"""
+    partes = almacenado.split("$")
+    if len(partes) != 6 or partes[0] != PREFIJO:
+        return True
+    return partes[1:4] != [str(settings.SCRYPT_N), str(settings.SCRYPT_R), str(settings.SCRYPT_P)]
+
+
+def _obtener_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=settings.HASH_WORKERS, thread_name_prefix="contrasenas")
+    return _pool
+
+
+async def hashear_async(password: str) -> str:
+    """hashear() en el pool de trabajo"""
+    return await asyncio.get_running_loop().run_in_executor(_obtener_pool(), hashear, password)
+
+
+async def verificar_async(password: str, almacenado: Optional[str]) -> bool:
+    """
+    verificar() en el pool de trabajo. Sin usuario (almacenado=None) verifica
+    contra un hash ficticio para que el tiempo de respuesta no revele si el
+    username existe
+    """
+    global _hash_ficticio
+    if almacenado is None:
+        if _hash_ficticio is None:
+            _hash_ficticio = await hashear_async(_b64(os.urandom(LONGITUD_SAL)))
+        await asyncio.get_running_loop().run_in_executor(_obtener_pool(), verificar, password, _hash_ficticio)
+        return False
+    return await asyncio.get_running_loop().run_in_executor(_obtener_pool(), verificar, password, almacenado)
@@ -0,0 +1,183 @@
+"""
+Estado de cuenta mensual en PDF
+Dibuja el estado de un apartamento con el canvas de reportlab (sin
+platypus: una tabla simple paginada a mano es varias veces más rápida).
+renderizar_lote es la unidad de trabajo de los procesos de
+src/services/estados_cuenta.py: recibe datos ya leídos (sin tocar la base)
+y retorna las entradas del manifiesto.
+"""
+import hashlib
+import io
+import re
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+MESES = ("", "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio",
+         "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre")
+
+ANCHO, ALTO = letter
+MARGEN = 40
+ALTO_FILA = 14
+# (título, x, ancho máximo o alineación a la derecha)
+COLUMNAS = (
+    ("Fecha", MARGEN, 55),
+    ("Concepto", MARGEN + 58, 130),
+    ("Descripción", MARGEN + 192, 150),
+    ("Cargo", ANCHO - MARGEN - 150, None),
+    ("Abono", ANCHO - MARGEN - 75, None),
+    ("Saldo", ANCHO - MARGEN, None),
+)
+
+
+def _dinero(valor: Decimal) -> str:
+    return f"${valor:,.2f}"
+
+
+def _recortar(texto: str, ancho: float, fuente: str = "Helvetica", tamaño: int = 8) -> str:
+    if stringWidth(texto, fuente, tamaño) <= ancho:
+        return texto
+    while texto and stringWidth(texto + "…", fuente, tamaño) > ancho:
+        texto = texto[:-1]
+    return texto + "…"
+
+
+def totales(estado: Dict) -> Tuple[Decimal, Decimal, Decimal]:
+    """(cargos, abonos, saldo final) del mes"""
+    cargos = sum((m["monto"] for m in estado["movimientos"] if m["tipo"] == "DEBITO"), Decimal("0"))
+    abonos = sum((m["monto"] for m in estado["movimientos"] if m["tipo"] == "CREDITO"), Decimal("0"))
+    return cargos, abonos, estado["saldo_anterior"] + cargos - abonos
+
+
+def nombre_archivo(estado: Dict) -> str:
+    identificador = re.sub(r"[^A-Za-z0-9]+", "-", estado["identificador"]).strip("-")
+    return f"{estado['apartamento_id']:05d}_{identificador}.pdf"
+
+
+def _encabezado_tabla(pdf: canvas.Canvas, y: float) -> float:
+    pdf.setFont("Helvetica-Bold", 8)
+    for titulo, x, ancho in COLUMNAS:
+        if ancho is None:
+            pdf.drawRightString(x, y, titulo)
+        else:
+            pdf.drawString(x, y, titulo)
+    pdf.line(MARGEN, y - 4, ANCHO - MARGEN, y - 4)
+    pdf.setFont("Helvetica", 8)
+    return y - ALTO_FILA - 2
+
+
+def _pie(pdf: canvas.Canvas, pagina: int, estado: Dict):
+    pdf.setFont("Helvetica", 7)
+    pdf.drawString(MARGEN, MARGEN / 2, f"Apartamento {estado['identificador']}")
+    pdf.drawRightString(ANCHO - MARGEN, MARGEN / 2, f"Página {pagina}")
+
+
+def renderizar_estado(estado: Dict, año: int, mes: int, titulo: str, generado: date) -> bytes:
+    """
+    PDF del estado de cuenta del mes
+
+    Args:
+        estado: apartamento_id, identificador, propietario, documento_identidad,
+            saldo_anterior y movimientos (fecha, concepto, descripcion, tipo,
+            monto, saldo) en orden
+    """
+    salida = io.BytesIO()
+    # invariant: el mismo estado produce los mismos bytes (y el mismo sha256)
+    pdf = canvas.Canvas(salida, pagesize=letter, invariant=1, pageCompression=1)
+    pdf.setTitle(f"Estado de cuenta {estado['identificador']} {MESES[mes]} {año}")
+
+    cargos, abonos, saldo_final = totales(estado)
+
+    y = ALTO - MARGEN
+    pdf.setFont("Helvetica-Bold", 14)
+    pdf.drawString(MARGEN, y, "Estado de Cuenta")
+    pdf.setFont("Helvetica", 9)
+    pdf.drawRightString(ANCHO - MARGEN, y, titulo)
+    y -= 18
+    pdf.drawString(MARGEN, y, f"Período: {MESES[mes]} {año}")
+    pdf.drawRightString(ANCHO - MARGEN, y, f"Generado el {generado:%d/%m/%Y}")
+    y -= 14
+    pdf.drawString(MARGEN, y, f"Apartamento: {estado['identificador']}")
+    y -= 14
+    propietario = estado["propietario"] or "Sin propietario"
+    if estado.get("documento_identidad"):
+        propietario += f" ({estado['documento_identidad']})"
+    pdf.drawString(MARGEN, y, f"Propietario: {propietario}")
+
+    # Resumen
+    y -= 26
+    pdf.rect(MARGEN, y - 34, ANCHO - 2 * MARGEN, 46, stroke=1, fill=0)
+    resumen = (
+        ("Saldo anterior", estado["saldo_anterior"]),
+        ("Cargos del mes", cargos),
+        ("Abonos del mes", abonos),
+        ("Saldo a favor" if saldo_final < 0 else "Saldo a pagar", abs(saldo_final)),
+    )
+    ancho_celda = (ANCHO - 2 * MARGEN) / len(resumen)
+    for i, (etiqueta, valor) in enumerate(resumen):
+        x = MARGEN + ancho_celda * i + ancho_celda / 2
+        pdf.setFont("Helvetica", 8)
+        pdf.drawCentredString(x, y, etiqueta)
+        pdf.setFont("Helvetica-Bold", 11)
+        pdf.drawCentredString(x, y - 20, _dinero(valor))
+
+    # Movimientos
+    y = _encabezado_tabla(pdf, y - 60)
+    pagina = 1
+    if not estado["movimientos"]:
+        pdf.drawString(MARGEN, y, "Sin movimientos en el período.")
+    for movimiento in estado["movimientos"]:
+        if y < MARGEN + ALTO_FILA:
+            _pie(pdf, pagina, estado)
+            pdf.showPage()
+            pagina += 1
+            y = _encabezado_tabla(pdf, ALTO - MARGEN)
+        valores = (
+            f"{movimiento['fecha']:%d/%m/%Y}",
+            movimiento["concepto"],
+            movimiento["descripcion"] or "",
+            _dinero(movimiento["monto"]) if movimiento["tipo"] == "DEBITO" else "",
+            _dinero(movimiento["monto"]) if movimiento["tipo"] == "CREDITO" else "",
+            _dinero(movimiento["saldo"]) if movimiento["saldo"] is not None else "",
+        )
+        for (_, x, ancho), valor in zip(COLUMNAS, valores):
+            if ancho is None:
+                pdf.drawRightString(x, y, valor)
+            else:
+                pdf.drawString(x, y, _recortar(valor, ancho))
+        y -= ALTO_FILA
+
+    _pie(pdf, pagina, estado)
+    pdf.showPage()
+    pdf.save()
+    return salida.getvalue()
+
+
+def renderizar_lote(directorio: str, año: int, mes: int, titulo: str, generado: date,
+                    estados: List[Dict]) -> List[Dict]:
+    """Escribe los PDF de un lote y retorna su parte del manifiesto"""
+    entradas = []
+    for estado in estados:
+        contenido = renderizar_estado(estado, año, mes, titulo, generado)
+        archivo = nombre_archivo(estado)
+        (Path(directorio) / archivo).write_bytes(contenido)
+        cargos, abonos, saldo_final = totales(estado)
+        entradas.append({
+            "apartamento_id": estado["apartamento_id"],
+            "identificador": estado["identificador"],
+            "propietario": estado["propietario"],
+            "archivo": archivo,
+            "bytes": len(contenido),
+            "sha256": hashlib.sha256(contenido).hexdigest(),
+            "movimientos": len(estado["movimientos"]),
+            "saldo_anterior": str(estado["saldo_anterior"]),
+            "cargos": str(cargos),
+            "abonos": str(abonos),
+            "saldo_final": str(saldo_final),
+        })
+    return entradas
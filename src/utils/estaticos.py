@@ -0,0 +1,228 @@
+"""
+Estáticos con huella y precomprimidos
+src/scripts/construir_estaticos.py copia los fuentes de ASSETS_DIR a
+static/dist con el hash del contenido en el nombre, genera variantes .gz y
+.br y escribe un manifiesto. Las plantillas usan asset() para obtener la URL
+con huella y EstaticosComprimidos las sirve como inmutables, eligiendo la
+variante comprimida según Accept-Encoding.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import re
+import shutil
+import stat
+from pathlib import Path, PurePosixPath
+from typing import Dict, Optional, Sequence
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+MANIFIESTO = "manifiesto.json"
+
+# Extensiones que vale la pena comprimir (woff2 y las imágenes ya vienen comprimidas)
+COMPRIMIBLES = {".css", ".js", ".map", ".svg", ".json", ".txt", ".ttf", ".eot"}
+
+# Codificaciones en orden de preferencia: (Content-Encoding, extensión)
+CODIFICACIONES = (("br", ".br"), ("gzip", ".gz"))
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+
+# Librerías vendorizadas en assets/vendor/ -> URL de la versión fija de la que
+# se descargan una vez (src/scripts/construir_estaticos.py --vendorizar). Se
+# versionan con el repositorio: la app no depende de ningún CDN y la
+# construcción falla si falta alguna.
+FONT_AWESOME = "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0"
+LIBRERIAS = {
+    "vendor/bootstrap/css/bootstrap.min.css":
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css",
+    "vendor/bootstrap/js/bootstrap.bundle.min.js":
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js",
+    "vendor/chartjs/chart.umd.js":
+        "https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.js",
+    "vendor/fontawesome/css/all.min.css": f"{FONT_AWESOME}/css/all.min.css",
+    **{
+        f"vendor/fontawesome/webfonts/{fuente}.{extension}": f"{FONT_AWESOME}/webfonts/{fuente}.{extension}"
+        for fuente in ("fa-brands-400", "fa-regular-400", "fa-solid-900", "fa-v4compatibility")
+        for extension in ("woff2", "ttf")
+    },
+}
+
+_PATRON_URL_CSS = re.compile(r"url\(\s*(['\"]?)([^'\")]+)\1\s*\)")
+
+
+def _con_huella(ruta: PurePosixPath, contenido: bytes) -> PurePosixPath:
+    """css/style.css -> css/style.1a2b3c4d5e.css"""
+    huella = hashlib.sha256(contenido).hexdigest()[:10]
+    return ruta.with_name(f"{ruta.stem}.{huella}{ruta.suffix}")
+
+
+def _reescribir_urls_css(contenido: bytes, ruta: PurePosixPath, manifiesto: Dict[str, str]) -> bytes:
+    """Apunta los url(...) relativos de una hoja de estilos a los archivos con huella"""
+
+    def reemplazar(coincidencia):
+        comilla, url = coincidencia.groups()
+        if url.startswith(("data:", "http:", "https:", "/", "#")):
+            return coincidencia.group(0)
+        # Las fuentes suelen llevar ?v=... o #iefix después del nombre
+        referencia = re.split(r"[?#]", url, maxsplit=1)[0]
+        sufijo = url[len(referencia):]
+        objetivo = _normalizar(ruta.parent / referencia)
+        if objetivo not in manifiesto:
+            return coincidencia.group(0)
+        # La estructura de directorios se conserva: solo cambia el nombre del archivo
+        nueva = PurePosixPath(referencia).with_name(PurePosixPath(manifiesto[objetivo]).name)
+        return f"url({comilla}{nueva}{sufijo}{comilla})"
+
+    return _PATRON_URL_CSS.sub(reemplazar, contenido.decode("utf-8")).encode("utf-8")
+
+
+def _normalizar(ruta: PurePosixPath) -> str:
+    """Resuelve '..' y '.' de una ruta relativa sin tocar el sistema de archivos"""
+    partes = []
+    for parte in ruta.parts:
+        if parte == "..":
+            if partes:
+                partes.pop()
+        elif parte != ".":
+            partes.append(parte)
+    return "/".join(partes)
+
+
+def _comprimir(destino: Path, contenido: bytes):
+    """Escribe las variantes .gz y .br solo si resultan más pequeñas"""
+    import brotli  # Solo lo necesita el paso de construcción
+
+    variantes = {
+        ".gz": gzip.compress(contenido, compresslevel=9, mtime=0),
+        ".br": brotli.compress(contenido, quality=11),
+    }
+    for extension, comprimido in variantes.items():
+        if len(comprimido) < len(contenido):
+            destino.with_name(destino.name + extension).write_bytes(comprimido)
+
+
+def construir(origen: Path, destino: Path) -> Dict[str, str]:
+    """
+    Copia los estáticos de `origen` a `destino` con huella en el nombre,
+    comprime los que lo ameritan y escribe el manifiesto.
+
+    Las hojas de estilos se procesan al final, porque su contenido (y su
+    huella) depende de las URLs con huella de las fuentes que referencian.
+
+    Returns:
+        Dict[str, str]: ruta fuente -> ruta con huella, relativas a los directorios
+    """
+    if destino.exists():
+        shutil.rmtree(destino)
+    destino.mkdir(parents=True)
+
+    archivos = sorted(p for p in origen.rglob("*") if p.is_file() and not p.name.startswith("."))
+    archivos.sort(key=lambda p: p.suffix == ".css")
+
+    manifiesto: Dict[str, str] = {}
+    for archivo in archivos:
+        ruta = PurePosixPath(archivo.relative_to(origen).as_posix())
+        contenido = archivo.read_bytes()
+        if archivo.suffix == ".css":
+            contenido = _reescribir_urls_css(contenido, ruta, manifiesto)
+
+        con_huella = _con_huella(ruta, contenido)
+        salida = destino / con_huella
+        salida.parent.mkdir(parents=True, exist_ok=True)
+        salida.write_bytes(contenido)
+        if archivo.suffix in COMPRIMIBLES:
+            _comprimir(salida, contenido)
+        manifiesto[str(ruta)] = str(con_huella)
+
+    (destino / MANIFIESTO).write_text(json.dumps(manifiesto, indent=2, sort_keys=True))
+    return manifiesto
+
+
+class Estaticos:
+    """Resuelve rutas de estáticos a sus URLs con huella según el manifiesto"""
+
+    def __init__(self, directorio_estaticos: Path, subdirectorio_dist: str, prefijo: str = "/static"):
+        self.prefijo = prefijo
+        self.subdirectorio_dist = subdirectorio_dist
+        archivo = directorio_estaticos / subdirectorio_dist / MANIFIESTO
+        self.manifiesto: Dict[str, str] = json.loads(archivo.read_text()) if archivo.exists() else {}
+
+    def asset(self, ruta: str) -> str:
+        """
+        URL de un estático; sin construir, apunta al archivo sin huella
+        (EstaticosComprimidos lo busca también en assets/)
+        """
+        con_huella = self.manifiesto.get(ruta)
+        if con_huella is not None:
+            return f"{self.prefijo}/{self.subdirectorio_dist}/{con_huella}"
+        return f"{self.prefijo}/{ruta}"
+
+
+def _codificaciones_aceptadas(encabezado: str) -> set:
+    aceptadas = set()
+    for parte in encabezado.split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        if parametros.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        aceptadas.add(nombre.strip().lower())
+    return aceptadas
+
+
+class EstaticosComprimidos(StaticFiles):
+    """
+    StaticFiles que, para los archivos con huella, responde con la variante
+    .br o .gz si el cliente la acepta y marca la respuesta como inmutable.
+    El resto se sirve igual que antes, salvo los subdirectorios `privados`
+    (404), y lo que no está en STATIC_DIR se busca en los fuentes (assets/).
+    """
+
+    def __init__(self, *args, subdirectorio_dist: str = "dist", directorio_fuentes: Optional[str] = None,
+                 privados: Sequence[str] = (), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.subdirectorio_dist = subdirectorio_dist
+        self.privados = set(privados)
+        # Sin construir, /static/css/style.css sale de assets/css/style.css
+        if directorio_fuentes is not None:
+            self.all_directories.append(directorio_fuentes)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        # `path` ya viene normalizado por StaticFiles.get_path (sin '..')
+        primera = PurePosixPath(path).parts[:1]
+        if primera and primera[0] in self.privados:
+            raise HTTPException(status_code=404)
+        if primera != (self.subdirectorio_dist,):
+            return await super().get_response(path, scope)
+
+        respuesta = await self._variante_comprimida(path, scope)
+        if respuesta is None:
+            respuesta = await super().get_response(path, scope)
+        respuesta.headers["Cache-Control"] = CACHE_INMUTABLE
+        respuesta.headers["Vary"] = "Accept-Encoding"
+        return respuesta
+
+    async def _variante_comprimida(self, path: str, scope: Scope) -> Optional[Response]:
+        if scope["method"] not in ("GET", "HEAD"):
+            return None
+        aceptadas = _codificaciones_aceptadas(Headers(scope=scope).get("accept-encoding", ""))
+        for codificacion, extension in CODIFICACIONES:
+            if codificacion not in aceptadas:
+                continue
+            ruta_completa, resultado_stat = await anyio.to_thread.run_sync(self.lookup_path, path + extension)
+            if resultado_stat and stat.S_ISREG(resultado_stat.st_mode):
+                respuesta = self.file_response(ruta_completa, resultado_stat, scope)
+                # El tipo es el del archivo original, no el del comprimido
+                respuesta.headers["Content-Type"] = _tipo_medio(path)
+                respuesta.headers["Content-Encoding"] = codificacion
+                return respuesta
+        return None
+
+
+def _tipo_medio(path: str) -> str:
+    tipo = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return f"{tipo}; charset=utf-8" if tipo.startswith("text/") else tipo
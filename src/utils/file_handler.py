@@ -1,34 +1,138 @@
-from fastapi import UploadFile
+"""
+Almacenamiento de documentos subidos, direccionado por contenido
+
+El archivo se copia por trozos a un temporal mientras se calcula su SHA-256
+y se verifica el tamaño máximo; luego se mueve a <ab>/<cd>/<sha256> dentro de
+UPLOADS_DIR. Un mismo recibo subido dos veces ocupa un solo archivo: la
+segunda copia se descarta y la base (documento_soporte) cuenta referencias.
+"""
+import hashlib
+import mimetypes
+import os
+import sys
+import tempfile
+from dataclasses import dataclass
 from pathlib import Path
-from uuid import uuid4
-import shutil
+from typing import BinaryIO, Optional, Tuple
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
 from src.config import settings
 
-def guardar_documento(archivo: UploadFile, carpeta: str = "") -> str:
+TAMAÑO_TROZO = 1024 * 1024
+
+
+class DocumentoDemasiadoGrande(Exception):
+    """El archivo supera settings.DOCUMENTO_MAX_BYTES"""
+
+    def __init__(self, limite: int):
+        super().__init__(f"El documento supera el máximo de {limite // (1024 * 1024)} MB")
+        self.limite = limite
+
+
+@dataclass
+class DocumentoGuardado:
+    sha256: str
+    ruta: str  # Relativa a UPLOADS_DIR
+    tamaño: int
+    tipo_contenido: Optional[str]
+    nombre_original: Optional[str]
+    nuevo: bool  # False si el contenido ya estaba guardado
+
+
+def ruta_por_contenido(sha256: str) -> str:
+    """Ruta relativa de un contenido: dos niveles para no llenar un solo directorio"""
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def _copiar_con_hash(origen: BinaryIO, limite: int) -> Tuple[str, str, int]:
     """
-    Guarda un documento subido por el usuario y retorna la ruta relativa al archivo
+    Copia por trozos a un temporal en UPLOADS_DIR (mismo sistema de archivos,
+    así el movimiento final es atómico). Retorna (temporal, sha256, tamaño)
+    """
+    directorio_tmp = settings.UPLOADS_DIR / ".tmp"
+    directorio_tmp.mkdir(parents=True, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=directorio_tmp)
+    digest = hashlib.sha256()
+    tamaño = 0
+    try:
+        with os.fdopen(descriptor, "wb") as destino:
+            while trozo := origen.read(TAMAÑO_TROZO):
+                tamaño += len(trozo)
+                if tamaño > limite:
+                    raise DocumentoDemasiadoGrande(limite)
+                digest.update(trozo)
+                destino.write(trozo)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+    return temporal, digest.hexdigest(), tamaño
+
+
+def _mover(temporal: str, ruta: str) -> bool:
+    """Mueve el temporal a su ruta final. False si el contenido ya existía"""
+    destino = settings.UPLOADS_DIR / ruta
+    if destino.exists():
+        os.unlink(temporal)
+        return False
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    # Si otra subida del mismo contenido gana la carrera, reemplaza bytes idénticos
+    os.replace(temporal, destino)
+    return True
+
+
+async def guardar_documento(archivo: UploadFile) -> DocumentoGuardado:
+    """
+    Guarda un documento subido por el usuario sin bloquear el event loop
     
     Args:
         archivo: Archivo subido por el usuario
-        carpeta: Subcarpeta opcional donde guardar el archivo
     
     Returns:
-        str: Ruta relativa al archivo guardado
-    """
-    # Crear directorio si no existe
-    dir_path = settings.UPLOADS_DIR / carpeta
-    dir_path.mkdir(exist_ok=True)
+        DocumentoGuardado: hash, ruta relativa y metadatos para documento_soporte
     
-    # Generar nombre único para el archivo
-    filename = f"{uuid4()}_{archivo.filename}"
-    file_path = dir_path / filename
-    
-    # Guardar el archivo
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(archivo.file, buffer)
-    
-    # Retornar ruta relativa para guardar en la base de datos
-    return str(Path(carpeta) / filename)
+    Raises:
+        DocumentoDemasiadoGrande: si supera settings.DOCUMENTO_MAX_BYTES
+    """
+    limite = settings.DOCUMENTO_MAX_BYTES
+    # Starlette ya conoce el tamaño del multipart: rechazar sin copiar
+    if archivo.size is not None and archivo.size > limite:
+        raise DocumentoDemasiadoGrande(limite)
+
+    # Lectura, hash y escritura en un solo paso por el threadpool, en lugar
+    # de un salto por trozo
+    await archivo.seek(0)
+    temporal, sha256, tamaño = await run_in_threadpool(_copiar_con_hash, archivo.file, limite)
+    ruta = ruta_por_contenido(sha256)
+    nuevo = await run_in_threadpool(_mover, temporal, ruta)
+    return DocumentoGuardado(
+        sha256=sha256,
+        ruta=ruta,
+        tamaño=tamaño,
+        tipo_contenido=archivo.content_type,
+        nombre_original=Path(archivo.filename).name if archivo.filename else None,
+        nuevo=nuevo,
+    )
+
+def importar_archivo(origen: Path, nombre_original: Optional[str] = None) -> DocumentoGuardado:
+    """
+    Copia un archivo que ya está en disco al almacenamiento por contenido
+    (ej. los subidos antes con el esquema uuid_nombre). El origen se conserva:
+    lo borra el llamador cuando la base ya apunta a la copia
+    """
+    with open(origen, "rb") as archivo:
+        temporal, sha256, tamaño = _copiar_con_hash(archivo, sys.maxsize)
+    ruta = ruta_por_contenido(sha256)
+    nombre = nombre_original or origen.name
+    return DocumentoGuardado(
+        sha256=sha256,
+        ruta=ruta,
+        tamaño=tamaño,
+        tipo_contenido=mimetypes.guess_type(nombre)[0],
+        nombre_original=nombre,
+        nuevo=_mover(temporal, ruta),
+    )
 
 def obtener_ruta_documento(ruta_relativa: str) -> Path:
     """
@@ -0,0 +1,111 @@
+"""
+Instrumentación de consultas SQL por petición
+Cuenta las consultas, el tiempo en base de datos y las formas de sentencia
+repetidas de cada petición HTTP para detectar patrones N+1.
+"""
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from typing import Dict, List, Optional, Tuple
+
+_PATRON_CADENA = re.compile(r"'(?:[^']|'')*'")
+_PATRON_NUMERO = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PATRON_PARAMETRO = re.compile(r"%\(\w+\)s|%s|(?<!:):\w+|\$\d+")
+_PATRON_LISTA = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_PATRON_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar_sentencia(sql: str) -> str:
+    """Forma de la sentencia: literales y parámetros reemplazados por '?'"""
+    forma = _PATRON_CADENA.sub("?", sql)
+    forma = _PATRON_PARAMETRO.sub("?", forma)
+    forma = _PATRON_NUMERO.sub("?", forma)
+    forma = _PATRON_LISTA.sub("(?)", forma)
+    return _PATRON_ESPACIOS.sub(" ", forma).strip()
+
+
+class EstadisticasSQL:
+    """Consultas ejecutadas durante una petición"""
+
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo_total = 0.0
+        self.formas: Counter = Counter()
+        self.tiempo_por_forma: Dict[str, float] = {}
+
+    def registrar(self, sql: str, duracion: float):
+        forma = normalizar_sentencia(sql)
+        self.consultas += 1
+        self.tiempo_total += duracion
+        self.formas[forma] += 1
+        self.tiempo_por_forma[forma] = self.tiempo_por_forma.get(forma, 0.0) + duracion
+
+    def formas_repetidas(self, umbral: int) -> List[Tuple[str, int]]:
+        """Formas ejecutadas más de `umbral` veces, de la más a la menos repetida"""
+        return [(forma, veces) for forma, veces in self.formas.most_common() if veces > umbral]
+
+    def resumen(self, limite: int = 10) -> List[Dict]:
+        """Formas más costosas para el panel de depuración"""
+        formas = sorted(self.tiempo_por_forma.items(), key=lambda item: item[1], reverse=True)
+        return [
+            {"forma": forma, "veces": self.formas[forma], "tiempo_ms": round(tiempo * 1000, 2)}
+            for forma, tiempo in formas[:limite]
+        ]
+
+    def server_timing(self, duracion_total: Optional[float] = None) -> str:
+        """Valor del header Server-Timing"""
+        partes = [f'db;dur={self.tiempo_total * 1000:.1f};desc="{self.consultas} consultas"']
+        if duracion_total is not None:
+            partes.append(f"total;dur={duracion_total * 1000:.1f}")
+        return ", ".join(partes)
+
+
+_estadisticas: ContextVar[Optional[EstadisticasSQL]] = ContextVar("estadisticas_sql", default=None)
+
+
+def iniciar_medicion() -> Tuple[EstadisticasSQL, Token]:
+    """Empieza a acumular las consultas del contexto actual (una petición)"""
+    estadisticas = EstadisticasSQL()
+    return estadisticas, _estadisticas.set(estadisticas)
+
+
+def finalizar_medicion(token: Token):
+    _estadisticas.reset(token)
+
+
+def estadisticas_actuales() -> Optional[EstadisticasSQL]:
+    """Estadísticas de la petición en curso, o None fuera de una petición"""
+    return _estadisticas.get()
+
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    if _estadisticas.get() is not None:
+        conn.info.setdefault("inicio_consulta", []).append(time.perf_counter())
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    estadisticas = _estadisticas.get()
+    inicios = conn.info.get("inicio_consulta")
+    if estadisticas is None or not inicios:
+        return
+    estadisticas.registrar(statement, time.perf_counter() - inicios.pop())
+
+
+_eventos_registrados = False
+
+
+def registrar_eventos():
+    """
+    Escucha las consultas de todos los Engine. Lo llama src/models/database.py
+    al importarse, para que arrancar la app no requiera importar SQLAlchemy.
+    """
+    global _eventos_registrados
+    if _eventos_registrados:
+        return
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    event.listen(Engine, "before_cursor_execute", _antes_de_ejecutar)
+    event.listen(Engine, "after_cursor_execute", _despues_de_ejecutar)
+    _eventos_registrados = True
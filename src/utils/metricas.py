@@ -0,0 +1,201 @@
+"""
+Métricas en formato de texto de Prometheus
+Contadores, medidores e histogramas en memoria del proceso, sin dependencias
+externas, expuestos en /metrics para un scrape local.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_LATENCIA_LARGA = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatear_etiquetas(nombres: Sequence[str], valores: Tuple, extra: str = "") -> str:
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._lock = threading.Lock()
+        REGISTRO.append(self)
+
+    def _clave(self, etiquetas: Dict[str, str]) -> Tuple:
+        return tuple(etiquetas[nombre] for nombre in self.etiquetas)
+
+    def _encabezado(self) -> List[str]:
+        return [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+
+
+class Contador(_Metrica):
+    """Valor que solo crece"""
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._valores: Dict[Tuple, float] = {}
+
+    def inc(self, valor: float = 1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def exponer(self) -> List[str]:
+        lineas = self._encabezado()
+        for clave, valor in sorted(self._valores.items()):
+            lineas.append(f"{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {valor}")
+        return lineas
+
+
+class Medidor(_Metrica):
+    """Valor que sube y baja; con `funcion` se lee en cada scrape"""
+    tipo = "gauge"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (),
+                 funcion: Optional[Callable[[], float]] = None):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._valores: Dict[Tuple, float] = {}
+        self.funcion = funcion
+
+    def set(self, valor: float, **etiquetas):
+        with self._lock:
+            self._valores[self._clave(etiquetas)] = valor
+
+    def exponer(self) -> List[str]:
+        lineas = self._encabezado()
+        if self.funcion is not None:
+            lineas.append(f"{self.nombre} {self.funcion()}")
+        for clave, valor in sorted(self._valores.items()):
+            lineas.append(f"{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {valor}")
+        return lineas
+
+
+class Histograma(_Metrica):
+    """Distribución de observaciones en buckets acumulativos"""
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (),
+                 buckets: Sequence[float] = BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets))
+        # clave -> [conteo por bucket (+Inf al final), suma]
+        self._series: Dict[Tuple, List] = {}
+
+    def observe(self, valor: float, **etiquetas):
+        clave = self._clave(etiquetas)
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def exponer(self) -> List[str]:
+        lineas = self._encabezado()
+        for clave, (conteos, suma) in sorted(self._series.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float("inf"),), conteos):
+                acumulado += conteo
+                le = "+Inf" if limite == float("inf") else repr(limite)
+                etiquetas = _formatear_etiquetas(self.etiquetas, clave, f'le="{le}"')
+                lineas.append(f"{self.nombre}_bucket{etiquetas} {acumulado}")
+            etiquetas = _formatear_etiquetas(self.etiquetas, clave)
+            lineas.append(f"{self.nombre}_sum{etiquetas} {suma}")
+            lineas.append(f"{self.nombre}_count{etiquetas} {acumulado}")
+        return lineas
+
+
+REGISTRO: List[_Metrica] = []
+
+
+def exponer() -> str:
+    """Todas las métricas registradas en formato de texto de Prometheus"""
+    lineas = []
+    for metrica in REGISTRO:
+        lineas.extend(metrica.exponer())
+    return "\n".join(lineas) + "\n"
+
+
+# Peticiones HTTP (middleware de main.py)
+PETICIONES_TOTAL = Contador(
+    "http_peticiones_total", "Peticiones HTTP atendidas", ("metodo", "ruta", "estado")
+)
+PETICIONES_DURACION = Histograma(
+    "http_peticion_duracion_segundos", "Latencia de las peticiones HTTP", ("metodo", "ruta")
+)
+
+# Plantillas
+PLANTILLA_RENDER = Histograma(
+    "plantilla_render_segundos", "Tiempo de render de las plantillas Jinja2", ("plantilla",)
+)
+
+# Caché de páginas del propietario (src/services/cache_paginas.py)
+CACHE_PAGINAS = Contador(
+    "cache_paginas_total", "Páginas del propietario por resultado de caché (304, acierto, fallo)",
+    ("pagina", "resultado"),
+)
+
+# Generador automático de cargos
+GENERADOR_PASO_DURACION = Histograma(
+    "generador_paso_duracion_segundos", "Duración de cada paso de procesar_mes", ("paso",),
+    buckets=BUCKETS_LATENCIA_LARGA,
+)
+GENERADOR_PASO_REGISTROS = Contador(
+    "generador_paso_registros_total", "Registros generados por cada paso de procesar_mes", ("paso",)
+)
+
+# Pool de conexiones
+CONTRASENA_DURACION = Histograma(
+    "contrasena_duracion_segundos", "Costo de hashear o verificar una contraseña en el pool de trabajo",
+    ("operacion",),
+)
+
+POOL_ESPERA = Histograma(
+    "db_pool_espera_segundos", "Tiempo de espera para obtener una conexión del pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+
+
+# Réplica de lectura (src/models/database.py)
+SESIONES_LECTURA = Contador(
+    "db_sesiones_lectura_total",
+    "Sesiones de solo lectura por destino y motivo (replica, sin_replica, retraso, escritura_reciente)",
+    ("destino", "motivo"),
+)
+
+
+def registrar_pool(pool):
+    """Medidores de conexiones en uso y desborde, leídos del pool en cada scrape"""
+    Medidor("db_pool_conexiones_en_uso", "Conexiones entregadas por el pool", funcion=pool.checkedout)
+    Medidor("db_pool_desborde", "Conexiones abiertas por encima de pool_size", funcion=pool.overflow)
+    Medidor("db_pool_tamano", "Tamaño configurado del pool", funcion=pool.size)
+
+
+@contextmanager
+def medir_paso_generador(paso: str):
+    """
+    Mide un paso de GeneradorAutomaticoV3.procesar_mes.
+    El bloque puede asignar paso["registros"] con la cantidad generada.
+    """
+    medicion = {"registros": 0}
+    inicio = time.perf_counter()
+    try:
+        yield medicion
+    finally:
+        GENERADOR_PASO_DURACION.observe(time.perf_counter() - inicio, paso=paso)
+        GENERADOR_PASO_REGISTROS.inc(medicion["registros"], paso=paso)
@@ -0,0 +1,87 @@
+"""
+Carga rápida de plantillas Jinja2
+Caché de bytecode en disco y plantillas precompiladas a módulos Python
+(src/scripts/precompilar_plantillas.py) para que un proceso nuevo no tenga
+que parsear ni compilar las plantillas en su primera petición.
+"""
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Dict
+
+import jinja2
+
+logger = logging.getLogger(__name__)
+
+MANIFIESTO = "manifiesto.json"
+
+
+def huellas_plantillas(directorio: Path) -> Dict[str, str]:
+    """nombre de plantilla -> sha256 del fuente"""
+    return {
+        ruta.relative_to(directorio).as_posix(): hashlib.sha256(ruta.read_bytes()).hexdigest()
+        for ruta in sorted(directorio.rglob("*.html"))
+    }
+
+
+def precompilar(directorio_plantillas: Path, destino: Path) -> int:
+    """
+    Compila todas las plantillas a módulos Python en `destino` y escribe un
+    manifiesto con las huellas de los fuentes y la versión de Jinja2.
+
+    Returns:
+        int: Cantidad de plantillas compiladas
+    """
+    entorno = jinja2.Environment(loader=jinja2.FileSystemLoader(directorio_plantillas))
+    destino.mkdir(parents=True, exist_ok=True)
+    for anterior in destino.glob("tmpl_*.py"):
+        anterior.unlink()
+
+    entorno.compile_templates(str(destino), zip=None, ignore_errors=False)
+    huellas = huellas_plantillas(directorio_plantillas)
+    (destino / MANIFIESTO).write_text(json.dumps(
+        {"jinja2": jinja2.__version__, "plantillas": huellas}, indent=2
+    ))
+    return len(huellas)
+
+
+def precompiladas_vigentes(directorio_plantillas: Path, destino: Path) -> bool:
+    """True si las plantillas precompiladas corresponden a los fuentes y a esta versión de Jinja2"""
+    manifiesto = destino / MANIFIESTO
+    if not manifiesto.exists():
+        return False
+    contenido = json.loads(manifiesto.read_text())
+    return (
+        contenido.get("jinja2") == jinja2.__version__
+        and contenido.get("plantillas") == huellas_plantillas(directorio_plantillas)
+    )
+
+
+def configurar_carga(entorno: jinja2.Environment, directorio_plantillas: Path,
+                     directorio_compiladas: Path, directorio_cache: Path):
+    """
+    Usa las plantillas precompiladas si están vigentes (con respaldo en los
+    fuentes) y, en todo caso, una caché de bytecode en disco.
+    """
+    cargador_fuentes = jinja2.FileSystemLoader(directorio_plantillas)
+
+    if precompiladas_vigentes(directorio_plantillas, directorio_compiladas):
+        entorno.loader = jinja2.ChoiceLoader([
+            jinja2.ModuleLoader(str(directorio_compiladas)),
+            cargador_fuentes,
+        ])
+    else:
+        entorno.loader = cargador_fuentes
+        if directorio_compiladas.exists():
+            logger.warning(
+                f"Plantillas precompiladas en {directorio_compiladas} desactualizadas; "
+                "ejecute src/scripts/precompilar_plantillas.py"
+            )
+
+    try:
+        directorio_cache.mkdir(parents=True, exist_ok=True)
+        entorno.bytecode_cache = jinja2.FileSystemBytecodeCache(str(directorio_cache))
+    except OSError as e:
+        # Sistema de archivos de solo lectura: se compila en memoria como antes
+        logger.warning(f"Sin caché de bytecode de plantillas: {e}")
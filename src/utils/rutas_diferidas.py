@@ -0,0 +1,79 @@
+"""
+Registro diferido de routers
+Cada router se representa con una ruta que nunca coincide: la primera vez
+que llega una petición bajo su prefijo importa el módulo e inserta sus rutas
+reales justo después de ella, y el Router de Starlette las encuentra en la
+misma iteración. El orden de las rutas es el mismo que con include_router.
+"""
+import importlib
+import threading
+from typing import Iterable, List, Tuple
+
+from fastapi import FastAPI
+from starlette.routing import BaseRoute, Match, NoMatchFound
+from starlette.types import Receive, Scope, Send
+
+_lock = threading.RLock()
+
+
+class RutaDiferida(BaseRoute):
+    """Marcador de posición de un router que todavía no se ha importado"""
+
+    def __init__(self, app: FastAPI, prefijo: str, modulo: str):
+        self.app = app
+        self.prefijo = prefijo.rstrip("/")
+        self.modulo = modulo
+        self.cargada = False
+
+    def _bajo_prefijo(self, ruta: str) -> bool:
+        return ruta == self.prefijo or ruta.startswith(self.prefijo + "/")
+
+    def matches(self, scope: Scope) -> Tuple[Match, Scope]:
+        if not self.cargada and scope["type"] in ("http", "websocket") and self._bajo_prefijo(scope["path"]):
+            self.cargar()
+        return Match.NONE, {}
+
+    def cargar(self):
+        with _lock:
+            if self.cargada:
+                return
+            router = importlib.import_module(self.modulo).router
+            rutas = self.app.router.routes
+            antes = len(rutas)
+            self.app.include_router(router)
+            nuevas = rutas[antes:]
+            del rutas[antes:]
+            posicion = rutas.index(self) + 1
+            rutas[posicion:posicion] = nuevas
+            self.cargada = True
+            # El esquema OpenAPI se generó sin estas rutas
+            self.app.openapi_schema = None
+
+    def url_path_for(self, name: str, /, **path_params):
+        raise NoMatchFound(name, path_params)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send):  # pragma: no cover
+        raise RuntimeError("RutaDiferida nunca coincide con una petición")
+
+
+def registrar_diferidos(app: FastAPI, routers: Iterable[Tuple[str, str]]) -> List[RutaDiferida]:
+    """Agrega un marcador por cada (prefijo, módulo) y hace que /docs cargue todos"""
+    marcadores = [RutaDiferida(app, prefijo, modulo) for prefijo, modulo in routers]
+    app.router.routes.extend(marcadores)
+
+    openapi_original = app.openapi
+
+    def openapi():
+        cargar_todos(app)
+        return openapi_original()
+
+    app.openapi = openapi
+    return marcadores
+
+
+def cargar_todos(app: FastAPI) -> int:
+    """Importa los routers pendientes (calentamiento, OpenAPI). Retorna cuántos cargó"""
+    pendientes = [ruta for ruta in list(app.router.routes) if isinstance(ruta, RutaDiferida) and not ruta.cargada]
+    for ruta in pendientes:
+        ruta.cargar()
+    return len(pendientes)